@@ -10,9 +10,11 @@ from streamlit_extras.bottom_container import bottom
 from langchain.schema import HumanMessage
 
 from chaos_hunter.chaos_hunter import ChaosHunter, ChaosHunterInput
+from chaos_hunter.experiment.experimenter import FailFastPolicy
 from chaos_hunter.ce_tools.ce_tool import CEToolType, CETool
 import chaos_hunter.utils.app_utils as app_utils
 from chaos_hunter.utils.llms import load_llm
+from chaos_hunter.utils.budget import BudgetManager, BudgetConfig, BudgetLimit
 from chaos_hunter.utils.functions import get_timestamp, type_cmd, is_binary, run_command
 from chaos_hunter.utils.streamlit import StreamlitDisplayHandler
 from chaos_hunter.utils.k8s import remove_all_resources_by_namespace
@@ -123,6 +125,9 @@ def main():
         st.session_state.github_token = ""
     if "github_base_url" not in st.session_state:
         st.session_state.github_base_url = "https://models.github.ai/inference"
+    if "budget" not in st.session_state:
+        # the usage of all the cycles in this session is counted against the session budget
+        st.session_state.budget = BudgetManager()
     if "github_token" not in st.session_state:
         st.session_state.github_token = ""
     if "github_base_url" not in st.session_state:
@@ -175,7 +180,9 @@ def main():
                 if hasattr(it, 'dict'):
                     obj = it.dict()
                 st.write(f"[{idx+1}] {obj.get('name','')} ")
-                st.code("\n".join([str(x) for x in obj.get('message_history', [])])[:4000])
+                # full messages are rehydrated from the message store only when the logs are rendered
+                message_history = it.get_message_history() if hasattr(it, 'get_message_history') else obj.get('message_history', [])
+                st.code("\n".join([str(x) for x in message_history])[:4000])
 
     def render_phase_tabs(output):
         if not output:
@@ -610,10 +617,14 @@ def main():
             clean_cluster_before_run = st.checkbox("Clean the cluster before run", value=True)
             clean_cluster_after_run = st.checkbox("Clean the cluster after run", value=True)
             is_new_deployment = st.checkbox("New deployment", value=True)
+            fail_fast = st.checkbox("Abort the experiment when pre-validation fails", value=False)
             seed = st.number_input("Seed for LLMs (GPTs only)", 42)
             temperature = st.number_input("Temperature for LLMs", 0.0)
             max_num_steadystates = st.number_input("Max. number of steady states", 3)
             max_retries = st.number_input("Max retries", 3)
+            max_cost_per_session = st.number_input("Budget per session ($, 0 for no limit)", 0.0)
+            max_cost_per_cycle = st.number_input("Budget per cycle ($, 0 for no limit)", 0.0)
+            max_time_per_cycle = st.number_input("Time budget per cycle (min, 0 for no limit)", 0)
 
 
         #---------------------------
@@ -917,6 +928,11 @@ def main():
                 if len(avail_cluster_list) > 0 and avail_cluster_list[0] != FULL_CAP_MSG:
                     r = redis.Redis(host='localhost', port=6379, db=0)
                     r.hset("cluster_usage", st.session_state.session_id, cluster_name)
+                # set the budgets (0 for no limit)
+                st.session_state.budget.config = BudgetConfig(
+                    total=BudgetLimit(max_cost=max_cost_per_session or None),
+                    cycle=BudgetLimit(max_cost=max_cost_per_cycle or None, max_time=60 * max_time_per_cycle or None)
+                )
                 with st.chat_message("assistant", avatar=CHAOSHUNTER_ICON if CHAOSHUNTER_ICON is not None else "🤖"):
                     output = st.session_state.chashunter.run_ce_cycle(
                         input=input,
@@ -926,8 +942,12 @@ def main():
                         clean_cluster_before_run=clean_cluster_before_run,
                         clean_cluster_after_run=clean_cluster_after_run,
                         max_num_steadystates=max_num_steadystates,
-                        max_retries=max_retries
+                        max_retries=max_retries,
+                        fail_fast=FailFastPolicy() if fail_fast else None,
+                        budget=st.session_state.budget
                     )
+                    if output.stop_reason != "":
+                        st.warning(f"The CE cycle was stopped: {output.stop_reason}")
                     # store for tabs
                     st.session_state.last_output = output
                     st.session_state.last_input = input
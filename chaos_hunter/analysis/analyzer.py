@@ -6,8 +6,8 @@ from ..preprocessing.preprocessor import ProcessedData
 from ..hypothesis.hypothesizer import Hypothesis
 from ..experiment.experimenter import ChaosExperiment, ChaosExperimentResult
 from ..utils.wrappers import BaseModel, LLM
-from ..utils.llms import LLMLog
-from ..utils.functions import save_json, recursive_to_dict
+from ..utils.llms import LLMLog, embed_messages
+from ..utils.functions import save_json
 
 
 class Analysis(BaseModel):
@@ -51,6 +51,6 @@ class Analyzer:
         logs.append(report_log)
 
         analysis = Analysis(report=report)
-        save_json(f"{analysis_dir}/analysis{mod_count}.json", analysis.dict())
-        save_json(f"{analysis_dir}/analysis{mod_count}_log.json", recursive_to_dict(logs))
+        save_json(f"{analysis_dir}/analysis{mod_count}.json", analysis)
+        save_json(f"{analysis_dir}/analysis{mod_count}_log.json", embed_messages(logs))
         return logs, Analysis(report=report)
\ No newline at end of file
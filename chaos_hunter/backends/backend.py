@@ -0,0 +1,35 @@
+from enum import Enum
+
+from .backend_base import ExecutionBackend
+from .kubectl import KubectlBackend
+from .fake_cluster import FakeClusterBackend
+
+
+class BackendType(Enum):
+    kubectl = "kubectl"
+    fake = "fake"
+
+class Backend:
+    FACTORY_MAP = {
+        BackendType.kubectl.value: KubectlBackend,
+        BackendType.fake.value: FakeClusterBackend
+    }
+
+    @classmethod
+    def init(cls, backend: str, **kwargs) -> ExecutionBackend:
+        if backend in cls.FACTORY_MAP:
+            return cls.FACTORY_MAP[backend](**kwargs)
+        raise TypeError("Invalid execution backend!")
+
+
+# the backend used by the orchestration helpers (e.g., run_pod, Experimenter.run, and wait_for_resources_ready)
+BACKEND: ExecutionBackend = KubectlBackend()
+
+def get_backend() -> ExecutionBackend:
+    return BACKEND
+
+def set_backend(backend: ExecutionBackend) -> ExecutionBackend:
+    """replace the backend and return the previous one"""
+    global BACKEND
+    previous, BACKEND = BACKEND, backend
+    return previous
@@ -0,0 +1,194 @@
+import subprocess
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from ..utils.wrappers import BaseModel
+from ..utils.functions import DisplayHandler, display_cmd_result
+
+
+def join(*parts: Optional[str]) -> str:
+    """a command from its non-empty parts"""
+    return " ".join(part for part in parts if part)
+
+
+class CommandResult(BaseModel):
+    cmd: str # the (equivalent) command, for display
+    returncode: int = 0
+    stdout: str = ""
+    stderr: str = ""
+
+    @property
+    def output(self) -> str:
+        return self.stdout if self.returncode == 0 else self.stderr
+
+
+class ExecutionBackend(ABC):
+    """
+    Operations that the orchestrator performs against a cluster.
+    `context` is a kube context and `selector` is a label selector (e.g., `project=chaos-hunter`).
+    Operations given a `display_handler` stream their output to it and raise RuntimeError on failure (as `run_command`);
+    the others return their result, which is shown in the sidebar if `widget` is True (as `type_cmd`).
+    """
+    name: str
+
+    #-----------
+    # manifests
+    #-----------
+    @abstractmethod
+    def apply(
+        self,
+        path: str,
+        context: Optional[str] = None,
+        namespace: Optional[str] = None,
+        dry_run: bool = False,
+        widget: bool = True
+    ) -> CommandResult:
+        """apply the manifests in `path` (`kubectl apply -f`); dry_run only validates them"""
+        ...
+
+    @abstractmethod
+    def delete(
+        self,
+        context: str,
+        namespace: Optional[str] = None,
+        kind: Optional[str] = None,
+        name: Optional[str] = None,
+        path: Optional[str] = None,
+        selector: Optional[str] = None,
+        all_namespaces: bool = False,
+        widget: bool = True,
+        display_handler: Optional[DisplayHandler] = None
+    ) -> CommandResult:
+        """delete the resources in `path`, or resources of `kind` (comma-separated) by name, by selector, or all of them"""
+        ...
+
+    @abstractmethod
+    def annotate(
+        self,
+        kind: str,
+        annotation: str,
+        context: str,
+        namespace: str,
+        selector: str,
+        widget: bool = True
+    ) -> CommandResult:
+        """add `annotation` (`key=value`) to the resources of `kind` matching `selector` (`kubectl annotate --overwrite`)"""
+        ...
+
+    #-------
+    # reads
+    #-------
+    @abstractmethod
+    def get(
+        self,
+        kind: str,
+        context: str,
+        namespace: Optional[str] = None,
+        name: Optional[str] = None,
+        selector: Optional[str] = None,
+        widget: bool = False
+    ) -> Optional[dict]:
+        """a resource (if `name` is given) or a list of resources ({"items": [...]}); None if not found"""
+        ...
+
+    @abstractmethod
+    def logs(
+        self,
+        pod_name: str,
+        context: str,
+        namespace: str,
+        widget: bool = False
+    ) -> CommandResult:
+        """logs of a pod (`kubectl logs`)"""
+        ...
+
+    @abstractmethod
+    def get_events(
+        self,
+        context: str,
+        namespace: str,
+        limit: int = 20,
+        widget: bool = True
+    ) -> CommandResult:
+        """the latest `limit` events in the namespace, sorted by time (`kubectl get events`)"""
+        ...
+
+    @abstractmethod
+    def list_resources(
+        self,
+        context: str,
+        selector: str,
+        display_handler: DisplayHandler
+    ) -> CommandResult:
+        """human-readable statuses of the resources (`kubectl get all`)"""
+        ...
+
+    @abstractmethod
+    def get_dependency_graph(
+        self,
+        context: str,
+        selector: str,
+        graph_path: str,
+        display_handler: DisplayHandler
+    ) -> CommandResult:
+        """write the dependencies between the resources to `graph_path` in the DOT format (`kubectl graph`)"""
+        ...
+
+    #-----------
+    # readiness
+    #-----------
+    @abstractmethod
+    def resources_ready(
+        self,
+        selector: str,
+        context: Optional[str] = None,
+        namespace: Optional[str] = None
+    ) -> bool:
+        """whether the resources matching `selector` are ready (pods running and workloads available)"""
+        ...
+
+    @abstractmethod
+    def pvc_ready(
+        self,
+        name: str,
+        context: str,
+        namespace: str
+    ) -> bool:
+        """whether a PersistentVolumeClaim exists and is usable"""
+        ...
+
+    #------------
+    # deployment
+    #------------
+    @abstractmethod
+    def deploy(
+        self,
+        skaffold_path: str,
+        context: str,
+        project_name: str,
+        display_handler: Optional[DisplayHandler] = None
+    ) -> CommandResult:
+        """deploy a skaffold project whose resources are labeled with `project={project_name}`"""
+        ...
+
+    #---------
+    # display
+    #---------
+    def display(
+        self,
+        result: CommandResult,
+        widget: bool = False,
+        display_handler: Optional[DisplayHandler] = None
+    ) -> CommandResult:
+        """show a result computed without running the command (i.e., by in-process backends)"""
+        if display_handler is not None:
+            display_handler.on_start(result.cmd)
+            if result.stdout != "":
+                display_handler.on_output(result.stdout)
+            if result.returncode != 0:
+                display_handler.on_error(result.stderr)
+                raise RuntimeError(subprocess.CalledProcessError(result.returncode, result.cmd, result.stderr))
+            display_handler.on_success(result.stdout)
+        elif widget:
+            display_cmd_result(result.cmd, result)
+        return result
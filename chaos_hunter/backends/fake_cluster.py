@@ -0,0 +1,615 @@
+import os
+import re
+import copy
+import json
+import time
+import heapq
+import fnmatch
+import hashlib
+import threading
+from typing import List, Dict, Tuple, Optional, Callable
+
+import yaml
+
+from .backend_base import ExecutionBackend, CommandResult, join
+from ..utils.wrappers import BaseModel
+from ..utils.functions import DisplayHandler, parse_time
+
+
+WORKFLOW_LABEL = "chaos-mesh.org/workflow"
+# kind names accepted by kubectl (lower-cased; plurals and short names) -> kind
+KIND_ALIASES = {
+    "po": "Pod", "pod": "Pod", "pods": "Pod",
+    "svc": "Service", "service": "Service", "services": "Service",
+    "deploy": "Deployment", "deployment": "Deployment", "deployments": "Deployment",
+    "rs": "ReplicaSet", "replicaset": "ReplicaSet", "replicasets": "ReplicaSet",
+    "sts": "StatefulSet", "statefulset": "StatefulSet", "statefulsets": "StatefulSet",
+    "ds": "DaemonSet", "daemonset": "DaemonSet", "daemonsets": "DaemonSet",
+    "job": "Job", "jobs": "Job",
+    "cronjob": "CronJob", "cronjobs": "CronJob",
+    "pvc": "PersistentVolumeClaim", "persistentvolumeclaim": "PersistentVolumeClaim",
+    "workflow": "Workflow", "workflows": "Workflow",
+    "workflownode": "WorkflowNode", "workflownodes": "WorkflowNode",
+    "podchaos": "PodChaos", "networkchaos": "NetworkChaos", "dnschaos": "DNSChaos", "httpchaos": "HTTPChaos",
+    "stresschaos": "StressChaos", "iochaos": "IOChaos", "timechaos": "TimeChaos", "kernelchaos": "KernelChaos"
+}
+# the `all` category of kubectl
+ALL_KINDS = ["Pod", "Service", "Deployment", "ReplicaSet", "StatefulSet", "DaemonSet", "Job", "CronJob"]
+WORKLOAD_KINDS = ["Deployment", "ReplicaSet", "StatefulSet", "DaemonSet"]
+CLUSTER_SCOPED_KINDS = ["Namespace", "PersistentVolume", "StorageClass", "ClusterRole", "ClusterRoleBinding", "CustomResourceDefinition"]
+
+Key = Tuple[str, str, str] # (kind, namespace, name)
+
+
+def get_kinds(kind: str) -> List[str]:
+    """`po,svc` -> [Pod, Service]"""
+    kinds = []
+    for kind_ in kind.split(","):
+        if kind_.lower() == "all":
+            kinds += ALL_KINDS
+        else:
+            kinds.append(KIND_ALIASES.get(kind_.lower(), kind_))
+    return kinds
+
+def match_labels(labels: Dict[str, str], selector: Optional[str]) -> bool:
+    """equality-based label selectors (e.g., `app=web,tier=frontend`)"""
+    if selector is None:
+        return True
+    for requirement in selector.strip('"').split(","):
+        key, _, value = requirement.partition("=")
+        if labels.get(key.strip()) != value.strip():
+            return False
+    return True
+
+def get_suffix(*args) -> str:
+    """deterministic stand-in for the random suffixes of generated names"""
+    return hashlib.sha1("/".join(map(str, args)).encode("utf-8")).hexdigest()[:5]
+
+def get_container_duration(spec: dict) -> Optional[float]:
+    """the `--duration` given to the container of a pod spec, if any (e.g., `--duration 30` or `--duration 30s`)"""
+    for container in spec.get("containers", []) or [spec.get("container", {})]:
+        args = " ".join(map(str, (container.get("command") or []) + (container.get("args") or [])))
+        if (match := re.search(r"--duration[ =]+\"?(\w+)", args)) is not None:
+            duration = match.group(1)
+            return float(duration) if duration.isdigit() else float(parse_time(duration))
+    return None
+
+
+class FakePodBehavior(BaseModel):
+    """outcome of the pods (or workflow tasks) whose names match `pattern` (fnmatch)"""
+    pattern: str = "*"
+    latency: Optional[float] = None # seconds from running to termination (default: the `--duration` of the container)
+    exitcode: int = 0
+    logs: Optional[str] = None
+
+class FakeClusterConfig(BaseModel):
+    speedup: float = 1. # simulated seconds per wall-clock second
+    pod_startup: float = 1. # seconds from creation to running
+    default_pod_latency: float = 1. # seconds from running to termination, when neither a behavior nor `--duration` gives it
+    ready_latency: float = 0. # seconds until deployed workloads become ready
+    deploy_latency: float = 0. # wall-clock seconds that a deployment (`skaffold run`) takes
+    deploy_exitcode: int = 0
+    pod_behaviors: List[FakePodBehavior] = [] # the first match wins
+    pvcs: List[Tuple[str, str]] = [("chaos-hunter", "pvc")] # (namespace, name) of pre-provisioned, bound PVCs
+
+class PodRun(BaseModel):
+    created: float
+    running: float
+    terminated: float
+    exitcode: int
+    logs: str
+
+
+class FakeClusterBackend(ExecutionBackend):
+    """
+    In-memory cluster with Chaos Mesh for running the orchestrator without a cluster (e.g., load tests and profiling).
+    Objects are kept as dicts in a store; pods go through Pending -> Running -> Succeeded/Failed with the latencies and
+    exit codes of `config`, deployed workloads become ready after `ready_latency`, and an applied Chaos Mesh workflow
+    advances its nodes (Serial, Parallel, Suspend, Task, and chaos) according to its templates and deadlines.
+    The simulated clock runs `config.speedup` times faster than `clock` (time.time by default) and
+    scheduled changes are applied lazily whenever the backend is accessed.
+    """
+    name = "fake"
+
+    def __init__(
+        self,
+        config: FakeClusterConfig = FakeClusterConfig(),
+        clock: Callable[[], float] = time.time
+    ) -> None:
+        self.config = config
+        self.clock = clock
+        self.origin = clock()
+        self.lock = threading.RLock()
+        self.objects: Dict[Key, dict] = {}
+        self.pod_runs: Dict[Key, PodRun] = {}
+        self.ready_times: Dict[Key, float] = {}
+        self.events: List[tuple] = [] # heap of (time, seq, workflow key, action)
+        self.num_events = 0
+        self.commands: List[str] = [] # executed (equivalent) commands
+        for namespace, name in config.pvcs:
+            self.put({"apiVersion": "v1", "kind": "PersistentVolumeClaim", "metadata": {"name": name, "namespace": namespace}, "status": {"phase": "Bound"}})
+
+    #-------
+    # clock
+    #-------
+    def now(self) -> float:
+        return self.origin + (self.clock() - self.origin) * self.config.speedup
+
+    def sync(self) -> float:
+        """apply the scheduled changes that are due"""
+        now = self.now()
+        while len(self.events) > 0 and self.events[0][0] <= now:
+            _, _, _, action = heapq.heappop(self.events)
+            action()
+        return now
+
+    def schedule(self, at: float, workflow_key: tuple, action: Callable[[], None]) -> None:
+        heapq.heappush(self.events, (at, self.num_events, workflow_key, action))
+        self.num_events += 1
+
+    def respond(
+        self,
+        cmd: str,
+        result: Optional[CommandResult] = None,
+        widget: bool = False,
+        display_handler: Optional[DisplayHandler] = None
+    ) -> CommandResult:
+        self.commands.append(cmd)
+        return self.display(result or CommandResult(cmd=cmd), widget, display_handler)
+
+    #---------------
+    # object store
+    #---------------
+    def put(self, obj: dict, namespace: Optional[str] = None, labels: Dict[str, str] = {}) -> Key:
+        obj = copy.deepcopy(obj)
+        metadata = obj.setdefault("metadata", {})
+        if obj["kind"] not in CLUSTER_SCOPED_KINDS:
+            metadata["namespace"] = metadata.get("namespace") or namespace or "default"
+        metadata.setdefault("labels", {}).update(labels)
+        metadata["creationTimestamp"] = self.now()
+        key = (obj["kind"], metadata.get("namespace", ""), metadata["name"])
+        self.objects[key] = obj
+        return key
+
+    def remove(self, key: Key) -> None:
+        self.objects.pop(key, None)
+        self.pod_runs.pop(key, None)
+        self.ready_times.pop(key, None)
+
+    def find(
+        self,
+        kinds: Optional[List[str]] = None,
+        namespace: Optional[str] = None,
+        name: Optional[str] = None,
+        selector: Optional[str] = None
+    ) -> List[Key]:
+        return [
+            key for key, obj in self.objects.items()
+            if (kinds is None or key[0] in kinds)
+            and (namespace is None or key[1] == namespace)
+            and (name is None or key[2] == name)
+            and match_labels(obj["metadata"].get("labels", {}), selector)
+        ]
+
+    def render(self, key: Key, now: float) -> dict:
+        """an object with its status at `now`"""
+        obj = copy.deepcopy(self.objects[key])
+        if (pod_run := self.pod_runs.get(key)) is not None:
+            obj["status"] = self.get_pod_status(obj, pod_run, now)
+        elif (ready_time := self.ready_times.get(key)) is not None:
+            replicas = obj.get("spec", {}).get("replicas", 1)
+            ready_replicas = replicas if now >= ready_time else 0
+            obj["status"] = {"replicas": replicas, "readyReplicas": ready_replicas, "availableReplicas": ready_replicas}
+        return obj
+
+    def get_pod_status(self, pod: dict, pod_run: PodRun, now: float) -> dict:
+        container_names = [container.get("name", "main") for container in pod.get("spec", {}).get("containers", [{}])]
+        if now < pod_run.running:
+            phase, state = "Pending", {"waiting": {"reason": "ContainerCreating"}}
+        elif now < pod_run.terminated:
+            phase, state = "Running", {"running": {"startedAt": pod_run.running}}
+        else:
+            phase = "Succeeded" if pod_run.exitcode == 0 else "Failed"
+            state = {"terminated": {"exitCode": pod_run.exitcode, "reason": "Completed" if pod_run.exitcode == 0 else "Error", "finishedAt": pod_run.terminated}}
+        return {
+            "phase": phase,
+            "containerStatuses": [{"name": container_name, "state": state} for container_name in container_names]
+        }
+
+    def get_pod_run(self, pod: dict, start: float) -> PodRun:
+        """lifecycle of a pod created at `start`"""
+        name = pod["metadata"]["name"]
+        behavior = next((behavior for behavior in self.config.pod_behaviors if fnmatch.fnmatch(name, behavior.pattern)), FakePodBehavior())
+        latency = behavior.latency
+        if latency is None:
+            latency = get_container_duration(pod.get("spec", {}))
+        if latency is None:
+            latency = self.config.default_pod_latency
+        running = start + self.config.pod_startup
+        return PodRun(
+            created=start,
+            running=running,
+            terminated=running + latency,
+            exitcode=behavior.exitcode,
+            logs=behavior.logs if behavior.logs is not None else f"{name} finished with exit code {behavior.exitcode}.\n"
+        )
+
+    def start_pod(self, pod: dict, namespace: str, labels: Dict[str, str] = {}, pod_run: Optional[PodRun] = None) -> Key:
+        pod_run = pod_run or self.get_pod_run(pod, self.now())
+        key = self.put(pod, namespace, labels)
+        self.objects[key]["metadata"]["creationTimestamp"] = pod_run.created
+        self.pod_runs[key] = pod_run
+        return key
+
+    def create(self, obj: dict, namespace: Optional[str] = None, labels: Dict[str, str] = {}) -> Key:
+        if obj["kind"] == "Pod":
+            key = self.start_pod(obj, namespace, labels)
+        elif obj["kind"] == "Workflow":
+            key = self.put(obj, namespace, labels)
+            self.start_workflow(key)
+        else:
+            key = self.put(obj, namespace, labels)
+            if obj["kind"] in WORKLOAD_KINDS:
+                self.ready_times[key] = self.now() + self.config.ready_latency
+        return key
+
+    #-----------
+    # workflows
+    #-----------
+    def start_workflow(self, workflow_key: Key) -> None:
+        """schedule the nodes of a Chaos Mesh workflow from its templates and deadlines"""
+        workflow = self.objects[workflow_key]
+        templates = {template["name"]: template for template in workflow["spec"]["templates"]}
+        _, namespace, workflow_name = workflow_key
+        labels = {WORKFLOW_LABEL: workflow_name}
+
+        def add_node(template: dict, start: float, end: float, deadline: float) -> None:
+            node_name = f"{template['name']}-{get_suffix(workflow_name, template['name'], start)}"
+            node = {
+                "apiVersion": "chaos-mesh.org/v1alpha1",
+                "kind": "WorkflowNode",
+                "metadata": {"name": node_name},
+                "spec": {"templateName": template["name"], "type": template["templateType"], "workflowName": workflow_name}
+            }
+            def start_node() -> None:
+                key = self.put(node, namespace, labels)
+                self.set_conditions(key, accomplished=False, deadline_exceeded=False)
+            def end_node() -> None:
+                key = (node["kind"], namespace, node_name)
+                if key in self.objects:
+                    self.set_conditions(key, accomplished=True, deadline_exceeded=end >= deadline)
+            self.schedule(start, workflow_key, start_node)
+            self.schedule(end, workflow_key, end_node)
+
+        def run(template_name: str, start: float, limit: float) -> float:
+            """schedule a node started at `start` that must end by `limit`, and returns its end time"""
+            template = templates[template_name]
+            template_type = template["templateType"]
+            deadline = min(limit, start + parse_time(str(template.get("deadline", "0")))) if "deadline" in template else limit
+            if template_type == "Serial":
+                end = start
+                for child in template.get("children", []):
+                    if end >= deadline:
+                        break
+                    end = run(child, end, deadline)
+            elif template_type == "Parallel":
+                end = max([run(child, start, deadline) for child in template.get("children", [])], default=start)
+            elif template_type == "Suspend":
+                end = deadline
+            elif template_type == "Task":
+                end = self.schedule_task(template, workflow_key, labels, start, deadline)
+            else: # chaos
+                end = self.schedule_chaos(template, workflow_key, labels, start, deadline)
+            end = min(end, deadline)
+            add_node(template, start, end, deadline)
+            return end
+
+        run(workflow["spec"]["entry"], self.now(), float("inf"))
+
+    def schedule_task(
+        self,
+        template: dict,
+        workflow_key: Key,
+        labels: Dict[str, str],
+        start: float,
+        deadline: float
+    ) -> float:
+        _, namespace, workflow_name = workflow_key
+        pod = {
+            "apiVersion": "v1",
+            "kind": "Pod",
+            "metadata": {"name": f"{template['name']}-{get_suffix(workflow_name, template['name'], start, 'pod')}"},
+            "spec": {"containers": [template["task"]["container"]], "volumes": template["task"].get("volumes", []), "restartPolicy": "Never"}
+        }
+        # the outcome is determined in advance, as the following nodes are scheduled after the task's end
+        pod_run = self.get_pod_run(pod, start)
+        self.schedule(start, workflow_key, lambda: self.start_pod(pod, namespace, labels, pod_run))
+        if pod_run.terminated > deadline:
+            # the task is killed at its deadline
+            self.schedule(deadline, workflow_key, lambda: self.remove(("Pod", namespace, pod["metadata"]["name"])))
+        return min(pod_run.terminated, deadline)
+
+    def schedule_chaos(
+        self,
+        template: dict,
+        workflow_key: Key,
+        labels: Dict[str, str],
+        start: float,
+        deadline: float
+    ) -> float:
+        """chaos is injected from `start` until its deadline"""
+        _, namespace, workflow_name = workflow_key
+        kind = template["templateType"]
+        spec_key = next((key for key in template if key.lower() == kind.lower()), None)
+        chaos = {
+            "apiVersion": "chaos-mesh.org/v1alpha1",
+            "kind": kind,
+            "metadata": {"name": f"{template['name']}-{get_suffix(workflow_name, template['name'], start, 'chaos')}"},
+            "spec": template.get(spec_key, {})
+        }
+        chaos_key = (kind, namespace, chaos["metadata"]["name"])
+        self.schedule(start, workflow_key, lambda: self.put(chaos, namespace, labels))
+        self.schedule(deadline, workflow_key, lambda: self.remove(chaos_key))
+        return deadline
+
+    def set_conditions(self, key: Key, accomplished: bool, deadline_exceeded: bool) -> None:
+        self.objects[key]["status"] = {
+            "conditions": [
+                {"type": "Accomplished", "status": str(accomplished)},
+                {"type": "DeadlineExceed", "status": str(deadline_exceeded)}
+            ]
+        }
+
+    def stop_workflows(self, keys: List[Key]) -> None:
+        """drop the scheduled changes of deleted workflows"""
+        workflow_keys = set(key for key in keys if key[0] == "Workflow")
+        if len(workflow_keys) > 0:
+            self.events = [event for event in self.events if event[2] not in workflow_keys]
+            heapq.heapify(self.events)
+
+    #-----------
+    # manifests
+    #-----------
+    def load_manifests(self, path: str) -> List[dict]:
+        with open(path) as f:
+            manifests = [doc for doc in yaml.safe_load_all(f) if doc is not None]
+        for manifest in manifests:
+            if not isinstance(manifest, dict) or "kind" not in manifest:
+                raise ValueError(f"error: error validating {path}: kind not set")
+            if not isinstance(manifest.get("metadata"), dict) or not manifest["metadata"].get("name"):
+                raise ValueError(f"error: error validating {path}: resource name may not be empty")
+        return manifests
+
+    def apply(
+        self,
+        path: str,
+        context: Optional[str] = None,
+        namespace: Optional[str] = None,
+        dry_run: bool = False,
+        widget: bool = True
+    ) -> CommandResult:
+        cmd = join("kubectl apply", "--dry-run=server" if dry_run else None, f"-f {path}")
+        with self.lock:
+            self.sync()
+            try:
+                manifests = self.load_manifests(path)
+            except (OSError, yaml.YAMLError, ValueError) as e:
+                return self.respond(cmd, CommandResult(cmd=cmd, returncode=1, stderr=str(e)), widget)
+            lines = []
+            for manifest in manifests:
+                lines.append(f"{manifest['kind'].lower()}/{manifest.get('metadata', {}).get('name')} created{' (server dry run)' if dry_run else ''}")
+                if not dry_run:
+                    self.create(manifest, namespace)
+            return self.respond(cmd, CommandResult(cmd=cmd, stdout="\n".join(lines)), widget)
+
+    def delete(
+        self,
+        context: str,
+        namespace: Optional[str] = None,
+        kind: Optional[str] = None,
+        name: Optional[str] = None,
+        path: Optional[str] = None,
+        selector: Optional[str] = None,
+        all_namespaces: bool = False,
+        widget: bool = True,
+        display_handler: Optional[DisplayHandler] = None
+    ) -> CommandResult:
+        cmd = join("kubectl delete", f"-f {path}" if path is not None else kind, name, f"--selector={selector}" if selector is not None else None)
+        with self.lock:
+            self.sync()
+            namespace_ = None if all_namespaces else namespace
+            if path is not None:
+                keys = [
+                    key for manifest in self.load_manifests(path)
+                    for key in self.find([manifest["kind"]], manifest["metadata"].get("namespace") or namespace_, manifest["metadata"]["name"])
+                ]
+            else:
+                keys = self.find(get_kinds(kind), namespace_, name, selector)
+            # workflows are deleted with their nodes, pods, and chaos
+            for _, workflow_namespace, workflow_name in [key for key in keys if key[0] == "Workflow"]:
+                keys += [key for key in self.find(namespace=workflow_namespace, selector=f"{WORKFLOW_LABEL}={workflow_name}") if key not in keys]
+            self.stop_workflows(keys)
+            for key in keys:
+                self.remove(key)
+            stdout = "\n".join(f'{kind_.lower()} "{name_}" deleted' for kind_, _, name_ in keys)
+            return self.respond(cmd, CommandResult(cmd=cmd, stdout=stdout), widget, display_handler)
+
+    def annotate(
+        self,
+        kind: str,
+        annotation: str,
+        context: str,
+        namespace: str,
+        selector: str,
+        widget: bool = True
+    ) -> CommandResult:
+        cmd = f"kubectl annotate {kind} {annotation}"
+        key_, _, value = annotation.partition("=")
+        with self.lock:
+            self.sync()
+            for key in self.find(get_kinds(kind), namespace, selector=selector):
+                self.objects[key]["metadata"].setdefault("annotations", {})[key_] = value
+            return self.respond(cmd, widget=widget)
+
+    #-------
+    # reads
+    #-------
+    def get(
+        self,
+        kind: str,
+        context: str,
+        namespace: Optional[str] = None,
+        name: Optional[str] = None,
+        selector: Optional[str] = None,
+        widget: bool = False
+    ) -> Optional[dict]:
+        cmd = join("kubectl get", kind, name, f"--selector={selector}" if selector is not None else None)
+        with self.lock:
+            now = self.sync()
+            keys = self.find(get_kinds(kind), namespace, name, selector)
+            if name is not None:
+                if len(keys) == 0:
+                    self.respond(cmd, CommandResult(cmd=cmd, returncode=1, stderr=f'Error from server (NotFound): {kind} "{name}" not found'), widget)
+                    return None
+                result = self.render(keys[0], now)
+            else:
+                result = {"apiVersion": "v1", "kind": "List", "items": [self.render(key, now) for key in keys]}
+            self.respond(cmd, CommandResult(cmd=cmd, stdout=json.dumps(result)), widget)
+            return result
+
+    def logs(
+        self,
+        pod_name: str,
+        context: str,
+        namespace: str,
+        widget: bool = False
+    ) -> CommandResult:
+        cmd = f"kubectl logs {pod_name}"
+        with self.lock:
+            now = self.sync()
+            pod_run = self.pod_runs.get(("Pod", namespace, pod_name))
+            if pod_run is None:
+                result = CommandResult(cmd=cmd, returncode=1, stderr=f'Error from server (NotFound): pods "{pod_name}" not found')
+            else:
+                result = CommandResult(cmd=cmd, stdout=pod_run.logs if now >= pod_run.terminated else "")
+            return self.respond(cmd, result, widget)
+
+    def get_events(
+        self,
+        context: str,
+        namespace: str,
+        limit: int = 20,
+        widget: bool = True
+    ) -> CommandResult:
+        cmd = "kubectl get events"
+        return self.respond(cmd, CommandResult(cmd=cmd, stdout=f"No events found in {namespace} namespace."), widget)
+
+    def list_resources(
+        self,
+        context: str,
+        selector: str,
+        display_handler: DisplayHandler
+    ) -> CommandResult:
+        cmd = f"kubectl get all --selector={selector}"
+        with self.lock:
+            now = self.sync()
+            lines = [f"{'NAMESPACE':<20} {'NAME':<50} STATUS"]
+            for key in self.find(ALL_KINDS, selector=selector):
+                obj = self.render(key, now)
+                status = obj.get("status", {})
+                status_str = status.get("phase") or (f"{status['readyReplicas']}/{status['replicas']}" if "replicas" in status else "")
+                lines.append(f"{key[1]:<20} {key[0].lower() + '/' + key[2]:<50} {status_str}")
+            return self.respond(cmd, CommandResult(cmd=cmd, stdout="\n".join(lines) + "\n"), display_handler=display_handler)
+
+    def get_dependency_graph(
+        self,
+        context: str,
+        selector: str,
+        graph_path: str,
+        display_handler: DisplayHandler
+    ) -> CommandResult:
+        """services depend on the workloads that they select"""
+        cmd = f"kubectl graph all --selector={selector} > {graph_path}"
+        with self.lock:
+            keys = self.find(ALL_KINDS, selector=selector)
+            lines = ["digraph G {"]
+            for i, key in enumerate(keys):
+                lines.append(f'  n{i} [label="\\"{key[2]}\\""];')
+            for i, key in enumerate(keys):
+                if key[0] != "Service" or not (svc_selector := self.objects[key].get("spec", {}).get("selector")):
+                    continue
+                for j, key_ in enumerate(keys):
+                    pod_labels = self.objects[key_].get("spec", {}).get("template", {}).get("metadata", {}).get("labels", {})
+                    if key_[0] in WORKLOAD_KINDS and key_[1] == key[1] and all(pod_labels.get(k) == v for k, v in svc_selector.items()):
+                        lines.append(f'  n{i} -> n{j} [labeltooltip="\\"{key[0]} {key[2]} selects {key_[0]} {key_[2]}\\""];')
+            lines.append("}")
+            os.makedirs(os.path.dirname(graph_path) or ".", exist_ok=True)
+            with open(graph_path, "w") as f:
+                f.write("\n".join(lines) + "\n")
+            return self.respond(cmd, display_handler=display_handler)
+
+    #-----------
+    # readiness
+    #-----------
+    def resources_ready(
+        self,
+        selector: str,
+        context: Optional[str] = None,
+        namespace: Optional[str] = None
+    ) -> bool:
+        with self.lock:
+            now = self.sync()
+            keys = self.find(WORKLOAD_KINDS, namespace, selector=selector)
+            return all(now >= self.ready_times.get(key, now) for key in keys)
+
+    def pvc_ready(
+        self,
+        name: str,
+        context: str,
+        namespace: str
+    ) -> bool:
+        with self.lock:
+            pvc = self.objects.get(("PersistentVolumeClaim", namespace, name))
+            return pvc is not None and pvc.get("status", {}).get("phase") == "Bound"
+
+    #------------
+    # deployment
+    #------------
+    def get_skaffold_manifest_paths(self, skaffold_path: str) -> List[str]:
+        """manifests of rawYaml and kustomize (the `resources` of kustomization.yaml, without patches) in all the configs"""
+        root = os.path.dirname(skaffold_path)
+        paths = []
+        with open(skaffold_path) as f:
+            configs = [config for config in yaml.safe_load_all(f) if isinstance(config, dict)]
+        for config in configs:
+            manifests = config.get("manifests", {})
+            paths += [os.path.join(root, path) for path in manifests.get("rawYaml", [])]
+            for kustomize_dir in manifests.get("kustomize", {}).get("paths", []):
+                kustomize_dir = os.path.join(root, kustomize_dir)
+                with open(os.path.join(kustomize_dir, "kustomization.yaml")) as f:
+                    kustomization = yaml.safe_load(f)
+                paths += [os.path.join(kustomize_dir, path) for path in kustomization.get("resources", []) if path.endswith((".yaml", ".yml"))]
+        return paths
+
+    def deploy(
+        self,
+        skaffold_path: str,
+        context: str,
+        project_name: str,
+        display_handler: Optional[DisplayHandler] = None
+    ) -> CommandResult:
+        cmd = f"skaffold run -l project={project_name}"
+        time.sleep(self.config.deploy_latency)
+        with self.lock:
+            self.sync()
+            if self.config.deploy_exitcode != 0:
+                return self.respond(cmd, CommandResult(cmd=cmd, returncode=self.config.deploy_exitcode, stderr="deployment failed"), display_handler=display_handler)
+            try:
+                manifests = [manifest for path in self.get_skaffold_manifest_paths(skaffold_path) for manifest in self.load_manifests(path)]
+            except (OSError, yaml.YAMLError, ValueError) as e:
+                return self.respond(cmd, CommandResult(cmd=cmd, returncode=1, stderr=str(e)), display_handler=display_handler)
+            lines = []
+            for manifest in manifests:
+                self.create(manifest, labels={"project": project_name})
+                lines.append(f" - {manifest['kind'].lower()}/{manifest['metadata']['name']} created")
+            return self.respond(cmd, CommandResult(cmd=cmd, stdout="\n".join(lines) + "\n"), display_handler=display_handler)
@@ -0,0 +1,226 @@
+import os
+import json
+import functools
+import subprocess
+from typing import Optional
+
+from kubernetes import client, config
+from kubernetes.client.rest import ApiException
+
+from .backend_base import ExecutionBackend, CommandResult, join
+from ..utils.functions import DisplayHandler, run_command, display_cmd_result
+from ..utils.tracing import get_tracer, get_command_name
+
+
+@functools.lru_cache(maxsize=None)
+def create_core_api(context: Optional[str] = None) -> client.CoreV1Api:
+    configuration = client.Configuration()
+    if os.getenv('KUBERNETES_SERVICE_HOST'):
+        config.load_incluster_config(client_configuration=configuration)
+    else:
+        config.load_kube_config(context=context, client_configuration=configuration)
+    return client.CoreV1Api(client.ApiClient(configuration=configuration))
+
+
+class KubectlBackend(ExecutionBackend):
+    """a real cluster operated with kubectl, skaffold, and the Kubernetes Python client"""
+    name = "kubectl"
+
+    def __init__(self) -> None:
+        self.api_clients = {}
+
+    def run(
+        self,
+        cmd: str,
+        cwd: Optional[str] = None,
+        widget: bool = False,
+        display_handler: Optional[DisplayHandler] = None
+    ) -> CommandResult:
+        if display_handler is not None:
+            run_command(cmd=cmd, cwd=cwd or ".", display_handler=display_handler)
+            return CommandResult(cmd=cmd)
+        with get_tracer().span(get_command_name(cmd), "command", cmd=cmd) as span:
+            res = subprocess.run(cmd, shell=True, cwd=cwd, capture_output=True, text=True)
+            if span is not None:
+                span.attributes["returncode"] = res.returncode
+        if widget:
+            display_cmd_result(cmd, res)
+        return CommandResult(cmd=cmd, returncode=res.returncode, stdout=res.stdout, stderr=res.stderr)
+
+    def get_scope(
+        self,
+        context: Optional[str],
+        namespace: Optional[str] = None,
+        all_namespaces: bool = False
+    ) -> str:
+        scope = [f"--context {context}" if context is not None else ""]
+        if all_namespaces:
+            scope.append("--all-namespaces")
+        elif namespace is not None:
+            scope.append(f"-n {namespace}")
+        return join(*scope)
+
+    #-----------
+    # manifests
+    #-----------
+    def apply(
+        self,
+        path: str,
+        context: Optional[str] = None,
+        namespace: Optional[str] = None,
+        dry_run: bool = False,
+        widget: bool = True
+    ) -> CommandResult:
+        dry_run_opt = "--dry-run=server" if dry_run else ""
+        return self.run(join("kubectl apply", dry_run_opt, self.get_scope(context, namespace), f"-f {path}"), widget=widget)
+
+    def delete(
+        self,
+        context: str,
+        namespace: Optional[str] = None,
+        kind: Optional[str] = None,
+        name: Optional[str] = None,
+        path: Optional[str] = None,
+        selector: Optional[str] = None,
+        all_namespaces: bool = False,
+        widget: bool = True,
+        display_handler: Optional[DisplayHandler] = None
+    ) -> CommandResult:
+        scope = self.get_scope(context, namespace, all_namespaces)
+        if path is not None:
+            target = f"-f {path}"
+        elif name is not None:
+            target = f"{kind} {name}"
+        elif selector is not None:
+            target = f'{kind} --selector="{selector}"'
+        else:
+            target = f"{kind} --all"
+        return self.run(join("kubectl delete", target, scope, "--ignore-not-found"), widget=widget, display_handler=display_handler)
+
+    def annotate(
+        self,
+        kind: str,
+        annotation: str,
+        context: str,
+        namespace: str,
+        selector: str,
+        widget: bool = True
+    ) -> CommandResult:
+        return self.run(join("kubectl annotate", kind, self.get_scope(context, namespace), f'--selector="{selector}"', annotation, "--overwrite"), widget=widget)
+
+    #-------
+    # reads
+    #-------
+    def get(
+        self,
+        kind: str,
+        context: str,
+        namespace: Optional[str] = None,
+        name: Optional[str] = None,
+        selector: Optional[str] = None,
+        widget: bool = False
+    ) -> Optional[dict]:
+        target = f"{kind} {name}" if name is not None else kind
+        selector_opt = f'--selector="{selector}"' if selector is not None else ""
+        result = self.run(join("kubectl get", target, self.get_scope(context, namespace), selector_opt, "-o json"), widget=widget)
+        if result.returncode != 0:
+            return None
+        try:
+            return json.loads(result.stdout)
+        except json.JSONDecodeError:
+            return None
+
+    def logs(
+        self,
+        pod_name: str,
+        context: str,
+        namespace: str,
+        widget: bool = False
+    ) -> CommandResult:
+        return self.run(join("kubectl logs", pod_name, self.get_scope(context, namespace)), widget=widget)
+
+    def get_events(
+        self,
+        context: str,
+        namespace: str,
+        limit: int = 20,
+        widget: bool = True
+    ) -> CommandResult:
+        return self.run(join("kubectl get events", self.get_scope(context, namespace), f"--sort-by=.metadata.creationTimestamp | tail -{limit}"), widget=widget)
+
+    def list_resources(
+        self,
+        context: str,
+        selector: str,
+        display_handler: DisplayHandler
+    ) -> CommandResult:
+        return self.run(join("kubectl get all", self.get_scope(context, all_namespaces=True), f"--selector={selector}"), display_handler=display_handler)
+
+    def get_dependency_graph(
+        self,
+        context: str,
+        selector: str,
+        graph_path: str,
+        display_handler: DisplayHandler
+    ) -> CommandResult:
+        return self.run(join("kubectl graph all", self.get_scope(context, all_namespaces=True), f"--selector={selector} -t 1000 > {graph_path}"), display_handler=display_handler)
+
+    #-----------
+    # readiness
+    #-----------
+    def resources_ready(
+        self,
+        selector: str,
+        context: Optional[str] = None,
+        namespace: Optional[str] = None
+    ) -> bool:
+        from ..utils.k8s import create_api_client, check_resources_status
+        if context not in self.api_clients:
+            self.api_clients[context] = create_api_client(context)
+        return check_resources_status(selector, self.api_clients[context], namespace)
+
+    def pvc_ready(
+        self,
+        name: str,
+        context: str,
+        namespace: str
+    ) -> bool:
+        # for WaitForFirstConsumer classes, Pending is acceptable until a pod consumes it
+        api = create_core_api(context)
+        try:
+            pvc = api.read_namespaced_persistent_volume_claim(name=name, namespace=namespace)
+            phase = pvc.status.phase
+            if phase == "Bound":
+                return True
+            elif phase == "Pending":
+                # Check storageClass binding mode
+                sc_name = pvc.spec.storage_class_name
+                if sc_name:
+                    sc_api = client.StorageV1Api(client.ApiClient(api.api_client.configuration))
+                    sc = sc_api.read_storage_class(sc_name)
+                    if sc.volume_binding_mode == "WaitForFirstConsumer":
+                        print(f"PVC {name} is Pending with WaitForFirstConsumer. Allowing pod creation.")
+                        return True
+                return False
+            else:
+                return False
+        except ApiException as e:
+            if e.status == 404:
+                return False
+            raise
+
+    #------------
+    # deployment
+    #------------
+    def deploy(
+        self,
+        skaffold_path: str,
+        context: str,
+        project_name: str,
+        display_handler: Optional[DisplayHandler] = None
+    ) -> CommandResult:
+        return self.run(
+            f"skaffold run --kube-context {context} -l project={project_name}",
+            cwd=os.path.dirname(skaffold_path),
+            display_handler=display_handler
+        )
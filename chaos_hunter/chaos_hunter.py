@@ -1,29 +1,42 @@
 import os
 import time
 import subprocess
-from typing import List, Dict
+from typing import List, Dict, Tuple, Iterator, Optional
 
-from .preprocessing.preprocessor import PreProcessor, ChaosHunterInput
+from .preprocessing.preprocessor import PreProcessor, ChaosHunterInput, ProcessedData
 from .hypothesis.hypothesizer import Hypothesizer
-from .experiment.experimenter import Experimenter
+from .experiment.experimenter import Experimenter, FailFastPolicy
 from .analysis.analyzer import Analyzer
 from .improvement.improver import Improver
+from .improvement.llm_agents.reconfiguration_agent import ReconfigurationResult
 from .postprocessing.postprocessor import PostProcessor, ChaosCycle
 from .ce_tools.ce_tool_base import CEToolBase
 from .utils.constants import SKAFFOLD_YAML_TEMPLATE_PATH
 from .utils.wrappers import BaseModel, LLM
-from .utils.llms import LLMLog
+from .utils.llms import LLMLog, CURRENT_USAGE_TRACKER, embed_messages
+from .utils.message_store import MessageStore, CURRENT_MESSAGE_STORE, SEGMENTS_FNAME
+from .utils.serialization import construct_model
 from .utils.streamlit import StreamlitDisplayHandler, Spinner
-from .utils.k8s import remove_all_resources_by_labels, remove_all_resources_by_namespace
+from .utils.k8s import (
+    remove_all_resources_by_labels,
+    remove_all_resources_by_namespace,
+    remove_workflows_by_namespace,
+    get_deployment_drift
+)
+from .utils.cache import POD_RESULT_CACHE
+from .utils.project_store import ProjectStore, replace_file
 from .utils.schemas import File
-from .utils.callbacks import ChaosHunterCallback
+from .utils.callbacks import ChaosHunterCallback, TracingCallback
+from .utils.budget import BudgetManager, BudgetExceeded, BudgetUsage
+from .utils.tracing import Tracer, CURRENT_TRACER, TRACE_FNAME
+from .utils.journal import RunJournal, JournalCallback, load_journal, has_journal
+from .backends.backend import get_backend
 from .utils.functions import (
-    write_file,
     delete_file,
     copy_dir,
     get_timestamp,
     save_json,
-    run_command,
+    load_json,
     render_jinja_template,
     list_to_bullet_points,
     MessageLogger
@@ -36,6 +49,44 @@ class ChaosHunterOutput(BaseModel):
     logs: Dict[str, List[LLMLog] | List[List[LLMLog]]] = {}
     run_time: Dict[str, float | List[float]] = {}
     ce_cycle: ChaosCycle = ChaosCycle()
+    completed_phases: List[str] = [] # e.g., preprocess, hypothesis, experiment_plan, experiment_0, analysis_0, improvement_0, replan_1, ...
+    stop_reason: str = "" # why the cycle stopped before completing (e.g., an exceeded budget)
+    budget_usage: Optional[BudgetUsage] = None # tokens, cost, and time of the cycle (if run with a budget)
+
+    @classmethod
+    def load(
+        cls,
+        output_dir: str,
+        trusted: bool = True,
+        message_store: MessageStore = None
+    ) -> "ChaosHunterOutput":
+        """
+        load the output from the run journal (even of an unfinished cycle), or from output.json.
+        trusted=True skips validation, as the artifacts were written by ChaosHunter itself.
+        The segments of the logs are loaded into `message_store` (a new store by default).
+        """
+        message_store = message_store if message_store is not None else MessageStore()
+        if os.path.exists(segments_path := f"{output_dir}/{SEGMENTS_FNAME}"):
+            message_store.load(segments_path) # to rehydrate the message histories of the logs
+        data = load_journal(output_dir) if has_journal(output_dir) else load_json(f"{output_dir}/output.json")
+        ce_output = construct_model(cls, data) if trusted else cls.parse_obj(data)
+        for log in ce_output.iter_logs():
+            log.set_message_store(message_store)
+        return ce_output
+
+    def iter_logs(self) -> Iterator[LLMLog]:
+        for logs in self.logs.values():
+            for log in logs:
+                for log_ in (log if isinstance(log, list) else [log]):
+                    yield log_
+
+    def iter_message_histories(self) -> Iterator[List[List[str] | str]]:
+        for log in self.iter_logs():
+            yield log.message_history
+
+    def embed_messages(self) -> "ChaosHunterOutput":
+        """a copy with full messages in the logs, which can be read without the segment file (e.g., output.json)"""
+        return self.copy(update={"logs": {key: embed_messages(logs) for key, logs in self.logs.items()}})
 
 
 class ChaosHunter:
@@ -52,18 +103,21 @@ class ChaosHunter:
         os.makedirs(self.root_dir,  exist_ok=True)
         # working namespace
         self.namespace = namespace
-        # llm
-        self.llm = llm
         # message logger
         self.message_logger = message_logger
         # CE tool
         self.ce_tool = ce_tool
-        # agent managers
+        # llm and agent managers
+        self.set_llm(llm)
+
+    def set_llm(self, llm: LLM) -> None:
+        """(re)build the agent managers with `llm` (e.g., a cheaper one when the budget runs out)"""
+        self.llm = llm
         self.preprocessor  = PreProcessor(llm, self.message_logger)
-        self.hypothesizer  = Hypothesizer(llm, ce_tool, self.message_logger)
-        self.experimenter  = Experimenter(llm, ce_tool, message_logger=self.message_logger, namespace=namespace)
-        self.analyzer      = Analyzer(llm, self.message_logger, namespace)
-        self.improver      = Improver(llm, ce_tool, self.message_logger)
+        self.hypothesizer  = Hypothesizer(llm, self.ce_tool, self.message_logger)
+        self.experimenter  = Experimenter(llm, self.ce_tool, message_logger=self.message_logger, namespace=self.namespace)
+        self.analyzer      = Analyzer(llm, self.message_logger, self.namespace)
+        self.improver      = Improver(llm, self.ce_tool, self.message_logger)
         self.postprocessor = PostProcessor(llm, self.message_logger)
 
     def run_ce_cycle(
@@ -77,333 +131,560 @@ class ChaosHunter:
         is_new_deployment: bool = True,
         max_num_steadystates: int = 2,
         max_retries: int = 3,
+        extend_time_schedule: bool = False,
+        fail_fast: FailFastPolicy = None,
+        pipelined_steady_states: bool = False,
+        use_steady_state_library: bool = False,
+        compress_journal: bool = False,
+        use_project_store: bool = True,
+        resume_from: str = None,
+        trace: bool = True,
+        otlp_endpoint: str = None,
+        budget: BudgetManager = None,
         callbacks: List[ChaosHunterCallback] = []
     ) -> ChaosHunterOutput:
-        self.message_logger.subheader("Phase 0: Preprocessing", divider="gray")
-        # clean the cluster
-        spinner = Spinner(f"##### Cleaning the cluster ```{kube_context}```...")
-        remove_all_resources_by_namespace(
-            kube_context,
-            self.namespace,
-            display_handler=StreamlitDisplayHandler(self.message_logger)
-        )
-        if clean_cluster_before_run:
-            remove_all_resources_by_labels(
-                kube_context,
-                f"project={project_name}",
-                display_handler=StreamlitDisplayHandler(self.message_logger)
-            )
-        spinner.end(f"##### Cleaning the cluster ```{kube_context}```... Done")
-        # prepare a working directory
-        if work_dir is None:
-            work_dir = f"{self.root_dir}/cycle_{get_timestamp()}"
-        os.makedirs(work_dir, exist_ok=True)
-        # initialization
-        output_dir = f"{work_dir}/outputs"
-        os.makedirs(output_dir, exist_ok=True)
-        ce_output = ChaosHunterOutput(work_dir=work_dir)
-        entire_start_time = time.time()
-
-        #-----------------------------------------------------------------
-        # 0. preprocessing (input deployment & validation and reflection)
-        #-----------------------------------------------------------------
-        for cb in callbacks:
-            cb.on_preprocess_start()
-        start_time = time.time()
-        preprcess_logs, data = self.preprocessor.process(
-            input=input,
-            kube_context=kube_context,
-            work_dir=work_dir,
-            project_name=project_name,
-            is_new_deployment=is_new_deployment
-        )
-        ce_output.run_time["preprocess"] = time.time() - start_time
-        ce_output.logs["preprocess"] = preprcess_logs
-        ce_output.ce_cycle.processed_data = data
-        save_json(f"{output_dir}/output.json", ce_output.dict()) # save intermediate results
-        for cb in callbacks:
-            cb.on_preprocess_end(preprcess_logs)
-
-        #---------------
-        # 1. hypothesis
-        #---------------
-        for cb in callbacks:
-            cb.on_hypothesis_start()
-        self.message_logger.subheader("Phase 1: Hypothesis", divider="gray")
-        start_time = time.time()
-        hypothesis_logs, hypothesis = self.hypothesizer.hypothesize(
-            data=data,
-            kube_context=kube_context,
-            work_dir=work_dir,
-            max_num_steady_states=max_num_steadystates,
-            max_retries=max_retries
-        )
-        ce_output.run_time["hypothesis"] = time.time() - start_time
-        ce_output.logs["hypothesis"] = hypothesis_logs
-        ce_output.ce_cycle.hypothesis = hypothesis
-        save_json(f"{output_dir}/output.json", ce_output.dict()) # save intermediate results
-        for cb in callbacks:
-            cb.on_hypothesis_end(hypothesis_logs)
-
-        #---------------------
-        # 2. Chaos Experiment
-        #---------------------
-        self.message_logger.subheader("Phase 2: Chaos Experiment", divider="gray")
-        for cb in callbacks:
-            cb.on_experiment_plan_start()
-        # 2.1. plan a chaos experiment
-        start_time = time.time()
-        experiment_logs, experiment = self.experimenter.plan_experiment(
-            data=data,
-            hypothesis=hypothesis,
-            work_dir=work_dir
-        )
-        ce_output.run_time["experiment_plan"] = time.time() - start_time
-        ce_output.logs["experiment_plan"] = experiment_logs
-        ce_output.ce_cycle.experiment=experiment
-        save_json(f"{output_dir}/output.json", ce_output.dict())
-        for cb in callbacks:
-            cb.on_experiment_plan_end(experiment_logs)
-
-        #------------------
-        # improvement loop
-        #------------------
-        ce_output.run_time["analysis"] = []
-        ce_output.run_time["improvement"] = []
-        ce_output.run_time["experiment_execution"] = []
-        ce_output.logs["analysis"] = []
-        ce_output.logs["improvement"] = []
-        mod_k8s_count = 0
-        mod_dir = data.work_dir
-        k8s_yamls = data.k8s_yamls
-        k8s_yamls_history = [k8s_yamls]
-        mod_dir_history = [mod_dir]
-        while (1):
-            # 2.2. conduct the chaos experiment
-            for cb in callbacks:
-                cb.on_experiment_start()
-            start_time = time.time()
-            experiment_result = self.experimenter.run(experiment, kube_context=kube_context)
-            ce_output.run_time["experiment_execution"].append(time.time() - start_time)
-            ce_output.ce_cycle.result_history.append(experiment_result)
-            save_json(f"{output_dir}/output.json", ce_output.dict())
-            for cb in callbacks:
-                cb.on_experiment_end()
-
-            # check if the hypothesis is satisfied
-            if experiment_result.all_tests_passed:
-                self.message_logger.write("##### Your k8s yaml already has good resilience!!!")
-                break
+        # the cycle records its spans (phases, LLM calls, commands, pods, waits, sleeps) into its own tracer and
+        # interns the messages of its LLM calls into its own store, and reports their usage to its own budget;
+        # all are current only in this context, so concurrent cycles (e.g., sessions of the demo) do not mix them
+        tracer = Tracer()
+        if trace:
+            tracer.start_trace()
+            callbacks = [*callbacks, TracingCallback(tracer)]
+        message_store = MessageStore()
+        tracer_token = CURRENT_TRACER.set(tracer)
+        message_store_token = CURRENT_MESSAGE_STORE.set(message_store)
+        usage_tracker_token = CURRENT_USAGE_TRACKER.set(budget)
+        cycle_span = tracer.start_span("ce_cycle", "cycle", resumed=resume_from is not None)
+        output_dir = None
+        journal = None
+        try:
+            # resume an interrupted cycle from its journal
+            if resume_from is not None:
+                work_dir = resume_from
+            resumes = resume_from is not None and has_journal(f"{resume_from}/outputs")
+            if resumes:
+                ce_output = ChaosHunterOutput.load(f"{resume_from}/outputs", message_store=message_store)
+                self.message_logger.write(f"##### Resuming the CE cycle in ```{resume_from}``` (completed: {', '.join(ce_output.completed_phases) or 'none'})")
+            else:
+                ce_output = ChaosHunterOutput(work_dir=work_dir)
+            completed = ce_output.completed_phases
+
+            self.message_logger.subheader("Phase 0: Preprocessing", divider="gray")
+            # clean the cluster
+            spinner = Spinner(f"##### Cleaning the cluster ```{kube_context}```...")
+            if "preprocess" in completed:
+                # keep the deployed system, and remove only the workflows of the interrupted experiment
+                remove_workflows_by_namespace(
+                    kube_context,
+                    self.namespace,
+                    display_handler=StreamlitDisplayHandler(self.message_logger)
+                )
+            else:
+                remove_all_resources_by_namespace(
+                    kube_context,
+                    self.namespace,
+                    display_handler=StreamlitDisplayHandler(self.message_logger)
+                )
+                if clean_cluster_before_run:
+                    remove_all_resources_by_labels(
+                        kube_context,
+                        f"project={project_name}",
+                        display_handler=StreamlitDisplayHandler(self.message_logger)
+                    )
+            spinner.end(f"##### Cleaning the cluster ```{kube_context}```... Done")
+            # prepare a working directory
+            if work_dir is None:
+                work_dir = f"{self.root_dir}/cycle_{get_timestamp()}"
+            os.makedirs(work_dir, exist_ok=True)
+            # initialization
+            output_dir = f"{work_dir}/outputs"
+            os.makedirs(output_dir, exist_ok=True)
+            if not resumes:
+                ce_output.work_dir = work_dir
+            # intermediate results are appended to a journal instead of rewriting output.json
+            # reconfigured projects are materialized from a content-addressed store instead of full copies
+            project_store = ProjectStore(f"{work_dir}/project_store") if use_project_store else None
+            journal = RunJournal(output_dir, get_state=lambda: ce_output, compress=compress_journal, reset=not resumes)
+            journal.set_from(ce_output, "work_dir")
+            callbacks = [*callbacks, JournalCallback(journal)]
+            # track the usage of the cycle; the budget goes first so that it stops a phase before the others start it
+            original_llm = self.llm
+            if budget is not None:
+                budget.start_cycle(ce_output.budget_usage if resumes else None)
+                callbacks = [budget, *callbacks]
+            if ce_output.stop_reason != "":
+                ce_output.stop_reason = ""
+                journal.set_from(ce_output, "stop_reason")
+            def degrade() -> Tuple[int, int]:
+                """max_num_steadystates and max_retries of the next phase, reduced (with a cheaper llm) near the budget"""
+                if budget is None or not budget.degrades():
+                    return max_num_steadystates, max_retries
+                if budget.fallback_llm is not None and self.llm is not budget.fallback_llm:
+                    self.message_logger.write(f"##### Approaching the budget (cycle usage: {budget.get_cycle_usage().to_str()}). Switching to a cheaper model.")
+                    self.set_llm(budget.fallback_llm)
+                return (
+                    min(max_num_steadystates, budget.config.degraded_max_num_steadystates),
+                    min(max_retries, budget.config.degraded_max_retries)
+                )
+            # the logs only hold references to interned messages; their segments are stored next to the journal
+            segments_path = f"{output_dir}/{SEGMENTS_FNAME}"
+            def complete_phase(phase: str) -> None:
+                message_store.flush(segments_path, ce_output.iter_message_histories())
+                if budget is not None:
+                    ce_output.budget_usage = budget.get_cycle_usage()
+                    journal.set_from(ce_output, "budget_usage")
+                ce_output.completed_phases.append(phase)
+                journal.append_from(ce_output, "completed_phases")
+            entire_start_time = time.time()
+
+            mod_dir = ce_output.output_dir
+            try:
+                #-----------------------------------------------------------------
+                # 0. preprocessing (input deployment & validation and reflection)
+                #-----------------------------------------------------------------
+                if "preprocess" not in completed:
+                    for cb in callbacks:
+                        cb.on_preprocess_start()
+                    start_time = time.time()
+                    preprcess_logs, data = self.preprocessor.process(
+                        input=input,
+                        kube_context=kube_context,
+                        work_dir=work_dir,
+                        project_name=project_name,
+                        is_new_deployment=is_new_deployment
+                    )
+                    ce_output.run_time["preprocess"] = time.time() - start_time
+                    ce_output.logs["preprocess"] = preprcess_logs
+                    ce_output.ce_cycle.processed_data = data
+                    journal.set_from(ce_output, "run_time.preprocess", "logs.preprocess", "ce_cycle.processed_data")
+                    complete_phase("preprocess")
+                    for cb in callbacks:
+                        cb.on_preprocess_end(preprcess_logs)
+                data = ce_output.ce_cycle.processed_data
+
+                #---------------------------------------------------------------
+                # restore the reconfigured projects of the interrupted cycle and
+                # make sure that the cluster runs the last deployed manifests
+                #---------------------------------------------------------------
+                mod_k8s_count = 0
+                mod_dir = data.work_dir
+                k8s_yamls = data.k8s_yamls
+                k8s_yamls_history = [k8s_yamls]
+                mod_dir_history = [mod_dir]
+                skaffold_path = data.input.skaffold_yaml.path
+                while f"replan_{mod_k8s_count+1}" in completed:
+                    mod_k8s_count += 1
+                    mod_dir, k8s_yamls, skaffold_path = self.apply_reconfig(
+                        data=data,
+                        reconfig=ce_output.ce_cycle.reconfig_history[mod_k8s_count-1],
+                        k8s_yamls=k8s_yamls,
+                        mod_dir=mod_dir,
+                        mod_k8s_count=mod_k8s_count,
+                        output_dir=output_dir,
+                        writes_files=False
+                    )
+                    k8s_yamls_history.append(k8s_yamls)
+                    mod_dir_history.append(mod_dir)
+                if resumes and "preprocess" in completed:
+                    drifts = get_deployment_drift(kube_context, k8s_yamls)
+                    if len(drifts) > 0:
+                        self.message_logger.write("##### The cluster does not match the last deployed manifests:  \n" + "  \n".join(f"- {drift}" for drift in drifts))
+                        remove_all_resources_by_namespace(kube_context, self.namespace)
+                        self.deploy(kube_context, project_name, skaffold_path, k8s_yamls)
+                    else:
+                        POD_RESULT_CACHE.set_deployment(kube_context, k8s_yamls)
+
+                #---------------
+                # 1. hypothesis
+                #---------------
+                if "hypothesis" not in completed:
+                    for cb in callbacks:
+                        cb.on_hypothesis_start()
+                    self.message_logger.subheader("Phase 1: Hypothesis", divider="gray")
+                    max_num_steadystates_, max_retries_ = degrade()
+                    start_time = time.time()
+                    hypothesis_logs, hypothesis = self.hypothesizer.hypothesize(
+                        data=data,
+                        kube_context=kube_context,
+                        work_dir=work_dir,
+                        max_num_steady_states=max_num_steadystates_,
+                        max_retries=max_retries_,
+                        pipelined_steady_states=pipelined_steady_states,
+                        use_steady_state_library=use_steady_state_library
+                    )
+                    ce_output.run_time["hypothesis"] = time.time() - start_time
+                    ce_output.logs["hypothesis"] = hypothesis_logs
+                    ce_output.ce_cycle.hypothesis = hypothesis
+                    journal.set_from(ce_output, "run_time.hypothesis", "logs.hypothesis", "ce_cycle.hypothesis")
+                    complete_phase("hypothesis")
+                    for cb in callbacks:
+                        cb.on_hypothesis_end(hypothesis_logs)
+                hypothesis = ce_output.ce_cycle.hypothesis
+
+                #---------------------
+                # 2. Chaos Experiment
+                #---------------------
+                self.message_logger.subheader("Phase 2: Chaos Experiment", divider="gray")
+                if "experiment_plan" not in completed:
+                    for cb in callbacks:
+                        cb.on_experiment_plan_start()
+                    # 2.1. plan a chaos experiment
+                    _, max_retries_ = degrade()
+                    start_time = time.time()
+                    experiment_logs, experiment = self.experimenter.plan_experiment(
+                        data=data,
+                        hypothesis=hypothesis,
+                        work_dir=work_dir,
+                        max_retries=max_retries_,
+                        extend_time_schedule=extend_time_schedule
+                    )
+                    ce_output.run_time["experiment_plan"] = time.time() - start_time
+                    ce_output.logs["experiment_plan"] = experiment_logs
+                    ce_output.ce_cycle.experiment=experiment
+                    journal.set_from(ce_output, "run_time.experiment_plan", "logs.experiment_plan", "ce_cycle.experiment")
+                    complete_phase("experiment_plan")
+                    for cb in callbacks:
+                        cb.on_experiment_plan_end(experiment_logs)
+                experiment = ce_output.ce_cycle.experiment
+
+                #------------------
+                # improvement loop
+                #------------------
+                for key in ["analysis", "improvement", "experiment_execution"]:
+                    if key not in ce_output.run_time:
+                        ce_output.run_time[key] = []
+                        journal.set_from(ce_output, f"run_time.{key}")
+                for key in ["analysis", "improvement"]:
+                    if key not in ce_output.logs:
+                        ce_output.logs[key] = []
+                        journal.set_from(ce_output, f"logs.{key}")
+                while (1):
+                    # 2.2. conduct the chaos experiment
+                    if f"experiment_{mod_k8s_count}" not in completed:
+                        for cb in callbacks:
+                            cb.on_experiment_start()
+                        start_time = time.time()
+                        experiment_result = self.experimenter.run(experiment, kube_context=kube_context, fail_fast=fail_fast, callbacks=callbacks)
+                        ce_output.run_time["experiment_execution"].append(time.time() - start_time)
+                        ce_output.ce_cycle.result_history.append(experiment_result)
+                        journal.append_from(ce_output, "run_time.experiment_execution", "ce_cycle.result_history")
+                        complete_phase(f"experiment_{mod_k8s_count}")
+                        for cb in callbacks:
+                            cb.on_experiment_end()
+                    experiment_result = ce_output.ce_cycle.result_history[mod_k8s_count]
+
+                    # check if the hypothesis is satisfied
+                    if experiment_result.all_tests_passed:
+                        self.message_logger.write("##### Your k8s yaml already has good resilience!!!")
+                        break
             
-            # set flag
-            ce_output.ce_cycle.conducts_reconfig = True
-            save_json(f"{output_dir}/output.json", ce_output.dict())
-
-            # mod count checking 
-            assert mod_k8s_count < max_retries, f"MAX_MOD_COUNT_EXCEEDED: improvement exceeds the max_retries {max_retries}"
-
-            #-------------
-            # 3. analysis
-            #-------------
-            for cb in callbacks:
-                cb.on_analysis_start()
-            self.message_logger.subheader("Phase 3: Analysis", divider="gray")
-            start_time = time.time()
-            analysis_logs, analysis = self.analyzer.analyze(
-                mod_count=mod_k8s_count,
-                input_data=data,
-                hypothesis=hypothesis,
-                experiment=experiment,
-                reconfig_history=ce_output.ce_cycle.reconfig_history,
-                experiment_result=experiment_result,
-                work_dir=work_dir
-            )
-            ce_output.run_time["analysis"].append(time.time() - start_time)
-            ce_output.logs["analysis"].append(analysis_logs)
-            ce_output.ce_cycle.analysis_history.append(analysis)
-            save_json(f"{output_dir}/output.json", ce_output.dict())
-            for cb in callbacks:
-                cb.on_analysis_end(analysis_logs)
-
-            #----------------
-            # 4. improvement
-            #----------------
-            for cb in callbacks:
-                cb.on_improvement_start()
-            self.message_logger.subheader("Phase 4: Improvement", divider="gray")
-            start_time = time.time()
-            reconfig_logs, reconfig = self.improver.reconfigure(
-                input_data=data,
-                hypothesis=hypothesis,
-                experiment=experiment,
-                k8s_yamls_history=k8s_yamls_history,
-                mod_dir_history=mod_dir_history,
-                result_history=ce_output.ce_cycle.result_history,
-                analysis_history=ce_output.ce_cycle.analysis_history,
-                reconfig_history=ce_output.ce_cycle.reconfig_history,
-                kube_context=kube_context,
-                work_dir=work_dir,
-                max_retries=max_retries
-            )
-            ce_output.run_time["improvement"].append(time.time() - start_time)
-            ce_output.logs["improvement"].append(reconfig_logs)
-            ce_output.ce_cycle.reconfig_history.append(reconfig)
-            save_json(f"{output_dir}/output.json", ce_output.dict())
-            for cb in callbacks:
-                cb.on_improvement_end(reconfig_logs)
-
-            #-------------------------------
-            # preparation for the next loop
-            # TODO: preprocess again
-            #-------------------------------
-            # increment counter
-            mod_k8s_count += 1
-
-            # clean cluster
-            remove_all_resources_by_namespace(kube_context, self.namespace)
-
-            # copy the previous project to the current project dir
-            mod_dir_ = f"{output_dir}/mod_{mod_k8s_count}"
-            copy_dir(mod_dir, mod_dir_) # duplicate the input project
-            mod_dir = mod_dir_
-            mod_dir_history.append(mod_dir)
-
-            # modify k8s yamls
-            reconfig_yamls = reconfig.mod_k8s_yamls["modified_k8s_yamls"]
+                    # set flag
+                    ce_output.ce_cycle.conducts_reconfig = True
+                    journal.set_from(ce_output, "ce_cycle.conducts_reconfig")
+
+                    # mod count checking 
+                    assert mod_k8s_count < max_retries, f"MAX_MOD_COUNT_EXCEEDED: improvement exceeds the max_retries {max_retries}"
+
+                    #-------------
+                    # 3. analysis
+                    #-------------
+                    if f"analysis_{mod_k8s_count}" not in completed:
+                        for cb in callbacks:
+                            cb.on_analysis_start()
+                        self.message_logger.subheader("Phase 3: Analysis", divider="gray")
+                        degrade()
+                        start_time = time.time()
+                        analysis_logs, analysis = self.analyzer.analyze(
+                            mod_count=mod_k8s_count,
+                            input_data=data,
+                            hypothesis=hypothesis,
+                            experiment=experiment,
+                            reconfig_history=ce_output.ce_cycle.reconfig_history,
+                            experiment_result=experiment_result,
+                            work_dir=work_dir
+                        )
+                        ce_output.run_time["analysis"].append(time.time() - start_time)
+                        ce_output.logs["analysis"].append(analysis_logs)
+                        ce_output.ce_cycle.analysis_history.append(analysis)
+                        journal.append_from(ce_output, "run_time.analysis", "logs.analysis", "ce_cycle.analysis_history")
+                        complete_phase(f"analysis_{mod_k8s_count}")
+                        for cb in callbacks:
+                            cb.on_analysis_end(analysis_logs)
+
+                    #----------------
+                    # 4. improvement
+                    #----------------
+                    if f"improvement_{mod_k8s_count}" not in completed:
+                        for cb in callbacks:
+                            cb.on_improvement_start()
+                        self.message_logger.subheader("Phase 4: Improvement", divider="gray")
+                        _, max_retries_ = degrade()
+                        start_time = time.time()
+                        reconfig_logs, reconfig = self.improver.reconfigure(
+                            input_data=data,
+                            hypothesis=hypothesis,
+                            experiment=experiment,
+                            k8s_yamls_history=k8s_yamls_history,
+                            mod_dir_history=mod_dir_history,
+                            result_history=ce_output.ce_cycle.result_history,
+                            analysis_history=ce_output.ce_cycle.analysis_history,
+                            reconfig_history=ce_output.ce_cycle.reconfig_history,
+                            kube_context=kube_context,
+                            work_dir=work_dir,
+                            max_retries=max_retries_,
+                            project_store=project_store
+                        )
+                        ce_output.run_time["improvement"].append(time.time() - start_time)
+                        ce_output.logs["improvement"].append(reconfig_logs)
+                        ce_output.ce_cycle.reconfig_history.append(reconfig)
+                        journal.append_from(ce_output, "run_time.improvement", "logs.improvement", "ce_cycle.reconfig_history")
+                        complete_phase(f"improvement_{mod_k8s_count}")
+                        for cb in callbacks:
+                            cb.on_improvement_end(reconfig_logs)
+                    reconfig = ce_output.ce_cycle.reconfig_history[mod_k8s_count]
+
+                    #-------------------------------
+                    # preparation for the next loop
+                    # TODO: preprocess again
+                    #-------------------------------
+                    # increment counter
+                    mod_k8s_count += 1
+
+                    # clean cluster
+                    remove_all_resources_by_namespace(kube_context, self.namespace)
+
+                    # modify k8s yamls in a copy of the previous project
+                    prev_k8s_yamls = k8s_yamls
+                    mod_dir, k8s_yamls, skaffold_path = self.apply_reconfig(
+                        data=data,
+                        reconfig=reconfig,
+                        k8s_yamls=k8s_yamls,
+                        mod_dir=mod_dir,
+                        mod_k8s_count=mod_k8s_count,
+                        output_dir=output_dir,
+                        project_store=project_store
+                    )
+                    mod_dir_history.append(mod_dir)
+                    k8s_yamls_history.append(k8s_yamls)
+
+                    #-----------------------------------
+                    # deploy the reconfigured k8s yamls
+                    #-----------------------------------
+                    self.deploy(kube_context, project_name, skaffold_path, k8s_yamls, spinner_text="Deploying reconfigured resources")
+
+                    #------------------------------------------------------
+                    # replan the experiment (modify only fault selectorss)
+                    #------------------------------------------------------
+                    for cb in callbacks:
+                        cb.on_experiment_replan_start()
+                    _, max_retries_ = degrade()
+                    start_time = time.time()
+                    experiment_logs, experiment = self.experimenter.replan_experiment(
+                        prev_k8s_yamls=prev_k8s_yamls,
+                        prev_experiment=experiment,
+                        curr_k8s_yamls=k8s_yamls,
+                        kube_context=kube_context,
+                        work_dir=work_dir,
+                        max_retries=max_retries_,
+                        extend_time_schedule=extend_time_schedule
+                    )
+                    ce_output.run_time["experiment_replan"] = time.time() - start_time
+                    ce_output.logs["experiment_replan"] = experiment_logs
+                    ce_output.ce_cycle.experiment = experiment
+                    journal.set_from(ce_output, "run_time.experiment_replan", "logs.experiment_replan", "ce_cycle.experiment")
+                    complete_phase(f"replan_{mod_k8s_count}")
+                    for cb in callbacks:
+                        cb.on_experiment_replan_end(experiment_logs)
+
+                #------------------------------
+                # 5. post-processing (summary)
+                #------------------------------
+                for cb in callbacks:
+                    cb.on_postprocess_start()
+                self.message_logger.subheader("Phase EX: Postprocessing", divider="gray")
+                degrade()
+                ce_output.ce_cycle.completes_reconfig = True
+                journal.set_from(ce_output, "ce_cycle.completes_reconfig")
+                # summary
+                start_time = time.time()
+                summary_logs, summary = self.postprocessor.process(ce_cycle=ce_output.ce_cycle, work_dir=output_dir)
+                ce_output.run_time["summary"] = time.time() - start_time
+                ce_output.logs["summary"] = summary_logs
+                ce_output.ce_cycle.summary = summary
+                journal.set_from(ce_output, "run_time.summary", "logs.summary", "ce_cycle.summary")
+                complete_phase("postprocess")
+                for cb in callbacks:
+                    cb.on_postprocess_end(summary_logs)
+            except BudgetExceeded as e:
+                # stop cleanly; the journal keeps the completed phases, so the cycle can be resumed with a larger budget
+                ce_output.stop_reason = str(e)
+                journal.set_from(ce_output, "stop_reason")
+                self.message_logger.write(f"##### The CE cycle was stopped: {e}")
+            finally:
+                if budget is not None:
+                    budget.end_cycle()
+                    ce_output.budget_usage = budget.get_cycle_usage()
+                    journal.set_from(ce_output, "budget_usage")
+                if self.llm is not original_llm:
+                    self.set_llm(original_llm)
+
+            #----------
+            # epilogue
+            #----------
+            ce_output.run_time["cycle"] = time.time() - entire_start_time
+            ce_output.output_dir = mod_dir
+            journal.set_from(ce_output, "run_time.cycle", "output_dir")
+            journal.checkpoint()
+            journal.close()
+            save_json(f"{output_dir}/output.json", ce_output.embed_messages())
+            self.message_logger.save(f"{output_dir}/message_log.pkl")
+            if clean_cluster_after_run:
+                remove_all_resources_by_labels(
+                    kube_context,
+                    f"project={project_name}",
+                    display_handler=StreamlitDisplayHandler(self.message_logger)
+                )
+            return ce_output
+        finally:
+            if journal is not None:
+                # a failed cycle leaves a complete journal (and gzip stream), from which it can be resumed
+                journal.close()
+            CURRENT_USAGE_TRACKER.reset(usage_tracker_token)
+            CURRENT_MESSAGE_STORE.reset(message_store_token)
+            CURRENT_TRACER.reset(tracer_token)
+            if trace:
+                # the trace is also saved when the cycle fails, which is when it is needed the most
+                tracer.end_span(cycle_span)
+                tracer.stop_trace()
+                if output_dir is not None:
+                    tracer.save_chrome_trace(f"{output_dir}/{TRACE_FNAME}")
+                self.message_logger.write(f"##### Time sinks of the CE cycle\n```\n{tracer.summarize().to_str()}\n```")
+                if otlp_endpoint is not None:
+                    try:
+                        tracer.export_otlp(otlp_endpoint, service_name=project_name)
+                    except Exception as e: # do not mask the result (or the error) of the cycle
+                        print(f"Failed to export the trace to {otlp_endpoint}: {e}")
+
+    def apply_reconfig(
+        self,
+        data: ProcessedData,
+        reconfig: ReconfigurationResult,
+        k8s_yamls: List[File],
+        mod_dir: str,
+        mod_k8s_count: int,
+        output_dir: str,
+        writes_files: bool = True,
+        project_store: ProjectStore = None
+    ) -> Tuple[str, List[File], str]:
+        """
+        Duplicate the previous project and apply the reconfiguration to it.
+        With writes_files=False, only the resulting manifests are restored (e.g., when resuming a cycle).
+        Returns the new project dir, its k8s yamls, and the path of its skaffold.yaml.
+        """
+        # copy the previous project to the current project dir
+        mod_dir_ = f"{output_dir}/mod_{mod_k8s_count}"
+        reconfig_yamls = reconfig.mod_k8s_yamls["modified_k8s_yamls"]
+        if writes_files:
+            if project_store is not None:
+                # link the files of the input project; the files to be modified are copied
+                writable = [reconfig_yaml["fname"] for reconfig_yaml in reconfig_yamls] + [data.input.skaffold_yaml.fname]
+                project_store.clone(mod_dir, mod_dir_, writable=writable)
+            else:
+                copy_dir(mod_dir, mod_dir_) # duplicate the input project
+        mod_dir = mod_dir_
+
+        # modify k8s yamls
+        if writes_files:
             for mod_k8s_yaml in reconfig_yamls:
                 mod_type = mod_k8s_yaml["mod_type"]
                 fpath = f"{mod_dir}/{mod_k8s_yaml['fname']}"
                 if mod_type in ["create", "replace"]:
-                    write_file(fpath, mod_k8s_yaml['code'])
+                    replace_file(fpath, mod_k8s_yaml['code'])
                 elif mod_type == "delete":
                     delete_file(fpath)
                 else:
                     raise TypeError(f"Invalid modification type: {mod_type}")
 
-            # create new yamls
-            k8s_yamls_tmp = []
-            # existing yamls
-            for k8s_yaml in k8s_yamls:
-                is_found = False
-                for reconfig_yaml in reconfig_yamls:
-                    if reconfig_yaml["fname"] == k8s_yaml.fname:
-                        mod_type = reconfig_yaml["mod_type"]
-                        if mod_type == "replace":
-                            k8s_yamls_tmp.append(File(
-                                path=f"{mod_dir}/{reconfig_yaml['fname']}",
-                                content=reconfig_yaml["code"],
-                                work_dir=mod_dir,
-                                fname=k8s_yaml.fname
-                            ))
-                            is_found = True
-                            break
-                        elif mod_type == "delete":
-                            is_found = True
-                            break
-                if not is_found:
-                    # copy it changing only work_dir
-                    k8s_yamls_tmp.append(File(
-                        path=f"{mod_dir}/{k8s_yaml.fname}",
-                        content=k8s_yaml.content,
-                        work_dir=mod_dir,
-                        fname=k8s_yaml.fname
-                    ))
-            # new_yamls
+        # create new yamls
+        k8s_yamls_tmp = []
+        # existing yamls
+        for k8s_yaml in k8s_yamls:
+            is_found = False
             for reconfig_yaml in reconfig_yamls:
-                print(reconfig_yaml)
-                if reconfig_yaml["mod_type"] == "create":
-                    k8s_yamls_tmp.append(File(
-                        path=f"{mod_dir}/{reconfig_yaml['fname']}",
-                        content=reconfig_yaml["code"],
-                        work_dir=mod_dir,
-                        fname=reconfig_yaml["fname"]
-                    ))
-            # replace the previous yamls with new yamls
-            prev_k8s_yamls = k8s_yamls
-            k8s_yamls = k8s_yamls_tmp
-            k8s_yamls_history.append(k8s_yamls)
-
-            # modify skaffold
-            new_skaffold_path = f"{mod_dir}/{data.input.skaffold_yaml.fname}"
+                if reconfig_yaml["fname"] == k8s_yaml.fname:
+                    mod_type = reconfig_yaml["mod_type"]
+                    if mod_type == "replace":
+                        k8s_yamls_tmp.append(File(
+                            path=f"{mod_dir}/{reconfig_yaml['fname']}",
+                            content=reconfig_yaml["code"],
+                            work_dir=mod_dir,
+                            fname=k8s_yaml.fname
+                        ))
+                        is_found = True
+                        break
+                    elif mod_type == "delete":
+                        is_found = True
+                        break
+            if not is_found:
+                # copy it changing only work_dir
+                k8s_yamls_tmp.append(File(
+                    path=f"{mod_dir}/{k8s_yaml.fname}",
+                    content=k8s_yaml.content,
+                    work_dir=mod_dir,
+                    fname=k8s_yaml.fname
+                ))
+        # new_yamls
+        for reconfig_yaml in reconfig_yamls:
+            print(reconfig_yaml)
+            if reconfig_yaml["mod_type"] == "create":
+                k8s_yamls_tmp.append(File(
+                    path=f"{mod_dir}/{reconfig_yaml['fname']}",
+                    content=reconfig_yaml["code"],
+                    work_dir=mod_dir,
+                    fname=reconfig_yaml["fname"]
+                ))
+
+        # modify skaffold
+        new_skaffold_path = f"{mod_dir}/{data.input.skaffold_yaml.fname}"
+        if writes_files:
             new_skaffold_str = render_jinja_template(
                 SKAFFOLD_YAML_TEMPLATE_PATH,
                 name=f"mod-{mod_k8s_count}",
-                yaml_paths=list_to_bullet_points([os.sep.join(k8s_yaml_.fname.split("/")[1:]) for k8s_yaml_ in k8s_yamls])
-            )
-            write_file(new_skaffold_path, new_skaffold_str)
-
-            #-----------------------------------
-            # deploy the reconfigured k8s yamls
-            #-----------------------------------
-            spinner = Spinner(f"##### Deploying reconfigured resources...")
-            try:
-                run_command(
-                    cmd=f"skaffold run --kube-context {kube_context} -l project={project_name}",
-                    cwd=os.path.dirname(new_skaffold_path),
-                    display_handler=StreamlitDisplayHandler(self.message_logger)
-                )
-            except subprocess.CalledProcessError as e:
-                raise RuntimeError("K8s resource deployment failed.")
-            spinner.end(f"##### Deploying reconfigured resources... Done")
-            self.message_logger.write("##### Resource statuses")
-            run_command(
-                cmd=f"kubectl get all --all-namespaces --context {kube_context} --selector=project={project_name}",
-                display_handler=StreamlitDisplayHandler(self.message_logger)
+                yaml_paths=list_to_bullet_points([os.sep.join(k8s_yaml_.fname.split("/")[1:]) for k8s_yaml_ in k8s_yamls_tmp])
             )
+            replace_file(new_skaffold_path, new_skaffold_str)
+            if project_store is not None:
+                version = project_store.snapshot(mod_dir)
+                for k8s_yaml in k8s_yamls_tmp:
+                    k8s_yaml.blob = version.files.get(k8s_yaml.fname)
+        return mod_dir, k8s_yamls_tmp, new_skaffold_path
 
-            #------------------------------------------------------
-            # replan the experiment (modify only fault selectorss)
-            #------------------------------------------------------
-            for cb in callbacks:
-                cb.on_experiment_replan_start()
-            start_time = time.time()
-            experiment_logs, experiment = self.experimenter.replan_experiment(
-                prev_k8s_yamls=prev_k8s_yamls,
-                prev_experiment=experiment,
-                curr_k8s_yamls=k8s_yamls,
-                kube_context=kube_context,
-                work_dir=work_dir,
-                max_retries=max_retries
-            )
-            ce_output.run_time["experiment_replan"] = time.time() - start_time
-            ce_output.logs["experiment_replan"] = experiment_logs
-            ce_output.ce_cycle.experiment = experiment
-            save_json(f"{output_dir}/output.json", ce_output.dict())
-            for cb in callbacks:
-                cb.on_experiment_replan_end(experiment_logs)
-
-        #------------------------------
-        # 5. post-processing (summary)
-        #------------------------------
-        for cb in callbacks:
-            cb.on_postprocess_start()
-        self.message_logger.subheader("Phase EX: Postprocessing", divider="gray")
-        ce_output.ce_cycle.completes_reconfig = True
-        save_json(f"{output_dir}/output.json", ce_output.dict())
-        # summary
-        start_time = time.time()
-        summary_logs, summary = self.postprocessor.process(ce_cycle=ce_output.ce_cycle, work_dir=output_dir)
-        ce_output.run_time["summary"] = time.time() - start_time
-        ce_output.logs["summary"] = summary_logs
-        ce_output.ce_cycle.summary = summary
-        save_json(f"{output_dir}/output.json", ce_output.dict())
-        for cb in callbacks:
-            cb.on_postprocess_end(summary_logs)
-
-        #----------
-        # epilogue
-        #----------
-        ce_output.run_time["cycle"] = time.time() - entire_start_time
-        ce_output.output_dir = mod_dir
-        save_json(f"{output_dir}/output.json", ce_output.dict())
-        self.message_logger.save(f"{output_dir}/message_log.pkl")
-        if clean_cluster_after_run:
-            remove_all_resources_by_labels(
+    def deploy(
+        self,
+        kube_context: str,
+        project_name: str,
+        skaffold_path: str,
+        k8s_yamls: List[File],
+        spinner_text: str = "Deploying resources"
+    ) -> None:
+        spinner = Spinner(f"##### {spinner_text}...")
+        try:
+            get_backend().deploy(
+                skaffold_path,
                 kube_context,
-                f"project={project_name}",
+                project_name,
                 display_handler=StreamlitDisplayHandler(self.message_logger)
             )
-        return ce_output
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError("K8s resource deployment failed.")
+        spinner.end(f"##### {spinner_text}... Done")
+        POD_RESULT_CACHE.set_deployment(kube_context, k8s_yamls)
+        self.message_logger.write("##### Resource statuses")
+        get_backend().list_resources(
+            kube_context,
+            f"project={project_name}",
+            display_handler=StreamlitDisplayHandler(self.message_logger)
+        )
 
 
 # import os
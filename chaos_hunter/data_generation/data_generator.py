@@ -1,103 +1,205 @@
 import os
 import re
 import glob
-import yaml
-from typing import List
-
-import kubernetes_validate
+from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
 
 from .llm_agents.generate_seed_k8s_manifests import K8sAppGenerationAgent, K8sApplication
 from .llm_agents.weaken_seed_k8s_manifests import K8sAppVulnerabilityAgent, WeakK8sApplication
+from .fingerprints import FingerprintIndex
+from .manifest_validator import ManifestValidator
 from ..utils.wrappers import LLM
 from ..utils.functions import load_json, save_json, write_file, list_to_bullet_points, render_jinja_template, sanitize_filename
-from ..utils.constants import SKAFFOLD_YAML_TEMPLATE_PATH, K8S_VALIDATION_VERSION
+from ..utils.constants import SKAFFOLD_YAML_TEMPLATE_PATH
+
+
+def get_prefix(num_k8s_manifests: int) -> str:
+    return f"sample_{num_k8s_manifests}manifests_id"
+
+def find_sample_dirs(output_dir: str, prefix: str) -> List[str]:
+    """the sample dirs `<prefix><number>` in `output_dir`, sorted by their numbers (other entries are ignored)"""
+    pattern = re.compile(rf"{re.escape(prefix)}(\d+)")
+    sample_dirs = []
+    for d in glob.glob(os.path.join(output_dir, f"{glob.escape(prefix)}*")):
+        if os.path.isdir(d) and (match := pattern.fullmatch(os.path.basename(d))) is not None:
+            sample_dirs.append((int(match.group(1)), d))
+    return [d for _, d in sorted(sample_dirs)]
+
+def save_sample(
+    output_dir: str,
+    prefix: str,
+    number: int,
+    application: K8sApplication | WeakK8sApplication
+) -> str:
+    sample_dir = f"{output_dir}/{prefix}{number}"
+    os.makedirs(sample_dir, exist_ok=True)
+    # save README
+    write_file(f"{sample_dir}/README.md", f"# {application.title}  \n{application.description}")
+    # save project
+    project_dir = f"{sample_dir}/{sanitize_filename(application.title)}"
+    os.makedirs(project_dir, exist_ok=True)
+    # save manifests
+    yaml_paths = []
+    for k8s_manifest in application.k8s_manifests:
+        path = f"{project_dir}/{k8s_manifest.file_name}"
+        os.makedirs(os.path.dirname(path), exist_ok=True) # support cases like "nginx/sample.yaml"
+        write_file(path, k8s_manifest.content)
+        yaml_paths.append(k8s_manifest.file_name)
+    # save skaffold.yaml
+    write_file(
+        f"{project_dir}/skaffold.yaml",
+        render_jinja_template(
+            SKAFFOLD_YAML_TEMPLATE_PATH,
+            name=f"sample{number}",
+            yaml_paths=list_to_bullet_points(yaml_paths)
+        )
+    )
+    save_json(f"{sample_dir}/application_cache.json", application)
+    return sample_dir
 
 
 class DataGenerator:
-    def __init__(self, llm: LLM) -> None:
+    def __init__(
+        self,
+        llm: LLM,
+        num_workers: int = 4,
+        similarity_threshold: float = 0.5,
+        max_prompt_titles: int = 50,
+        validator: Optional[ManifestValidator] = None
+    ) -> None:
         self.llm = llm
         self.data_generation_agent = K8sAppGenerationAgent(llm)
         self.data_vul_agent = K8sAppVulnerabilityAgent(llm)
-    
+        self.num_workers = num_workers
+        self.similarity_threshold = similarity_threshold
+        self.max_prompt_titles = max_prompt_titles
+        self.validator = validator if validator is not None else ManifestValidator()
+
     def generate_dataset(
         self,
         num_samples: int,
         num_k8s_manifests_list: List[int],
         output_dir: str,
         resume: bool = True,
-        max_loop_margin: int = 5
+        max_loop_margin: int = 5,
+        weak_output_dir: Optional[str] = None,
+        max_mod_loop: int = 5
     ) -> List[List[K8sApplication]]:
-        k8s_applications_list = []
+        """
+        Generate samples with `num_workers` concurrent LLM calls.
+        Only the titles of the generated samples are given to the LLM (instead of all their manifests),
+        and duplicates are rejected with a fingerprint index (normalized manifest hashes + MinHash of titles/descriptions).
+        If `weak_output_dir` is given, each sample is weakened as soon as it is validated.
+        """
+        fingerprint_index = FingerprintIndex(similarity_threshold=self.similarity_threshold)
+        k8s_applications: Dict[int, List[K8sApplication]] = {}
         for num_k8s_manifests in num_k8s_manifests_list:
-            k8s_applications = []
-            prefix = f"sample_{num_k8s_manifests}manifests_id"
+            k8s_applications[num_k8s_manifests] = []
             if resume:
-                pattern = os.path.join(output_dir, f"{prefix}*")
-                sample_dirs = glob.glob(pattern)
-                sample_dirs = [d for d in sample_dirs if os.path.isdir(d)]
-                sample_dirs.sort()
-                for sample_dir in sample_dirs:
+                for sample_dir in find_sample_dirs(output_dir, get_prefix(num_k8s_manifests)):
                     k8s_application = K8sApplication(**load_json(f"{sample_dir}/application_cache.json"))
-                    k8s_applications.append(k8s_application)
+                    k8s_applications[num_k8s_manifests].append(k8s_application)
+                    fingerprint_index.add(fingerprint_index.fingerprint(k8s_application))
+        num_trials = {num_k8s_manifests: 0 for num_k8s_manifests in num_k8s_manifests_list}
+        max_loop_count = num_samples + max_loop_margin
 
-            loop_count = 0
-            while (len(k8s_applications) < num_samples):
-                assert loop_count < num_samples + max_loop_margin, f"Exceed max_loop_count: {num_samples + max_loop_margin}"
-                loop_count += 1
+        with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
+            weak_futures: List[Future] = []
+            def weaken(num_k8s_manifests: int, number: int, k8s_application: K8sApplication) -> None:
+                prefix = get_prefix(num_k8s_manifests)
+                if weak_output_dir is None or (resume and os.path.isdir(f"{weak_output_dir}/{prefix}{number}")):
+                    return
+                weak_futures.append(executor.submit(
+                    self.weaken_and_save_sample,
+                    k8s_application=k8s_application,
+                    output_dir=weak_output_dir,
+                    prefix=prefix,
+                    number=number,
+                    max_mod_loop=max_mod_loop
+                ))
+            # weaken resumed samples that have not been weakened yet
+            for num_k8s_manifests, k8s_applications_ in k8s_applications.items():
+                for number, k8s_application in enumerate(k8s_applications_):
+                    weaken(num_k8s_manifests, number, k8s_application)
 
-                #-------------------
-                # generate a sample
-                #-------------------
-                # generate a k8s application
-                k8s_application = self.data_generation_agent.generate_k8s_manifests(
-                    num_k8s_manifests=num_k8s_manifests,
-                    generation_history=k8s_applications
-                )
-                # validate the k8s manifests
-                if len(k8s_application.k8s_manifests) != num_k8s_manifests:
-                    continue
-                is_valid = True
-                for k8s_manifest in k8s_application.k8s_manifests:
-                    k8s_manifest_dict = yaml.safe_load(k8s_manifest.content)
-                    try:
-                        kubernetes_validate.validate(k8s_manifest_dict, K8S_VALIDATION_VERSION)
-                    except kubernetes_validate.ValidationError as e:
-                        is_valid = False
-                        break
-                if not is_valid:
-                    continue
+            pending: Dict[Future, int] = {} # generation future -> num_k8s_manifests
+            def submit_generations() -> None:
+                for num_k8s_manifests in num_k8s_manifests_list:
+                    num_in_flight = sum(n == num_k8s_manifests for n in pending.values())
+                    num_needed = num_samples - len(k8s_applications[num_k8s_manifests]) - num_in_flight
+                    while num_needed > 0 and len(pending) < self.num_workers and num_trials[num_k8s_manifests] < max_loop_count:
+                        future = executor.submit(
+                            self.data_generation_agent.generate_k8s_manifests,
+                            num_k8s_manifests=num_k8s_manifests,
+                            generated_titles=fingerprint_index.get_titles(self.max_prompt_titles)
+                        )
+                        pending[future] = num_k8s_manifests
+                        num_trials[num_k8s_manifests] += 1
+                        num_needed -= 1
+
+            submit_generations()
+            while len(pending) > 0:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    num_k8s_manifests = pending.pop(future)
+                    k8s_application = future.result()
+                    #---------------------
+                    # validate the sample
+                    #---------------------
+                    if len(k8s_application.k8s_manifests) != num_k8s_manifests:
+                        continue
+                    validation_result = self.validator.validate_k8s_manifests(k8s_application.k8s_manifests)
+                    if not validation_result.is_valid:
+                        print(f"Skipped an invalid sample '{k8s_application.title}':\n{validation_result.to_str()}")
+                        continue
+                    fingerprint = fingerprint_index.fingerprint(k8s_application)
+                    if (reason := fingerprint_index.find_duplicate(fingerprint)) is not None:
+                        print(f"Skipped a duplicate sample '{k8s_application.title}': {reason}")
+                        continue
+                    fingerprint_index.add(fingerprint)
+
+                    #-----------------
+                    # save the sample
+                    #-----------------
+                    number = len(k8s_applications[num_k8s_manifests])
+                    save_sample(output_dir, get_prefix(num_k8s_manifests), number, k8s_application)
+                    k8s_applications[num_k8s_manifests].append(k8s_application)
+                    weaken(num_k8s_manifests, number, k8s_application)
+                submit_generations()
+
+            for num_k8s_manifests in num_k8s_manifests_list:
+                assert len(k8s_applications[num_k8s_manifests]) >= num_samples, f"Exceed max_loop_count: {max_loop_count}"
+            for future in weak_futures:
+                future.result()
+        return [k8s_applications[num_k8s_manifests] for num_k8s_manifests in num_k8s_manifests_list]
 
-                #-----------------
-                # save the sample
-                #-----------------
-                number = len(k8s_applications)
-                sample_dir = f"{output_dir}/{prefix}{number}" 
-                os.makedirs(sample_dir, exist_ok=True)
-                # save README
-                write_file(f"{sample_dir}/README.md", f"# {k8s_application.title}  \n{k8s_application.description}")
-                # save project
-                project_dir = f"{sample_dir}/{sanitize_filename(k8s_application.title)}"
-                os.makedirs(project_dir, exist_ok=True)
-                # save manifests
-                yaml_paths = []
-                for k8s_manifest in k8s_application.k8s_manifests:
-                    path = f"{project_dir}/{k8s_manifest.file_name}"
-                    os.makedirs(os.path.dirname(path), exist_ok=True) # support cases like "nginx/sample.yaml"
-                    write_file(path, k8s_manifest.content)
-                    yaml_paths.append(k8s_manifest.file_name)
-                # save skaffold.yaml
-                write_file(
-                    f"{project_dir}/skaffold.yaml",
-                    render_jinja_template(
-                        SKAFFOLD_YAML_TEMPLATE_PATH,
-                        name=f"sample{number}",
-                        yaml_paths=list_to_bullet_points(yaml_paths)
-                    )
-                )
-                save_json(f"{sample_dir}/application_cache.json", k8s_application.dict())
-                k8s_applications.append(k8s_application)
-            k8s_applications_list.append(k8s_applications)
-        return k8s_applications_list
+    def weaken_sample(self, k8s_application: K8sApplication) -> Optional[WeakK8sApplication]:
+        """a weakened version of the sample, or None if it is invalid"""
+        weak_application = self.data_vul_agent.weaken_k8s_manifests(k8s_application)
+        # validate the k8s manifests
+        if len(weak_application.k8s_manifests) != len(k8s_application.k8s_manifests):
+            return None
+        validation_result = self.validator.validate_k8s_manifests(weak_application.k8s_manifests)
+        if not validation_result.is_valid:
+            print(f"Invalid weakened sample '{weak_application.title}':\n{validation_result.to_str()}")
+            return None
+        return weak_application
+
+    def weaken_and_save_sample(
+        self,
+        k8s_application: K8sApplication,
+        output_dir: str,
+        prefix: str,
+        number: int,
+        max_mod_loop: int = 5
+    ) -> Optional[WeakK8sApplication]:
+        """weaken a sample and save it with the same number as the original sample"""
+        for _ in range(max_mod_loop):
+            if (weak_application := self.weaken_sample(k8s_application)) is not None:
+                save_sample(output_dir, prefix, number, weak_application)
+                return weak_application
+        print(f"Failed to weaken '{k8s_application.title}' within {max_mod_loop} trials")
+        return None
 
     def weaken_dataset(
         self,
@@ -111,14 +213,10 @@ class DataGenerator:
         weak_applications_list = []
         for num_k8s_manifests, k8s_applications in zip(num_k8s_manifests_list, k8s_applications_list):
             weak_applications = []
-            prefix = f"sample_{num_k8s_manifests}manifests_id"
+            prefix = get_prefix(num_k8s_manifests)
             if resume:
-                pattern = os.path.join(output_dir, f"{prefix}*")
-                sample_dirs = glob.glob(pattern)
-                sample_dirs = [d for d in sample_dirs if os.path.isdir(d)]
-                sample_dirs.sort()
                 manifest_ids = []
-                for sample_dir in sample_dirs:
+                for sample_dir in find_sample_dirs(output_dir, prefix):
                     weak_application = WeakK8sApplication(**load_json(f"{sample_dir}/application_cache.json"))
                     weak_applications.append(weak_application)
                     match = re.search(rf'{prefix}(\d+)', sample_dir)
@@ -130,54 +228,17 @@ class DataGenerator:
                 not_generated_ids = [i for i in range(num_samples)]
 
             for id in not_generated_ids:
-                k8s_application = k8s_applications[id]
                 #-------------------
                 # weaken the sample
                 #-------------------
-                weak_application = self.data_vul_agent.weaken_k8s_manifests(k8s_application)
-                # validate the k8s manifests
-                is_added_deleted = False
-                if len(weak_application.k8s_manifests) != len(k8s_application.k8s_manifests):
-                    is_added_deleted = True
-                is_valid = True
-                for k8s_manifest in k8s_application.k8s_manifests:
-                    k8s_manifest_dict = yaml.safe_load(k8s_manifest.content)
-                    try:
-                        kubernetes_validate.validate(k8s_manifest_dict, K8S_VALIDATION_VERSION)
-                    except kubernetes_validate.ValidationError as e:
-                        is_valid = False
-                        break
-                if not is_valid or is_added_deleted:
+                weak_application = self.weaken_sample(k8s_applications[id])
+                if weak_application is None:
                     continue
 
                 #------------------------
                 # save the k8s manifests
                 #-------------------------
-                number = len(weak_applications)
-                sample_dir = f"{output_dir}/{prefix}{number}" 
-                os.makedirs(sample_dir, exist_ok=True)
-                # save README
-                write_file(f"{sample_dir}/README.md", f"# {weak_application.title}  \n{weak_application.description}")
-                # save the project
-                project_dir = f"{sample_dir}/{sanitize_filename(weak_application.title)}"
-                os.makedirs(project_dir, exist_ok=True)
-                # save manifests
-                yaml_paths = []
-                for k8s_manifest in weak_application.k8s_manifests:
-                    path = f"{project_dir}/{k8s_manifest.file_name}"
-                    os.makedirs(os.path.dirname(path), exist_ok=True) # support cases like "nginx/sample.yaml"
-                    write_file(path, k8s_manifest.content)
-                    yaml_paths.append(k8s_manifest.file_name)
-                # save skaffold.yaml
-                write_file(
-                    f"{project_dir}/skaffold.yaml",
-                    render_jinja_template(
-                        SKAFFOLD_YAML_TEMPLATE_PATH,
-                        name=f"sample{number}",
-                        yaml_paths=list_to_bullet_points(yaml_paths)
-                    )
-                )
-                save_json(f"{sample_dir}/application_cache.json", weak_application.dict())
+                save_sample(output_dir, prefix, len(weak_applications), weak_application)
                 weak_applications.append(weak_application)
             weak_applications_list.append(weak_applications)
         return weak_applications_list
\ No newline at end of file
@@ -0,0 +1,119 @@
+import re
+import json
+import zlib
+import hashlib
+from typing import List, Optional
+
+import yaml
+import numpy as np
+
+from ..utils.wrappers import BaseModel
+
+
+MINHASH_PRIME = (1 << 61) - 1
+MINHASH_MAX_HASH = (1 << 32) - 1
+SHINGLE_SIZE = 3 # words
+
+
+#---------------
+# normalization
+#---------------
+def normalize_manifest(content: str) -> str:
+    """
+    canonical form of a manifest: comments, formatting, and key order are dropped,
+    and so is `metadata` (names, labels, annotations), so a renamed copy of a resource has the same form
+    """
+    try:
+        docs = [doc for doc in yaml.safe_load_all(content) if doc is not None]
+    except yaml.YAMLError:
+        return re.sub(r"\s+", " ", content).strip()
+    for doc in docs:
+        if isinstance(doc, dict):
+            doc.pop("metadata", None)
+    return json.dumps(docs, sort_keys=True, separators=(",", ":"), default=str)
+
+def hash_manifest(content: str) -> str:
+    return hashlib.sha256(normalize_manifest(content).encode("utf-8")).hexdigest()[:16]
+
+def get_shingles(text: str, size: int = SHINGLE_SIZE) -> List[str]:
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    if len(words) <= size:
+        return [" ".join(words)] if len(words) > 0 else []
+    return [" ".join(words[i:i+size]) for i in range(len(words) - size + 1)]
+
+
+#---------
+# minhash
+#---------
+class MinHasher:
+    """MinHash signatures with `num_perm` universal hash functions, computed for all shingles at once with numpy"""
+    def __init__(self, num_perm: int = 64, seed: int = 0) -> None:
+        rng = np.random.default_rng(seed)
+        # a < 2^29 and x < 2^32 keep a * x + b within uint64
+        self.a = rng.integers(1, 1 << 29, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 29, size=num_perm, dtype=np.uint64)
+        self.num_perm = num_perm
+
+    def signature(self, text: str) -> np.ndarray:
+        shingles = get_shingles(text)
+        if len(shingles) == 0:
+            return np.full(self.num_perm, MINHASH_MAX_HASH, dtype=np.uint64)
+        hashes = np.array([zlib.crc32(shingle.encode("utf-8")) for shingle in shingles], dtype=np.uint64)
+        permuted = (np.outer(hashes, self.a) + self.b) % np.uint64(MINHASH_PRIME) & np.uint64(MINHASH_MAX_HASH)
+        return permuted.min(axis=0)
+
+
+#-------
+# index
+#-------
+class AppFingerprint(BaseModel):
+    title: str
+    manifest_hashes: List[str]
+    minhash: List[int]
+
+class FingerprintIndex:
+    """
+    Compact index of the generated applications for duplicate detection.
+    An application is a duplicate of an indexed one if all of its (normalized) manifests are already indexed,
+    or if the estimated Jaccard similarity of their titles + descriptions reaches `similarity_threshold`.
+    """
+    def __init__(
+        self,
+        num_perm: int = 64,
+        similarity_threshold: float = 0.5
+    ) -> None:
+        self.minhasher = MinHasher(num_perm)
+        self.similarity_threshold = similarity_threshold
+        self.fingerprints: List[AppFingerprint] = []
+        self.manifest_hashes = set()
+        self.signatures = np.empty((0, num_perm), dtype=np.uint64)
+
+    def __len__(self) -> int:
+        return len(self.fingerprints)
+
+    def fingerprint(self, k8s_application) -> AppFingerprint:
+        return AppFingerprint(
+            title=k8s_application.title,
+            manifest_hashes=[hash_manifest(k8s_manifest.content) for k8s_manifest in k8s_application.k8s_manifests],
+            minhash=self.minhasher.signature(f"{k8s_application.title}\n{k8s_application.description}").tolist()
+        )
+
+    def find_duplicate(self, fingerprint: AppFingerprint) -> Optional[str]:
+        """the reason why `fingerprint` is a duplicate, or None if it is not"""
+        if len(fingerprint.manifest_hashes) > 0 and all(h in self.manifest_hashes for h in fingerprint.manifest_hashes):
+            return "all the manifests have already been generated"
+        if len(self.fingerprints) > 0:
+            similarities = (self.signatures == np.array(fingerprint.minhash, dtype=np.uint64)).mean(axis=1)
+            idx = int(similarities.argmax())
+            if similarities[idx] >= self.similarity_threshold:
+                return f"similar to '{self.fingerprints[idx].title}' (similarity: {similarities[idx]:.2f})"
+        return None
+
+    def add(self, fingerprint: AppFingerprint) -> None:
+        self.fingerprints.append(fingerprint)
+        self.manifest_hashes.update(fingerprint.manifest_hashes)
+        self.signatures = np.vstack([self.signatures, np.array(fingerprint.minhash, dtype=np.uint64)])
+
+    def get_titles(self, max_titles: Optional[int] = None) -> List[str]:
+        titles = [fingerprint.title for fingerprint in self.fingerprints]
+        return titles if max_titles is None else titles[-max_titles:]
@@ -1,7 +1,8 @@
-from typing import List
+from typing import List, Optional
 
 from ...utils.wrappers import LLM, LLMBaseModel, LLMField
 from ...utils.llms import build_json_agent
+from ...utils.functions import list_to_bullet_points
 
 
 SYS_GENERATE_K8S_MANIFESTS = """\
@@ -22,6 +23,11 @@ USER_GENERATE_K8S_MANIFESTS = """\
 {generation_history}
 Please generate "{num_k8s_manifests}" manifest(s) that is different from what has been generated so far."""
 
+USER_GENERATE_K8S_MANIFESTS_WITH_TITLES = """\
+# Here are the titles of the previously generated services:
+{generated_titles}
+Please generate "{num_k8s_manifests}" manifest(s) for a service with a different application or theme from the above."""
+
 GENERATION_SUMMARY_TEMPLATE = """\
 ## Sample {sample_id}: {title}
 {description}
@@ -50,8 +56,17 @@ class K8sAppGenerationAgent:
     def generate_k8s_manifests(
         self,
         num_k8s_manifests: int,
-        generation_history: List[K8sApplication]
+        generation_history: List[K8sApplication] = [],
+        generated_titles: Optional[List[str]] = None
     ) -> K8sApplication:
+        """
+        Either the full `generation_history` or only the `generated_titles` is given to the LLM for diversity.
+        The latter keeps the prompt short; duplicates are then filtered by the caller (see fingerprints.py).
+        """
+        if generated_titles is not None:
+            if len(generated_titles) > 0:
+                return self.generate_k8s_manifests_with_titles(num_k8s_manifests, generated_titles)
+            generation_history = []
         is_first_try = len(generation_history) == 0
         if is_first_try:
             chat_messages = [("system", SYS_GENERATE_K8S_MANIFESTS), ("human", USER_GENERATE_FIRST_K8S_MANIFESTS)]
@@ -72,6 +87,23 @@ class K8sAppGenerationAgent:
             })
         return K8sApplication(**k8s_manifests)
 
+    def generate_k8s_manifests_with_titles(
+        self,
+        num_k8s_manifests: int,
+        generated_titles: List[str]
+    ) -> K8sApplication:
+        agent = build_json_agent(
+            llm=self.llm,
+            chat_messages=[("system", SYS_GENERATE_K8S_MANIFESTS), ("human", USER_GENERATE_K8S_MANIFESTS_WITH_TITLES)],
+            pydantic_object=K8sApplication,
+            is_async=False
+        )
+        k8s_manifests = agent.invoke({
+            "num_k8s_manifests": num_k8s_manifests,
+            "generated_titles": list_to_bullet_points(generated_titles)
+        })
+        return K8sApplication(**k8s_manifests)
+
     def generation_history_to_str(self, generation_history: List[K8sApplication]) -> str:
         generation_history_str = ""
         for id, generation in enumerate(generation_history):
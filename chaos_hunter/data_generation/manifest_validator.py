@@ -0,0 +1,181 @@
+import re
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple, Literal, Optional
+
+import yaml
+import jsonschema
+from referencing import Registry, Resource
+from kubernetes_validate import utils as k8s_validate_utils
+
+from ..utils.wrappers import BaseModel
+from ..utils.constants import K8S_VALIDATION_VERSION
+
+
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader) # libyaml-backed if available
+ErrorType = Literal["yaml", "format", "schema_not_found", "schema"]
+
+
+class ManifestError(BaseModel):
+    fname: str
+    doc_index: int # index of the document in a multi-document yaml
+    error_type: ErrorType
+    message: str
+    kind: Optional[str] = None
+    name: Optional[str] = None
+    path: str = "" # e.g., spec.template.spec.containers.0.image
+
+    def to_str(self) -> str:
+        resource = f"{self.kind}/{self.name}" if self.kind is not None else f"document {self.doc_index}"
+        location = f" at `{self.path}`" if self.path != "" else ""
+        return f"{self.fname} ({resource}){location}: {self.message}"
+
+class ValidationResult(BaseModel):
+    fname: str
+    num_docs: int = 0
+    errors: List[ManifestError] = []
+
+    @property
+    def is_valid(self) -> bool:
+        return len(self.errors) == 0
+
+    def to_str(self) -> str:
+        """error list that can be given back to an LLM as feedback"""
+        return "\n".join(f"- {error.to_str()}" for error in self.errors)
+
+
+#---------------
+# schema caches
+#---------------
+@functools.lru_cache(maxsize=None)
+def get_schema_dir(version: str, strict: bool = False) -> str:
+    """same schema resolution as kubernetes_validate.validate: the latest schema not newer than `version`"""
+    version = version[1:] if version.startswith("v") else version
+    desired = k8s_validate_utils.major_minor(version)
+    if desired > k8s_validate_utils.latest_version():
+        raise k8s_validate_utils.VersionNotSupportedError(version=desired)
+    schema_version = [v for v in k8s_validate_utils.all_versions() if k8s_validate_utils.major_minor(v) <= desired][-1]
+    return f"v{schema_version}-local" + ("-strict" if strict else "")
+
+@functools.lru_cache(maxsize=None)
+def get_registry(schema_dir: str) -> Registry:
+    """the (1MB+) definitions of a schema set are loaded once per process"""
+    definitions = k8s_validate_utils.schema_contents(f"kubernetes-json-schema/{schema_dir}/_definitions.json", schema_dir)
+    return Resource.from_contents(definitions) @ Registry()
+
+@functools.lru_cache(maxsize=None)
+def get_validator(schema_dir: str, kind: str, api_version: str) -> Optional[jsonschema.protocols.Validator]:
+    """compiled validator of a kind, or None if there is no schema for it (e.g., a CRD)"""
+    # e.g. rbac.authorization.k8s.io/v1 -> rbac-v1
+    api_version_ = re.sub(r"^([^./]*)(?:\.[^/]*)?/", r"\1-", api_version)
+    try:
+        schema = k8s_validate_utils.schema_contents(f"kubernetes-json-schema/{schema_dir}/{kind.lower()}-{api_version_}.json", schema_dir)
+    except FileNotFoundError:
+        return None
+    registry = Resource.from_contents(schema) @ get_registry(schema_dir)
+    return jsonschema.validators.Draft202012Validator(schema, registry=registry)
+
+
+#------------
+# validation
+#------------
+def validate_manifest(
+    content: str,
+    fname: str = "manifest.yaml",
+    version: str = K8S_VALIDATION_VERSION,
+    strict: bool = False,
+    max_errors_per_doc: int = 5
+) -> ValidationResult:
+    """validate all the documents of a (multi-document) manifest, collecting every error instead of stopping at the first one"""
+    result = ValidationResult(fname=fname)
+    try:
+        docs = list(yaml.load_all(content, Loader=YAML_LOADER))
+    except yaml.YAMLError as e:
+        result.errors.append(ManifestError(fname=fname, doc_index=0, error_type="yaml", message=str(e)))
+        return result
+    schema_dir = get_schema_dir(version, strict)
+    for doc_index, doc in enumerate(docs):
+        if doc is None: # empty documents (e.g., a trailing `---`) are ignored
+            continue
+        result.num_docs += 1
+        if not isinstance(doc, dict) or not isinstance(doc.get("kind"), str) or not isinstance(doc.get("apiVersion"), str):
+            result.errors.append(ManifestError(fname=fname, doc_index=doc_index, error_type="format", message="A resource must be a mapping with `apiVersion` and `kind`."))
+            continue
+        kind, api_version = doc["kind"], doc["apiVersion"]
+        metadata = doc.get("metadata")
+        name = metadata.get("name") if isinstance(metadata, dict) else None
+        validator = get_validator(schema_dir, kind, api_version)
+        if validator is None:
+            result.errors.append(ManifestError(
+                fname=fname,
+                doc_index=doc_index,
+                error_type="schema_not_found",
+                message=f"No schema for kind {kind} with apiVersion {api_version} in Kubernetes {k8s_validate_utils.major_minor(version.lstrip('v'))}.",
+                kind=kind,
+                name=name
+            ))
+            continue
+        errors = sorted(validator.iter_errors(doc), key=lambda e: list(e.path))[:max_errors_per_doc]
+        for error in errors:
+            result.errors.append(ManifestError(
+                fname=fname,
+                doc_index=doc_index,
+                error_type="schema",
+                message=error.message,
+                kind=kind,
+                name=name,
+                path=".".join(str(item) for item in error.path)
+            ))
+    return result
+
+def validate_manifest_args(args: Tuple[str, str, str, bool]) -> ValidationResult:
+    return validate_manifest(*args)
+
+
+class ManifestValidator:
+    """
+    Validates manifests against the schema set of `version`.
+    Validators are compiled once per kind (and per process), and batches of `pool_threshold` manifests or more
+    are validated across a process pool of `num_workers` processes, which is created on first use and reused.
+    """
+    def __init__(
+        self,
+        version: str = K8S_VALIDATION_VERSION,
+        strict: bool = False,
+        num_workers: Optional[int] = None,
+        pool_threshold: int = 64
+    ) -> None:
+        self.version = version
+        self.strict = strict
+        self.num_workers = num_workers
+        self.pool_threshold = pool_threshold
+        self.pool = None
+
+    def validate(self, content: str, fname: str = "manifest.yaml") -> ValidationResult:
+        return validate_manifest(content, fname, self.version, self.strict)
+
+    def validate_batch(self, manifests: List[Tuple[str, str]]) -> List[ValidationResult]:
+        """results of (fname, content) pairs, in the same order"""
+        if len(manifests) < self.pool_threshold or self.num_workers == 1:
+            return [self.validate(content, fname) for fname, content in manifests]
+        if self.pool is None:
+            # spawn instead of fork, as the callers (e.g., DataGenerator) run threads
+            self.pool = ProcessPoolExecutor(max_workers=self.num_workers, mp_context=multiprocessing.get_context("spawn"))
+        args = [(content, fname, self.version, self.strict) for fname, content in manifests]
+        chunksize = max(1, len(args) // (4 * self.pool._max_workers))
+        return list(self.pool.map(validate_manifest_args, args, chunksize=chunksize))
+
+    def validate_k8s_manifests(self, k8s_manifests: list) -> ValidationResult:
+        """validate the manifests of a (weak) K8s application; errors of all the files are merged into one result"""
+        results = self.validate_batch([(k8s_manifest.file_name, k8s_manifest.content) for k8s_manifest in k8s_manifests])
+        return ValidationResult(
+            fname=", ".join(result.fname for result in results),
+            num_docs=sum(result.num_docs for result in results),
+            errors=[error for result in results for error in result.errors]
+        )
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
@@ -0,0 +1,171 @@
+import os
+import re
+import glob
+import mmap
+import hashlib
+from typing import List, Dict, Tuple, Iterator, Optional
+
+import numpy as np
+
+from ..preprocessing.preprocessor import ChaosHunterInput
+from ..utils.schemas import File
+from ..utils.wrappers import BaseModel
+from ..utils.serialization import save, load_model
+
+
+INDEX_FNAME = "dataset_index.json"
+BLOB_FNAME = "dataset_blob.bin"
+SAMPLE_DIR_PATTERN = r"sample(.+)"
+
+
+def is_binary_array(content: bytes | memoryview) -> bool:
+    """vectorized version of `b'\\0' in content or any(byte > 127 for byte in content)`"""
+    data = np.frombuffer(content, dtype=np.uint8)
+    # with uint8 wrap-around, 0 becomes 255, so a single comparison catches both NUL and non-ASCII bytes
+    return bool(np.any((data - np.uint8(1)) >= 127))
+
+
+class FileEntry(BaseModel):
+    fname: str # relative to the sample dir
+    offset: int
+    size: int
+    sha256: str
+    binary: bool
+
+class SampleEntry(BaseModel):
+    suffix: str
+    dir_name: str
+    files: List[FileEntry]
+
+class DatasetIndex(BaseModel):
+    sample_dirs: List[str]
+    blob_size: int
+    samples: List[SampleEntry]
+
+
+class PackedDataset:
+    """
+    Evaluation dataset packed into an index and a blob.
+    The index (sample -> files with offsets, sizes, hashes, and text/binary flags) is computed once by `build`;
+    file bodies are stored (deduplicated) in a single blob that is memory-mapped, so opening a dataset only
+    reads the index, and a sample's files are read when the sample is iterated.
+    """
+    def __init__(self, dataset_dir: str, index: Optional[DatasetIndex] = None) -> None:
+        self.dataset_dir = dataset_dir
+        self.index = index if index is not None else load_model(DatasetIndex, f"{dataset_dir}/{INDEX_FNAME}")
+        self.blob_file = None
+        self.blob = b""
+        if self.index.blob_size > 0:
+            self.blob_file = open(f"{dataset_dir}/{BLOB_FNAME}", "rb")
+            self.blob = mmap.mmap(self.blob_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @classmethod
+    def open(cls, dataset_dir: str, rebuild: bool = False) -> "PackedDataset":
+        """open the packed dataset, (re)building it if missing, stale, or requested"""
+        index_path = f"{dataset_dir}/{INDEX_FNAME}"
+        index = load_model(DatasetIndex, index_path) if not rebuild and os.path.isfile(index_path) else None
+        if index is None or index.sample_dirs != cls.find_sample_dirs(dataset_dir):
+            index = cls.build(dataset_dir)
+        return cls(dataset_dir, index)
+
+    @staticmethod
+    def find_sample_dirs(dataset_dir: str) -> List[str]:
+        sample_dirs = [d for d in glob.glob(os.path.join(dataset_dir, "sample*")) if os.path.isdir(d)]
+        return sorted(os.path.basename(d) for d in sample_dirs)
+
+    @classmethod
+    def is_stale(cls, dataset_dir: str) -> bool:
+        """whether the index is missing or the set of samples has changed since it was built"""
+        index_path = f"{dataset_dir}/{INDEX_FNAME}"
+        if not os.path.isfile(index_path):
+            return True
+        return load_model(DatasetIndex, index_path).sample_dirs != cls.find_sample_dirs(dataset_dir)
+
+    @classmethod
+    def build(cls, dataset_dir: str) -> DatasetIndex:
+        sample_dirs = cls.find_sample_dirs(dataset_dir)
+        samples = []
+        offsets: Dict[str, int] = {} # sha256 -> offset of a body already in the blob
+        binaries: Dict[str, bool] = {}
+        blob_size = 0
+        tmp_blob_path = f"{dataset_dir}/{BLOB_FNAME}.tmp"
+        with open(tmp_blob_path, "wb") as blob:
+            for dir_name in sample_dirs:
+                match = re.search(SAMPLE_DIR_PATTERN, dir_name)
+                assert match is not None, f"Invalid sample dir: {dir_name}"
+                sample_dir = f"{dataset_dir}/{dir_name}"
+                files = []
+                for root, dirs, fnames in os.walk(sample_dir):
+                    dirs.sort()
+                    for fname in sorted(fnames):
+                        fpath = os.path.join(root, fname)
+                        if not os.path.isfile(fpath):
+                            continue
+                        with open(fpath, "rb") as f:
+                            content = f.read()
+                        sha256 = hashlib.sha256(content).hexdigest()
+                        if sha256 not in offsets:
+                            offsets[sha256] = blob_size
+                            binaries[sha256] = is_binary_array(content)
+                            blob.write(content)
+                            blob_size += len(content)
+                        files.append(FileEntry(
+                            fname=os.path.relpath(fpath, sample_dir),
+                            offset=offsets[sha256],
+                            size=len(content),
+                            sha256=sha256,
+                            binary=binaries[sha256]
+                        ))
+                samples.append(SampleEntry(suffix=match.group(1), dir_name=dir_name, files=files))
+        os.replace(tmp_blob_path, f"{dataset_dir}/{BLOB_FNAME}")
+        index = DatasetIndex(sample_dirs=sample_dirs, blob_size=blob_size, samples=samples)
+        save(f"{dataset_dir}/{INDEX_FNAME}", index, indent=False)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.index.samples)
+
+    def __iter__(self) -> Iterator[Tuple[str, ChaosHunterInput]]:
+        return self.iter_samples()
+
+    def iter_samples(self, ce_instructions: Optional[str] = None) -> Iterator[Tuple[str, ChaosHunterInput]]:
+        """(suffix, input) of each sample; a sample's files are read only when it is reached"""
+        for sample in self.index.samples:
+            yield sample.suffix, self.load_sample(sample, ce_instructions)
+
+    def get_sample(self, suffix: str) -> Optional[ChaosHunterInput]:
+        for sample in self.index.samples:
+            if sample.suffix == suffix:
+                return self.load_sample(sample)
+        return None
+
+    def read_file(self, entry: FileEntry) -> str | bytes:
+        content = self.blob[entry.offset:entry.offset+entry.size]
+        return content if entry.binary else content.decode("utf-8")
+
+    def load_sample(
+        self,
+        sample: SampleEntry,
+        ce_instructions: Optional[str] = None
+    ) -> ChaosHunterInput:
+        work_dir = f"{self.dataset_dir}/{sample.dir_name}"
+        skaffold_yaml = None
+        files = []
+        for entry in sample.files:
+            file = File(
+                path=f"{work_dir}/{entry.fname}",
+                content=self.read_file(entry),
+                work_dir=work_dir,
+                fname=entry.fname
+            )
+            if os.path.basename(entry.fname) == "skaffold.yaml":
+                skaffold_yaml = file
+            else:
+                files.append(file)
+        assert skaffold_yaml is not None, f"skaffold.yaml is not found in {work_dir}"
+        return ChaosHunterInput(skaffold_yaml=skaffold_yaml, files=files, ce_instructions=ce_instructions)
+
+    def close(self) -> None:
+        if self.blob_file is not None:
+            self.blob.close()
+            self.blob_file.close()
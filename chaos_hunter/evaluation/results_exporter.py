@@ -0,0 +1,225 @@
+import os
+import re
+import glob
+from typing import List, Dict, Tuple, Literal, Optional
+
+import pandas as pd
+
+from ..utils.llms import get_pricing
+from ..utils.serialization import load
+
+
+TableFormat = Literal["parquet", "arrow", "csv"]
+TABLE_NAMES = ["runs", "phases", "reviews"]
+PHASE_GROUPS = {
+    "preprocess": "preprocess",
+    "hypothesis": "hypothesis",
+    "experiment_plan": "experiment",
+    "experiment_execution": "experiment",
+    "experiment_replan": "experiment",
+    "analysis": "analysis",
+    "improvement": "improvement",
+    "summary": "summary"
+}
+REVIEW_ASPECTS = ["overall", "hypothesis", "experiment", "analysis", "improvement"]
+RUN_DIR_PATTERN = r"(?P<model>.+)-(?P<dataset>[^-]+)-(?P<index>\d+)$" # e.g., gpt-4o-2024-08-06-nginx-1
+RESULT_FNAME_PATTERN = r"result(?P<suffix>.+)\.json$" # results of evaluate_quantitative_metrics.py
+
+
+#-----------
+# discovery
+#-----------
+def find_runs(root_dir: str) -> List[Tuple[str, str]]:
+    """
+    (run id, path of its ChaosHunterOutput) of the runs under `root_dir`.
+    Both `<run_dir>/outputs/output.json` and `result<suffix>.json` (with its run dir `output<suffix>`) are supported;
+    the latter is preferred as it is also saved for failed runs.
+    """
+    runs: Dict[str, str] = {}
+    for path in sorted(glob.glob(f"{root_dir}/**/outputs/output.json", recursive=True)):
+        run_dir = os.path.dirname(os.path.dirname(path))
+        runs[os.path.relpath(run_dir, root_dir)] = path
+    for path in sorted(glob.glob(f"{root_dir}/**/result*.json", recursive=True)):
+        if (match := re.search(RESULT_FNAME_PATTERN, os.path.basename(path))) is not None:
+            run_dir = f"{os.path.dirname(path)}/output{match.group('suffix')}"
+            runs[os.path.relpath(run_dir, root_dir)] = path
+    return sorted(runs.items())
+
+def get_labels(run_id: str, model: Optional[str], dataset: Optional[str]) -> Tuple[str, str]:
+    """model/dataset labels given explicitly, or parsed from the run dir name"""
+    if model is None or dataset is None:
+        for name in reversed(run_id.split(os.sep)):
+            if (match := re.search(RUN_DIR_PATTERN, name)) is not None:
+                model = model or match.group("model")
+                dataset = dataset or match.group("dataset")
+                break
+    return model or "unknown", dataset or "unknown"
+
+
+#------------
+# flattening
+#------------
+def iter_logs(logs: list) -> List[dict]:
+    return [log_ for log in logs for log_ in (log if isinstance(log, list) else [log])]
+
+def sum_tokens(logs: list) -> Tuple[int, int, int]:
+    usages = [log["token_usage"] for log in iter_logs(logs)]
+    return (
+        sum(usage["input_tokens"] for usage in usages),
+        sum(usage["output_tokens"] for usage in usages),
+        sum(usage["total_tokens"] for usage in usages)
+    )
+
+def get_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    if (pricing := get_pricing(model)) is None:
+        return float("nan")
+    return pricing["input"] * input_tokens + pricing["output"] * output_tokens
+
+def flatten_run(
+    run_id: str,
+    output: dict,
+    model: str,
+    dataset: str
+) -> Tuple[dict, List[dict]]:
+    """a row of the runs table and rows of the phases table for a ChaosHunterOutput (as loaded from JSON)"""
+    run_time = output.get("run_time", {})
+    logs = output.get("logs", {})
+    ce_cycle = output.get("ce_cycle", {})
+    processed_data = ce_cycle.get("processed_data") or {}
+    phase_rows = []
+    for phase in PHASE_GROUPS:
+        if phase not in run_time and phase not in logs:
+            continue
+        phase_time = run_time.get(phase, 0.)
+        input_tokens, output_tokens, total_tokens = sum_tokens(logs.get(phase, []))
+        phase_rows.append({
+            "run_id": run_id,
+            "model": model,
+            "dataset": dataset,
+            "phase": phase,
+            "phase_group": PHASE_GROUPS[phase],
+            "run_time": sum(phase_time) if isinstance(phase_time, list) else phase_time,
+            "num_calls": len(phase_time) if isinstance(phase_time, list) else 1,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": total_tokens,
+            "cost": get_cost(model, input_tokens, output_tokens)
+        })
+    input_tokens = sum(row["input_tokens"] for row in phase_rows)
+    output_tokens = sum(row["output_tokens"] for row in phase_rows)
+    run_row = {
+        "run_id": run_id,
+        "model": model,
+        "dataset": dataset,
+        "num_manifests": len(processed_data.get("k8s_yamls", [])),
+        "completes_preprocess": bool(processed_data),
+        "completes_hypothesis": ce_cycle.get("hypothesis") is not None,
+        "completes_reconfig": bool(ce_cycle.get("completes_reconfig", False)),
+        "completes_summary": ce_cycle.get("summary", "") != "",
+        "completes_cycle": "cycle" in run_time,
+        "conducts_reconfig": bool(ce_cycle.get("conducts_reconfig", False)),
+        "num_experiments": len(ce_cycle.get("result_history", [])),
+        "num_reconfigs": len(ce_cycle.get("reconfig_history", [])),
+        "run_time": run_time.get("cycle", float("nan")),
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "total_tokens": sum(row["total_tokens"] for row in phase_rows),
+        "cost": get_cost(model, input_tokens, output_tokens)
+    }
+    return run_row, phase_rows
+
+def flatten_reviews(
+    run_id: str,
+    run_dir: str,
+    model: str,
+    dataset: str
+) -> List[dict]:
+    rows = []
+    for path in sorted(glob.glob(f"{run_dir}/reviews/*_review*.json")):
+        match = re.search(r"(?P<reviewer>.+)_review(?P<index>\d+)\.json$", os.path.basename(path))
+        if match is None:
+            continue
+        review = load(path)
+        for aspect in REVIEW_ASPECTS:
+            if isinstance(review.get(aspect), dict) and "score" in review[aspect]:
+                rows.append({
+                    "run_id": run_id,
+                    "model": model,
+                    "dataset": dataset,
+                    "reviewer": match.group("reviewer"),
+                    "review_index": int(match.group("index")),
+                    "aspect": aspect,
+                    "score": float(review[aspect]["score"])
+                })
+    return rows
+
+
+#--------
+# export
+#--------
+def collect_tables(
+    root_dir: str,
+    model: Optional[str] = None,
+    dataset: Optional[str] = None
+) -> Dict[str, pd.DataFrame]:
+    """runs/phases/reviews tables of the evaluation results under `root_dir`"""
+    run_rows, phase_rows, review_rows = [], [], []
+    for run_id, path in find_runs(root_dir):
+        model_, dataset_ = get_labels(run_id, model, dataset)
+        run_row, phase_rows_ = flatten_run(run_id, load(path), model_, dataset_)
+        run_rows.append(run_row)
+        phase_rows += phase_rows_
+        review_rows += flatten_reviews(run_id, f"{root_dir}/{run_id}", model_, dataset_)
+    return {
+        "runs": pd.DataFrame(run_rows),
+        "phases": pd.DataFrame(phase_rows),
+        "reviews": pd.DataFrame(review_rows, columns=["run_id", "model", "dataset", "reviewer", "review_index", "aspect", "score"])
+    }
+
+def concat_tables(tables_list: List[Dict[str, pd.DataFrame]]) -> Dict[str, pd.DataFrame]:
+    return {name: pd.concat([tables[name] for tables in tables_list], ignore_index=True) for name in TABLE_NAMES}
+
+def get_pyarrow():
+    """pyarrow is only imported for Parquet/Arrow tables (its wheels may require another numpy than the one installed)"""
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError(f"pyarrow is required for Parquet/Arrow tables (pip install pyarrow, a version compatible with the installed numpy), or use format='csv': {e}")
+    return pyarrow
+
+def save_tables(
+    tables: Dict[str, pd.DataFrame],
+    output_dir: str,
+    format: TableFormat = "csv"
+) -> List[str]:
+    """write the tables as CSV, Parquet, or Arrow IPC (feather) files; Parquet/Arrow require pyarrow"""
+    if format in ["parquet", "arrow"]:
+        get_pyarrow()
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for name, table in tables.items():
+        if format == "parquet":
+            table.to_parquet(path := f"{output_dir}/{name}.parquet", index=False)
+        elif format == "arrow":
+            table.to_feather(path := f"{output_dir}/{name}.arrow")
+        elif format == "csv":
+            table.to_csv(path := f"{output_dir}/{name}.csv", index=False)
+        else:
+            raise TypeError(f"Invalid table format: {format}")
+        paths.append(path)
+    return paths
+
+def load_tables(table_dir: str) -> Dict[str, pd.DataFrame]:
+    tables = {}
+    for name in TABLE_NAMES:
+        if os.path.isfile(path := f"{table_dir}/{name}.parquet"):
+            get_pyarrow()
+            tables[name] = pd.read_parquet(path)
+        elif os.path.isfile(path := f"{table_dir}/{name}.arrow"):
+            get_pyarrow()
+            tables[name] = pd.read_feather(path)
+        elif os.path.isfile(path := f"{table_dir}/{name}.csv"):
+            tables[name] = pd.read_csv(path)
+        else:
+            raise FileNotFoundError(f"No {name} table in {table_dir}")
+    return tables
@@ -0,0 +1,128 @@
+from typing import List, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def bootstrap_ci(
+    values: np.ndarray,
+    num_resamples: int = 2000,
+    alpha: float = 0.05,
+    seed: int = 0
+) -> Tuple[float, float]:
+    """percentile bootstrap CI of the mean; all resamples are drawn and averaged at once"""
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return float("nan"), float("nan")
+    rng = np.random.default_rng(seed)
+    means = values[rng.integers(0, len(values), size=(num_resamples, len(values)))].mean(axis=1)
+    return float(np.quantile(means, alpha / 2)), float(np.quantile(means, 1 - alpha / 2))
+
+def add_bootstrap_ci(
+    summary: pd.DataFrame,
+    table: pd.DataFrame,
+    by: List[str],
+    column: str,
+    prefix: str,
+    **kwargs
+) -> pd.DataFrame:
+    cis = {
+        key if isinstance(key, tuple) else (key,): bootstrap_ci(group[column].to_numpy(), **kwargs)
+        for key, group in table.groupby(by, sort=True)
+    }
+    index = [key if isinstance(key, tuple) else (key,) for key in summary.index]
+    summary[f"{prefix}_ci_low"] = [cis[key][0] for key in index]
+    summary[f"{prefix}_ci_high"] = [cis[key][1] for key in index]
+    return summary
+
+def percentile(q: float):
+    def percentile_(values: pd.Series) -> float:
+        return values.quantile(q)
+    percentile_.__name__ = f"p{int(q * 100)}"
+    return percentile_
+
+def sum_or_nan(values: pd.Series) -> float:
+    """sum that stays NaN when all the values are unknown (e.g., cost of a model without pricing)"""
+    return values.sum(min_count=1)
+
+
+#---------
+# queries
+#---------
+def summarize_runs(
+    runs: pd.DataFrame,
+    by: List[str] = ["model", "dataset"],
+    **kwargs
+) -> pd.DataFrame:
+    """success/reconfiguration rates (with bootstrap CIs), latency, tokens, and cost per group of runs"""
+    runs = runs.assign(success=runs["completes_cycle"].astype(float), reconfig=runs["conducts_reconfig"].astype(float))
+    summary = runs.groupby(by, sort=True).agg(
+        num_runs=("run_id", "size"),
+        success_rate=("success", "mean"),
+        reconfig_rate=("reconfig", "mean"),
+        mean_reconfigs=("num_reconfigs", "mean"),
+        mean_time=("run_time", "mean"),
+        p50_time=("run_time", percentile(0.5)),
+        p90_time=("run_time", percentile(0.9)),
+        mean_input_tokens=("input_tokens", "mean"),
+        mean_output_tokens=("output_tokens", "mean"),
+        mean_cost=("cost", "mean"),
+        total_cost=("cost", sum_or_nan)
+    )
+    return add_bootstrap_ci(summary, runs, by, "success", "success_rate", **kwargs)
+
+def summarize_phases(
+    phases: pd.DataFrame,
+    by: List[str] = ["model", "phase_group"],
+    percentiles: List[float] = [0.5, 0.9, 0.95]
+) -> pd.DataFrame:
+    """latency percentiles, tokens, and cost per phase (phases of a run in the same group are summed first)"""
+    per_run = phases.groupby(["run_id", *by], sort=False)[["run_time", "input_tokens", "output_tokens", "total_tokens", "cost"]].sum(min_count=1).reset_index()
+    return per_run.groupby(by, sort=True).agg(
+        num_runs=("run_id", "nunique"),
+        mean_time=("run_time", "mean"),
+        **{f"p{int(q * 100)}_time": ("run_time", percentile(q)) for q in percentiles},
+        mean_input_tokens=("input_tokens", "mean"),
+        mean_output_tokens=("output_tokens", "mean"),
+        mean_cost=("cost", "mean")
+    )
+
+def summarize_scores(
+    reviews: pd.DataFrame,
+    by: List[str] = ["model", "dataset", "aspect"],
+    **kwargs
+) -> pd.DataFrame:
+    """review score mean/std with bootstrap CIs per group"""
+    summary = reviews.groupby(by, sort=True).agg(
+        num_reviews=("score", "size"),
+        mean_score=("score", "mean"),
+        std_score=("score", "std"),
+        median_score=("score", "median")
+    )
+    return add_bootstrap_ci(summary, reviews, by, "score", "score", **kwargs)
+
+def score_distribution(
+    reviews: pd.DataFrame,
+    by: List[str] = ["model", "aspect"],
+    normalize: bool = True
+) -> pd.DataFrame:
+    """share (or count) of each score per group; columns are the score values"""
+    counts = reviews.groupby([*by, "score"], sort=True).size().unstack("score", fill_value=0)
+    return counts.div(counts.sum(axis=1), axis=0) if normalize else counts
+
+def with_run_columns(table: pd.DataFrame, runs: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+    """add columns of the runs table (e.g., num_manifests) that `table` does not have"""
+    missing = [column for column in columns if column not in table.columns]
+    if len(missing) == 0:
+        return table
+    return table.merge(runs[["run_id", *missing]], on="run_id", how="left")
+
+def summarize(tables: Dict[str, pd.DataFrame], by: List[str] = ["model", "dataset"]) -> Dict[str, pd.DataFrame]:
+    summaries = {
+        "runs": summarize_runs(tables["runs"], by=by),
+        "phases": summarize_phases(with_run_columns(tables["phases"], tables["runs"], by), by=[*by, "phase_group"])
+    }
+    if len(tables["reviews"]) > 0:
+        summaries["scores"] = summarize_scores(with_run_columns(tables["reviews"], tables["runs"], by), by=[*by, "aspect"])
+    return summaries
@@ -0,0 +1,142 @@
+from collections import Counter, defaultdict
+from typing import List, Dict, Literal, Optional
+
+from ...utils.wrappers import BaseModel
+from ...utils.functions import add_timeunit, parse_time
+
+
+class NameConfilictAvoider:
+    def __init__(self):
+        self.name_counter = Counter()
+
+    def avoid_name_confilict(self, workflow_name: str) -> str:
+        self.name_counter[workflow_name] += 1
+        if self.name_counter[workflow_name] == 1:
+            return workflow_name
+        else:
+            return f"{workflow_name}{self.name_counter[workflow_name]}"
+
+
+class TaskInterval(BaseModel):
+    workflow_name: str
+    start: int    # offset from the start of the phase (sec)
+    duration: int # intended running time of the task (sec)
+    deadline: int # deadline of the task node (sec)
+
+    @property
+    def end(self) -> int:
+        return self.start + self.deadline
+
+class ScheduleNode(BaseModel):
+    template_type: Literal["Parallel", "Serial", "Suspend"]
+    name: str
+    deadline: int
+    children: List[str] = []
+
+class PhaseSchedule(BaseModel):
+    template_type: Literal["Parallel", "Serial"]
+    deadline: int # makespan of the phase (sec)
+    children: List[str]
+    nodes: List[ScheduleNode] # intermediate nodes (grandchildren of the phase)
+    tasks: List[TaskInterval]
+    budget: Optional[int] = None
+
+    def over_budget_tasks(self) -> List[TaskInterval]:
+        if self.budget is None:
+            return []
+        return [task for task in self.tasks if task.start + task.duration > self.budget]
+
+    def fits_budget(self) -> bool:
+        return len(self.over_budget_tasks()) == 0
+
+    def to_groundchildren_args(self) -> List[tuple]:
+        """arguments of Plan2WorkflowConverter.get_groundchild_str"""
+        args = []
+        for node in self.nodes:
+            if node.template_type == "Suspend":
+                args.append((node.template_type, node.name, add_timeunit(node.deadline)))
+            else:
+                args.append((node.template_type, node.name, add_timeunit(node.deadline), node.children))
+        return args
+
+
+class SchedulePacker:
+    """
+    Packs the tasks of a phase into a Serial/Parallel/Suspend tree.
+    Every task starts exactly at its grace period: tasks sharing the same offset are
+    grouped under one Suspend, and all groups run in parallel from the phase start.
+    With fixed start offsets, the makespan max(start + deadline) is a lower bound of
+    any valid tree, and this tree achieves it.
+    """
+    def __init__(self, phase_name: str):
+        self.prefix = phase_name.replace("_", "-")
+        self.name_confilict_avoider = NameConfilictAvoider()
+
+    def pack(
+        self,
+        tasks: List[dict],
+        budget: Optional[str] = None
+    ) -> PhaseSchedule:
+        intervals = [self.to_interval(task) for task in tasks]
+        budget_sec = parse_time(budget) if budget is not None else None
+        if len(intervals) == 0:
+            return PhaseSchedule(template_type="Serial", deadline=0, children=[], nodes=[], tasks=[], budget=budget_sec)
+
+        # group tasks by start offset (the order of the plan is kept within each group)
+        groups: Dict[int, List[TaskInterval]] = defaultdict(list)
+        for interval in intervals:
+            groups[interval.start].append(interval)
+
+        children = []
+        nodes = []
+        for start in sorted(groups.keys()):
+            group = groups[start]
+            group_deadline = max(task.deadline for task in group)
+            if start == 0:
+                children.extend(task.workflow_name for task in group)
+                continue
+            serial_name = self.get_name("suspend-workflow")
+            suspend_name = self.get_name("suspend")
+            children.append(serial_name)
+            if len(group) == 1:
+                nodes.append(ScheduleNode(
+                    template_type="Serial",
+                    name=serial_name,
+                    deadline=start + group_deadline,
+                    children=[suspend_name, group[0].workflow_name]
+                ))
+                nodes.append(ScheduleNode(template_type="Suspend", name=suspend_name, deadline=start))
+            else:
+                parallel_name = self.get_name("parallel-workflows")
+                nodes.append(ScheduleNode(
+                    template_type="Serial",
+                    name=serial_name,
+                    deadline=start + group_deadline,
+                    children=[suspend_name, parallel_name]
+                ))
+                nodes.append(ScheduleNode(template_type="Suspend", name=suspend_name, deadline=start))
+                nodes.append(ScheduleNode(
+                    template_type="Parallel",
+                    name=parallel_name,
+                    deadline=group_deadline,
+                    children=[task.workflow_name for task in group]
+                ))
+        return PhaseSchedule(
+            template_type="Parallel",
+            deadline=max(interval.end for interval in intervals),
+            children=children,
+            nodes=nodes,
+            tasks=intervals,
+            budget=budget_sec
+        )
+
+    def to_interval(self, task: dict) -> TaskInterval:
+        return TaskInterval(
+            workflow_name=task["workflow_name"],
+            start=parse_time(task["grace_period"]),
+            duration=parse_time(task["duration"]),
+            deadline=parse_time(task["deadline"])
+        )
+
+    def get_name(self, suffix: str) -> str:
+        return self.name_confilict_avoider.avoid_name_confilict(f"{self.prefix}-{suffix}")
@@ -0,0 +1,234 @@
+import re
+import math
+from typing import List, Dict, Literal, Optional
+
+import yaml
+
+from ...utils.wrappers import BaseModel
+from ...utils.functions import add_timeunit, parse_time
+
+
+COMPOSITE_TYPES = ["Serial", "Parallel"]
+DURATION_ARG_PATTERN = r"--duration[\s=]+([0-9]+[smh0-9]*)"
+
+class TimelineEntry(BaseModel):
+    name: str
+    template_type: str
+    depth: int
+    parent: Optional[str]
+    start: int
+    end: int          # end time after deadlines are applied
+    expected_end: int # end time if no deadline stopped the node
+    deadline_end: Optional[int]
+    cut_by: Optional[str] = None # the node whose deadline stops this node before its expected end
+    critical: bool = False
+
+    @property
+    def is_leaf(self) -> bool:
+        return self.template_type not in COMPOSITE_TYPES
+
+    @property
+    def overrun(self) -> bool:
+        return self.cut_by is not None
+
+class TimelineViolation(BaseModel):
+    kind: Literal["overrun", "budget"]
+    task: str
+    message: str
+
+class WorkflowTimeline(BaseModel):
+    workflow_name: str
+    makespan: int
+    entries: List[TimelineEntry]
+    critical_path: List[str]
+    violations: List[TimelineViolation] = []
+
+    def has_overruns(self) -> bool:
+        return any(violation.kind == "overrun" for violation in self.violations)
+
+    def is_valid(self) -> bool:
+        return len(self.violations) == 0
+
+    def to_violation_str(self) -> str:
+        return "\n".join(f"- {violation.message}" for violation in self.violations)
+
+    def get_required_time(self, node_name: str) -> int:
+        """time from the start of a node (e.g., a phase) until all its tasks are expected to end"""
+        entries = {entry.name: entry for entry in self.entries}
+        if node_name not in entries:
+            return 0
+        node = entries[node_name]
+        required_time = 0
+        parents = {node_name}
+        for entry in self.entries: # entries are in DFS order
+            if entry.parent in parents:
+                parents.add(entry.name)
+                if entry.is_leaf and entry.template_type != "Suspend":
+                    required_time = max(required_time, entry.expected_end - node.start)
+        return required_time
+
+    def to_json_gantt(self) -> dict:
+        return {
+            "workflow_name": self.workflow_name,
+            "makespan": self.makespan,
+            "critical_path": self.critical_path,
+            "tasks": [{**entry.dict(), "overrun": entry.overrun} for entry in self.entries],
+            "violations": [violation.dict() for violation in self.violations]
+        }
+
+    def to_ascii_gantt(self, width: int = 60) -> str:
+        """'#': running, '*': running on the critical path, '!': cut by a deadline, '-': composite node"""
+        label_width = max([len(entry.name) + 2*entry.depth for entry in self.entries] + [4])
+        scale = max(self.makespan, 1) / width
+        lines = [f"{'task':<{label_width}} |{'0':<{width//2}}{add_timeunit(self.makespan):>{width - width//2}}|"]
+        for entry in self.entries:
+            begin = min(int(entry.start / scale), width)
+            end = min(max(math.ceil(entry.end / scale), begin + (entry.end > entry.start)), width)
+            if not entry.is_leaf:
+                mark = "-"
+            elif entry.critical:
+                mark = "*"
+            else:
+                mark = "#"
+            bar = " " * begin + mark * (end - begin)
+            if entry.overrun:
+                bar += "!"
+            label = "  " * entry.depth + entry.name
+            lines.append(f"{label:<{label_width}} |{bar:<{width}}| {add_timeunit(entry.start)} - {add_timeunit(entry.end)}")
+        return "\n".join(lines)
+
+
+class WorkflowSimulator:
+    """
+    Offline simulator of a Chaos Mesh Workflow.
+    Task nodes are expected to run for their `--duration` argument, and other
+    leaves (Suspend, chaos nodes, StatusCheck, ...) run until their deadline.
+    """
+    def simulate(
+        self,
+        workflow: str | dict,
+        budgets: Dict[str, str] = {}
+    ) -> WorkflowTimeline:
+        if isinstance(workflow, str):
+            workflow = yaml.safe_load(workflow)
+        spec = workflow["spec"]
+        self.templates = {template["name"]: template for template in spec["templates"]}
+        self.entries: List[TimelineEntry] = []
+        root = self.simulate_node(spec["entry"], start=0, depth=0, parent=None, cutoff=math.inf, cutoff_owner=None)
+        critical_path = self.get_critical_path(root)
+        for entry in self.entries:
+            entry.critical = entry.name in critical_path
+        violations = [
+            TimelineViolation(
+                kind="overrun",
+                task=entry.name,
+                message=f"{entry.name} is expected to run {add_timeunit(entry.start)} - {add_timeunit(entry.expected_end)}, but the deadline of {entry.cut_by} stops it at {add_timeunit(entry.end)}."
+            )
+            for entry in self.entries if entry.is_leaf and entry.overrun
+        ]
+        violations += self.check_budgets(budgets)
+        return WorkflowTimeline(
+            workflow_name=workflow["metadata"]["name"],
+            makespan=root.end,
+            entries=self.entries,
+            critical_path=critical_path,
+            violations=violations
+        )
+
+    def simulate_node(
+        self,
+        name: str,
+        start: int,
+        depth: int,
+        parent: Optional[str],
+        cutoff: float,
+        cutoff_owner: Optional[str]
+    ) -> TimelineEntry:
+        template = self.templates[name]
+        template_type = template["templateType"]
+        deadline_end = start + parse_time(str(template["deadline"])) if "deadline" in template else None
+        if deadline_end is not None and deadline_end < cutoff:
+            cutoff, cutoff_owner = deadline_end, name
+        entry = TimelineEntry(
+            name=name,
+            template_type=template_type,
+            depth=depth,
+            parent=parent,
+            start=start,
+            end=start,
+            expected_end=start,
+            deadline_end=deadline_end
+        )
+        self.entries.append(entry)
+        if template_type == "Serial":
+            curr_time = start
+            for child in template.get("children") or []:
+                curr_time = self.simulate_node(child, curr_time, depth+1, name, cutoff, cutoff_owner).end
+            entry.expected_end = curr_time
+        elif template_type == "Parallel":
+            children = [
+                self.simulate_node(child, start, depth+1, name, cutoff, cutoff_owner)
+                for child in template.get("children") or []
+            ]
+            entry.expected_end = max([child.end for child in children] + [start])
+        else:
+            entry.expected_end = start + self.get_expected_duration(template, deadline_end, start)
+        entry.end = int(min(entry.expected_end, cutoff))
+        if entry.expected_end > cutoff:
+            entry.cut_by = cutoff_owner
+        return entry
+
+    def get_expected_duration(
+        self,
+        template: dict,
+        deadline_end: Optional[int],
+        start: int
+    ) -> int:
+        if template["templateType"] == "Task":
+            container = template.get("task", {}).get("container", {})
+            cmd = " ".join(container.get("command", []) + container.get("args", []))
+            if (match := re.search(DURATION_ARG_PATTERN, cmd)) is not None:
+                duration = match.group(1)
+                return int(duration) if duration.isdigit() else parse_time(duration)
+        return deadline_end - start if deadline_end is not None else 0
+
+    def get_critical_path(self, root: TimelineEntry) -> List[str]:
+        children = {}
+        for entry in self.entries:
+            children.setdefault(entry.parent, []).append(entry)
+        def get_path(entry: TimelineEntry) -> List[str]:
+            if entry.template_type == "Serial":
+                return [name for child in children.get(entry.name, []) for name in get_path(child)]
+            if entry.template_type == "Parallel":
+                if entry.name not in children:
+                    return []
+                return get_path(max(children[entry.name], key=lambda child: child.end))
+            return [entry.name]
+        return get_path(root)
+
+    def check_budgets(self, budgets: Dict[str, str]) -> List[TimelineViolation]:
+        """check that leaves under each node (e.g., a phase) end within the node's time budget"""
+        violations = []
+        entries = {entry.name: entry for entry in self.entries}
+        for node_name, budget in budgets.items():
+            if node_name not in entries:
+                continue
+            node = entries[node_name]
+            for entry in self.get_descendants(node_name):
+                if entry.is_leaf and entry.template_type != "Suspend" and entry.expected_end - node.start > parse_time(budget):
+                    violations.append(TimelineViolation(
+                        kind="budget",
+                        task=entry.name,
+                        message=f"{entry.name} is expected to end {add_timeunit(entry.expected_end - node.start)} after the start of {node_name}, which exceeds its time budget ({budget})."
+                    ))
+        return violations
+
+    def get_descendants(self, node_name: str) -> List[TimelineEntry]:
+        descendants = []
+        parents = {node_name}
+        for entry in self.entries: # entries are in DFS order
+            if entry.parent in parents:
+                descendants.append(entry)
+                parents.add(entry.name)
+        return descendants
+
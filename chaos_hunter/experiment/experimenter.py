@@ -1,21 +1,25 @@
 import os
 import yaml
-import json
 import time
-from typing import Dict, List, Tuple
+from typing import Dict, List, Tuple, Optional, Literal
 
 import streamlit as st
 
 from .llm_agents.experiment_plan_agent import ExperimentPlanAgent
 from .llm_agents.experiment_replan_agent import ExperimentRePlanAgent
 from .algorithms.plan2workflow_converter import Plan2WorkflowConverter
+from .algorithms.workflow_simulator import WorkflowSimulator, WorkflowTimeline, TimelineViolation
 from ..preprocessing.preprocessor import ProcessedData
 from ..hypothesis.hypothesizer import Hypothesis
 from ..ce_tools.ce_tool_base import CEToolBase
-from ..utils.functions import pseudo_streaming_text, type_cmd, save_json, recursive_to_dict, limit_string_length
+from ..utils.functions import pseudo_streaming_text, save_json, write_file, limit_string_length, parse_time, add_timeunit
 from ..utils.schemas import File
 from ..utils.wrappers import LLM, BaseModel
-from ..utils.llms import LLMLog
+from ..utils.llms import LLMLog, embed_messages, get_usage_tracker
+from ..utils.callbacks import ChaosHunterCallback
+from ..utils.budget import BudgetExceeded
+from ..utils.tracing import get_tracer
+from ..backends.backend import get_backend
 
 
 CHAOS_EXPERIMENT_PLAN_TEMPALTE = """\
@@ -70,6 +74,14 @@ class ChaosExperiment(BaseModel):
             summary=self.plan["summary"]
         )
 
+    def get_duration(self) -> int:
+        """upper bound of the workflow's run time in seconds (the deadline of its entry node, or the planned total time)"""
+        for manifest in yaml.safe_load_all(self.workflow.content):
+            for template in (manifest or {}).get("spec", {}).get("templates", []):
+                if template.get("name") == "the-entry" and "deadline" in template:
+                    return parse_time(str(template["deadline"]))
+        return parse_time(self.plan.get("time_schedule", {}).get("total_time", "0"))
+
 
 class Status(BaseModel):
     exitcode: int
@@ -77,17 +89,139 @@ class Status(BaseModel):
 
 class ChaosExperimentResult(BaseModel):
     pod_statuses: Dict[str, Status]
+    skipped_tasks: List[str] = [] # tasks that were not completed because the experiment was aborted
+    abort_reason: Optional[str] = None
 
     @property
     def all_tests_passed(self) -> bool:
-        return sum([pod_status.exitcode for pod_status in self.pod_statuses.values()]) == 0
+        return sum([pod_status.exitcode for pod_status in self.pod_statuses.values()]) == 0 and len(self.skipped_tasks) == 0
 
     def to_str(self) -> str:
         passed_tests = [workflow_name for workflow_name, pod_status in self.pod_statuses.items() if pod_status.exitcode == 0]
         failed_tests = [(workflow_name, pod_status.logs) for workflow_name, pod_status in self.pod_statuses.items() if pod_status.exitcode != 0]
         passed_tests_str = "\n".join([f"- {item}" for item in passed_tests]) 
         failed_tests_str = "\n".join([f"- {item[0]}\n```log\n{limit_string_length(item[1], max_length=1000)}\n```\n" for item in failed_tests])
-        return f"Passed unittests:\n{passed_tests_str}\nFailed unittests:\n{failed_tests_str}"
+        result_str = f"Passed unittests:\n{passed_tests_str}\nFailed unittests:\n{failed_tests_str}"
+        if self.abort_reason is not None:
+            skipped_tests_str = "\n".join([f"- {item}" for item in self.skipped_tasks])
+            result_str += f"\nThe experiment was aborted ({self.abort_reason}).\nSkipped tasks:\n{skipped_tests_str}"
+        return result_str
+
+class FailFastPolicy(BaseModel):
+    """abort the workflow as soon as `max_failures` tasks matching `task_prefixes` fail"""
+    task_prefixes: List[str] = ["pre-unittest-"]
+    max_failures: int = 1
+
+    def get_abort_reason(self, pod_statuses: Dict[str, Status]) -> Optional[str]:
+        failed_tasks = [
+            task_name for task_name, pod_status in pod_statuses.items()
+            if pod_status.exitcode != 0 and task_name.startswith(tuple(self.task_prefixes))
+        ]
+        if len(failed_tasks) >= self.max_failures:
+            return f"fail-fast: {', '.join(failed_tasks)} failed"
+        return None
+
+class TaskEvent(BaseModel):
+    task_name: str
+    pod_name: str
+    event_type: Literal["started", "running", "terminated"]
+    timestamp: float
+    exitcode: Optional[int] = None # only for terminated events
+    log_tail: Optional[str] = None # only for terminated events
+
+LOG_TAIL_LINES = 20
+WORKFLOW_WAIT_MARGIN = 300 # sec; time for the workflow to be scheduled and to report its end after its deadline
+CHAOS_KINDS = "podchaos,networkchaos,dnschaos,httpchaos,stresschaos,iochaos,timechaos,kernelchaos"
+UNITTEST_PREFIXES = (
+    "pre-unittest-",
+    "fault-unittest-",
+    "post-unittest-"
+)
+
+class WorkflowPodMonitor:
+    """Watches the unit-test pods of a workflow and collects their statuses as soon as they terminate"""
+    def __init__(
+        self,
+        experimenter: "Experimenter",
+        experiment: ChaosExperiment,
+        kube_context: str,
+        namespace: str
+    ) -> None:
+        self.experimenter = experimenter
+        self.workflow_name = experiment.workflow_name
+        self.kube_context = kube_context
+        self.namespace = namespace
+        yaml_dict = yaml.safe_load(experiment.workflow.content)
+        self.task_names = [elm["name"] for elm in yaml_dict["spec"]["templates"] if elm["name"].startswith(UNITTEST_PREFIXES)]
+        self.pod_statuses: Dict[str, Status] = {}
+        self.task_states: Dict[str, str] = {}
+
+    def poll(self) -> List[TaskEvent]:
+        """returns the events of unit-test pods (started, running, terminated) since the last poll"""
+        pods = get_backend().get("pod", self.kube_context, self.namespace, selector=f"chaos-mesh.org/workflow={self.workflow_name}")
+        if pods is None:
+            return []
+        pods = pods.get("items", [])
+        events = []
+        for pod in pods:
+            pod_name = pod["metadata"]["name"]
+            task_name = self.get_task_name(pod_name)
+            if task_name is None or task_name in self.pod_statuses:
+                continue
+            if task_name not in self.task_states:
+                events.append(self.add_event(task_name, pod_name, "started"))
+            container_statuses = pod.get("status", {}).get("containerStatuses", [])
+            if any(container_status.get("state", {}).get("terminated") for container_status in container_statuses):
+                pod_status = self.experimenter.get_pod_status(
+                    pod_name=pod_name,
+                    kube_context=self.kube_context,
+                    namespace=self.namespace
+                )
+                self.pod_statuses[task_name] = pod_status
+                events.append(self.add_event(
+                    task_name,
+                    pod_name,
+                    "terminated",
+                    exitcode=pod_status.exitcode,
+                    log_tail="\n".join(pod_status.logs.splitlines()[-LOG_TAIL_LINES:])
+                ))
+            elif pod.get("status", {}).get("phase") == "Running" and self.task_states[task_name] != "running":
+                events.append(self.add_event(task_name, pod_name, "running"))
+        return events
+
+    def add_event(
+        self,
+        task_name: str,
+        pod_name: str,
+        event_type: Literal["started", "running", "terminated"],
+        **kwargs
+    ) -> TaskEvent:
+        self.task_states[task_name] = event_type
+        return TaskEvent(
+            task_name=task_name,
+            pod_name=pod_name,
+            event_type=event_type,
+            timestamp=time.time(),
+            **kwargs
+        )
+
+    def to_status_str(self) -> str:
+        status_str = ""
+        for task_name in self.task_names:
+            state = self.task_states.get(task_name, "waiting")
+            if state == "terminated":
+                state = "passed" if self.pod_statuses[task_name].exitcode == 0 else "failed"
+            status_str += f"- ```{task_name}```: {state}  \n"
+        return status_str
+
+    def get_task_name(self, pod_name: str) -> Optional[str]:
+        # pods are named "{task_name}-{suffix}"; choose the longest match to distinguish e.g., "task" and "task-2"
+        candidates = [task_name for task_name in self.task_names if pod_name.startswith(task_name + "-")]
+        return max(candidates, key=len) if len(candidates) > 0 else None
+
+    @property
+    def missing_tasks(self) -> List[str]:
+        return [task_name for task_name in self.task_names if task_name not in self.pod_statuses]
 
 
 class Experimenter:
@@ -114,12 +248,15 @@ class Experimenter:
         self.experiment_replan_agent = ExperimentRePlanAgent(llm, test_dir, namespace)
         # algortihms
         self.plan2workflow_converter = Plan2WorkflowConverter()
+        self.workflow_simulator = WorkflowSimulator()
 
     def plan_experiment(
         self,
         data: ProcessedData,
         hypothesis: Hypothesis,
-        work_dir: str
+        work_dir: str,
+        max_retries: int = 3,
+        extend_time_schedule: bool = False
     ) -> Tuple[List[LLMLog], ChaosExperiment]:
         logs = []
         # prepare a working directory
@@ -129,24 +266,84 @@ class Experimenter:
         #----------------------------------------------------------
         # 1. plan a CE experiment with the steady state and faults
         #----------------------------------------------------------
-        plan_log, experiment_plan = self.experiment_plan_agent.plan(data=data, hypothesis=hypothesis)
-        logs.append(plan_log)
-        save_json(f"{experiment_dir}/experiment_plan.json", experiment_plan.dict())
+        feedback = None
+        timeline = None
+        num_attempts = max(max_retries, 1) # the first plan is always made
+        for i in range(num_attempts):
+            plan_log, experiment_plan = self.experiment_plan_agent.plan(data=data, hypothesis=hypothesis, feedback=feedback)
+            logs.append(plan_log)
+            save_json(f"{experiment_dir}/experiment_plan.json", experiment_plan)
 
-        #-----------------------------------------------------------
-        # 2. convert the plan into the format of a specific CE tool 
-        #-----------------------------------------------------------
-        workflow_name, workflow = self.plan2workflow_converter.convert(experiment_plan.dict(), experiment_dir)
+            #-----------------------------------------------------------
+            # 2. convert the plan into the format of a specific CE tool 
+            #-----------------------------------------------------------
+            workflow_name, workflow = self.plan2workflow_converter.convert(experiment_plan.dict(), experiment_dir)
+
+            #------------------------------------------------------------------
+            # 3. simulate the workflow timeline before applying it to the cluster
+            #------------------------------------------------------------------
+            timeline = self.simulate_workflow(workflow, experiment_plan.dict(), experiment_dir)
+            if extend_time_schedule and not timeline.is_valid() and not timeline.has_overruns():
+                # (opt-in) only the time schedule is too short for the tasks: extend it instead of replanning
+                print(f"Extended the time schedule to fit the tasks:\n{timeline.to_violation_str()}")
+                experiment_plan.time_schedule = self.fit_time_schedule(experiment_plan.time_schedule, timeline)
+                save_json(f"{experiment_dir}/experiment_plan.json", experiment_plan)
+                workflow_name, workflow = self.plan2workflow_converter.convert(experiment_plan.dict(), experiment_dir)
+                timeline = self.simulate_workflow(workflow, experiment_plan.dict(), experiment_dir)
+            if timeline.is_valid():
+                break
+            feedback = f"The previous plan was rejected because its timeline violates the time schedule:\n{timeline.to_violation_str()}\nPlease revise the time schedule, grace periods, and durations so that every fault injection/unit test ends within its phase and its time budget."
+            print(f"Invalid workflow timeline ({i+1}/{num_attempts}):\n{timeline.to_violation_str()}")
+        assert timeline.is_valid(), f"WORKFLOW_DEADLINE_EXCEEDED: the timeline of {workflow_name} is still invalid after {num_attempts} attempts.\n{timeline.to_violation_str()}"
 
         chaos_experiment = ChaosExperiment(
             plan=experiment_plan.dict(),
             workflow_name=workflow_name,
             workflow=workflow
         )
-        save_json(f"{experiment_dir}/experiment.json", chaos_experiment.dict())
-        save_json(f"{experiment_dir}/experiment_log.json", recursive_to_dict(logs))
+        save_json(f"{experiment_dir}/experiment.json", chaos_experiment)
+        save_json(f"{experiment_dir}/experiment_log.json", embed_messages(logs))
         return logs, chaos_experiment
 
+    def fit_time_schedule(
+        self,
+        time_schedule: dict,
+        timeline: WorkflowTimeline
+    ) -> dict:
+        """extend the phase times to the times their tasks are expected to take (only with extend_time_schedule=True)"""
+        time_schedule = dict(time_schedule)
+        total_time = 0
+        for phase_name in ["pre_validation", "fault_injection", "post_validation"]:
+            phase_time = parse_time(time_schedule.get(f"{phase_name}_time", "0"))
+            phase_time = max(phase_time, timeline.get_required_time(f"{phase_name.replace('_', '-')}-phase"))
+            time_schedule[f"{phase_name}_time"] = add_timeunit(phase_time)
+            total_time += phase_time
+        time_schedule["total_time"] = add_timeunit(total_time)
+        return time_schedule
+
+    def simulate_workflow(
+        self,
+        workflow: File,
+        plan: dict,
+        experiment_dir: str
+    ) -> WorkflowTimeline:
+        timeline = self.workflow_simulator.simulate(workflow.content)
+        # the time budgets are checked on the packed plan, where the intended start offsets of the tasks are known
+        time_schedule = plan.get("time_schedule", {})
+        for phase_name, tasks in self.plan2workflow_converter.get_budget_violations(plan).items():
+            budget = time_schedule[f"{phase_name}_time"]
+            timeline.violations += [
+                TimelineViolation(
+                    kind="budget",
+                    task=task.workflow_name,
+                    message=f"{task.workflow_name} is expected to end {add_timeunit(task.start + task.duration)} after the start of {phase_name.replace('_', '-')}-phase, which exceeds its time budget ({budget})."
+                )
+                for task in tasks
+            ]
+        save_json(f"{experiment_dir}/workflow_timeline.json", timeline.to_json_gantt())
+        write_file(f"{experiment_dir}/workflow_timeline.txt", timeline.to_ascii_gantt())
+        return timeline
+
     def replan_experiment(
         self,
         prev_k8s_yamls: List[File],
@@ -154,7 +351,8 @@ class Experimenter:
         curr_k8s_yamls: List[File],
         kube_context: str,
         work_dir: str,
-        max_retries: int = 3
+        max_retries: int = 3,
+        extend_time_schedule: bool = False
     ) -> Tuple[List[LLMLog], ChaosExperiment]:
         logs = []
         # prepare a working directory
@@ -181,6 +379,14 @@ class Experimenter:
             experiment_replan.dict(),
             experiment_dir
         )
+        timeline = self.simulate_workflow(workflow, experiment_replan.dict(), experiment_dir)
+        if extend_time_schedule and not timeline.is_valid() and not timeline.has_overruns():
+            print(f"Extended the time schedule to fit the tasks:\n{timeline.to_violation_str()}")
+            experiment_replan.time_schedule = self.fit_time_schedule(experiment_replan.time_schedule, timeline)
+            workflow_name, workflow = self.plan2workflow_converter.convert(experiment_replan.dict(), experiment_dir)
+            timeline = self.simulate_workflow(workflow, experiment_replan.dict(), experiment_dir)
+        # the replan keeps the time schedule of the previous plan, so it fails instead of being revised
+        assert timeline.is_valid(), f"WORKFLOW_DEADLINE_EXCEEDED: the timeline of {workflow_name} violates the time schedule.\n{timeline.to_violation_str()}"
 
         chaos_experiment = ChaosExperiment(
             plan=experiment_replan.dict(),
@@ -194,7 +400,10 @@ class Experimenter:
         experiment: ChaosExperiment,
         kube_context: str,
         namespace: str = None,
-        check_interval: int = 5 # sec
+        check_interval: int = 5, # sec
+        fail_fast: FailFastPolicy = None,
+        wait_margin: float = WORKFLOW_WAIT_MARGIN, # sec
+        callbacks: List[ChaosHunterCallback] = []
     ) -> ChaosExperimentResult:
         if namespace is None:
             namespace = self.namespace
@@ -205,72 +414,131 @@ class Experimenter:
         pseudo_streaming_text("##### Running the experiment... See http://localhost:2333 for more details.", obj=execution_msg)
         # self.ce_tool.run_experiment() # TODO
         # reset the experiment
-        type_cmd(f"kubectl delete --context {kube_context} -n {namespace} -f {experiment.workflow.path} --ignore-not-found")
-        type_cmd(f'kubectl delete workflownode --context {kube_context} -n {namespace} --selector="chaos-mesh.org/workflow={experiment.workflow_name}" --ignore-not-found')
-        type_cmd(f'kubectl delete po --context {kube_context} -n {namespace} --selector="chaos-mesh.org/workflow={experiment.workflow_name}" --ignore-not-found')
+        backend = get_backend()
+        selector = f"chaos-mesh.org/workflow={experiment.workflow_name}"
+        backend.delete(kube_context, namespace, path=experiment.workflow.path)
+        backend.delete(kube_context, namespace, kind="workflownode", selector=selector)
+        backend.delete(kube_context, namespace, kind="po", selector=selector)
         # run the experiment
-        type_cmd(f"kubectl apply --context {kube_context} -n {namespace} -f {experiment.workflow.path}")
+        backend.apply(experiment.workflow.path, kube_context, namespace)
         st.components.v1.iframe("http://localhost:2333/#/workflows", height=500, scrolling=True)
 
-        #--------------------------
-        # wait for workflow to end
-        #--------------------------
+        #-----------------------------------------------------------
+        # wait for workflow to end while collecting unit-test results
+        #-----------------------------------------------------------
+        monitor = WorkflowPodMonitor(self, experiment, kube_context, namespace)
+        task_status_msg = st.empty()
+        abort_reason = None
+        timeout_reason = None
+        budget_error = None
+        usage_tracker = get_usage_tracker()
         workflow_running = True
-        while(workflow_running):
-            # is_running = self.ce_tool.status_check() # TODO
-            # https://chaos-mesh.org/docs/check-workflow-status/
-            entry_node_name = type_cmd(f'kubectl get workflownode --context {kube_context} -n {namespace} --selector="chaos-mesh.org/workflow={experiment.workflow_name}" -o custom-columns=:metadata.name | grep "^the-entry"', widget=False)
-            entry_node_name = entry_node_name.strip()
-            json_res = json.loads(type_cmd(f"kubectl get workflownode {entry_node_name} --context {kube_context} -n {namespace} -o json", widget=False))
-            conditions = json_res["status"]["conditions"]
-            status_accomplished = next((c["status"] for c in conditions if c["type"] == "Accomplished"), None)
-            workflow_running = (status_accomplished == "False")
-            time.sleep(check_interval)
-        pseudo_streaming_text("##### Completed the chaos experiment!", obj=execution_msg)
+        # the workflow must start within the margin and end within its duration (plus the margin)
+        start_time = time.time()
+        entry_node_found = False
+        deadline = start_time + experiment.get_duration() + wait_margin
+        with get_tracer().span("workflow", "wait", workflow_name=experiment.workflow_name):
+            while(workflow_running):
+                # is_running = self.ce_tool.status_check() # TODO
+                # https://chaos-mesh.org/docs/check-workflow-status/
+                self.dispatch_events(monitor, task_status_msg, callbacks)
+                if fail_fast is not None and (abort_reason := fail_fast.get_abort_reason(monitor.pod_statuses)) is not None:
+                    break
+                # budgets are also enforced while the workflow runs, where most of the wall time of a cycle goes
+                try:
+                    if usage_tracker is not None:
+                        usage_tracker.check()
+                except BudgetExceeded as e:
+                    budget_error = e
+                    break
+                workflow_nodes = backend.get("workflownode", kube_context, namespace, selector=selector) or {}
+                entry_node = next((node for node in workflow_nodes.get("items", []) if node["metadata"]["name"].startswith("the-entry")), None)
+                if entry_node is not None:
+                    entry_node_found = True
+                    conditions = entry_node.get("status", {}).get("conditions", [])
+                    status_accomplished = next((c["status"] for c in conditions if c["type"] == "Accomplished"), None)
+                    workflow_running = (status_accomplished == "False")
+                    if not workflow_running:
+                        break
+                if not entry_node_found and time.time() - start_time > wait_margin:
+                    timeout_reason = f"WORKFLOW_NOT_STARTED: the entry node of {experiment.workflow_name} did not appear within {wait_margin}s."
+                    break
+                if time.time() > deadline:
+                    timeout_reason = f"WORKFLOW_TIMEOUT: {experiment.workflow_name} did not end within {deadline - start_time:.0f}s."
+                    break
+                with get_tracer().span("workflow_poll_interval", "sleep"):
+                    time.sleep(check_interval)
+        self.dispatch_events(monitor, task_status_msg, callbacks)
 
         #-----------------------
         # organize the resullts
         #-----------------------
-        yaml_dict = yaml.safe_load(experiment.workflow.content)
-        prefixes = (
-            "pre-unittest-",
-            "fault-unittest-",
-            "post-unittest-"
-        )
-        pod_prefixes= []
-        for elm in yaml_dict["spec"]["templates"]:
-            if elm["name"].startswith(prefixes):
-                pod_prefixes.append(elm["name"])
-        # get pod names
-        pod_names = [
-            type_cmd(f'kubectl get pod -o custom-columns=:metadata.name --context {kube_context} -n {namespace} --selector="chaos-mesh.org/workflow={experiment.workflow_name}" | grep "{pod_prefix + "-"}"').strip()
-            for pod_prefix in pod_prefixes
-        ]
-        missed_idx =  [i for i, x in enumerate(pod_names) if x == ""]
-        pod_names = list(filter(None, pod_names)) # If experiment exceeds deadline, we cannot find the pod
-        assert len(pod_prefixes) == len(pod_names), f"WORKFLOW_DEADLINE_EXCEEDED: {len(pod_prefixes) - len(pod_names)} task(s) missed due to deadline exceeding.\nMissed task(s): {[pod_prefixes[idx] for idx in missed_idx]}"
-        # get status
-        pod_statuses = {}
-        for pod_prefix, pod_name in zip(pod_prefixes, pod_names):
-            pod_statuses[pod_prefix] = self.get_pod_status(
-                pod_name=pod_name,
-                kube_context=kube_context,
-                namespace=namespace
+        if timeout_reason is not None:
+            self.abort_workflow(experiment, kube_context, namespace)
+            pseudo_streaming_text(f"##### Stopped the chaos experiment ({timeout_reason})", obj=execution_msg)
+            raise TimeoutError(timeout_reason)
+        if budget_error is not None:
+            self.abort_workflow(experiment, kube_context, namespace)
+            pseudo_streaming_text(f"##### Stopped the chaos experiment ({budget_error})", obj=execution_msg)
+            raise budget_error
+        if abort_reason is not None:
+            self.abort_workflow(experiment, kube_context, namespace)
+            pseudo_streaming_text(f"##### Aborted the chaos experiment ({abort_reason})", obj=execution_msg)
+            return ChaosExperimentResult(
+                pod_statuses=monitor.pod_statuses,
+                skipped_tasks=monitor.missing_tasks,
+                abort_reason=abort_reason
             )
+        pseudo_streaming_text("##### Completed the chaos experiment!", obj=execution_msg)
+        # If experiment exceeds deadline, we cannot find the pod
+        missed_tasks = monitor.missing_tasks
+        assert len(missed_tasks) == 0, f"WORKFLOW_DEADLINE_EXCEEDED: {len(missed_tasks)} task(s) missed due to deadline exceeding.\nMissed task(s): {missed_tasks}"
         return ChaosExperimentResult(
-            pod_statuses=pod_statuses,
+            pod_statuses={task_name: monitor.pod_statuses[task_name] for task_name in monitor.task_names},
         )
 
+    def dispatch_events(
+        self,
+        monitor: WorkflowPodMonitor,
+        task_status_msg: st.empty,
+        callbacks: List[ChaosHunterCallback]
+    ) -> List[TaskEvent]:
+        events = monitor.poll()
+        if len(events) > 0:
+            task_status_msg.markdown(monitor.to_status_str())
+        for event in events:
+            for cb in callbacks:
+                cb.on_experiment_task_event(event)
+        return events
+
+    def abort_workflow(
+        self,
+        experiment: ChaosExperiment,
+        kube_context: str,
+        namespace: str
+    ) -> None:
+        backend = get_backend()
+        selector = f"chaos-mesh.org/workflow={experiment.workflow_name}"
+        # pause the injected chaos first so that faults are stopped immediately
+        backend.annotate(CHAOS_KINDS, "experiment.chaos-mesh.org/pause=true", kube_context, namespace, selector)
+        # delete the workflow (its workflow nodes, pods, and chaos are deleted in cascade)
+        backend.delete(kube_context, namespace, path=experiment.workflow.path)
+        # clean up the remaining chaos and pods
+        backend.delete(kube_context, namespace, kind=CHAOS_KINDS, selector=selector)
+        backend.delete(kube_context, namespace, kind="workflownode", selector=selector)
+        backend.delete(kube_context, namespace, kind="po", selector=selector)
+
     def get_pod_status(
         self,
         pod_name: str,
         kube_context: str,
         namespace: str
     ) -> Status:
-        logs = type_cmd(f"kubectl logs {pod_name} --context {kube_context} -n {namespace}", widget=False)
-        summary = type_cmd(f"kubectl get pod {pod_name} --context {kube_context} -n {namespace} -o json")
+        backend = get_backend()
+        logs = backend.logs(pod_name, kube_context, namespace).output
+        pod_info = backend.get("pod", kube_context, namespace, name=pod_name, widget=True)
+        assert pod_info is not None, f"Cannot find the pod {pod_name}."
         # check container status
-        pod_info = json.loads(summary)
         container_statuses = pod_info.get("status", {}).get("containerStatuses", [])
         assert len(container_statuses) > 0, f"Cannot find containerStatuses in the json summary: {container_statuses}."
         for container_status in container_statuses:
@@ -176,7 +176,8 @@ class ExperimentPlanAgent:
     def plan(
         self,
         data: ProcessedData,
-        hypothesis: Hypothesis
+        hypothesis: Hypothesis,
+        feedback: str = None
     ) -> Tuple[LLMLog, dict]:
         #-------------------
         # initialization
@@ -185,13 +186,14 @@ class ExperimentPlanAgent:
         st.session_state.plan_container = self.get_plan_items()
         pseudo_streaming_text("##### Planning a CE experiment...", obj=plan_msg)
         logger = LoggingCallback(name="experiment_plan", llm=self.llm)
+        ce_instructions = data.ce_instructions if feedback is None else f"{data.ce_instructions}\n{feedback}"
 
         #----------------------
         # plan a time schedule
         #----------------------
         for time_schedule in self.time_schedule_agent.stream({
             "user_input": data.to_k8s_overview_str(),
-            "ce_instructions": data.ce_instructions,
+            "ce_instructions": ce_instructions,
             "steady_states": hypothesis.steady_states.to_overview_str(),
             "fault_scenario": hypothesis.fault.to_overview_str()},
             {"callbacks": [logger]}
@@ -215,7 +217,7 @@ class ExperimentPlanAgent:
         #---------------------------------------------------------------------------
         for pre_validation_plan in self.pre_validation_agent.stream({
             "user_input": data.to_k8s_overview_str(),
-            "ce_instructions": data.ce_instructions,
+            "ce_instructions": ce_instructions,
             "steady_states": hypothesis.steady_states.to_overview_str(),
             "fault_scenario": hypothesis.fault.to_overview_str(),
             "phase_name": "pre-validation phase",
@@ -226,7 +228,7 @@ class ExperimentPlanAgent:
 
         for fault_injection_plan in self.fault_injection_agent.stream({
             "user_input": data.to_k8s_overview_str(),
-            "ce_instructions": data.ce_instructions,
+            "ce_instructions": ce_instructions,
             "steady_states": hypothesis.steady_states.to_overview_str(),
             "fault_scenario": hypothesis.fault.to_overview_str(),
             "phase_name": "fault-injection phase",
@@ -237,7 +239,7 @@ class ExperimentPlanAgent:
         
         for post_validation_plan in self.post_validation_agent.stream({
             "user_input": data.to_k8s_overview_str(),
-            "ce_instructions": data.ce_instructions,
+            "ce_instructions": ce_instructions,
             "steady_states": hypothesis.steady_states.to_overview_str(),
             "fault_scenario": hypothesis.fault.to_overview_str(),
             "phase_name": "post-validation phase",
@@ -321,7 +321,8 @@ class ExperimentRePlanAgent:
                         inspection=inspection_,
                         work_dir=work_dir,
                         kube_context=kube_context,
-                        namespace="chaos-hunter"
+                        namespace="chaos-hunter",
+                        use_cache=True
                     )
                     
                     # validation
@@ -1,5 +1,7 @@
 import yaml
 import json
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Tuple, Iterable
 
 import streamlit as st
@@ -8,7 +10,9 @@ from ...steady_states.steady_state_definer import SteadyStates
 from ....ce_tools.ce_tool_base import CEToolBase
 from ....utils.wrappers import LLM, BaseModel
 from ....utils.llms import build_json_agent, LLMLog, LoggingCallback
-from ....utils.functions import render_jinja_template, write_file, type_cmd3, limit_string_length
+from ....utils.functions import render_jinja_template, write_file, display_cmd_result, limit_string_length
+from ....utils.streamlit import StreamlitContainer, StreamlitUIQueue
+from ....backends.backend import get_backend
 
 
 SYS_REFINE_FAULT = """\
@@ -82,10 +86,12 @@ class FaultRefiner:
     def __init__(
         self,
         llm: LLM,
-        ce_tool: CEToolBase
+        ce_tool: CEToolBase,
+        max_concurrency: int = 4
     ) -> None:
         self.llm = llm
         self.ce_tool = ce_tool
+        self.max_concurrency = max_concurrency
 
     def refine_faults(
         self,
@@ -96,63 +102,54 @@ class FaultRefiner:
         work_dir: str,
         max_retries: int = 3
     ) -> Tuple[LLMLog, FaultScenario]:
-        self.logger = LoggingCallback(name="refine_fault_params", llm=self.llm)
-        st.session_state.fault_container.create_subcontainer(id="fault_params", header="##### ⚙ Detailed fault parameters")
-        faults_ = []
-        idx = 0
-        for para_faults in fault_scenario["faults"]:
-            para_faults_ = []
-            faults_.append(para_faults_)
-            for fault in para_faults:
-                #-----------------------
-                # generate fault params
-                #-----------------------
-                refined_prams = self.refine_fault(
+        fault_container = st.session_state.fault_container
+        fault_container.create_subcontainer(id="fault_params", header="##### ⚙ Detailed fault parameters")
+        # the faults are independent of each other given the scenario, so they are refined concurrently.
+        # UI updates from the workers are applied by this (script) thread through ui_queue.
+        # the workers run in copies of this context, so that their LLM calls are logged into the cycle's message store.
+        faults = [fault for para_faults in fault_scenario["faults"] for fault in para_faults]
+        for idx in range(len(faults)):
+            fault_container.create_subsubcontainer(subcontainer_id="fault_params", subsubcontainer_id=f"fault_type{idx}")
+            fault_container.create_subsubcontainer(subcontainer_id="fault_params", subsubcontainer_id=f"fault_params{idx}")
+        ui_queue = StreamlitUIQueue()
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            futures = [
+                executor.submit(
+                    contextvars.copy_context().run,
+                    self.refine_and_verify_fault,
                     idx=idx,
                     user_input=user_input,
                     ce_instructions=ce_instructions,
                     steady_states=steady_states.to_overview_str(),
                     fault_scenario=self.convert_fault_senario_to_str(fault_scenario),
                     fault=fault,
+                    work_dir=work_dir,
+                    fault_container=fault_container,
+                    ui_queue=ui_queue,
+                    max_retries=max_retries
                 )
-                #-----------------------
-                # validate fault params
-                #-----------------------
-                is_valid = False
-                mod_count = 0
-                output_history = [refined_prams]
-                error_history = []
-                while (not is_valid):
-                    assert mod_count < max_retries, f"mod_count_loop ({max_retries}) exceeded."
-                    mod_count += 1
-                    is_valid, msg = self.verify_fault_params(fault, refined_prams, work_dir)
-                    if is_valid:
-                        break
-                    error_history.append(limit_string_length(msg))
-                    refined_prams = self.refine_fault(
-                        idx=idx,
-                        user_input=user_input,
-                        ce_instructions=ce_instructions,
-                        steady_states=steady_states.to_overview_str(),
-                        fault_scenario=self.convert_fault_senario_to_str(fault_scenario),
-                        fault=fault,
-                        mod_count=mod_count,
-                        output_history=output_history,
-                        error_history=error_history
-                    )
-                    output_history.append(refined_prams)
-                #---------------------- 
-                # add the valid params
-                #----------------------
+                for idx, fault in enumerate(faults)
+            ]
+            ui_queue.drain_until_done(futures)
+        results = [future.result() for future in futures]
+        #---------------------- 
+        # add the valid params
+        #----------------------
+        faults_ = []
+        idx = 0
+        for para_faults in fault_scenario["faults"]:
+            para_faults_ = []
+            faults_.append(para_faults_)
+            for fault in para_faults:
                 para_faults_.append(Fault(
                     name=fault["name"],
                     name_id=fault["name_id"],
-                    params=refined_prams
+                    params=results[idx][1]
                 ))
                 idx += 1
-        st.session_state.fault_container.update_header(f"##### ✅ Scenario: {fault_scenario['event']}", expanded=True)
+        fault_container.update_header(f"##### ✅ Scenario: {fault_scenario['event']}", expanded=True)
         return (
-            self.logger.log, 
+            LLMLog.merge("refine_fault_params", [log for log, _ in results]),
             FaultScenario(
                 event=fault_scenario["event"],
                 faults=faults_,
@@ -160,6 +157,65 @@ class FaultRefiner:
             )
         )
 
+    def refine_and_verify_fault(
+        self,
+        idx: int,
+        user_input: str,
+        ce_instructions: str,
+        steady_states: str,
+        fault_scenario: str,
+        fault: Dict[str, str],
+        work_dir: str,
+        fault_container: StreamlitContainer,
+        ui_queue: StreamlitUIQueue,
+        max_retries: int = 3
+    ) -> Tuple[LLMLog, Dict[str, Any]]:
+        logger = LoggingCallback(name="refine_fault_params", llm=self.llm)
+        #-----------------------
+        # generate fault params
+        #-----------------------
+        refined_prams = self.refine_fault(
+            idx=idx,
+            user_input=user_input,
+            ce_instructions=ce_instructions,
+            steady_states=steady_states,
+            fault_scenario=fault_scenario,
+            fault=fault,
+            logger=logger,
+            fault_container=fault_container,
+            ui_queue=ui_queue
+        )
+        #-----------------------
+        # validate fault params
+        #-----------------------
+        is_valid = False
+        mod_count = 0
+        output_history = [refined_prams]
+        error_history = []
+        while (not is_valid):
+            assert mod_count < max_retries, f"mod_count_loop ({max_retries}) exceeded."
+            mod_count += 1
+            is_valid, msg = self.verify_fault_params(idx, fault, refined_prams, work_dir, ui_queue)
+            if is_valid:
+                break
+            error_history.append(limit_string_length(msg))
+            refined_prams = self.refine_fault(
+                idx=idx,
+                user_input=user_input,
+                ce_instructions=ce_instructions,
+                steady_states=steady_states,
+                fault_scenario=fault_scenario,
+                fault=fault,
+                logger=logger,
+                fault_container=fault_container,
+                ui_queue=ui_queue,
+                mod_count=mod_count,
+                output_history=output_history,
+                error_history=error_history
+            )
+            output_history.append(refined_prams)
+        return logger.log, refined_prams
+
     def refine_fault(
         self,
         idx: int,
@@ -168,6 +224,9 @@ class FaultRefiner:
         steady_states: str,
         fault_scenario: str,
         fault: Dict[str, str],
+        logger: LoggingCallback,
+        fault_container: StreamlitContainer,
+        ui_queue: StreamlitUIQueue,
         mod_count: int = -1,
         output_history: List[dict] = [],
         error_history: List[str] = []
@@ -185,9 +244,6 @@ class FaultRefiner:
             pydantic_object=fault_params,
             is_async=False
         )
-        if mod_count == -1:
-            st.session_state.fault_container.create_subsubcontainer(subcontainer_id="fault_params", subsubcontainer_id=f"fault_type{idx}")
-            st.session_state.fault_container.create_subsubcontainer(subcontainer_id="fault_params", subsubcontainer_id=f"fault_params{idx}")
         result = {}
         for token in agent.stream({
             "user_input": user_input,
@@ -196,14 +252,14 @@ class FaultRefiner:
             "fault_scenario": fault_scenario,
             "refined_fault_type": fault["name"] + f"({fault['scope']})" if len(fault['scope']) > 0 else fault["name"],
             "ce_tool_name": self.ce_tool.name},
-            {"callbacks": [self.logger]}
+            {"callbacks": [logger]}
         ):
             for key in fault_params.__fields__.keys():
                 key_item = token.get(key)
                 if key_item is not None and isinstance(key_item, Iterable) and len(key_item) > 0:
                     result[key] = key_item
-                    st.session_state.fault_container.update_subsubcontainer(f"Detailed parameters of ```{fault['name']}``` ({fault['scope']})", f"fault_type{idx}")
-                    st.session_state.fault_container.update_subsubcontainer(result, f"fault_params{idx}")
+                    ui_queue.put(fault_container.update_subsubcontainer, f"Detailed parameters of ```{fault['name']}``` ({fault['scope']})", f"fault_type{idx}")
+                    ui_queue.put(fault_container.update_subsubcontainer, dict(result), f"fault_params{idx}")
         return result
     
     def convert_fault_senario_to_str(self, fault_scenario: Dict[str, str]) -> str:
@@ -215,9 +271,11 @@ class FaultRefiner:
     
     def verify_fault_params(
         self,
+        idx: int,
         fault: Dict[str, str],
         params: dict,
-        work_dir: str
+        work_dir: str,
+        ui_queue: StreamlitUIQueue
     ) -> Tuple[bool, str]:
         fault_template_path = self.ce_tool.get_template_path(fault["name"])
         specs_str = yaml.dump(params, Dumper=IndentedDumper, default_flow_style=False)
@@ -226,9 +284,10 @@ class FaultRefiner:
             fault_type=fault["name"],
             specs=specs_str
         )
-        fault_yaml_path = f"{work_dir}/{fault['name']}.yaml"
+        fault_yaml_path = f"{work_dir}/{fault['name']}{idx}.yaml"
         write_file(fault_yaml_path, fault_yaml_str)
-        result = type_cmd3(f"kubectl apply --dry-run=server -f {fault_yaml_path}")
+        result = get_backend().apply(fault_yaml_path, dry_run=True, widget=False)
+        ui_queue.put(display_cmd_result, result.cmd, result)
         is_valid = (result.returncode == 0)
         if is_valid:
             msg = result.stdout
@@ -4,8 +4,8 @@ from typing import List, Tuple
 from .steady_states.steady_state_definer import SteadyStateDefiner, SteadyStates
 from .faults.fault_definer import FaultDefiner, FaultScenario
 from ..utils.wrappers import LLM, BaseModel
-from ..utils.functions import save_json, recursive_to_dict
-from ..utils.llms import LLMLog
+from ..utils.functions import save_json
+from ..utils.llms import LLMLog, embed_messages
 from ..ce_tools.ce_tool_base import CEToolBase
 from ..preprocessing.preprocessor import ProcessedData
 
@@ -55,7 +55,9 @@ class Hypothesizer:
         kube_context: str,
         work_dir: str,
         max_num_steady_states: int = 2,
-        max_retries: int = 3
+        max_retries: int = 3,
+        pipelined_steady_states: bool = False,
+        use_steady_state_library: bool = False
     ) -> Tuple[List[LLMLog], Hypothesis]:
         #----------------
         # initialization
@@ -72,11 +74,13 @@ class Hypothesizer:
             kube_context=kube_context,
             work_dir=hypothesis_dir,
             max_num_steady_states=max_num_steady_states,
-            max_retries=max_retries
+            max_retries=max_retries,
+            pipelined=pipelined_steady_states,
+            use_library=use_steady_state_library
         )
         logs += steady_state_logs
-        save_json(f"{hypothesis_dir}/steady_states.json", steady_states.dict())
-        save_json(f"{hypothesis_dir}/steady_states.json", recursive_to_dict(steady_state_logs))
+        save_json(f"{hypothesis_dir}/steady_states.json", steady_states)
+        save_json(f"{hypothesis_dir}/steady_states.json", embed_messages(steady_state_logs))
 
         #------------------
         # 2. define faults
@@ -88,13 +92,13 @@ class Hypothesizer:
             max_retries=max_retries
         )
         logs += fault_logs
-        save_json(f"{hypothesis_dir}/faults.json", fault.dict())
-        save_json(f"{hypothesis_dir}/faults_log.json", recursive_to_dict(fault_logs))
+        save_json(f"{hypothesis_dir}/faults.json", fault)
+        save_json(f"{hypothesis_dir}/faults_log.json", embed_messages(fault_logs))
 
         #-------------------
         # make a hypothesis
         #-------------------
         hypothesis = Hypothesis(steady_states=steady_states, fault=fault)
-        save_json(f"{hypothesis_dir}/hypothesis.json", hypothesis.dict())
-        save_json(f"{hypothesis_dir}/hypothesis_log.json", recursive_to_dict(logs))
+        save_json(f"{hypothesis_dir}/hypothesis.json", hypothesis)
+        save_json(f"{hypothesis_dir}/hypothesis_log.json", embed_messages(logs))
         return logs, hypothesis
\ No newline at end of file
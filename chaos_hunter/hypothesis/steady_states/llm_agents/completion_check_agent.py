@@ -1,8 +1,10 @@
-from typing import Dict, Tuple
+from contextlib import nullcontext
+from typing import Dict, Tuple, Optional
 import streamlit as st
 from ....preprocessing.preprocessor import ProcessedData
 from ....utils.wrappers import LLM, BaseModel, Field
 from ....utils.llms import build_json_agent, LoggingCallback, LLMLog
+from ....utils.streamlit import StreamlitUIQueue, run_ui
 
 
 #---------
@@ -53,13 +55,13 @@ class SteadyStateCompletionCheckAgent:
         self,
         input_data: ProcessedData,
         predefined_steady_states: list,
+        ui_queue: Optional[StreamlitUIQueue] = None,
+        container = None
     ) -> Tuple[LLMLog, Dict[str, str]]:
+        """from a worker thread, pass ui_queue (and the container to write in) so that the script thread writes the UI"""
         logger = LoggingCallback(name="steady_state_completion_check", llm=self.llm)
-        
-        with st.container(border=True):
-            st.write("##### Steady state completion check")
-            thought_empty = st.empty()
-            check_empty = st.empty()
+        display = {}
+        run_ui(ui_queue, self.create_display, display, container)
 
         for completion_check in self.agent.stream({
             "user_input": input_data.to_k8s_overview_str(), 
@@ -68,7 +70,17 @@ class SteadyStateCompletionCheckAgent:
             {"callbacks": [logger]}
         ):
             if (thought := completion_check["thought"]) is not None:
-                thought_empty.write(thought)
+                run_ui(ui_queue, self.update_display, display, "thought", thought)
             if (check := completion_check["requires_addition"]) is not None:
-                check_empty.write(f"An additional steady state is needed?: ```{check}```")
-        return logger.log, completion_check
\ No newline at end of file
+                run_ui(ui_queue, self.update_display, display, "check", f"An additional steady state is needed?: ```{check}```")
+        return logger.log, completion_check
+
+    def create_display(self, display: dict, container = None) -> None:
+        with container if container is not None else nullcontext():
+            with st.container(border=True):
+                st.write("##### Steady state completion check")
+                display["thought"] = st.empty()
+                display["check"] = st.empty()
+
+    def update_display(self, display: dict, id: str, text: str) -> None:
+        display[id].write(text)
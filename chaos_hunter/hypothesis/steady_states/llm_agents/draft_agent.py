@@ -43,6 +43,7 @@ class SteadyStateDraft(BaseModel):
     thought: str = Field(description="Describe your thought process of determing the steady state of a SINGLE K8s resource (i.e., manifest) that is easiest to encounter the issues. Describe also the details of the steady state itself.")
     manifest: str = Field(description="The targeted K8s-manifest name. Specify a SINGLE manifest.")
     name: str = Field(description="Steady state name including the target K8s resource (manifest) name. Please write it using a-z, A-Z, and 0-9.")
+    category: str = Field(description="The category of the steady state. Choose 'ready_pod_count' if it is the number of ready pods of a workload, 'http_success_rate' if it is the success rate of HTTP requests to a service serving HTTP, 'http_p95_latency' if it is the p95 latency of HTTP requests to a service serving HTTP, and 'other' otherwise.")
 
 
 #------------------
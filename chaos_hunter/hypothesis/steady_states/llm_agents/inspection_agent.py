@@ -1,6 +1,7 @@
 from typing import List, Dict, Tuple, Literal
 
 from .utils import Inspection, run_pod
+from .preflight import ScriptPreflight
 from ....preprocessing.preprocessor import ProcessedData
 from ....utils.wrappers import LLM, BaseModel, Field
 from ....utils.llms import build_json_agent, LLMLog, LoggingCallback
@@ -85,6 +86,7 @@ class InspectionAgent:
     ) -> None:
         self.llm = llm
         self.namespace = namespace
+        self.preflight = ScriptPreflight()
     
     def inspect_current_state(
         self,
@@ -126,13 +128,19 @@ class InspectionAgent:
                 subcontainer_id="inspection",
                 subsubcontainer_id=subsubcontainer_id
             )
-            returncode, console_log = run_pod(
-                inspection,
-                work_dir,
-                kube_context,
-                self.namespace,
-                display_container.get_subsubcontainer(subsubcontainer_id)
-            )
+            # check the script locally before shipping it to a pod
+            preflight = self.preflight.check(inspection.script.fname, inspection.script.content)
+            if preflight.passed:
+                returncode, console_log = run_pod(
+                    inspection,
+                    work_dir,
+                    kube_context,
+                    self.namespace,
+                    display_container.get_subsubcontainer(subsubcontainer_id)
+                )
+            else:
+                display_container.get_subsubcontainer(subsubcontainer_id).write("###### Static pre-flight check failed:")
+                returncode, console_log = 1, preflight.to_str()
             inspection.result = console_log
             display_container.create_subsubcontainer(
                 subcontainer_id="inspection",
@@ -0,0 +1,354 @@
+import os
+import re
+import ast
+import sys
+import shutil
+import tempfile
+import subprocess
+from typing import List, Optional
+
+from ....utils.wrappers import BaseModel
+from ....utils.functions import read_file
+from ....utils.constants import K8SAPI_DOCKERFILE_PATH
+
+
+#-----------
+# constants
+#-----------
+RUNNER_PYTHON_VERSION = (3, 10) # python:3.10.13 in docker/Dockerfile_k8sapi
+DEFAULT_RUNNER_PACKAGES = ["kubernetes", "requests", "numpy", "pandas"]
+# import names that differ from their distribution names
+DISTRIBUTION_TO_MODULES = {
+    "kubernetes": ["kubernetes", "yaml", "urllib3", "six", "dateutil", "google", "websocket", "requests_oauthlib", "oauthlib", "certifi", "durationpy"],
+    "requests": ["requests", "urllib3", "certifi", "charset_normalizer", "idna"],
+    "pandas": ["pandas", "dateutil", "pytz", "tzdata"],
+    "pyyaml": ["yaml"],
+    "python-dateutil": ["dateutil"]
+}
+# files copied to the pod volume along with the scripts
+LOCAL_MODULES = ["unittest_base"]
+K6_MODULE_PREFIXES = ["k6", "https://jslib.k6.io/"]
+K6_REQUIRED_OPTIONS = ["vus", "duration", "thresholds"]
+NODE_CHECK_TIMEOUT = 10 # sec
+
+USER_PREFLIGHT_ERROR = """\
+The script was rejected by static checks before running it in a pod:
+{errors}"""
+
+
+#-------------------
+# pre-flight result
+#-------------------
+class PreflightResult(BaseModel):
+    fname: str
+    errors: List[str] = []
+
+    @property
+    def passed(self) -> bool:
+        return len(self.errors) == 0
+
+    def to_str(self) -> str:
+        return USER_PREFLIGHT_ERROR.format(errors="\n".join(f"- {error}" for error in self.errors))
+
+
+def get_runner_modules(dockerfile_path: str = K8SAPI_DOCKERFILE_PATH) -> List[str]:
+    """top-level module names importable in the k8s API runner image"""
+    packages = DEFAULT_RUNNER_PACKAGES
+    if os.path.exists(dockerfile_path):
+        # join continued lines, then collect the arguments of `pip install`
+        dockerfile = read_file(dockerfile_path).replace("\\\n", " ")
+        packages = [
+            re.split(r"[<>=!~\[;]", arg)[0].lower()
+            for cmd in re.findall(r"pip3? install([^\n&|;]*)", dockerfile)
+            for arg in cmd.split() if not arg.startswith("-")
+        ]
+    modules = set()
+    for package in packages:
+        modules.update(DISTRIBUTION_TO_MODULES.get(package, [package.replace("-", "_")]))
+    return sorted(modules)
+
+
+class ScriptPreflight:
+    """
+    Static checks of generated scripts, which are run before shipping them to a pod.
+    Python: syntax (for the runner's Python version), argparse '--duration', the entry point,
+            K8sAPIBase subclassing (unit tests only), and imports available in the runner image.
+    k6    : syntax (`node --check` if available, otherwise delimiter matching) and
+            'vus'/'duration'/'thresholds' in the exported options.
+    """
+    def __init__(self, dockerfile_path: str = K8SAPI_DOCKERFILE_PATH) -> None:
+        self.allowed_modules = set(get_runner_modules(dockerfile_path)) | set(sys.stdlib_module_names) | set(LOCAL_MODULES)
+
+    def check(
+        self,
+        fname: str,
+        content: str,
+        is_unittest: bool = False
+    ) -> PreflightResult:
+        extension = os.path.splitext(fname)[1]
+        if extension == ".py":
+            errors = self.check_python(content, is_unittest)
+        elif extension == ".js":
+            errors = self.check_k6(content)
+        else:
+            errors = [f"Unsupported script type: {extension}. .js and .py are supported."]
+        return PreflightResult(fname=fname, errors=errors)
+
+    #--------
+    # python
+    #--------
+    def check_python(
+        self,
+        content: str,
+        is_unittest: bool = False
+    ) -> List[str]:
+        try:
+            tree = ast.parse(content, feature_version=RUNNER_PYTHON_VERSION)
+        except SyntaxError as e:
+            return [f"SyntaxError at line {e.lineno}: {e.msg}" + (f"\n  {e.text.strip()}" if e.text else "")]
+        errors = []
+        if not self.has_duration_arg(tree):
+            errors.append("argparse '--duration' is not defined. Add `parser.add_argument('--duration', type=int, ...)` so that the loop duration can be specified.")
+        if not self.has_entry_point(tree):
+            errors.append("The entry point is missing. Add `if __name__ == '__main__':` at the bottom to run the script from the command line.")
+        if is_unittest and not self.subclasses_k8s_api_base(tree):
+            errors.append("No class inherits from 'K8sAPIBase'. Import it via `from unittest_base import K8sAPIBase` and inherit from it.")
+        for lineno, module in self.get_imported_modules(tree):
+            if module not in self.allowed_modules:
+                errors.append(f"Line {lineno}: module '{module}' is not available in the runner image. Available third-party packages: {', '.join(sorted(self.allowed_modules - set(sys.stdlib_module_names)))}.")
+        return errors
+
+    def has_duration_arg(self, tree: ast.AST) -> bool:
+        for node in ast.walk(tree):
+            if (
+                isinstance(node, ast.Call)
+                and isinstance(node.func, ast.Attribute)
+                and node.func.attr == "add_argument"
+                and any(isinstance(arg, ast.Constant) and arg.value == "--duration" for arg in node.args)
+            ):
+                return True
+        return False
+
+    def has_entry_point(self, tree: ast.AST) -> bool:
+        for node in tree.body:
+            if (
+                isinstance(node, ast.If)
+                and isinstance(node.test, ast.Compare)
+                and isinstance(node.test.left, ast.Name)
+                and node.test.left.id == "__name__"
+                and any(isinstance(comparator, ast.Constant) and comparator.value == "__main__" for comparator in node.test.comparators)
+            ):
+                return True
+        return False
+
+    def subclasses_k8s_api_base(self, tree: ast.AST) -> bool:
+        for node in ast.walk(tree):
+            if isinstance(node, ast.ClassDef):
+                for base in node.bases:
+                    if (isinstance(base, ast.Name) and base.id == "K8sAPIBase") or (isinstance(base, ast.Attribute) and base.attr == "K8sAPIBase"):
+                        return True
+        return False
+
+    def get_imported_modules(self, tree: ast.AST) -> List[tuple]:
+        modules = []
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                modules += [(node.lineno, alias.name.split(".")[0]) for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module is not None:
+                modules.append((node.lineno, node.module.split(".")[0]))
+        return modules
+
+    #----
+    # k6
+    #----
+    def check_k6(self, content: str) -> List[str]:
+        masked, errors = mask_js(content)
+        if len(errors) == 0:
+            errors = check_js_delimiters(masked)
+        if len(errors) == 0 and (node_error := run_node_check(content)) is not None:
+            errors.append(node_error)
+        if len(errors) > 0:
+            return errors
+        if re.search(r"export\s+default\s+(async\s+)?function", masked) is None:
+            errors.append("`export default function` is missing. k6 runs the default exported function for each iteration.")
+        for lineno, module in self.get_js_imported_modules(content):
+            if not any(module.startswith(prefix) for prefix in K6_MODULE_PREFIXES):
+                errors.append(f"Line {lineno}: module '{module}' cannot be imported in k6. Use the k6 built-in modules (e.g., 'k6/http') or jslib (https://jslib.k6.io/).")
+        option_keys = get_js_object_keys(content, masked, "options")
+        if option_keys is None:
+            errors.append("`export const options = {...}` is missing. Define 'vus', 'duration', and 'thresholds' in the options.")
+        else:
+            for key in K6_REQUIRED_OPTIONS:
+                if key not in option_keys:
+                    errors.append(f"'{key}' is missing in the options.")
+        return errors
+
+    def get_js_imported_modules(self, content: str) -> List[tuple]:
+        return [
+            (content.count("\n", 0, match.start()) + 1, match.group(1))
+            for match in re.finditer(r"^\s*import\s[^;]*?from\s+['\"]([^'\"]+)['\"]", content, flags=re.MULTILINE)
+        ]
+
+
+#--------------------
+# javascript helpers
+#--------------------
+REGEX_PRECEDERS = set("(,=:[!&|?{};+-*%<>~^")
+BRACKET_PAIRS = {")": "(", "]": "[", "}": "{"}
+
+def mask_js(content: str) -> tuple:
+    """
+    Blank out comments, and brackets in string/template/regex literals, so that
+    brackets and object keys can be matched with plain text scanning.
+    Returns the masked code (same length as the input) and lexical errors.
+    """
+    masked = list(content)
+    i, n = 0, len(content)
+    prev = "" # last significant character outside literals
+    template_depths = [] # brace depths at which `${` of each template literal was opened
+    brace_depth = 0
+    def line_of(pos: int) -> int:
+        return content.count("\n", 0, pos) + 1
+    def blank(begin: int, end: int, keep_newlines: bool = True) -> None:
+        for j in range(begin, end):
+            if not (keep_newlines and content[j] == "\n"):
+                masked[j] = " "
+    def scan_literal(begin: int, quote: str) -> Optional[int]:
+        """return the index of the closing quote, or the index of `${` for template literals"""
+        j = begin + 1
+        while j < n:
+            c = content[j]
+            if c == "\\":
+                j += 2
+                continue
+            if c == quote:
+                return j
+            if quote == "`" and content.startswith("${", j):
+                return j
+            if c == "\n" and quote != "`":
+                return None
+            j += 1
+        return None
+
+    while i < n:
+        c = content[i]
+        if content.startswith("//", i):
+            end = content.find("\n", i)
+            end = n if end == -1 else end
+            blank(i, end)
+            i = end
+            continue
+        if content.startswith("/*", i):
+            end = content.find("*/", i + 2)
+            if end == -1:
+                return "".join(masked), [f"Unterminated comment starting at line {line_of(i)}."]
+            blank(i, end + 2)
+            i = end + 2
+            continue
+        if c in "'\"`" or (c == "}" and template_depths and template_depths[-1] == brace_depth):
+            if c == "}": # back to the template literal after `${...}`
+                template_depths.pop()
+                masked[i] = " "
+                quote = "`"
+            else:
+                quote = c
+            end = scan_literal(i, quote)
+            if end is None:
+                return "".join(masked), [f"Unterminated string literal at line {line_of(i)}."]
+            blank(i + 1, end)
+            if quote == "`" and content.startswith("${", end):
+                masked[end] = masked[end + 1] = " "
+                template_depths.append(brace_depth)
+                i = end + 2
+            else:
+                i = end + 1
+            prev = quote
+            continue
+        if c == "/" and (prev == "" or prev in REGEX_PRECEDERS):
+            j = i + 1
+            in_class = False
+            while j < n and (content[j] != "/" or in_class):
+                if content[j] == "\\":
+                    j += 1
+                elif content[j] == "[":
+                    in_class = True
+                elif content[j] == "]":
+                    in_class = False
+                elif content[j] == "\n":
+                    return "".join(masked), [f"Unterminated regular expression at line {line_of(i)}."]
+                j += 1
+            blank(i + 1, j)
+            i = j + 1
+            prev = "/"
+            continue
+        if c == "{":
+            brace_depth += 1
+        elif c == "}":
+            brace_depth -= 1
+        if not c.isspace():
+            prev = c
+        i += 1
+    return "".join(masked), []
+
+def check_js_delimiters(masked: str) -> List[str]:
+    stack = []
+    for i, c in enumerate(masked):
+        if c in "([{":
+            stack.append((c, i))
+        elif c in ")]}":
+            line = masked.count("\n", 0, i) + 1
+            if len(stack) == 0:
+                return [f"Unexpected '{c}' at line {line}."]
+            opener, pos = stack.pop()
+            if opener != BRACKET_PAIRS[c]:
+                return [f"'{opener}' at line {masked.count(chr(10), 0, pos) + 1} is closed by '{c}' at line {line}."]
+    if len(stack) > 0:
+        opener, pos = stack[-1]
+        return [f"'{opener}' at line {masked.count(chr(10), 0, pos) + 1} is never closed."]
+    return []
+
+JS_OBJECT_KEY_PATTERN = re.compile(r"\s*(?:([A-Za-z_$][\w$]*)|'([^'\n]*)'|\"([^\"\n]*)\")\s*:")
+
+def get_js_object_keys(
+    content: str,
+    masked: str,
+    name: str
+) -> Optional[List[str]]:
+    """
+    top-level keys of the object literal assigned to `name` (e.g., `export const options = {...}`).
+    The object is located in the masked code, and its keys (which may be quoted) are read from the original one.
+    """
+    match = re.search(rf"\b(?:const|let|var)\s+{name}\s*=\s*\{{", masked)
+    if match is None:
+        return None
+    keys = []
+    depth = 0
+    for i in range(match.end() - 1, len(masked)):
+        c = masked[i]
+        if c in "([{":
+            depth += 1
+        elif c in ")]}":
+            depth -= 1
+            if depth == 0:
+                break
+        # a key follows the opening brace or a comma at the top level
+        if depth == 1 and c in "{,":
+            if (key := JS_OBJECT_KEY_PATTERN.match(content, i + 1)) is not None:
+                keys.append(next(group for group in key.groups() if group is not None))
+    return keys
+
+def run_node_check(content: str) -> Optional[str]:
+    """full syntax check with node, if it is installed"""
+    if shutil.which("node") is None:
+        return None
+    with tempfile.TemporaryDirectory() as temp_dir:
+        script_path = f"{temp_dir}/script.mjs"
+        with open(script_path, "w") as f:
+            f.write(content)
+        try:
+            res = subprocess.run(["node", "--check", script_path], capture_output=True, text=True, timeout=NODE_CHECK_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            return None
+    if res.returncode == 0:
+        return None
+    return "SyntaxError: " + res.stderr.replace(script_path, "script.js").strip()
@@ -3,6 +3,7 @@ import json
 from typing import List, Dict, Tuple
 
 from .utils import run_pod, Inspection
+from .preflight import ScriptPreflight
 from ....preprocessing.preprocessor import ProcessedData
 from ....utils.wrappers import LLM, LLMBaseModel, LLMField
 from ....utils.llms import build_json_agent, LLMLog, LoggingCallback
@@ -98,6 +99,7 @@ class K6UnitTest(LLMBaseModel):
 class UnittestAgent:
     def __init__(self, llm: LLM) -> None:
         self.llm = llm
+        self.preflight = ScriptPreflight()
 
     def write_unittest(
         self,
@@ -161,13 +163,20 @@ class UnittestAgent:
                 subcontainer_id="unittest",
                 subsubcontainer_id=subsubcontainer_id
             )
-            returncode, console_log = run_pod(
-                inspection=inspection_,
-                work_dir=work_dir,
-                kube_context=kube_context,
-                namespace="chaos-hunter",
-                display_container=display_container.get_subsubcontainer(subsubcontainer_id)
-            )
+            # check the unit test locally before shipping it to a pod
+            preflight = self.preflight.check(inspection_.script.fname, unittest["code"], is_unittest=True)
+            if preflight.passed:
+                returncode, console_log = run_pod(
+                    inspection=inspection_,
+                    work_dir=work_dir,
+                    kube_context=kube_context,
+                    namespace="chaos-hunter",
+                    display_container=display_container.get_subsubcontainer(subsubcontainer_id),
+                    use_cache=True
+                )
+            else:
+                display_container.get_subsubcontainer(subsubcontainer_id).write("###### Static pre-flight check failed:")
+                returncode, console_log = 1, preflight.to_str()
             display_container.create_subsubcontainer(
                 subcontainer_id="unittest",
                 subsubcontainer_id=f"unittest_value{mod_count}",
@@ -1,14 +1,11 @@
 import os
 import time
-import json
-import subprocess
 from typing import Tuple, Literal, Optional
-from kubernetes import client, config
-from kubernetes.client.rest import ApiException
+
+import yaml
 
 from ....utils.functions import (
     write_file,
-    type_cmd,
     render_jinja_template,
     parse_time,
     sanitize_k8s_name,
@@ -16,7 +13,10 @@ from ....utils.functions import (
 )
 from ....utils.wrappers import BaseModel
 from ....utils.schemas import File
+from ....utils.cache import POD_RESULT_CACHE
+from ....utils.tracing import get_tracer, traced
 from ....utils.constants import K6_POD_TEMPLATE_PATH, K8S_POD_TEMPLATE_PATH
+from ....backends.backend import get_backend
 
 
 K8S_INSPECTION_SUMMARY = """\
@@ -57,51 +57,27 @@ class Inspection(BaseModel):
             )
 
 
-def _create_k8s_api_client(kube_context: str):
-    """Helper function to create a Kubernetes API client."""
-    configuration = client.Configuration()
-    if os.getenv('KUBERNETES_SERVICE_HOST'):
-        config.load_incluster_config(client_configuration=configuration)
-    else:
-        config.load_kube_config(context=kube_context, client_configuration=configuration)
-    return client.CoreV1Api(client.ApiClient(configuration=configuration))
-
-def _check_pvc_ready(pvc_name: str, namespace: str, kube_context: str) -> bool:
-    """Checks if a PersistentVolumeClaim exists and is usable.
-    For WaitForFirstConsumer classes, Pending is acceptable until a pod consumes it.
-    """
-    api = _create_k8s_api_client(kube_context)
-    try:
-        pvc = api.read_namespaced_persistent_volume_claim(name=pvc_name, namespace=namespace)
-        phase = pvc.status.phase
-        if phase == "Bound":
-            return True
-        elif phase == "Pending":
-            # Check storageClass binding mode
-            sc_name = pvc.spec.storage_class_name
-            if sc_name:
-                sc_api = client.StorageV1Api(client.ApiClient(api.api_client.configuration))
-                sc = sc_api.read_storage_class(sc_name)
-                if sc.volume_binding_mode == "WaitForFirstConsumer":
-                    print(f"PVC {pvc_name} is Pending with WaitForFirstConsumer. Allowing pod creation.")
-                    return True
-            return False
-        else:
-            return False
-    except ApiException as e:
-        if e.status == 404:
-            return False
-        raise
-
+@traced("pod")
 def run_pod(
     inspection: Inspection,
     work_dir: str,
     kube_context: str,
     namespace: str,
-    display_container=None
+    display_container=None,
+    use_cache: bool = False
 ) -> Tuple[int, str]:
+    # reuse the result of the same script run against the same deployment.
+    # only for unit tests: inspections read the live state of the cluster, which changes without redeployment
+    cache_args = (kube_context, namespace, inspection.tool_type, inspection.duration, inspection.script.content)
+    if use_cache and (cached_result := POD_RESULT_CACHE.get(*cache_args)) is not None:
+        if display_container is not None:
+            display_container.write(f"###### The same script has already been run against the current deployment. Reusing its results:")
+        print(f"Reusing the cached result of {inspection.script.fname}.")
+        return cached_result
+
     # Check PVC
-    if not _check_pvc_ready("pvc", namespace, kube_context):
+    backend = get_backend()
+    if not backend.pvc_ready("pvc", kube_context, namespace):
         error_msg = f"PersistentVolumeClaim 'pvc' not found or not in a usable state in namespace '{namespace}'. Pod creation will fail."
         print(error_msg)
         if display_container is not None:
@@ -133,29 +109,33 @@ def run_pod(
     write_file(yaml_path, pod_manifest)
 
     # apply the manifest
-    type_cmd(f"kubectl apply -f {yaml_path} --context {kube_context} -n {namespace}")
+    backend.apply(yaml_path, kube_context, namespace)
 
     # wait for completion
     if wait_for_pod_completion(pod_name, kube_context, namespace, display_container=display_container):
-        time.sleep(1)
+        with get_tracer().span("log_flush_delay", "sleep"):
+            time.sleep(1)
         returncode, console_logs = get_pod_logs(pod_name, kube_context, namespace)
-        type_cmd(f"kubectl delete pod {pod_name} --context {kube_context} -n {namespace}")
+        backend.delete(kube_context, namespace, kind="pod", name=pod_name)
+        if use_cache:
+            POD_RESULT_CACHE.put(*cache_args, returncode=returncode, console_log=limit_string_length(console_logs))
         return returncode, limit_string_length(console_logs)
     else:
         # Collect extra debug info
-        pvc_info = type_cmd(f"kubectl get pvc pvc -n {namespace} -o yaml --context {kube_context}")
-        pod_events = type_cmd(f"kubectl get events -n {namespace} --context {kube_context} --sort-by=.metadata.creationTimestamp | tail -20")
+        pvc_info = yaml.dump(backend.get("pvc", kube_context, namespace, name="pvc", widget=True))
+        pod_events = backend.get_events(kube_context, namespace, limit=20).output
         console_logs = (
             "Pod did not complete successfully.\n\n"
             f"PVC Status:\n{pvc_info}\n\n"
             f"Recent Pod Events:\n{pod_events}"
         )
         print(console_logs)
-        type_cmd(f"kubectl delete pod {pod_name} --context {kube_context} -n {namespace}")
+        backend.delete(kube_context, namespace, kind="pod", name=pod_name)
         assert False, console_logs
         return -1, console_logs
 
 
+@traced("wait")
 def wait_for_pod_completion(
     pod_name: str,
     kube_context: str,
@@ -166,57 +146,47 @@ def wait_for_pod_completion(
 ) -> bool:
     start_time = time.time()
     while (time.time()) - start_time < timeout:
-        try:
-            result = subprocess.run(
-                ["kubectl", "get", "pod", pod_name, "--context", kube_context, "-n", namespace, "-o", "json"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            pod_data = json.loads(result.stdout)
-            phase = pod_data["status"]["phase"]
-            container_statuses = pod_data.get("status", {}).get("containerStatuses", [])
-            if container_statuses and container_statuses.get("state", {}).get("terminated"):
-                if display_container is not None:
-                    display_container.write(f"###### Pod ```{pod_name}``` has completed.  \nThe inspection script's results (current states) are as follows:")
-                print(f"Pod {pod_name} has completed.")
-                return True
-            elif phase == "Succeeded":
-                if display_container is not None:
-                    display_container.write(f"###### Pod ```{pod_name}``` has completed successfully.  \nThe inspection script's results are as follows:")
-                print(f"Pod {pod_name} has completed successfully.")
-                return True
-            elif phase == "Failed":
-                if display_container is not None:
-                    display_container.write(f"###### Pod ```{pod_name}``` has failed.")
-                print(f"Pod {pod_name} has failed.")
-                return True
-            else:
-                if display_container is not None:
-                    display_container.write(f"###### Pod ```{pod_name}``` is in phase ```{phase}```. Waiting...")
-                print(f"Pod {pod_name} is in phase {phase}. Waiting... (elapsed: {int(time.time() - start_time)}s)")
-        except subprocess.CalledProcessError as e:
-            print(f"Error checking Pod status: {e}")
+        pod_data = get_backend().get("pod", kube_context, namespace, name=pod_name)
+        if pod_data is None:
+            print(f"Error checking Pod status: {pod_name} is not found.")
             return False
+        phase = pod_data["status"]["phase"]
+        container_statuses = pod_data.get("status", {}).get("containerStatuses", [])
+        if any(container_status.get("state", {}).get("terminated") for container_status in container_statuses):
+            if display_container is not None:
+                display_container.write(f"###### Pod ```{pod_name}``` has completed.  \nThe inspection script's results (current states) are as follows:")
+            print(f"Pod {pod_name} has completed.")
+            return True
+        elif phase == "Succeeded":
+            if display_container is not None:
+                display_container.write(f"###### Pod ```{pod_name}``` has completed successfully.  \nThe inspection script's results are as follows:")
+            print(f"Pod {pod_name} has completed successfully.")
+            return True
+        elif phase == "Failed":
+            if display_container is not None:
+                display_container.write(f"###### Pod ```{pod_name}``` has failed.")
+            print(f"Pod {pod_name} has failed.")
+            return True
+        else:
+            if display_container is not None:
+                display_container.write(f"###### Pod ```{pod_name}``` is in phase ```{phase}```. Waiting...")
+            print(f"Pod {pod_name} is in phase {phase}. Waiting... (elapsed: {int(time.time() - start_time)}s)")
         time.sleep(interval)
     print(f"Timeout waiting for Pod {pod_name} to complete.")
     return False
 
+@traced("pod")
 def get_pod_logs(
     pod_name: str,
     kube_context: str,
     namespace: str = "chaos-hunter"
 ) -> Tuple[int, str]:
-    try:
-        result = subprocess.run(
-            ["kubectl", "logs", pod_name, "--context", kube_context, "-n", namespace],
-            capture_output=True, text=True, check=True
-        )
-        status = get_pod_status(pod_name, kube_context, namespace)
-        return status.exitcode, result.stdout
-    except subprocess.CalledProcessError as e:
-        print(f"Error getting Pod logs: {e}")
+    result = get_backend().logs(pod_name, kube_context, namespace)
+    if result.returncode != 0:
+        print(f"Error getting Pod logs: {result.stderr}")
         return None
+    status = get_pod_status(pod_name, kube_context, namespace)
+    return status.exitcode, result.stdout
 
 class Status(BaseModel):
     exitcode: int
@@ -227,9 +197,10 @@ def get_pod_status(
     kube_context: str,
     namespace: str
 ) -> Status:
-    logs = type_cmd(f"kubectl logs {pod_name} --context {kube_context} -n {namespace}")
-    summary = type_cmd(f"kubectl get pod {pod_name} --context {kube_context} -n {namespace} -o json")
-    pod_info = json.loads(summary)
+    backend = get_backend()
+    logs = backend.logs(pod_name, kube_context, namespace, widget=True).output
+    pod_info = backend.get("pod", kube_context, namespace, name=pod_name, widget=True)
+    assert pod_info is not None, f"Cannot find the pod {pod_name}."
     container_statuses = pod_info.get("status", {}).get("containerStatuses", [])
     assert len(container_statuses) > 0, f"Cannot find containerStatuses in the json summary: {container_statuses}."
     for container_status in container_statuses:
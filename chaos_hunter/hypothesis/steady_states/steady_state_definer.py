@@ -1,5 +1,8 @@
 import os
-from typing import List, Dict, Tuple
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import List, Dict, Tuple, Optional
 
 import streamlit as st
 
@@ -9,12 +12,13 @@ from .llm_agents.threshold_agent import ThresholdAgent
 from .llm_agents.unittest_agent import UnittestAgent
 from .llm_agents.completion_check_agent import SteadyStateCompletionCheckAgent
 from .llm_agents.utils import Inspection
+from .steady_state_library import SteadyStateLibrary, ManifestIndex
 from ...preprocessing.preprocessor import ProcessedData
 from ...utils.wrappers  import LLM, BaseModel
 from ...utils.schemas import File
-from ...utils.llms import LLMLog
+from ...utils.llms import LLMLog, cancellable
 from ...utils.functions import int_to_ordinal
-from ...utils.streamlit import StreamlitContainer
+from ...utils.streamlit import StreamlitContainer, StreamlitUIQueue
 
 
 STEADY_STATE_OVERVIEW_TEMPLATE = """\
@@ -31,6 +35,11 @@ STEADY_STATE_LIST_TEMPLATE = """\
 {script}
 ```"""
 
+STEADY_STATE_IN_PROGRESS_TEMPLATE = """\
+{ordinal_number} steady states (its threshold and unit test are still being defined):
+- Name: {name}
+- Description: {description}"""
+
 class SteadyState(BaseModel):
     id: int
     name: str
@@ -72,6 +81,24 @@ class SteadyStates(BaseModel):
     def append(self, steady_state: SteadyState):
         self.elems.append(steady_state)
 
+class SpeculativeSteadyStates(SteadyStates):
+    """defined steady states + a drafted one whose threshold and unit test are still being defined"""
+    draft: Dict[str, str]
+
+    @property
+    def count(self):
+        return len(self.elems) + 1
+
+    def to_overview_str(self) -> str:
+        in_progress_str = STEADY_STATE_IN_PROGRESS_TEMPLATE.format(
+            ordinal_number=int_to_ordinal(len(self.elems)+1),
+            name=self.draft["name"],
+            description=self.draft["thought"]
+        )
+        if len(self.elems) > 0:
+            return f"{super().to_overview_str()}\n{in_progress_str}"
+        return f"1 steady state is being defined.\n{in_progress_str}"
+
 
 #--------------------------
 # agent-manager definition
@@ -94,6 +121,8 @@ class SteadyStateDefiner:
         self.threshold_agent  = ThresholdAgent(llm)
         self.unittest_agent   = UnittestAgent(llm)
         self.completion_check_agent = SteadyStateCompletionCheckAgent(llm)
+        # pre-validated templates for common steady states
+        self.library = SteadyStateLibrary(namespace)
 
     def define_steady_states(
         self,
@@ -101,7 +130,9 @@ class SteadyStateDefiner:
         kube_context: str,
         work_dir: str,
         max_num_steady_states: int = 2,
-        max_retries: int = 3
+        max_retries: int = 3,
+        pipelined: bool = False,
+        use_library: bool = False
     ) -> Tuple[List[LLMLog], SteadyStates]:
         #-------------------
         # 0. initialization
@@ -116,98 +147,180 @@ class SteadyStateDefiner:
         steady_states = SteadyStates()
         steady_state_containers = []
         prev_check_thought = ""
+        # pipelined mode: the completion check and the next draft run in the background
+        # while the pods of the current steady state are running.
+        # UI updates from the worker are applied by this (script) thread through ui_queue whenever it writes to
+        # its own containers, and the worker runs in a copy of this context (e.g., to log its LLM calls into the cycle's message store).
+        executor = ThreadPoolExecutor(max_workers=1) if pipelined else None
+        ui_queue = StreamlitUIQueue()
+        cancelled = threading.Event() # stops the speculative work (including a running LLM call) when it is discarded
+        speculation: Optional[Future] = None
+        next_draft = None
+        manifest_index = ManifestIndex(input_data.k8s_yamls) if use_library else None
 
         #-----------------------------------
         # sequentially define steady states
         #-----------------------------------
-        num_retries = 0
-        while steady_states.count < max_num_steady_states:
-            # error handling
-            assert num_retries < max_retries + max_num_steady_states, f"MAX_RETRIES_EXCEEDED: failed to define steady states within {max_retries+max_num_steady_states} tries."
-            num_retries += 1
-
-            # display settings
-            display_container = StreamlitContainer()
-            steady_state_containers.append(display_container)
-
-            #-------------------------
-            # 1. draft a steady state
-            #-------------------------
-            draft_log, steady_state_draft = self.draft_agent.draft_steady_state(
-                input_data=input_data,
-                predefined_steady_states=steady_states,
-                prev_check_thought=prev_check_thought,
-                display_container=display_container
-            )
-            logs.append(draft_log)
+        try:
+            num_retries = 0
+            while steady_states.count < max_num_steady_states:
+                # error handling
+                assert num_retries < max_retries + max_num_steady_states, f"MAX_RETRIES_EXCEEDED: failed to define steady states within {max_retries+max_num_steady_states} tries."
+                num_retries += 1
 
-            #--------------------------------------------------
-            # 2. inspect the current value of the steady state
-            #--------------------------------------------------
-            cmd_log, inspection = self.inspection_agent.inspect_current_state(
-                input_data=input_data,
-                steady_state_draft=steady_state_draft,
-                predefined_steady_states=steady_states,
-                display_container=display_container,
-                kube_context=kube_context,
-                work_dir=work_dir,
-                max_retries=max_retries
-            )
-            logs.append(cmd_log)
+                #-------------------------
+                # 1. draft a steady state
+                #-------------------------
+                if next_draft is not None: # already drafted in the background
+                    display_container, draft_log, steady_state_draft = next_draft
+                    display_container = ui_queue.draining(display_container)
+                    next_draft = None
+                else:
+                    display_container = ui_queue.draining(StreamlitContainer())
+                    draft_log, steady_state_draft = self.draft_agent.draft_steady_state(
+                        input_data=input_data,
+                        predefined_steady_states=steady_states,
+                        prev_check_thought=prev_check_thought,
+                        display_container=display_container
+                    )
+                steady_state_containers.append(display_container)
+                logs.append(draft_log)
 
-            #---------------------------------------------
-            # 3. define a threshold for the steady steate
-            #---------------------------------------------
-            threshold_log, threshold = self.threshold_agent.define_threshold(
-                input_data=input_data,
-                steady_state_draft=steady_state_draft,
-                inspection=inspection,
-                predefined_steady_states=steady_states,
-                display_container=display_container
-            )
-            logs.append(threshold_log)
+                # speculatively check the completion and draft the next steady state
+                if pipelined and steady_states.count + 1 < max_num_steady_states:
+                    speculation = executor.submit(
+                        contextvars.copy_context().run,
+                        self.speculate_next_steady_state,
+                        input_data=input_data,
+                        speculative_steady_states=SpeculativeSteadyStates(elems=list(steady_states.elems), draft=steady_state_draft),
+                        check_container=st.container(),
+                        next_display_container=StreamlitContainer(),
+                        ui_queue=ui_queue,
+                        cancelled=cancelled
+                    )
+
+                #----------------------------------------------------------------
+                # 2-4. inspection, threshold, and unit test from a template
+                #      (falls back to the LLM agents if no template fits)
+                #----------------------------------------------------------------
+                defined = None
+                if use_library and (match := self.library.match(steady_state_draft, manifest_index)) is not None:
+                    defined = self.library.define_steady_state(
+                        match=match,
+                        steady_state_draft=steady_state_draft,
+                        predefined_steady_states=steady_states,
+                        display_container=display_container,
+                        kube_context=kube_context,
+                        work_dir=work_dir
+                    )
+                if defined is not None:
+                    inspection, threshold, unittest = defined
+                else:
+                    #--------------------------------------------------
+                    # 2. inspect the current value of the steady state
+                    #--------------------------------------------------
+                    cmd_log, inspection = self.inspection_agent.inspect_current_state(
+                        input_data=input_data,
+                        steady_state_draft=steady_state_draft,
+                        predefined_steady_states=steady_states,
+                        display_container=display_container,
+                        kube_context=kube_context,
+                        work_dir=work_dir,
+                        max_retries=max_retries
+                    )
+                    logs.append(cmd_log)
+
+                    #---------------------------------------------
+                    # 3. define a threshold for the steady steate
+                    #---------------------------------------------
+                    threshold_log, threshold = self.threshold_agent.define_threshold(
+                        input_data=input_data,
+                        steady_state_draft=steady_state_draft,
+                        inspection=inspection,
+                        predefined_steady_states=steady_states,
+                        display_container=display_container
+                    )
+                    logs.append(threshold_log)
+
+                    #-------------------------------------------
+                    # 4. write a unit test for the steady state
+                    #-------------------------------------------
+                    unittest_log, unittest = self.unittest_agent.write_unittest(
+                        input_data=input_data,
+                        steady_state_draft=steady_state_draft,
+                        inspection=inspection,
+                        threshold=threshold,
+                        predefined_steady_states=steady_states,
+                        display_container=display_container,
+                        kube_context=kube_context,
+                        work_dir=work_dir,
+                        max_retries=max_retries
+                    )
+                    logs.append(unittest_log)
+
+                #-------------------------------
+                # epilogue for the steady state
+                #-------------------------------
+                steady_states.append(SteadyState(
+                    id=steady_states.count,
+                    name=steady_state_draft["name"],
+                    description=steady_state_draft["thought"],
+                    inspection=inspection,
+                    threshold=threshold,
+                    unittest=unittest
+                ))
 
-            #-------------------------------------------
-            # 4. write a unit test for the steady state
-            #-------------------------------------------
-            unittest_log, unittest = self.unittest_agent.write_unittest(
+                #-------------------------------
+                # Check steady-state completion
+                #-------------------------------
+                if steady_states.count >= max_num_steady_states:
+                    with st.container(border=True):
+                        st.write(f"##### The number of steady states has reached the maximum limit ({max_num_steady_states}).")
+                    break
+                if speculation is not None:
+                    ui_queue.drain_until_done([speculation])
+                    check_log, check, next_draft = speculation.result()
+                    speculation = None
+                else:
+                    check_log, check = self.completion_check_agent.check_steady_state_completion(
+                        input_data=input_data,
+                        predefined_steady_states=steady_states,
+                    )
+                logs.append(check_log)
+                prev_check_thought = check["thought"]
+                if not check["requires_addition"]: 
+                    break
+        finally:
+            if executor is not None:
+                cancelled.set()
+                executor.shutdown(wait=False, cancel_futures=True)
+        return logs, steady_states
+
+    def speculate_next_steady_state(
+        self,
+        input_data: ProcessedData,
+        speculative_steady_states: SpeculativeSteadyStates,
+        check_container: st.container,
+        next_display_container: StreamlitContainer,
+        ui_queue: StreamlitUIQueue,
+        cancelled: threading.Event
+    ) -> Tuple[LLMLog, Dict[str, str], Optional[tuple]]:
+        """runs in the worker thread; the containers are created by the script thread and written through ui_queue"""
+        with cancellable(cancelled):
+            check_log, check = self.completion_check_agent.check_steady_state_completion(
                 input_data=input_data,
-                steady_state_draft=steady_state_draft,
-                inspection=inspection,
-                threshold=threshold,
-                predefined_steady_states=steady_states,
-                display_container=display_container,
-                kube_context=kube_context,
-                work_dir=work_dir,
-                max_retries=max_retries
+                predefined_steady_states=speculative_steady_states,
+                ui_queue=ui_queue,
+                container=check_container
             )
-            logs.append(unittest_log)
-
-            #-------------------------------
-            # epilogue for the steady state
-            #-------------------------------
-            steady_states.append(SteadyState(
-                id=steady_states.count,
-                name=steady_state_draft["name"],
-                description=steady_state_draft["thought"],
-                inspection=inspection,
-                threshold=threshold,
-                unittest=unittest
-            ))
-
-            #-------------------------------
-            # Check steady-state completion
-            #-------------------------------
-            if steady_states.count >= max_num_steady_states:
-                with st.container(border=True):
-                    st.write(f"##### The number of steady states has reached the maximum limit ({max_num_steady_states}).")
-                break
-            check_log, check = self.completion_check_agent.check_steady_state_completion(
+            if not check["requires_addition"] or cancelled.is_set():
+                # discard the speculative work
+                ui_queue.put(next_display_container.header_empty.empty)
+                return check_log, check, None
+            draft_log, steady_state_draft = self.draft_agent.draft_steady_state(
                 input_data=input_data,
-                predefined_steady_states=steady_states,
+                predefined_steady_states=speculative_steady_states,
+                prev_check_thought=check["thought"],
+                display_container=ui_queue.wrap(next_display_container)
             )
-            logs.append(check_log)
-            prev_check_thought = check["thought"]
-            if not check["requires_addition"]: 
-                break
-        return logs, steady_states
\ No newline at end of file
+        return check_log, check, (next_display_container, draft_log, steady_state_draft)
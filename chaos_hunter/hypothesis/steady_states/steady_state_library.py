@@ -0,0 +1,405 @@
+import os
+import re
+import abc
+import math
+from typing import List, Dict, Tuple, Optional, Any, Literal
+
+import yaml
+
+from .llm_agents.utils import Inspection, run_pod
+from .llm_agents.preflight import ScriptPreflight
+from ...utils.wrappers import BaseModel
+from ...utils.schemas import File
+from ...utils.functions import write_file, copy_file, render_jinja_template, sanitize_filename
+from ...utils.constants import K8S_STEADY_STATE_TEMPLATE_DIR, K6_STEADY_STATE_TEMPLATE_DIR, UNITTEST_BASE_PY_PATH
+from ...utils.streamlit import StreamlitContainer
+
+
+WORKLOAD_KINDS = ["Deployment", "StatefulSet", "ReplicaSet", "DaemonSet", "Pod"]
+HTTP_PORTS = [80, 8000, 8080, 3000, 5000, 8888]
+STEADY_STATE_VALUE_PATTERN = r"STEADY_STATE_VALUE:\s*([0-9.eE+-]+)"
+TEMPLATE_DURATION = "5s"
+K6_VUS = 5
+K6_INTERVAL_SEC = 1
+
+
+#----------------
+# manifest index
+#----------------
+class ManifestResource(BaseModel):
+    kind: str
+    name: str
+    namespace: Optional[str]
+    fname: str
+    body: dict
+
+    @property
+    def pod_labels(self) -> Dict[str, str]:
+        if self.kind == "Pod":
+            return self.body.get("metadata", {}).get("labels") or {}
+        return self.body.get("spec", {}).get("template", {}).get("metadata", {}).get("labels") or {}
+
+    @property
+    def selector(self) -> Dict[str, str]:
+        """labels selecting the pods of a workload or a service"""
+        if self.kind == "Pod":
+            return self.pod_labels
+        if self.kind == "Service":
+            return self.body.get("spec", {}).get("selector") or {}
+        return self.body.get("spec", {}).get("selector", {}).get("matchLabels") or {}
+
+    @property
+    def replicas(self) -> Optional[int]:
+        if self.kind == "Pod":
+            return 1
+        if self.kind == "DaemonSet":
+            return None
+        return self.body.get("spec", {}).get("replicas", 1)
+
+class ManifestIndex:
+    """K8s resources of the input manifests, indexed by file and by name"""
+    def __init__(self, k8s_yamls: List[File]) -> None:
+        self.resources: List[ManifestResource] = []
+        for k8s_yaml in k8s_yamls:
+            try:
+                docs = list(yaml.safe_load_all(k8s_yaml.content))
+            except yaml.YAMLError:
+                continue
+            for doc in docs:
+                if not isinstance(doc, dict) or "kind" not in doc or "name" not in doc.get("metadata", {}):
+                    continue
+                self.resources.append(ManifestResource(
+                    kind=doc["kind"],
+                    name=doc["metadata"]["name"],
+                    namespace=doc["metadata"].get("namespace"),
+                    fname=k8s_yaml.fname,
+                    body=doc
+                ))
+
+    def find_targets(self, steady_state_draft: Dict[str, str]) -> List[ManifestResource]:
+        """resources in the manifest targeted by the draft; resources named in the steady-state name come first"""
+        manifest = steady_state_draft.get("manifest") or ""
+        draft_name = normalize_name(steady_state_draft["name"])
+        in_manifest = [
+            resource for resource in self.resources
+            if manifest != "" and (resource.fname == manifest or os.path.basename(resource.fname) == os.path.basename(manifest))
+        ]
+        named = sorted(
+            [resource for resource in self.resources if normalize_name(resource.name) in draft_name],
+            key=lambda resource: -len(resource.name)
+        )
+        targets = []
+        for resource in named + in_manifest:
+            if resource not in targets:
+                targets.append(resource)
+        return targets
+
+    def find_services(self, workload: ManifestResource) -> List[ManifestResource]:
+        return [
+            resource for resource in self.resources
+            if resource.kind == "Service" and len(resource.selector) > 0 and resource.selector.items() <= workload.pod_labels.items()
+        ]
+
+    def find_workloads(self, service: ManifestResource) -> List[ManifestResource]:
+        return [
+            resource for resource in self.resources
+            if resource.kind in WORKLOAD_KINDS and len(service.selector) > 0 and service.selector.items() <= resource.pod_labels.items()
+        ]
+
+def normalize_name(name: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+def get_http_port(service: ManifestResource) -> Optional[int]:
+    """a port of the service that serves HTTP, judged by its name, appProtocol, or number"""
+    ports = [port for port in service.body.get("spec", {}).get("ports") or [] if "port" in port]
+    for port in ports:
+        if str(port.get("appProtocol", "")).lower() in ["http", "kubernetes.io/h2c"] or str(port.get("name", "")).lower().startswith("http"):
+            return port["port"]
+    for port in ports:
+        if port["port"] in HTTP_PORTS:
+            return port["port"]
+    return None
+
+
+#---------------------------
+# steady-state templates
+#---------------------------
+class SteadyStateMatch(BaseModel):
+    template_name: str
+    tool_type: Literal["k8s", "k6"]
+    params: Dict[str, Any]
+
+class SteadyStateTemplate(abc.ABC):
+    """A pre-validated, parameterized pair of an inspection script and a unit test"""
+    name: str # also the category of steady-state drafts that the template defines
+    tool_type: Literal["k8s", "k6"]
+    inspection_template: str
+    unittest_template: str
+
+    @abc.abstractmethod
+    def resolve_params(
+        self,
+        index: ManifestIndex,
+        targets: List[ManifestResource],
+        namespace: str
+    ) -> Optional[Dict[str, Any]]:
+        """returns the parameters of the templates for the target resources, or None if they do not fit"""
+        ...
+
+    @abc.abstractmethod
+    def define_threshold(
+        self,
+        value: float,
+        params: Dict[str, Any]
+    ) -> Optional[Tuple[Dict[str, str], Dict[str, Any]]]:
+        """returns the threshold and the parameters of the unit test, or None if the current value is not a steady state"""
+        ...
+
+    def render_inspection(self, params: Dict[str, Any]) -> str:
+        return render_jinja_template(self.inspection_template, **params)
+
+    def render_unittest(self, params: Dict[str, Any]) -> str:
+        return render_jinja_template(self.unittest_template, **params)
+
+class PodCountTemplate(SteadyStateTemplate):
+    name = "ready_pod_count"
+    tool_type = "k8s"
+    inspection_template = f"{K8S_STEADY_STATE_TEMPLATE_DIR}/pod_count_inspection.j2"
+    unittest_template = f"{K8S_STEADY_STATE_TEMPLATE_DIR}/pod_count_unittest.j2"
+    min_ratio = 0.8
+
+    def resolve_params(self, index, targets, namespace):
+        workloads = []
+        for target in targets:
+            if target.kind in WORKLOAD_KINDS:
+                workloads.append(target)
+            elif target.kind == "Service":
+                workloads += index.find_workloads(target)
+        for workload in workloads:
+            if len(workload.selector) == 0:
+                continue
+            return {
+                "resource_kind": workload.kind,
+                "resource_name": workload.name,
+                "namespace": workload.namespace or namespace,
+                "label_selector": ",".join(f"{key}={value}" for key, value in workload.selector.items()),
+                "expected_replicas": workload.replicas if workload.replicas is not None else "unknown"
+            }
+        return None
+
+    def define_threshold(self, value, params):
+        num_ready = int(value)
+        if num_ready == 0:
+            return None
+        expected = params["expected_replicas"]
+        min_ready = min(num_ready, expected) if isinstance(expected, int) else num_ready
+        threshold = {
+            "threshold": f"At least {min_ready} ready pod(s) of {params['resource_kind']} '{params['resource_name']}' in at least {self.min_ratio*100:.0f}% of the checks during the monitoring period.",
+            "reason": f"The current minimum number of ready pods is {num_ready} (expected replicas: {expected}). The threshold keeps this redundancy and tolerates short fluctuations, e.g., during pod restarts."
+        }
+        return threshold, {**params, "min_ready": min_ready, "min_ratio": self.min_ratio}
+
+class HttpTemplate(SteadyStateTemplate):
+    tool_type = "k6"
+    inspection_template = f"{K6_STEADY_STATE_TEMPLATE_DIR}/http_inspection.j2"
+    unittest_template = f"{K6_STEADY_STATE_TEMPLATE_DIR}/http_unittest.j2"
+    value_expr: str
+
+    def resolve_params(self, index, targets, namespace):
+        services = []
+        for target in targets:
+            if target.kind == "Service":
+                services.append(target)
+            elif target.kind in WORKLOAD_KINDS:
+                services += index.find_services(target)
+        for service in services:
+            # GET / is only sent to ports that look like serving HTTP
+            if (port := get_http_port(service)) is None:
+                continue
+            return {
+                "service_name": service.name,
+                "url": f"http://{service.name}.{service.namespace or namespace}.svc.cluster.local:{port}/",
+                "vus": K6_VUS,
+                "duration": TEMPLATE_DURATION,
+                "interval": K6_INTERVAL_SEC,
+                "value_expr": self.value_expr
+            }
+        return None
+
+class HttpSuccessRateTemplate(HttpTemplate):
+    name = "http_success_rate"
+    value_expr = "successRate.toFixed(4)"
+    tolerance = 0.05
+
+    def define_threshold(self, value, params):
+        if value < 0.5: # requests are failing even in the normal state
+            return None
+        min_rate = math.floor((min(value, 1.0) - self.tolerance) * 100) / 100
+        threshold = {
+            "threshold": f"The HTTP request success rate to service '{params['service_name']}' is at least {min_rate*100:.0f}% (i.e., http_req_failed rate <= {1-min_rate:.2f}).",
+            "reason": f"The current success rate is {value*100:.2f}%. A tolerance of {self.tolerance*100:.0f}% is added to account for fluctuations."
+        }
+        return threshold, {
+            **params,
+            "threshold_metric": "http_req_failed",
+            "threshold_expr": f"rate<={1-min_rate:.2f}",
+            "threshold_comment": f"at least {min_rate*100:.0f}% of the requests must succeed"
+        }
+
+class HttpLatencyTemplate(HttpTemplate):
+    name = "http_p95_latency"
+    value_expr = "p95.toFixed(2)"
+
+    def define_threshold(self, value, params):
+        max_latency = int(math.ceil(max(value * 1.5, value + 50.) / 10.) * 10)
+        threshold = {
+            "threshold": f"The 95th percentile latency of HTTP requests to service '{params['service_name']}' is below {max_latency} ms.",
+            "reason": f"The current p95 latency is {value:.2f} ms. The threshold adds a 50% (at least 50 ms) margin to account for fluctuations."
+        }
+        return threshold, {
+            **params,
+            "threshold_metric": "http_req_duration",
+            "threshold_expr": f"p(95)<{max_latency}",
+            "threshold_comment": f"95% of the requests must finish within {max_latency} ms"
+        }
+
+
+#------------------
+# template library
+#------------------
+class SteadyStateLibrary:
+    """
+    Defines common steady states (ready pod count, HTTP success rate, p95 latency) from
+    templates instead of LLM-generated scripts (opt-in). A draft is matched to a template
+    only by the category classified in the draft and the kinds of its target resources;
+    other drafts and failed template runs fall back to the LLM agents.
+    """
+    def __init__(
+        self,
+        namespace: str = "chaos-hunter",
+        templates: List[SteadyStateTemplate] = None
+    ) -> None:
+        self.namespace = namespace
+        self.templates = templates if templates is not None else [HttpLatencyTemplate(), HttpSuccessRateTemplate(), PodCountTemplate()]
+        self.preflight = ScriptPreflight()
+
+    def match(
+        self,
+        steady_state_draft: Dict[str, str],
+        index: ManifestIndex
+    ) -> Optional[SteadyStateMatch]:
+        category = steady_state_draft.get("category")
+        if (template := next((template for template in self.templates if template.name == category), None)) is None:
+            return None
+        targets = index.find_targets(steady_state_draft)
+        if len(targets) == 0:
+            return None
+        if (params := template.resolve_params(index, targets, self.namespace)) is None:
+            return None
+        return SteadyStateMatch(template_name=template.name, tool_type=template.tool_type, params=params)
+
+    def get_template(self, name: str) -> SteadyStateTemplate:
+        return next(template for template in self.templates if template.name == name)
+
+    def define_steady_state(
+        self,
+        match: SteadyStateMatch,
+        steady_state_draft: Dict[str, str],
+        predefined_steady_states: list,
+        display_container: StreamlitContainer,
+        kube_context: str,
+        work_dir: str
+    ) -> Optional[Tuple[Inspection, Dict[str, str], File]]:
+        """inspect, define a threshold, and validate the unit test with one pod each; returns None to fall back to the LLM agents"""
+        template = self.get_template(match.template_name)
+        extension = ".py" if template.tool_type == "k8s" else ".js"
+        display_container.create_subcontainer(id="template", header=f"##### 📚 Steady-state template: ```{template.name}```")
+
+        #------------
+        # inspection
+        #------------
+        fname = f"{template.tool_type}_{sanitize_filename(steady_state_draft['name'])}{extension}"
+        inspection = Inspection(
+            tool_type=template.tool_type,
+            duration=TEMPLATE_DURATION,
+            script=File(path=f"{work_dir}/{fname}", content=template.render_inspection(match.params), work_dir=work_dir, fname=fname)
+        )
+        returncode, console_log = self.run_script(inspection, display_container, "template_inspection", kube_context, work_dir)
+        if returncode != 0 or (value := re.search(STEADY_STATE_VALUE_PATTERN, console_log)) is None:
+            return self.fall_back(display_container, "the inspection with the template failed")
+        inspection.result = console_log
+
+        #-----------
+        # threshold
+        #-----------
+        if (defined := template.define_threshold(float(value.group(1)), match.params)) is None:
+            return self.fall_back(display_container, "the current state does not look steady for the template")
+        threshold, unittest_params = defined
+        steady_state_draft["threshold"] = threshold["threshold"]
+        steady_state_draft["threshold_reason"] = threshold["reason"]
+        display_container.create_subsubcontainer(subcontainer_id="template", subsubcontainer_id="template_threshold", text=f"Threshold: {threshold['threshold']}  \n{threshold['reason']}")
+
+        #-----------
+        # unit test
+        #-----------
+        if template.tool_type == "k8s":
+            copy_file(UNITTEST_BASE_PY_PATH, f"{work_dir}/unittest_base.py")
+        fname = f"unittest_{sanitize_filename(steady_state_draft['name'])}_mod0{extension}"
+        unittest = File(path=f"{work_dir}/{fname}", content=template.render_unittest(unittest_params), work_dir=work_dir, fname=fname)
+        unittest_inspection = Inspection(tool_type=template.tool_type, duration=TEMPLATE_DURATION, script=unittest)
+        returncode, console_log = self.run_script(unittest_inspection, display_container, "template_unittest", kube_context, work_dir, is_unittest=True)
+        if returncode != 0:
+            return self.fall_back(display_container, "the unit test with the template failed")
+        display_container.update_header(f"##### ✅ Steady state #{predefined_steady_states.count+1}: {steady_state_draft['name']}", expanded=True)
+        return inspection, threshold, unittest
+
+    def run_script(
+        self,
+        inspection: Inspection,
+        display_container: StreamlitContainer,
+        container_id: str,
+        kube_context: str,
+        work_dir: str,
+        is_unittest: bool = False
+    ) -> Tuple[int, str]:
+        write_file(inspection.script.path, inspection.script.content)
+        display_container.create_subsubcontainer(
+            subcontainer_id="template",
+            subsubcontainer_id=f"{container_id}_script",
+            text=inspection.script.content,
+            is_code=True,
+            language="python" if inspection.tool_type == "k8s" else "javascript"
+        )
+        # templates are pre-validated; this only guards against broken parameters
+        preflight = self.preflight.check(inspection.script.fname, inspection.script.content, is_unittest=is_unittest)
+        if not preflight.passed:
+            return 1, preflight.to_str()
+        display_container.create_subsubcontainer(subcontainer_id="template", subsubcontainer_id=f"{container_id}_status")
+        returncode, console_log = run_pod(
+            inspection=inspection,
+            work_dir=work_dir,
+            kube_context=kube_context,
+            namespace=self.namespace,
+            display_container=display_container.get_subsubcontainer(f"{container_id}_status"),
+            use_cache=is_unittest
+        )
+        display_container.create_subsubcontainer(
+            subcontainer_id="template",
+            subsubcontainer_id=f"{container_id}_value",
+            text=console_log,
+            is_code=True,
+            language="powershell"
+        )
+        return returncode, console_log
+
+    def fall_back(
+        self,
+        display_container: StreamlitContainer,
+        reason: str
+    ) -> None:
+        display_container.create_subsubcontainer(
+            subcontainer_id="template",
+            subsubcontainer_id="template_fallback",
+            text=f"###### Falling back to LLM-generated scripts: {reason}."
+        )
+        return None
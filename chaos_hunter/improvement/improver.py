@@ -8,9 +8,10 @@ from ..experiment.experimenter import ChaosExperiment, ChaosExperimentResult
 from ..hypothesis.hypothesizer import Hypothesis
 from ..preprocessing.preprocessor import ProcessedData
 from ..utils.wrappers import LLM
-from ..utils.llms import LLMLog
-from ..utils.functions import save_json, recursive_to_dict
+from ..utils.llms import LLMLog, embed_messages
+from ..utils.functions import save_json
 from ..utils.schemas import File
+from ..utils.project_store import ProjectStore
 
 
 class Improver:
@@ -39,7 +40,8 @@ class Improver:
         reconfig_history: List[ReconfigurationResult],
         kube_context: str,
         work_dir: str,
-        max_retries: int = 3
+        max_retries: int = 3,
+        project_store: ProjectStore = None
     ) -> Tuple[List[LLMLog], ReconfigurationResult]:
         improvement_dir = f"{work_dir}/improvement"
         os.makedirs(improvement_dir, exist_ok=True)
@@ -56,12 +58,13 @@ class Improver:
             reconfig_history=reconfig_history,
             kube_context=kube_context,
             work_dir=improvement_dir,
-            max_retries=max_retries
+            max_retries=max_retries,
+            project_store=project_store
         )
         logs.append(log)
 
         mod_count = len(reconfig_history)
         reconfig_result = ReconfigurationResult(mod_k8s_yamls=mod_k8s_yamls)
-        save_json(f"{improvement_dir}/improvment{mod_count}.json", reconfig_result.dict())
-        save_json(f"{improvement_dir}/improvment_log{mod_count}.json", recursive_to_dict(logs))
+        save_json(f"{improvement_dir}/improvment{mod_count}.json", reconfig_result)
+        save_json(f"{improvement_dir}/improvment_log{mod_count}.json", embed_messages(logs))
         return logs, reconfig_result
\ No newline at end of file
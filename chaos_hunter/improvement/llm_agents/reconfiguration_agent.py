@@ -1,5 +1,4 @@
 import os
-import subprocess
 from typing import List, Tuple, Literal, Optional
 
 import streamlit as st
@@ -16,14 +15,15 @@ from ...utils.functions import (
     file_list_to_str,
     copy_dir,
     render_jinja_template,
-    write_file,
     delete_file,
     list_to_bullet_points,
     limit_string_length,
     remove_curly_braces
 )
 from ...utils.schemas import File
+from ...utils.project_store import ProjectStore, replace_file
 from ...utils.k8s import remove_all_resources_by_labels
+from ...backends.backend import get_backend
 
 
 SYS_RECONFIGURE_K8S_YAML = """\
@@ -156,6 +156,7 @@ class ReconfigurationAgent:
         kube_context: str,
         work_dir: str,
         max_retries: int = 3,
+        project_store: ProjectStore = None
     ) -> Tuple[LLMLog, dict]:
         #----------------
         # initialization
@@ -192,14 +193,20 @@ class ReconfigurationAgent:
             output_history.append(mod_k8s_yamls)
             # copy the previous project to the current project dir
             mod_dir = f"{work_dir}/mod_{mod_count}"
-            copy_dir(mod_dir_history[-1], mod_dir) # duplicate the input project
-            # modify k8s yamls
             reconfig_yamls = mod_k8s_yamls["modified_k8s_yamls"]
+            if project_store is not None:
+                # link the files of the input project; only the files that differ are rewritten if mod_dir exists,
+                # and the files to be modified are copied
+                writable = [reconfig_yaml["fname"] for reconfig_yaml in reconfig_yamls] + [input_data.input.skaffold_yaml.fname]
+                project_store.clone(mod_dir_history[-1], mod_dir, writable=writable)
+            else:
+                copy_dir(mod_dir_history[-1], mod_dir) # duplicate the input project
+            # modify k8s yamls
             for mod_k8s_yaml in reconfig_yamls:
                 mod_type = mod_k8s_yaml["mod_type"]
                 fpath = f"{mod_dir}/{mod_k8s_yaml['fname']}"
                 if mod_type in ["create", "replace"]:
-                    write_file(fpath, mod_k8s_yaml['code'])
+                    replace_file(fpath, mod_k8s_yaml['code'])
                 elif mod_type == "delete":
                     delete_file(fpath)
                 else:
@@ -249,7 +256,7 @@ class ReconfigurationAgent:
                 name=f"mod-{mod_count}",
                 yaml_paths=list_to_bullet_points([os.sep.join(k8s_yaml_.fname.split("/")[1:]) for k8s_yaml_ in k8s_yamls])
             )
-            write_file(new_skaffold_path, new_skaffold_str)
+            replace_file(new_skaffold_path, new_skaffold_str)
 
             #----------------------------------------
             # deploy the new project and validate it
@@ -258,16 +265,9 @@ class ReconfigurationAgent:
             # clean the resouce
             remove_all_resources_by_labels(kube_context, label_selector=f"project={project_name}")
             # deploy the project
-            process = subprocess.Popen(
-                f"skaffold run --kube-context {kube_context} -l project={project_name}",
-                shell=True,
-                cwd=os.path.dirname(new_skaffold_path),
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-            )
-            stdout, stderr = process.communicate()
-            returncode = process.returncode
-            error_msg = limit_string_length(stderr.decode('utf-8'))
+            result = get_backend().deploy(new_skaffold_path, kube_context, project_name)
+            returncode = result.returncode
+            error_msg = limit_string_length(result.stderr)
 
             # validation
             if returncode == 0:
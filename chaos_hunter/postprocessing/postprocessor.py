@@ -5,8 +5,8 @@ import streamlit as st
 
 from .llm_agents.summary_agent import SummaryAgent, ChaosCycle
 from ..utils.wrappers import LLM
-from ..utils.llms import LLMLog
-from ..utils.functions import save_json, recursive_to_dict
+from ..utils.llms import LLMLog, embed_messages
+from ..utils.functions import save_json
 
 
 class PostProcessor:
@@ -28,7 +28,7 @@ class PostProcessor:
         os.makedirs(work_dir, exist_ok=True)
         with open(f"{work_dir}/summary.dat", "w") as f:
             f.write(summary)
-        save_json(f"{work_dir}/summary_log.json", recursive_to_dict(logs))
+        save_json(f"{work_dir}/summary_log.json", embed_messages(logs))
         return logs, summary
     
     def generate_intermediate_summary(self):
@@ -7,9 +7,10 @@ import pydot
 
 from ...utils.wrappers import LLM, LLMBaseModel, LLMField, BaseModel
 from ...utils.llms import build_json_agent, LoggingCallback, LLMLog
-from ...utils.functions import list_to_bullet_points, add_code_fences, run_command
+from ...utils.functions import list_to_bullet_points, add_code_fences
 from ...utils.schemas import File
 from ...utils.streamlit import StreamlitDisplayHandler
+from ...backends.backend import get_backend
 
 
 SYS_DESCRIBE_INTER_DEPENDENCY = """\
@@ -132,8 +133,10 @@ class K8sAnalysisAgent:
 
         # get dependencies between resources
         graph_path = f"{work_dir}/inputs/dependency.dot"
-        run_command(
-            cmd=f"kubectl graph all --all-namespaces --context {kube_context} --selector=project={project_name} -t 1000 > {graph_path}",
+        get_backend().get_dependency_graph(
+            kube_context,
+            f"project={project_name}",
+            graph_path,
             display_handler=StreamlitDisplayHandler()
         )
         (graph,) = pydot.graph_from_dot_file(graph_path)
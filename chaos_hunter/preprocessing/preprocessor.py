@@ -11,15 +11,15 @@ from .llm_agents.k8s_app_assuption_agent import K8sAppAssumptionAgent, K8sAppAss
 from .llm_agents.ce_instruct_agent import CEInstructAgent
 from ..utils.functions import (
     write_file,
-    save_json,
-    recursive_to_dict,
-    run_command
+    save_json
 )
 from ..utils.wrappers import LLM, BaseModel
 from ..utils.streamlit import StreamlitDisplayHandler, Spinner
 from ..utils.schemas import File
 from ..utils.k8s import wait_for_resources_ready
-from ..utils.llms import LLMLog
+from ..utils.cache import POD_RESULT_CACHE
+from ..utils.llms import LLMLog, embed_messages
+from ..backends.backend import get_backend
 
 
 INPUT_TEMPLATE = """\
@@ -134,9 +134,10 @@ class PreProcessor:
         if is_new_deployment:
             spinner = Spinner(f"##### Deploying resources...")
             try:
-                run_command(
-                    cmd=f"skaffold run --kube-context {kube_context} -l project={project_name}",
-                    cwd=os.path.dirname(new_skaffold_yaml.path),
+                get_backend().deploy(
+                    new_skaffold_yaml.path,
+                    kube_context,
+                    project_name,
                     display_handler=StreamlitDisplayHandler()
                 )
             except subprocess.CalledProcessError as e:
@@ -145,10 +146,12 @@ class PreProcessor:
 
         # wait for all the resources to be deployed
         wait_for_resources_ready(label_selector=f"project={project_name}", context=kube_context)
+        POD_RESULT_CACHE.set_deployment(kube_context, k8s_yamls)
         # display each resouce status
         st.write("##### Resource statuses")
-        run_command(
-            cmd=f"kubectl get all --all-namespaces --context {kube_context} --selector=project={project_name}",
+        get_backend().list_resources(
+            kube_context,
+            f"project={project_name}",
             display_handler=StreamlitDisplayHandler()
         )
 
@@ -212,8 +215,8 @@ class PreProcessor:
             k8s_app=k8s_application,
             ce_instructions=ce_instructions
         )
-        save_json(f"{preprocess_dir}/processed_data.json", processed_data.dict())
-        save_json(f"{preprocess_dir}/preprcessing_log.json", recursive_to_dict(log))
+        save_json(f"{preprocess_dir}/processed_data.json", processed_data)
+        save_json(f"{preprocess_dir}/preprcessing_log.json", embed_messages(log))
         return log, processed_data
     
     def get_kustomize_paths(self, skaffold_config: dict) -> List[str]:
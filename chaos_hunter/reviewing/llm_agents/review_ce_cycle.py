@@ -1,4 +1,4 @@
-from typing import Literal
+from typing import Literal, Optional
 
 from ...chaos_hunter import ChaosCycle
 from ...utils.wrappers import LLM, LLMBaseModel, LLMField
@@ -131,16 +131,21 @@ Please review the above Chaos Engineering cycle."""
 class CEReviewAgent:
     def __init__(self, llm: LLM) -> None:
         self.llm = llm
-
-    def reveiew(self, ce_cycle: ChaosCycle) -> Review:
-        agent = build_json_agent(
+        self.agent = build_json_agent(
             llm=self.llm,
             chat_messages=[("system", SYS_REVIEW_CE_CYCLE), ("human", USER_REVIEW_CE_CYCLE)],
             pydantic_object=Review,
             is_async=False
         )
-        review = agent.invoke({
-            "ce_cycle_overview": ce_cycle.to_str(),
+
+    def reveiew(
+        self,
+        ce_cycle: ChaosCycle,
+        ce_cycle_overview: Optional[str] = None
+    ) -> Review:
+        """review a CE cycle; pass `ce_cycle_overview` (`ce_cycle.to_str()`) to reuse it across reviews"""
+        review = self.agent.invoke({
+            "ce_cycle_overview": ce_cycle.to_str() if ce_cycle_overview is None else ce_cycle_overview,
             "ce_description": CHAOS_ENGINEERING_DESCRIIPTION
         })
         return Review(**review)
\ No newline at end of file
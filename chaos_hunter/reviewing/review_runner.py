@@ -0,0 +1,160 @@
+import os
+import time
+import threading
+from typing import List, Dict, Optional, Callable
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed
+
+from .reviwer import Reviewer
+from ..chaos_hunter import ChaosHunterOutput
+from ..utils.wrappers import LLM, BaseModel
+from ..utils.functions import save_json
+from ..utils.serialization import load_model
+from ..utils.tracing import get_tracer
+
+
+def get_review_path(
+    result_dir: str,
+    model_name: str,
+    sample_id: int
+) -> str:
+    return f"{result_dir}/reviews/{model_name.split('/')[-1]}_review{sample_id}.json"
+
+
+class RateLimiter:
+    """spaces out requests to at most `requests_per_minute` (0 means unlimited), shared by threads"""
+    def __init__(self, requests_per_minute: float = 0.) -> None:
+        self.interval = 60. / requests_per_minute if requests_per_minute > 0 else 0.
+        self.next_time = 0.
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.interval == 0.:
+            return
+        with self.lock:
+            now = time.time()
+            start = max(now, self.next_time)
+            self.next_time = start + self.interval
+        if (delay := start - now) > 0:
+            with get_tracer().span("rate_limit", "sleep", delay=delay):
+                time.sleep(delay)
+
+
+class ReviewTask(BaseModel):
+    result_dir: str
+    model_name: str
+    sample_id: int
+
+    @property
+    def path(self) -> str:
+        return get_review_path(self.result_dir, self.model_name, self.sample_id)
+
+class ReviewRunStats(BaseModel):
+    num_tasks: int = 0
+    num_done: int = 0
+    num_skipped: int = 0 # reviews that already exist (resume)
+    num_failed: int = 0
+    skipped_cycles: List[str] = [] # cycles that did not complete a reconfiguration
+    elapsed_time: float = 0. # [s]
+    review_time: float = 0. # sum of the latencies of the reviews [s]
+
+    @property
+    def throughput(self) -> float:
+        """reviews per minute"""
+        return 60. * self.num_done / self.elapsed_time if self.elapsed_time > 0 else 0.
+
+    def to_str(self) -> str:
+        mean_latency = self.review_time / self.num_done if self.num_done > 0 else 0.
+        return (
+            f"{self.num_done} reviews in {self.elapsed_time:.1f}s ({self.throughput:.2f} reviews/min, mean latency {mean_latency:.1f}s), "
+            f"{self.num_skipped} already done, {self.num_failed} failed, {len(self.skipped_cycles)} cycles without reconfiguration"
+        )
+
+
+class ReviewRunner:
+    """
+    Review CE cycles by LLMs (LLM-as-a-judge) concurrently.
+    Each cycle is loaded and rendered (`ce_cycle.to_str()`) once and shared by all its reviews.
+    The reviews of all samples, reviewers, and results are run by `max_workers` threads,
+    and each reviewer sends at most `requests_per_minute` requests.
+    Each review is written as soon as it is done, so an interrupted run resumes from the missing reviews.
+    """
+    def __init__(
+        self,
+        llms: Dict[str, LLM],
+        max_workers: int = 8,
+        requests_per_minute: float = 0.
+    ) -> None:
+        self.reviewers = {model_name: Reviewer(llm) for model_name, llm in llms.items()}
+        self.rate_limiters = {model_name: RateLimiter(requests_per_minute) for model_name in llms.keys()}
+        self.max_workers = max_workers
+
+    def run(
+        self,
+        result_dirs: List[str],
+        num_review_samples: int = 10,
+        resume: bool = True,
+        on_review: Optional[Callable[[ReviewTask], None]] = None
+    ) -> ReviewRunStats:
+        stats = ReviewRunStats()
+        start_time = time.time()
+        #-------------
+        # plan tasks
+        #-------------
+        tasks: Dict[str, List[ReviewTask]] = {}
+        for result_dir in result_dirs:
+            for model_name in self.reviewers.keys():
+                for sample_id in range(num_review_samples):
+                    task = ReviewTask(result_dir=result_dir, model_name=model_name, sample_id=sample_id)
+                    stats.num_tasks += 1
+                    if resume and os.path.exists(task.path):
+                        stats.num_skipped += 1
+                        continue
+                    tasks.setdefault(result_dir, []).append(task)
+
+        #--------------------------
+        # render cycles and review
+        #--------------------------
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures: Dict[Future, ReviewTask] = {}
+            for result_dir, tasks_ in tasks.items():
+                result = load_model(ChaosHunterOutput, f"{result_dir}/outputs/output.json")
+                if not result.ce_cycle.completes_reconfig:
+                    print(f"Skipped {result_dir}: the cycle did not perform any system reconfiguration.")
+                    stats.skipped_cycles.append(result_dir)
+                    continue
+                ce_cycle_overview = result.ce_cycle.to_str()
+                os.makedirs(f"{result_dir}/reviews", exist_ok=True)
+                for task in tasks_:
+                    futures[executor.submit(self.review, task, result, ce_cycle_overview)] = task
+            for future in as_completed(futures):
+                task = futures[future]
+                try:
+                    review_time = future.result()
+                except Exception as e:
+                    print(f"Failed to review {task.result_dir} by {task.model_name} (sample #{task.sample_id}): {e}")
+                    stats.num_failed += 1
+                    continue
+                stats.num_done += 1
+                stats.review_time += review_time
+                if on_review is not None:
+                    on_review(task)
+        stats.elapsed_time = time.time() - start_time
+        print(stats.to_str())
+        return stats
+
+    def review(
+        self,
+        task: ReviewTask,
+        result: ChaosHunterOutput,
+        ce_cycle_overview: str
+    ) -> float:
+        """review a cycle and write the review; returns its latency"""
+        self.rate_limiters[task.model_name].acquire()
+        start_time = time.time()
+        with get_tracer().span(f"review:{task.model_name}", "llm", sample_id=task.sample_id):
+            review = self.reviewers[task.model_name].review(result.ce_cycle, ce_cycle_overview)
+        review_time = time.time() - start_time
+        # write to a temporary file first so that a partially written review is not taken as done on resume
+        save_json(f"{task.path}.tmp", review.dict())
+        os.replace(f"{task.path}.tmp", task.path)
+        return review_time
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from .llm_agents.review_ce_cycle import CEReviewAgent, Review
 from ..chaos_hunter import ChaosCycle
 from ..utils.wrappers import LLM
@@ -8,6 +10,10 @@ class Reviewer:
         self.llm = llm
         self.review_agent = CEReviewAgent(llm)
 
-    def review(self, ce_cycle: ChaosCycle) -> Review:
-        review = self.review_agent.reveiew(ce_cycle)
+    def review(
+        self,
+        ce_cycle: ChaosCycle,
+        ce_cycle_overview: Optional[str] = None
+    ) -> Review:
+        review = self.review_agent.reveiew(ce_cycle, ce_cycle_overview)
         return review
\ No newline at end of file
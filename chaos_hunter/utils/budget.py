@@ -0,0 +1,212 @@
+import time
+import threading
+from typing import List, Dict, Tuple, Optional
+
+from .wrappers import BaseModel, LLM
+from .llms import get_pricing
+from .callbacks import ChaosHunterCallback
+
+
+class BudgetExceeded(Exception):
+    """raised (by the next LLM call, phase, or workflow poll) to stop a CE cycle whose budget is exceeded"""
+    pass
+
+
+class BudgetLimit(BaseModel):
+    max_tokens: Optional[int] = None
+    max_cost: Optional[float] = None # [$]
+    max_time: Optional[float] = None # wall time [s]
+
+class BudgetConfig(BaseModel):
+    total: BudgetLimit = BudgetLimit() # all the cycles run with a manager (e.g., a Streamlit session or an evaluation sample)
+    cycle: BudgetLimit = BudgetLimit()
+    phases: Dict[str, BudgetLimit] = {} # e.g., improvement (summed over the loops of the cycle)
+    degrade_ratio: float = 0.8 # degrade when a usage reaches this ratio of its budget
+    degraded_max_num_steadystates: int = 1
+    degraded_max_retries: int = 1
+
+class BudgetUsage(BaseModel):
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost: float = 0. # [$]
+    time: float = 0. # [s]
+
+    @property
+    def tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+    def to_str(self) -> str:
+        return f"{self.tokens} tokens, ${self.cost:.2f}, {self.time:.0f}s"
+
+
+class BudgetManager(ChaosHunterCallback):
+    """
+    Tracks the tokens, cost, and wall time of CE cycles in real time, and enforces budgets
+    on all the cycles run with the manager (`total`), on the current cycle, and on each phase.
+    LLM calls are reported by the LoggingCallbacks in the manager's context (see use_usage_tracker), and phases by the ChaosHunter callbacks.
+    Near a budget, the cycle degrades (fallback_llm, fewer steady states, and fewer retries);
+    over a budget, the next LLM call, phase, or poll of the running experiment workflow raises BudgetExceeded,
+    and the cycle stops (the workflow is aborted first).
+    """
+    def __init__(
+        self,
+        config: BudgetConfig = BudgetConfig(),
+        fallback_llm: Optional[LLM] = None
+    ) -> None:
+        self.config = config
+        self.fallback_llm = fallback_llm # a cheaper llm
+        self.total = BudgetUsage()
+        self.cycle = BudgetUsage()
+        self.phases: Dict[str, BudgetUsage] = {}
+        self.phase: Optional[str] = None
+        self.starts: Dict[str, float] = {} # scope (total, cycle, or phase name) -> start time of its running interval
+        self.lock = threading.RLock()
+
+    #----------
+    # tracking
+    #----------
+    def add_usage(
+        self,
+        model: str,
+        input_tokens: int,
+        output_tokens: int
+    ) -> None:
+        """add the usage of an LLM call ({provider}/{model}); unknown models (e.g., local ones) cost nothing"""
+        input_tokens, output_tokens = max(input_tokens, 0), max(output_tokens, 0)
+        pricing = get_pricing(model)
+        cost = input_tokens * pricing["input"] + output_tokens * pricing["output"] if pricing is not None else 0.
+        with self.lock:
+            for usage in self.get_usages():
+                usage.input_tokens += input_tokens
+                usage.output_tokens += output_tokens
+                usage.cost += cost
+
+    def start_cycle(self, usage: Optional[BudgetUsage] = None) -> None:
+        """start a cycle, whose usage so far is `usage` if it is resumed"""
+        with self.lock:
+            self.cycle = usage.copy() if usage is not None else BudgetUsage()
+            self.phases = {}
+            self.phase = None
+            self.starts["total"] = self.starts["cycle"] = time.time()
+
+    def end_cycle(self) -> None:
+        with self.lock:
+            self.end_phase()
+            self.stop("cycle", self.cycle)
+            self.stop("total", self.total)
+
+    def start_phase(self, phase: str) -> None:
+        with self.lock:
+            self.end_phase()
+            self.phase = phase
+            self.phases.setdefault(phase, BudgetUsage())
+            self.starts[phase] = time.time()
+        self.check()
+
+    def end_phase(self) -> None:
+        with self.lock:
+            if self.phase is not None:
+                self.stop(self.phase, self.phases[self.phase])
+                self.phase = None
+
+    def stop(self, scope: str, usage: BudgetUsage) -> None:
+        if (start := self.starts.pop(scope, None)) is not None:
+            usage.time += time.time() - start
+
+    #-------------
+    # enforcement
+    #-------------
+    def get_usages(self) -> List[BudgetUsage]:
+        return [self.total, self.cycle] + ([self.phases[self.phase]] if self.phase is not None else [])
+
+    def get_time(self, scope: str, usage: BudgetUsage) -> float:
+        start = self.starts.get(scope)
+        return usage.time + (time.time() - start if start is not None else 0.)
+
+    def get_cycle_usage(self) -> BudgetUsage:
+        """the usage of the current cycle (to be recorded in its output)"""
+        with self.lock:
+            return self.cycle.copy(update={"time": self.get_time("cycle", self.cycle)})
+
+    def get_ratios(self) -> List[Tuple[str, str, float, float]]:
+        """(scope, metric, used, limit) of each budget that is set"""
+        scopes = [("total", self.config.total, self.total), ("cycle", self.config.cycle, self.cycle)]
+        if self.phase is not None and self.phase in self.config.phases:
+            scopes.append((self.phase, self.config.phases[self.phase], self.phases[self.phase]))
+        ratios = []
+        with self.lock:
+            for scope, limit, usage in scopes:
+                for metric, used, max_value in [
+                    ("tokens", usage.tokens, limit.max_tokens),
+                    ("cost", usage.cost, limit.max_cost),
+                    ("time", self.get_time(scope, usage), limit.max_time)
+                ]:
+                    if max_value is not None:
+                        ratios.append((scope, metric, used, max_value))
+        return ratios
+
+    def get_exceeded(self) -> Optional[str]:
+        """the reason why the run must stop, or None if it is within its budgets"""
+        for scope, metric, used, max_value in self.get_ratios():
+            if used >= max_value:
+                return f"{scope.upper()}_BUDGET_EXCEEDED: {metric} {used:.6g} reached the budget {max_value:.6g}"
+        return None
+
+    def check(self) -> None:
+        if (reason := self.get_exceeded()) is not None:
+            raise BudgetExceeded(reason)
+
+    def degrades(self) -> bool:
+        """whether any usage is close to its budget"""
+        return any(used >= self.config.degrade_ratio * max_value for _, _, used, max_value in self.get_ratios())
+
+    #-------
+    # hooks
+    #-------
+    def on_preprocess_start(self):
+        self.start_phase("preprocess")
+
+    def on_preprocess_end(self, logs):
+        self.end_phase()
+
+    def on_hypothesis_start(self):
+        self.start_phase("hypothesis")
+
+    def on_hypothesis_end(self, logs):
+        self.end_phase()
+
+    def on_experiment_plan_start(self):
+        self.start_phase("experiment_plan")
+
+    def on_experiment_plan_end(self, logs):
+        self.end_phase()
+
+    def on_experiment_start(self):
+        self.start_phase("experiment")
+
+    def on_experiment_end(self):
+        self.end_phase()
+
+    def on_experiment_replan_start(self):
+        self.start_phase("experiment_replan")
+
+    def on_experiment_replan_end(self, logs):
+        self.end_phase()
+
+    def on_analysis_start(self):
+        self.start_phase("analysis")
+
+    def on_analysis_end(self, logs):
+        self.end_phase()
+
+    def on_improvement_start(self):
+        self.start_phase("improvement")
+
+    def on_improvement_end(self, logs):
+        self.end_phase()
+
+    def on_postprocess_start(self):
+        self.start_phase("postprocess")
+
+    def on_postprocess_end(self, logs):
+        self.end_phase()
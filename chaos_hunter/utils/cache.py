@@ -0,0 +1,94 @@
+import time
+import hashlib
+import threading
+from typing import List, Dict, Tuple, Optional
+
+from .schemas import File
+from .constants import POD_RESULT_CACHE_TTL
+
+
+def hash_str(content: str | bytes) -> str:
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return hashlib.sha256(content).hexdigest()
+
+def hash_files(files: List[File]) -> str:
+    hasher = hashlib.sha256()
+    for file in sorted(files, key=lambda file: file.fname or file.path):
+        hasher.update((file.fname or file.path).encode("utf-8"))
+        hasher.update(hash_str(file.content).encode("utf-8"))
+    return hasher.hexdigest()
+
+
+class PodResultCache:
+    """
+    Cache of script executions in pods (i.e., `run_pod`).
+    An entry is keyed by (kube context, namespace, tool type, duration, script hash, hash of the deployed manifests),
+    and expires after `ttl` seconds. Entries of a cluster are dropped whenever its deployment changes.
+    Only successful runs against a recorded deployment are cached, so failures are always rerun.
+    """
+    def __init__(self, ttl: float = POD_RESULT_CACHE_TTL) -> None:
+        self.ttl = ttl
+        self.entries: Dict[tuple, Tuple[float, int, str]] = {}
+        self.deployment_hashes: Dict[str, str] = {}
+        self.lock = threading.RLock()
+        self.num_hits = 0
+
+    def set_ttl(self, ttl: float) -> None:
+        """ttl <= 0 disables the cache"""
+        with self.lock:
+            self.ttl = ttl
+            if ttl <= 0:
+                self.entries.clear()
+
+    def get_key(
+        self,
+        kube_context: str,
+        namespace: str,
+        tool_type: str,
+        duration: str,
+        script: str
+    ) -> Optional[tuple]:
+        """None if the deployment of the cluster is unknown"""
+        with self.lock:
+            if (deployment_hash := self.deployment_hashes.get(kube_context)) is None:
+                return None
+            return (kube_context, namespace, tool_type, duration, hash_str(script), deployment_hash)
+
+    def get(self, *args) -> Optional[Tuple[int, str]]:
+        with self.lock:
+            if (key := self.get_key(*args)) is None or (entry := self.entries.get(key)) is None:
+                return None
+            stored_at, returncode, console_log = entry
+            if time.time() - stored_at > self.ttl:
+                del self.entries[key]
+                return None
+            self.num_hits += 1
+            return returncode, console_log
+
+    def put(self, *args, returncode: int, console_log: str) -> None:
+        if returncode != 0:
+            return
+        with self.lock:
+            if self.ttl > 0 and (key := self.get_key(*args)) is not None:
+                self.entries[key] = (time.time(), returncode, console_log)
+
+    def set_deployment(self, kube_context: str, k8s_yamls: List[File]) -> None:
+        """record the manifests deployed to the cluster; entries for the previous deployment are dropped"""
+        deployment_hash = hash_files(k8s_yamls)
+        with self.lock:
+            if self.deployment_hashes.get(kube_context) != deployment_hash:
+                self.invalidate(kube_context)
+                self.deployment_hashes[kube_context] = deployment_hash
+
+    def invalidate(self, kube_context: str = None) -> None:
+        with self.lock:
+            if kube_context is None:
+                self.entries.clear()
+                self.deployment_hashes.clear()
+            else:
+                self.entries = {key: entry for key, entry in self.entries.items() if key[0] != kube_context}
+                self.deployment_hashes.pop(kube_context, None)
+
+
+POD_RESULT_CACHE = PodResultCache()
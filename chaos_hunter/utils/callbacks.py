@@ -1,6 +1,7 @@
-from typing import List
+from typing import List, Dict
 
 from .llms import LLMLog
+from .tracing import Tracer, Span, get_tracer
 
 
 class ChaosHunterCallback:
@@ -37,6 +38,9 @@ class ChaosHunterCallback:
     def on_experiment_start(self):
         pass
 
+    def on_experiment_task_event(self, event): # event: TaskEvent (started, running, or terminated)
+        pass
+
     def on_experiment_end(self):
         pass
 
@@ -71,4 +75,86 @@ class ChaosHunterCallback:
         pass
 
     def on_postprocess_end(self, logs: List[LLMLog]):
-        pass
\ No newline at end of file
+        pass
+
+class TracingCallback(ChaosHunterCallback):
+    """turns the phase hooks into spans (with the phase's token usage) and experiment task events into task spans"""
+    def __init__(self, tracer: Tracer = None):
+        self.tracer = tracer if tracer is not None else get_tracer()
+        self.phase_spans: Dict[str, Span] = {}
+        self.task_starts: Dict[str, float] = {}
+
+    def start(self, phase: str) -> None:
+        self.phase_spans[phase] = self.tracer.start_span(phase, "phase")
+
+    def end(self, phase: str, logs: list = []) -> None:
+        logs_ = [log_ for log in logs for log_ in (log if isinstance(log, list) else [log])]
+        self.tracer.end_span(
+            self.phase_spans.pop(phase, None),
+            num_llm_calls=len(logs_),
+            input_tokens=sum(log.token_usage.input_tokens for log in logs_),
+            output_tokens=sum(log.token_usage.output_tokens for log in logs_)
+        )
+
+    def on_preprocess_start(self):
+        self.start("preprocess")
+
+    def on_preprocess_end(self, logs):
+        self.end("preprocess", logs)
+
+    def on_hypothesis_start(self):
+        self.start("hypothesis")
+
+    def on_hypothesis_end(self, logs):
+        self.end("hypothesis", logs)
+
+    def on_experiment_plan_start(self):
+        self.start("experiment_plan")
+
+    def on_experiment_plan_end(self, logs):
+        self.end("experiment_plan", logs)
+
+    def on_experiment_start(self):
+        self.start("experiment")
+
+    def on_experiment_task_event(self, event):
+        if event.event_type == "started":
+            self.task_starts[event.task_name] = event.timestamp
+        elif event.event_type == "terminated":
+            start = self.task_starts.pop(event.task_name, event.timestamp)
+            self.tracer.add_span(
+                event.task_name,
+                "task",
+                start=start,
+                end=event.timestamp,
+                parent=self.phase_spans.get("experiment"),
+                pod_name=event.pod_name,
+                exitcode=event.exitcode
+            )
+
+    def on_experiment_end(self):
+        self.end("experiment")
+
+    def on_experiment_replan_start(self):
+        self.start("experiment_replan")
+
+    def on_experiment_replan_end(self, logs):
+        self.end("experiment_replan", logs)
+
+    def on_analysis_start(self):
+        self.start("analysis")
+
+    def on_analysis_end(self, logs):
+        self.end("analysis", logs)
+
+    def on_improvement_start(self):
+        self.start("improvement")
+
+    def on_improvement_end(self, logs):
+        self.end("improvement", logs)
+
+    def on_postprocess_start(self):
+        self.start("postprocess")
+
+    def on_postprocess_end(self, logs):
+        self.end("postprocess", logs)
@@ -12,6 +12,9 @@ SKAFFOLD_YAML_TEMPLATE_PATH = os.path.join(PROJECT_ROOT, "chaos_hunter/data_gene
 UNITTEST_BASE_PY_PATH = os.path.join(PROJECT_ROOT, "chaos_hunter/ce_tools/k8s/unittest_base.py")
 K6_POD_TEMPLATE_PATH = os.path.join(PROJECT_ROOT, "chaos_hunter/ce_tools/k6/templates/k6_pod_template.j2")
 K8S_POD_TEMPLATE_PATH = os.path.join(PROJECT_ROOT, "chaos_hunter/ce_tools/k8s/templates/k8s_pod_template.j2")
+K8S_STEADY_STATE_TEMPLATE_DIR = os.path.join(PROJECT_ROOT, "chaos_hunter/ce_tools/k8s/templates/steady_states")
+K6_STEADY_STATE_TEMPLATE_DIR = os.path.join(PROJECT_ROOT, "chaos_hunter/ce_tools/k6/templates/steady_states")
+K8SAPI_DOCKERFILE_PATH = os.path.join(PROJECT_ROOT, "docker/Dockerfile_k8sapi")
 META_TEMPLATE_PATH  = os.path.join(PROJECT_ROOT, "chaos_hunter/ce_tools/chaosmesh/templates/workflow_meta_template.j2")
 TASK_TEMPLATE_PATH  = os.path.join(PROJECT_ROOT, "chaos_hunter/ce_tools/chaosmesh/templates/task_template.j2")
 TASK_K6_TEMPLATE_PATH = os.path.join(PROJECT_ROOT, "chaos_hunter/ce_tools/chaosmesh/templates/task_k6_template.j2")
@@ -43,4 +46,5 @@ except Exception:
     CHAOSHUNTER_IMAGE = None
     CHAOSHUNTER_ICON = None
 
-K8S_VALIDATION_VERSION = "1.27"
\ No newline at end of file
+K8S_VALIDATION_VERSION = "1.27"
+POD_RESULT_CACHE_TTL = 600. # sec (0 disables the cache of run_pod)
\ No newline at end of file
@@ -6,6 +6,7 @@ import time
 import json
 import shutil
 import datetime
+import functools
 from typing import List
 from jinja2 import Environment, FileSystemLoader
 
@@ -14,14 +15,17 @@ import streamlit as st
 
 from .schemas import File
 from .wrappers import BaseModel
+from . import serialization
+from .tracing import get_tracer, get_command_name
 
 
 def remove_spaces(text: str) -> str:
     return "\n".join(list(map(str.strip, text.split("\n"))))
 
 def write_file(fname: str, content: str) -> None:
-    with open(fname, "w") as f:
-        f.write(content)
+    with get_tracer().span("write_file", "file", path=fname, size=len(content)):
+        with open(fname, "w") as f:
+            f.write(content)
 
 async def write_file_async(path: str, content: str) -> None:
     async with aiofiles.open(path, 'w') as f:
@@ -62,14 +66,12 @@ def copy_dir(source_path: str, destination_path: str) -> bool:
         print(f"An unexpected error occurred: {e}")
     return False
 
-def save_json(path: str, data: dict | list):
-    with open(path, 'w') as f:
-        json.dump(data, f, indent=4)
+def save_json(path: str, data: dict | list | BaseModel):
+    # models can be passed as is; they are serialized in a single pass (see utils/serialization.py)
+    serialization.save(path, data)
 
 def load_json(path: str):
-    with open(path, 'r') as f:
-        loaded_data = json.load(f)
-    return loaded_data
+    return serialization.load(path)
 
 def save_jsonl(path, data):
     with open(path, 'w', encoding='utf-8') as file:
@@ -86,7 +88,7 @@ def load_jsonl(path):
 
 def recursive_to_dict(obj):
     if isinstance(obj, BaseModel):
-        return {k: recursive_to_dict(v) for k, v in obj.dict().items()}
+        return {k: recursive_to_dict(v) for k, v in obj.__dict__.items()}
     elif isinstance(obj, dict):
         return {k: recursive_to_dict(v) for k, v in obj.items()}
     elif isinstance(obj, list):
@@ -150,25 +152,31 @@ def type_cmd2(input: List[str], returncode: bool = False) -> str:
     return res
 
 def type_cmd3(input: str) -> str:
+    res = subprocess.run(input, shell=True, capture_output=True, text=True)
+    display_cmd_result(input, res)
+    return res
+
+def display_cmd_result(input: str, res: subprocess.CompletedProcess) -> None:
     with st.sidebar.expander(input):
-        res = subprocess.run(input, shell=True, capture_output=True, text=True)
         if res.returncode == 0:
             st.write(limit_string_length(res.stdout))
         else:
             st.write(limit_string_length(res.stderr))
-    return res
 
 def type_cmd(
     input: str,
     returncode: bool = False,
     widget: bool = True,
 ) -> str:
-    res = subprocess.run(
-        input,
-        shell=True,
-        capture_output=True,
-        text=True,
-    )
+    with get_tracer().span(get_command_name(input), "command", cmd=input) as span:
+        res = subprocess.run(
+            input,
+            shell=True,
+            capture_output=True,
+            text=True,
+        )
+        if span is not None:
+            span.attributes["returncode"] = res.returncode
     if widget:
         with st.sidebar.expander(input):
             if returncode:
@@ -197,10 +205,11 @@ def pseudo_streaming_text(
     else:
         elem = obj
     words = ""
-    for word in list(text):
-        words += word
-        elem.write(words, **kwargs)
-        time.sleep(sleep_sec)
+    with get_tracer().span("pseudo_streaming_text", "sleep", num_chars=len(text)):
+        for word in list(text):
+            words += word
+            elem.write(words, **kwargs)
+            time.sleep(sleep_sec)
     print(text)
     return elem
 
@@ -219,14 +228,20 @@ def list_to_bullet_points(lst_str: List[str]) -> str:
 def add_code_fences(code: str, header: str = ""):
     return f"```{header}\n{code}\n```"
 
-def render_jinja_template(template_path: str, **kwargs) -> str:
-    file_loader = FileSystemLoader(os.path.dirname(template_path))
-    env = Environment(
-        loader=file_loader,
+@functools.lru_cache(maxsize=None)
+def get_jinja_environment(template_dir: str) -> Environment:
+    """Shared environment per template directory. Compiled templates are cached
+    in the environment, so each template file is parsed only once per process."""
+    return Environment(
+        loader=FileSystemLoader(template_dir),
         trim_blocks=False,
         lstrip_blocks=False,
-        keep_trailing_newline=True
+        keep_trailing_newline=True,
+        auto_reload=False
     )
+
+def render_jinja_template(template_path: str, **kwargs) -> str:
+    env = get_jinja_environment(os.path.dirname(os.path.abspath(template_path)))
     template = env.get_template(os.path.basename(template_path))
     rendered_unittest_template = template.render(**kwargs)
     return rendered_unittest_template
@@ -432,6 +447,14 @@ def run_command(
     cmd: str,
     cwd: str = ".",
     display_handler: DisplayHandler = CLIDisplayHandler()
+) -> None:
+    with get_tracer().span(get_command_name(cmd), "command", cmd=cmd):
+        run_command_(cmd, cwd, display_handler)
+
+def run_command_(
+    cmd: str,
+    cwd: str,
+    display_handler: DisplayHandler
 ) -> None:
     try:
         display_handler.on_start(cmd)
@@ -0,0 +1,294 @@
+import os
+import gzip
+import json
+import zlib
+import time
+from typing import List, Dict, Any, Callable, Optional
+
+from . import serialization
+from .callbacks import ChaosHunterCallback
+
+
+JOURNAL_FNAME = "journal.jsonl"
+CHECKPOINT_FNAME = "checkpoint.json"
+
+
+def open_text(path: str, mode: str, compress: bool):
+    if compress:
+        return gzip.open(path, f"{mode}t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+def get_by_path(obj: Any, path: str) -> Any:
+    for key in path.split("."):
+        obj = obj[key] if isinstance(obj, dict) else getattr(obj, key)
+    return obj
+
+def set_by_path(state: dict, path: str, value: Any) -> None:
+    keys = path.split(".")
+    for key in keys[:-1]:
+        state = state.setdefault(key, {})
+    state[keys[-1]] = value
+
+def append_by_path(state: dict, path: str, value: Any) -> None:
+    keys = path.split(".")
+    for key in keys[:-1]:
+        state = state.setdefault(key, {})
+    if not isinstance(state.get(keys[-1]), list):
+        state[keys[-1]] = []
+    state[keys[-1]].append(value)
+
+
+class RunJournal:
+    """
+    Append-only journal of a CE cycle.
+    Each entry only contains the updated field (e.g., `ce_cycle.hypothesis`), so the cost of
+    a write does not depend on the size of the whole output. Entries are flushed immediately
+    and fsync-ed in batches. Every `checkpoint_interval` entries, the whole state is written
+    to a checkpoint and the journal is truncated, which bounds the replay time of `load`.
+    """
+    def __init__(
+        self,
+        journal_dir: str,
+        get_state: Callable[[], Any] = None,
+        compress: bool = False,
+        fsync_every: int = 16,
+        fsync_interval: float = 5.,
+        checkpoint_interval: int = 64,
+        reset: bool = False
+    ) -> None:
+        self.journal_dir = journal_dir
+        self.get_state = get_state
+        self.compress = compress
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.checkpoint_interval = checkpoint_interval
+        suffix = ".gz" if compress else ""
+        self.journal_path = f"{journal_dir}/{JOURNAL_FNAME}{suffix}"
+        self.checkpoint_path = f"{journal_dir}/{CHECKPOINT_FNAME}{suffix}"
+        os.makedirs(journal_dir, exist_ok=True)
+        if reset: # discard the journal of a previous run
+            for fname in [JOURNAL_FNAME, CHECKPOINT_FNAME]:
+                while (found := find_file(journal_dir, fname)) is not None:
+                    os.remove(found[0])
+        # continue the sequence of an existing journal
+        self.seq = get_last_seq(journal_dir)
+        if compress and os.path.exists(self.journal_path):
+            # a gzip stream left open by a crash has no trailer, and a member appended after it would be unreadable
+            self.rewrite(read_entries(journal_dir))
+        self.file = open_text(self.journal_path, "a", compress)
+        if not compress and self.file.tell() > 0:
+            # terminate a line partially written before a crash
+            with open(self.journal_path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    self.file.write("\n")
+        self.num_unsynced = 0
+        self.num_since_checkpoint = 0
+        self.last_fsync_time = time.time()
+
+    #---------
+    # entries
+    #---------
+    def set(self, path: str, value: Any) -> None:
+        self.write({"op": "set", "path": path, "value": value})
+
+    def append(self, path: str, value: Any) -> None:
+        self.write({"op": "append", "path": path, "value": value})
+
+    def event(self, name: str, **data) -> None:
+        """a marker that does not change the state (e.g., phase start/end)"""
+        self.write({"op": "event", "name": name, "value": data})
+
+    def set_from(self, obj: Any, *paths: str) -> None:
+        """journal the current values of `paths` in `obj`"""
+        for path in paths:
+            self.set(path, get_by_path(obj, path))
+
+    def append_from(self, obj: Any, *paths: str) -> None:
+        """journal the last items of the lists at `paths` in `obj`"""
+        for path in paths:
+            self.append(path, get_by_path(obj, path)[-1])
+
+    def write(self, entry: dict) -> None:
+        self.seq += 1
+        self.file.write(serialization.dumps({"seq": self.seq, "time": time.time(), **entry}).decode("utf-8") + "\n")
+        self.file.flush()
+        self.num_unsynced += 1
+        self.num_since_checkpoint += 1
+        if self.num_unsynced >= self.fsync_every or time.time() - self.last_fsync_time >= self.fsync_interval:
+            self.sync()
+        if self.get_state is not None and self.num_since_checkpoint >= self.checkpoint_interval:
+            self.checkpoint()
+
+    def rewrite(self, entries: List[dict]) -> None:
+        """atomically replace the journal with `entries`"""
+        tmp_path = f"{self.journal_path}.tmp"
+        with open_text(tmp_path, "w", self.compress) as f:
+            for entry in entries:
+                f.write(serialization.dumps(entry).decode("utf-8") + "\n")
+        with open(tmp_path, "rb+") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.journal_path)
+
+    def sync(self) -> None:
+        self.file.flush() # also flushes the compressor (Z_SYNC_FLUSH) when compressed
+        os.fsync(self.file.fileno())
+        self.num_unsynced = 0
+        self.last_fsync_time = time.time()
+
+    #------------
+    # checkpoint
+    #------------
+    def checkpoint(self, state: Any = None) -> None:
+        """write the whole state atomically, then start a new (empty) journal"""
+        state = state if state is not None else self.get_state()
+        self.sync()
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open_text(tmp_path, "w", self.compress) as f:
+            f.write(serialization.dumps({"seq": self.seq, "state": state}).decode("utf-8"))
+            f.flush()
+        with open(tmp_path, "rb+") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+        # entries up to `seq` are in the checkpoint
+        self.file.close()
+        self.file = open_text(self.journal_path, "w", self.compress)
+        self.num_since_checkpoint = 0
+
+    def close(self) -> None:
+        if not self.file.closed:
+            self.sync()
+            self.file.close()
+
+
+class JournalCallback(ChaosHunterCallback):
+    """records phase boundaries and experiment task events in a journal"""
+    def __init__(self, journal: RunJournal):
+        self.journal = journal
+
+    def on_preprocess_start(self):
+        self.journal.event("preprocess_start")
+
+    def on_preprocess_end(self, logs):
+        self.journal.event("preprocess_end")
+
+    def on_hypothesis_start(self):
+        self.journal.event("hypothesis_start")
+
+    def on_hypothesis_end(self, logs):
+        self.journal.event("hypothesis_end")
+
+    def on_experiment_plan_start(self):
+        self.journal.event("experiment_plan_start")
+
+    def on_experiment_plan_end(self, logs):
+        self.journal.event("experiment_plan_end")
+
+    def on_experiment_start(self):
+        self.journal.event("experiment_start")
+
+    def on_experiment_task_event(self, event):
+        self.journal.event("experiment_task_event", **event.dict())
+
+    def on_experiment_end(self):
+        self.journal.event("experiment_end")
+
+    def on_experiment_replan_start(self):
+        self.journal.event("experiment_replan_start")
+
+    def on_experiment_replan_end(self, logs):
+        self.journal.event("experiment_replan_end")
+
+    def on_analysis_start(self):
+        self.journal.event("analysis_start")
+
+    def on_analysis_end(self, logs):
+        self.journal.event("analysis_end")
+
+    def on_improvement_start(self):
+        self.journal.event("improvement_start")
+
+    def on_improvement_end(self, logs):
+        self.journal.event("improvement_end")
+
+    def on_postprocess_start(self):
+        self.journal.event("postprocess_start")
+
+    def on_postprocess_end(self, logs):
+        self.journal.event("postprocess_end")
+
+
+#--------
+# loader
+#--------
+def find_file(journal_dir: str, fname: str) -> Optional[tuple]:
+    for compress in [False, True]:
+        path = f"{journal_dir}/{fname}" + (".gz" if compress else "")
+        if os.path.exists(path):
+            return path, compress
+    return None
+
+def read_gzip_prefix(path: str, chunk_size: int = 4096) -> str:
+    """the text of a gzip file up to where it is truncated or corrupted (e.g., by a crash)"""
+    with open(path, "rb") as f:
+        data = f.read()
+    decompressed = []
+    pos = 0
+    while pos < len(data):
+        decompressor = zlib.decompressobj(wbits=31) # a gzip member
+        try:
+            # decompress in chunks so that the data before a corrupted part is kept
+            while pos < len(data) and not decompressor.eof:
+                decompressed.append(decompressor.decompress(data[pos:pos+chunk_size]))
+                pos = min(pos + chunk_size, len(data))
+        except zlib.error:
+            break
+        if not decompressor.eof: # a member without its trailer
+            break
+        pos -= len(decompressor.unused_data) # the next member starts in the unused data of the last chunk
+    return b"".join(decompressed).decode("utf-8", errors="ignore")
+
+def read_entries(journal_dir: str) -> List[dict]:
+    """entries of the journal; a truncated tail (e.g., by a crash) is ignored"""
+    if (found := find_file(journal_dir, JOURNAL_FNAME)) is None:
+        return []
+    path, compress = found
+    if compress:
+        lines = read_gzip_prefix(path).splitlines()
+    else:
+        with open_text(path, "r", compress) as f:
+            lines = f.readlines()
+    entries = []
+    for line in lines:
+        try:
+            entries.append(serialization.loads(line))
+        except json.JSONDecodeError: # a partially written line
+            continue
+    return entries
+
+def read_checkpoint(journal_dir: str) -> Dict[str, Any]:
+    if (found := find_file(journal_dir, CHECKPOINT_FNAME)) is None:
+        return {"seq": 0, "state": {}}
+    path, compress = found
+    with open_text(path, "r", compress) as f:
+        return serialization.loads(f.read())
+
+def get_last_seq(journal_dir: str) -> int:
+    entries = read_entries(journal_dir)
+    return entries[-1]["seq"] if len(entries) > 0 else read_checkpoint(journal_dir)["seq"]
+
+def load_journal(journal_dir: str) -> dict:
+    """reconstruct the state from the latest checkpoint and the journal entries after it"""
+    checkpoint = read_checkpoint(journal_dir)
+    state = checkpoint["state"]
+    for entry in read_entries(journal_dir):
+        if entry["seq"] <= checkpoint["seq"]:
+            continue
+        if entry["op"] == "set":
+            set_by_path(state, entry["path"], entry["value"])
+        elif entry["op"] == "append":
+            append_by_path(state, entry["path"], entry["value"])
+    return state
+
+def has_journal(journal_dir: str) -> bool:
+    return find_file(journal_dir, JOURNAL_FNAME) is not None or find_file(journal_dir, CHECKPOINT_FNAME) is not None
@@ -1,9 +1,18 @@
 import os
 import subprocess
+import re
 import time
+from decimal import Decimal, InvalidOperation
+from typing import List, Any, Optional
+
+import yaml
 from kubernetes import client, config
 
-from .functions import run_command, DisplayHandler, CLIDisplayHandler
+from .functions import DisplayHandler, CLIDisplayHandler
+from .schemas import File
+from .cache import POD_RESULT_CACHE
+from .tracing import traced
+from ..backends.backend import get_backend
 
 
 def kubectl_apply(manifest_path):
@@ -108,11 +117,12 @@ def check_resources_status(label_selector, api_client, namespace=None):
         return False
     return True
 
+@traced("wait")
 def wait_for_resources_ready(label_selector, context=None, namespace=None, timeout=300):
-    api_client = create_api_client(context)  # Create a new ApiClient for the current session
+    backend = get_backend()
     start_time = time.time()
     while time.time() - start_time < timeout:
-        if check_resources_status(label_selector, api_client, namespace):
+        if backend.resources_ready(label_selector, context, namespace):
             print(f"All resources with label '{label_selector}' are ready in namespace '{namespace}' and context '{context}'.")
             time.sleep(1)
             return True
@@ -125,9 +135,13 @@ def remove_all_resources_by_labels(
     label_selector: str,
     display_handler: DisplayHandler = CLIDisplayHandler()
 ) -> None:
+    POD_RESULT_CACHE.invalidate(context)
     try:
-        run_command(
-            cmd=f"kubectl delete all --all-namespaces --context {context} -l {label_selector}",
+        get_backend().delete(
+            context,
+            kind="all",
+            selector=label_selector,
+            all_namespaces=True,
             display_handler=display_handler
         )
     except subprocess.CalledProcessError as e:
@@ -138,15 +152,88 @@ def remove_all_resources_by_namespace(
     namespace: str,
     display_handler: DisplayHandler = CLIDisplayHandler()
 ) -> None:
+    POD_RESULT_CACHE.invalidate(context)
     for resource_type in ["workflow", "workflownode", "deployments", "pods", "services"]:
         try:
-            run_command(
-                cmd=f"kubectl delete {resource_type} --all --context {context} -n {namespace}",
+            get_backend().delete(
+                context,
+                namespace,
+                kind=resource_type,
+                display_handler=display_handler
+            )
+        except subprocess.CalledProcessError as e:
+            assert False, f"Failed to delete {resource_type} (errorcode: {e.returncode}): {e.stderr.decode('utf-8')}"
+
+def remove_workflows_by_namespace(
+    context: str,
+    namespace: str,
+    display_handler: DisplayHandler = CLIDisplayHandler()
+) -> None:
+    for resource_type in ["workflow", "workflownode"]:
+        try:
+            get_backend().delete(
+                context,
+                namespace,
+                kind=resource_type,
                 display_handler=display_handler
             )
         except subprocess.CalledProcessError as e:
             assert False, f"Failed to delete {resource_type} (errorcode: {e.returncode}): {e.stderr.decode('utf-8')}"
 
+QUANTITY_SUFFIXES = {
+    "Ki": Decimal(2) ** 10, "Mi": Decimal(2) ** 20, "Gi": Decimal(2) ** 30,
+    "Ti": Decimal(2) ** 40, "Pi": Decimal(2) ** 50, "Ei": Decimal(2) ** 60,
+    "n": Decimal("1e-9"), "u": Decimal("1e-6"), "m": Decimal("1e-3"), "": Decimal(1),
+    "k": Decimal("1e3"), "M": Decimal("1e6"), "G": Decimal("1e9"),
+    "T": Decimal("1e12"), "P": Decimal("1e15"), "E": Decimal("1e18"),
+}
+QUANTITY_PATTERN = re.compile(r"^([+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)(Ki|Mi|Gi|Ti|Pi|Ei|n|u|m|k|M|G|T|P|E)?$")
+
+def parse_quantity(value: Any) -> Optional[Decimal]:
+    """numeric value of a k8s quantity (e.g., "500m", "1Gi", 2), or None if `value` is not a quantity"""
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        return None
+    match = QUANTITY_PATTERN.match(str(value).strip())
+    if match is None:
+        return None
+    try:
+        return Decimal(match.group(1)) * QUANTITY_SUFFIXES[match.group(2) or ""]
+    except InvalidOperation:
+        return None
+
+def is_subset(expected: Any, actual: Any) -> bool:
+    """whether all the fields in `expected` are in `actual` (fields defaulted by the API server are ignored)"""
+    if isinstance(expected, dict):
+        return isinstance(actual, dict) and all(key in actual and is_subset(value, actual[key]) for key, value in expected.items())
+    if isinstance(expected, list):
+        return isinstance(actual, list) and len(expected) == len(actual) and all(is_subset(e, a) for e, a in zip(expected, actual))
+    if str(expected) == str(actual):
+        return True
+    # quantities are canonicalized by the API server (e.g., 0.5 -> "500m", "1024Mi" -> "1Gi")
+    expected_quantity, actual_quantity = parse_quantity(expected), parse_quantity(actual)
+    return expected_quantity is not None and expected_quantity == actual_quantity
+
+def get_deployment_drift(
+    context: str,
+    k8s_yamls: List[File]
+) -> List[str]:
+    """differences between the manifests and the live resources (missing resources and modified specs)"""
+    drifts = []
+    for k8s_yaml in k8s_yamls:
+        for manifest in yaml.safe_load_all(k8s_yaml.content):
+            if not isinstance(manifest, dict) or "kind" not in manifest:
+                continue
+            kind, name = manifest["kind"], manifest["metadata"]["name"]
+            namespace = manifest["metadata"].get("namespace")
+            live = get_backend().get(kind, context, namespace, name=name)
+            if live is None:
+                drifts.append(f"{kind}/{name} ({k8s_yaml.fname}) is not found.")
+                continue
+            for field in ["spec", "data"]:
+                if field in manifest and not is_subset(manifest[field], live.get(field)):
+                    drifts.append(f"The {field} of {kind}/{name} ({k8s_yaml.fname}) differs from the manifest.")
+    return drifts
+
 # import os
 # import subprocess
 # import time
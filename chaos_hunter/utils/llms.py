@@ -1,7 +1,10 @@
 import time
 import random
 import re
-from typing import List, Tuple, Callable, Iterator, Optional, Any
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import List, Dict, Tuple, Callable, Iterator, Optional, Any
 from functools import wraps
 
 import tiktoken
@@ -19,7 +22,9 @@ from langchain_core.output_parsers import JsonOutputParser
 from langchain.callbacks.base import BaseCallbackHandler
 from langchain.schema import LLMResult
 
-from .wrappers import LLM, LLMBaseModel, BaseModel
+from .wrappers import LLM, LLMBaseModel, BaseModel, PrivateAttr
+from .message_store import MessageStore, get_message_store
+from .tracing import get_tracer
 
 
 class GitHubLLM(BaseLLM):
@@ -116,9 +121,9 @@ def retry_with_exponential_backoff(
                             retry_after = e.response.headers.get('retry-after')
                             if retry_after:
                                 try:
-                                    retry_after = int(retry_after)
-                                except:
-                                    pass
+                                    retry_after = float(retry_after)
+                                except ValueError:
+                                    retry_after = None
                     
                     # Anthropic rate limit
                     elif "rate_limit" in str(e).lower() or "429" in str(e):
@@ -143,7 +148,8 @@ def retry_with_exponential_backoff(
                         delay = delay * (0.5 + random.random() * 0.5)
                     
                     print(f"Rate limit hit, retrying in {delay:.2f} seconds (attempt {attempt + 1}/{max_retries + 1})")
-                    time.sleep(delay)
+                    with get_tracer().span("rate_limit_backoff", "sleep", delay=delay):
+                        time.sleep(delay)
             
             # This should never be reached, but just in case
             raise last_exception
@@ -208,7 +214,8 @@ def create_retry_llm(llm_class, max_retries: int = 5, **kwargs):
                             delay = delay * (0.5 + random.random() * 0.5)
                         
                         print(f"Stream rate limit hit, retrying in {delay:.2f} seconds (attempt {attempt + 1}/{max_retries + 1})")
-                        time.sleep(delay)
+                        with get_tracer().span("rate_limit_backoff", "sleep", delay=delay):
+                            time.sleep(delay)
             
             # Use setattr to avoid Pydantic field validation issues
             setattr(llm, 'stream', retry_stream)
@@ -247,7 +254,8 @@ def create_retry_llm(llm_class, max_retries: int = 5, **kwargs):
                             delay = delay * (0.5 + random.random() * 0.5)
                         
                         print(f"Async stream rate limit hit, retrying in {delay:.2f} seconds (attempt {attempt + 1}/{max_retries + 1})")
-                        time.sleep(delay)
+                        with get_tracer().span("rate_limit_backoff", "sleep", delay=delay):
+                            time.sleep(delay)
             
             # Use setattr to avoid Pydantic field validation issues
             setattr(llm, 'astream', retry_astream)
@@ -387,7 +395,8 @@ def load_llm(
                                 delay = delay * (0.5 + random.random() * 0.5)
                             
                             print(f"Bedrock stream rate limit hit, retrying in {delay:.2f} seconds (attempt {attempt + 1}/6)")
-                            time.sleep(delay)
+                            with get_tracer().span("rate_limit_backoff", "sleep", delay=delay):
+                                time.sleep(delay)
                 
                 # Use setattr to avoid Pydantic field validation issues
                 setattr(bedrock_wrapper, 'stream', retry_stream)
@@ -426,7 +435,8 @@ def load_llm(
                                 delay = delay * (0.5 + random.random() * 0.5)
                             
                             print(f"Bedrock async stream rate limit hit, retrying in {delay:.2f} seconds (attempt {attempt + 1}/6)")
-                            time.sleep(delay)
+                            with get_tracer().span("rate_limit_backoff", "sleep", delay=delay):
+                                time.sleep(delay)
                 
                 # Use setattr to avoid Pydantic field validation issues
                 setattr(bedrock_wrapper, 'astream', retry_astream)
@@ -444,7 +454,8 @@ def load_llm(
             openai_api_key="EMPTY",
             openai_api_base=f"http://localhost:{port}/v1",
             temperature=temperature,
-            max_tokens=2048
+            max_tokens=2048,
+            stream_usage=True # local servers (vLLM or the stub server) report the token usage
         )
     
 
@@ -542,14 +553,97 @@ class TokenUsage(BaseModel):
 class LLMLog(BaseModel):
     name: str
     token_usage: TokenUsage
-    message_history: List[List[str] | str]
+    message_history: List[List[str] | str] # references to the message store (or full messages of old logs)
+    _message_store: Optional[MessageStore] = PrivateAttr(default=None) # the store that interned the messages
+
+    def set_message_store(self, message_store: MessageStore) -> "LLMLog":
+        self._message_store = message_store
+        return self
+
+    def get_message_history(self) -> List[List[str] | str]:
+        """the message history with full prompts/responses (rehydrated on each call)"""
+        message_store = self._message_store if self._message_store is not None else MessageStore()
+        return message_store.resolve_history(self.message_history)
+
+    def embed_messages(self) -> "LLMLog":
+        """a copy with full messages, which can be read without the segment file (e.g., *_log.json)"""
+        return LLMLog(name=self.name, token_usage=self.token_usage, message_history=self.get_message_history())
+
+    @classmethod
+    def merge(cls, name: str, logs: List["LLMLog"]) -> "LLMLog":
+        message_stores = {id(log._message_store): log._message_store for log in logs}
+        if len(message_stores) == 1:
+            message_store = logs[0]._message_store
+            message_history = [message for log in logs for message in log.message_history]
+        else: # the logs were interned into different stores (e.g., by agents called outside of a cycle)
+            message_store = MessageStore()
+            message_history = [
+                [message_store.put(message) for message in messages] if isinstance(messages, list) else message_store.put(messages)
+                for log in logs for messages in log.get_message_history()
+            ]
+        return cls(
+            name=name,
+            token_usage=TokenUsage(
+                input_tokens=sum(log.token_usage.input_tokens for log in logs),
+                output_tokens=sum(log.token_usage.output_tokens for log in logs),
+                total_tokens=sum(log.token_usage.total_tokens for log in logs)
+            ),
+            message_history=message_history
+        ).set_message_store(message_store)
+
+def embed_messages(logs: LLMLog | List[LLMLog] | List[List[LLMLog]]) -> LLMLog | List[LLMLog] | List[List[LLMLog]]:
+    """(nested lists of) logs with full messages, to save them outside of the cycle's output dir"""
+    if isinstance(logs, list):
+        return [embed_messages(log) for log in logs]
+    return logs.embed_messages()
+
+#----------------
+# usage trackers
+#----------------
+# the tracker (e.g., BudgetManager) of the running CE cycle, which is told about every LLM call of the cycle in real time.
+# it has check() (raises to stop the call) and add_usage(model, input_tokens, output_tokens).
+# it is current only in the cycle's context, so concurrent cycles sharing an llm do not mix their usages
+CURRENT_USAGE_TRACKER: contextvars.ContextVar[Optional[Any]] = contextvars.ContextVar("usage_tracker", default=None)
+
+def get_usage_tracker() -> Optional[Any]:
+    """the tracker of the current CE cycle, or None outside of tracked cycles"""
+    return CURRENT_USAGE_TRACKER.get()
+
+@contextmanager
+def use_usage_tracker(tracker: Optional[Any]) -> Iterator[Optional[Any]]:
+    """report the LLM calls in this context to `tracker`"""
+    token = CURRENT_USAGE_TRACKER.set(tracker)
+    try:
+        yield tracker
+    finally:
+        CURRENT_USAGE_TRACKER.reset(token)
+
+#--------------
+# cancellation
+#--------------
+class LLMCallCancelled(Exception):
+    """raised (by the start or the next token of an LLM call) when the work of the call was discarded"""
+    pass
+
+# set by work whose LLM calls may be discarded while they are running (e.g., speculation of the steady-state definer)
+CURRENT_CANCEL_EVENT: contextvars.ContextVar[Optional[threading.Event]] = contextvars.ContextVar("cancel_event", default=None)
+
+@contextmanager
+def cancellable(event: threading.Event) -> Iterator[threading.Event]:
+    """stop the LLM calls in this context once `event` is set"""
+    token = CURRENT_CANCEL_EVENT.set(event)
+    try:
+        yield event
+    finally:
+        CURRENT_CANCEL_EVENT.reset(token)
 
 class LoggingCallback(BaseCallbackHandler):
     def __init__(
         self,
         name: str,
         llm: LLM,
-        streaming: bool = True
+        streaming: bool = True,
+        usage_tracker: Optional[Any] = None
     ) -> None:
         if "model" in list(llm.__fields__.keys()):
             self.model_name = llm.model
@@ -563,6 +657,8 @@ class LoggingCallback(BaseCallbackHandler):
             self.model_name = llm.model_name
             if "gpt" in self.model_name:
                 self.model_provider = "openai"
+            elif getattr(llm, "openai_api_base", None) is not None:
+                self.model_provider = "local" # an OpenAI-compatible server (e.g., vLLM or the stub server)
             else:
                 raise TypeError(f"Invalid model name: {self.model_name}")
         elif "model_id" in list(llm.__fields__.keys()):
@@ -583,18 +679,45 @@ class LoggingCallback(BaseCallbackHandler):
         )
         self.message_history = []
         self.name = name
+        self.message_store = get_message_store()
+        self.usage_tracker = usage_tracker if usage_tracker is not None else get_usage_tracker()
+        self.cancel_event = CURRENT_CANCEL_EVENT.get()
         self.log = LLMLog(
             name=self.name,
             token_usage=self.token_usage,
             message_history=self.message_history
-        )
+        ).set_message_store(self.message_store)
+        self.spans = {} # run id -> (tracer, span of the LLM call, token usage at its start)
+        self.llm = llm
+
+    @property
+    def raise_error(self) -> bool:
+        # errors of tracked or cancellable calls are raised so that they can be stopped (e.g., when the budget is exceeded)
+        return self.usage_tracker is not None or self.cancel_event is not None
+
+    def check_cancelled(self) -> None:
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise LLMCallCancelled(f"{self.name}: the LLM call was cancelled.")
 
     def on_llm_start(self, serialized, prompts, **kwargs):
-        self.message_history.append(prompts)
+        self.check_cancelled()
+        if self.usage_tracker is not None:
+            self.usage_tracker.check()
+        tracer = get_tracer()
+        span = tracer.start_span(f"llm:{self.name}", "llm", model=self.model_name)
+        self.spans[kwargs.get("run_id")] = (tracer, span, self.token_usage.copy())
+        # prompts repeat the same system overview and manifests, so they are interned
+        self.message_history.append([self.message_store.put(prompt) for prompt in prompts])
         if self.model_provider == "openai" and self.streaming:
             for prompt in prompts:
                 self.token_usage.input_tokens += len(self.enc.encode(prompt))
 
+    def on_llm_new_token(self, token: str, **kwargs):
+        self.check_cancelled() # stops the stream of a discarded call instead of letting it use up tokens
+        _, span, _ = self.spans.get(kwargs.get("run_id"), (None, None, None))
+        if span is not None and "time_to_first_token" not in span.attributes:
+            span.attributes["time_to_first_token"] = time.time() - span.start
+
     def on_llm_end(self, response: LLMResult, **kwargs):
         for generations in response.generations:
             for generation in generations:
@@ -607,17 +730,29 @@ class LoggingCallback(BaseCallbackHandler):
                         self.token_usage.input_tokens += tokens.get("prompt_tokens", -1)
                         self.token_usage.output_tokens += tokens.get("completion_tokens", -1)
                         self.token_usage.total_tokens += tokens.get("total_tokens", -1)
-                    elif self.model_provider in ["google", "anthropic", "bedrock"]:
-                        tokens = generation.message.usage_metadata
+                    elif self.model_provider in ["google", "anthropic", "bedrock", "local"]:
+                        tokens = generation.message.usage_metadata or {}
                         self.token_usage.input_tokens += tokens.get("input_tokens", -1)
                         self.token_usage.output_tokens += tokens.get("output_tokens", -1)
                         self.token_usage.total_tokens += tokens.get("total_tokens", -1)
-                self.message_history.append(generation.text)
+                self.message_history.append(self.message_store.put(generation.text))
         self.log = LLMLog(
             name=self.name,
             token_usage=self.token_usage,
             message_history=self.message_history
-        )
+        ).set_message_store(self.message_store)
+        tracer, span, usage_at_start = self.spans.pop(kwargs.get("run_id"), (None, None, None))
+        if usage_at_start is not None:
+            input_tokens = self.token_usage.input_tokens - usage_at_start.input_tokens
+            output_tokens = self.token_usage.output_tokens - usage_at_start.output_tokens
+            tracer.end_span(span, input_tokens=input_tokens, output_tokens=output_tokens)
+            if self.usage_tracker is not None:
+                self.usage_tracker.add_usage(f"{self.model_provider}/{self.model_name}", input_tokens, output_tokens)
+
+    def on_llm_error(self, error: BaseException, **kwargs):
+        tracer, span, _ = self.spans.pop(kwargs.get("run_id"), (None, None, None))
+        if tracer is not None:
+            tracer.end_span(span, error=repr(error)[:200])
 
 UNIT = 1e+6
 PRICING_PER_TOKEN = {
@@ -715,4 +850,13 @@ PRICING_PER_TOKEN = {
         "input": 1.2 / UNIT,
         "output": 1.6 / UNIT
     },
-}
\ No newline at end of file
+}
+
+def get_pricing(model: str) -> Optional[Dict[str, float]]:
+    """the pricing of a model ({provider}/{model} or only the model name), or None if unknown"""
+    if model in PRICING_PER_TOKEN:
+        return PRICING_PER_TOKEN[model]
+    for model_name, pricing in PRICING_PER_TOKEN.items():
+        if model_name.split("/")[-1] == model.split("/")[-1]:
+            return pricing
+    return None
@@ -0,0 +1,170 @@
+import os
+import json
+import zlib
+import hashlib
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import List, Dict, Set, Iterable, Iterator, Optional
+
+import zstandard
+
+
+REF_PREFIX = "msgref:"
+SEGMENTS_FNAME = "message_segments.jsonl.zst"
+
+
+def split_segments(
+    text: str,
+    min_size: int = 64,
+    max_size: int = 8192
+) -> List[str]:
+    """
+    Content-defined chunking at line granularity.
+    A segment ends after a line whose checksum hits the mask (once the segment has `min_size` chars),
+    so boundaries only depend on nearby lines and a block repeated in different prompts
+    (e.g., the system overview or manifests) is split into the same segments.
+    """
+    segments, buf, size = [], [], 0
+    for line in text.splitlines(keepends=True):
+        buf.append(line)
+        size += len(line)
+        if size >= max_size or (size >= min_size and zlib.crc32(line.encode("utf-8")) % 4 == 0):
+            segments.append("".join(buf))
+            buf, size = [], 0
+    if len(buf) > 0:
+        segments.append("".join(buf))
+    return segments
+
+def get_segment_id(segment: str) -> str:
+    return hashlib.sha256(segment.encode("utf-8")).hexdigest()[:16]
+
+def is_ref(message: str) -> bool:
+    return isinstance(message, str) and message.startswith(REF_PREFIX)
+
+def get_segment_ids(ref: str) -> List[str]:
+    return ref[len(REF_PREFIX):].split(".") if len(ref) > len(REF_PREFIX) else []
+
+
+class MessageStore:
+    """
+    Interned storage of LLM messages.
+    A message is split into content-addressed segments, each kept once in memory, and is replaced
+    by a short reference (`msgref:<id>.<id>...`) in LLMLog.message_history.
+    Full messages are only rehydrated on access (`resolve`).
+    A store is scoped to a CE cycle (see `use_message_store`) and is referenced by the logs of the cycle,
+    so its segments are released together with the logs.
+    On disk, segments are appended to a zstd-compressed JSONL file, one frame per flush.
+    """
+    def __init__(self) -> None:
+        self.segments: Dict[str, str] = {}
+        self.refs: Dict[str, str] = {} # hash of a whole message -> its reference
+        self.saved_ids: Dict[str, Set[str]] = {} # path -> ids of the segments in the file
+        self.lock = threading.Lock()
+
+    def put(self, message: str) -> str:
+        """intern `message` and return its reference"""
+        if not isinstance(message, str) or is_ref(message):
+            return message
+        message_hash = hashlib.sha256(message.encode("utf-8")).hexdigest()
+        with self.lock:
+            if (ref := self.refs.get(message_hash)) is not None:
+                return ref
+        ids = []
+        for segment in split_segments(message):
+            segment_id = get_segment_id(segment)
+            with self.lock:
+                self.segments.setdefault(segment_id, segment)
+            ids.append(segment_id)
+        ref = REF_PREFIX + ".".join(ids)
+        with self.lock:
+            self.refs[message_hash] = ref
+        return ref
+
+    def resolve(self, message: str) -> str:
+        """the full message of a reference (other strings are returned as is)"""
+        if not is_ref(message):
+            return message
+        segment_ids = get_segment_ids(message)
+        missing = [segment_id for segment_id in segment_ids if segment_id not in self.segments]
+        assert len(missing) == 0, f"MISSING_MESSAGE_SEGMENTS: {missing[:3]} (load the segment file of the cycle first)"
+        return "".join(self.segments[segment_id] for segment_id in segment_ids)
+
+    def resolve_history(self, message_history: List[List[str] | str]) -> List[List[str] | str]:
+        return [
+            [self.resolve(message) for message in messages] if isinstance(messages, list) else self.resolve(messages)
+            for messages in message_history
+        ]
+
+    def get_num_chars(self) -> int:
+        return sum(len(segment) for segment in self.segments.values())
+
+    #---------
+    # storage
+    #---------
+    def flush(self, path: str, message_histories: Iterable[List[List[str] | str]]) -> int:
+        """append the segments referenced by `message_histories` that are not in the file yet; returns their count"""
+        saved_ids = self.saved_ids.setdefault(path, self.read_ids(path))
+        new_ids = []
+        for message_history in message_histories:
+            for messages in message_history:
+                for message in (messages if isinstance(messages, list) else [messages]):
+                    if is_ref(message):
+                        new_ids += [segment_id for segment_id in get_segment_ids(message) if segment_id not in saved_ids]
+                        saved_ids.update(new_ids)
+        if len(new_ids) == 0:
+            return 0
+        lines = "".join(
+            json.dumps({"id": segment_id, "text": self.segments[segment_id]}, ensure_ascii=False) + "\n"
+            for segment_id in dict.fromkeys(new_ids)
+        )
+        with open(path, "ab") as f:
+            f.write(zstandard.ZstdCompressor(level=9).compress(lines.encode("utf-8")))
+        return len(set(new_ids))
+
+    def load(self, path: str) -> None:
+        """load the segments in a file (e.g., of a previous cycle) so that its logs can be rehydrated"""
+        for segment_id, text in iter_segment_file(path):
+            with self.lock:
+                self.segments.setdefault(segment_id, text)
+
+    def read_ids(self, path: str) -> Set[str]:
+        if not os.path.exists(path):
+            return set()
+        return {segment_id for segment_id, _ in iter_segment_file(path)}
+
+
+def iter_segment_file(path: str) -> Iterable[tuple]:
+    with open(path, "rb") as f:
+        reader = zstandard.ZstdDecompressor().stream_reader(f, read_across_frames=True)
+        buf = b""
+        try:
+            while (chunk := reader.read(1 << 20)):
+                buf += chunk
+                *lines, buf = buf.split(b"\n")
+                for line in lines:
+                    entry = json.loads(line)
+                    yield entry["id"], entry["text"]
+        except zstandard.ZstdError: # a frame partially written before a crash
+            pass
+
+
+#---------------
+# current store
+#---------------
+# the store of the running CE cycle (worker threads need to run in a copy of the cycle's context)
+CURRENT_MESSAGE_STORE: contextvars.ContextVar[Optional[MessageStore]] = contextvars.ContextVar("message_store", default=None)
+
+def get_message_store() -> MessageStore:
+    """the store of the current CE cycle, or a new store outside of cycles"""
+    store = CURRENT_MESSAGE_STORE.get()
+    return store if store is not None else MessageStore()
+
+@contextmanager
+def use_message_store(store: MessageStore) -> Iterator[MessageStore]:
+    """intern the messages of the LLM calls in this context into `store`"""
+    token = CURRENT_MESSAGE_STORE.set(store)
+    try:
+        yield store
+    finally:
+        CURRENT_MESSAGE_STORE.reset(token)
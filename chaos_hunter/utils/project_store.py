@@ -0,0 +1,245 @@
+import os
+import json
+import stat
+import fcntl
+import shutil
+import hashlib
+import tempfile
+import threading
+from typing import List, Dict, Tuple, Literal, Optional, Iterable
+
+from .schemas import File
+from .wrappers import BaseModel
+
+
+LinkMode = Literal["hardlink", "reflink", "copy"]
+FICLONE = 0x40049409 # ioctl to clone (reflink) a file on Linux (btrfs, xfs, ...)
+EXECUTABLE_SUFFIX = "+x"
+
+
+class ProjectVersion(BaseModel):
+    version_id: str
+    files: Dict[str, str] # relative path -> blob id
+
+class VersionDiff(BaseModel):
+    added: List[str] = []
+    removed: List[str] = []
+    modified: List[str] = []
+
+    def is_empty(self) -> bool:
+        return len(self.added) + len(self.removed) + len(self.modified) == 0
+
+    def to_str(self) -> str:
+        return "\n".join(
+            [f"+ {path}" for path in self.added]
+            + [f"- {path}" for path in self.removed]
+            + [f"M {path}" for path in self.modified]
+        )
+
+
+def replace_file(path: str, content: str | bytes) -> None:
+    """
+    Write `content` to a new inode and atomically move it to `path`.
+    Unlike an in-place write, this never modifies a blob hardlinked to `path`.
+    """
+    dir_path = os.path.dirname(path) or "."
+    os.makedirs(dir_path, exist_ok=True)
+    # a unique temporary file in the same directory (i.e., on the same filesystem) for concurrent writers
+    fd, tmp_path = tempfile.mkstemp(dir=dir_path, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb" if isinstance(content, bytes) else "w") as f:
+            f.write(content)
+        executable = os.path.exists(path) and bool(os.stat(path).st_mode & stat.S_IXUSR)
+        os.chmod(tmp_path, 0o755 if executable else 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        remove_file(tmp_path)
+        raise
+
+def remove_file(path: str) -> None:
+    if os.path.lexists(path):
+        os.remove(path)
+
+
+class ProjectStore:
+    """
+    Content-addressed store of project directories.
+    A file's content is stored once as a blob (`blobs/<sha256[:2]>/<sha256>`, with a `+x` suffix for executables),
+    and a project version is a manifest (relative path -> blob id) saved in `manifests/<version_id>.json`.
+    Working trees are materialized by hardlinking (or reflinking) the blobs, so duplicating a project only
+    costs one link per file and updating an existing tree only touches the files that differ.
+    Linked files share their inode with the blob, so they must be rewritten with `replace_file` (or removed),
+    not modified in place; the files that are going to be modified can instead be materialized as
+    independent copies (reflinks if supported) by passing them as `writable`.
+    """
+    def __init__(
+        self,
+        store_dir: str,
+        link_mode: LinkMode = "hardlink"
+    ) -> None:
+        self.store_dir = store_dir
+        self.link_mode = link_mode
+        self.blob_dir = f"{store_dir}/blobs"
+        self.manifest_dir = f"{store_dir}/manifests"
+        os.makedirs(self.blob_dir, exist_ok=True)
+        os.makedirs(self.manifest_dir, exist_ok=True)
+        # (device, inode) -> (size, mtime_ns, blob id) to avoid rehashing unchanged (or linked) files
+        self.stat_cache: Dict[Tuple[int, int], Tuple[int, int, str]] = {}
+        self.lock = threading.Lock()
+        self.num_hashed = 0
+
+    #-------
+    # blobs
+    #-------
+    def get_blob_path(self, blob_id: str) -> str:
+        return f"{self.blob_dir}/{blob_id[:2]}/{blob_id}"
+
+    def put_file(self, path: str) -> str:
+        """store the content of the file at `path` and return its blob id"""
+        st = os.stat(path)
+        key = (st.st_dev, st.st_ino)
+        with self.lock:
+            cached = self.stat_cache.get(key)
+        if cached is not None and cached[:2] == (st.st_size, st.st_mtime_ns):
+            return cached[2]
+        with open(path, "rb") as f:
+            content = f.read()
+        blob_id = self.put_blob(content, executable=bool(st.st_mode & stat.S_IXUSR))
+        with self.lock:
+            self.stat_cache[key] = (st.st_size, st.st_mtime_ns, blob_id)
+            self.num_hashed += 1
+        return blob_id
+
+    def put_blob(self, content: str | bytes, executable: bool = False) -> str:
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        blob_id = hashlib.sha256(content).hexdigest() + (EXECUTABLE_SUFFIX if executable else "")
+        blob_path = self.get_blob_path(blob_id)
+        if not os.path.exists(blob_path):
+            replace_file(blob_path, content)
+            os.chmod(blob_path, 0o555 if executable else 0o444)
+        st = os.stat(blob_path)
+        with self.lock:
+            self.stat_cache[(st.st_dev, st.st_ino)] = (st.st_size, st.st_mtime_ns, blob_id)
+        return blob_id
+
+    def read_blob(self, blob_id: str) -> bytes:
+        with open(self.get_blob_path(blob_id), "rb") as f:
+            return f.read()
+
+    #----------
+    # versions
+    #----------
+    def snapshot(self, project_dir: str) -> ProjectVersion:
+        """store all the files under `project_dir` (symlinks are followed, as in shutil.copytree) and record the version"""
+        files = {}
+        for root, dirs, fnames in os.walk(project_dir, followlinks=True):
+            dirs.sort()
+            for fname in sorted(fnames):
+                path = os.path.join(root, fname)
+                if os.path.isfile(path):
+                    files[os.path.relpath(path, project_dir)] = self.put_file(path)
+        return self.add_version(files)
+
+    def add_version(self, files: Dict[str, str]) -> ProjectVersion:
+        version_id = hashlib.sha256(json.dumps(files, sort_keys=True).encode("utf-8")).hexdigest()
+        version = ProjectVersion(version_id=version_id, files=files)
+        manifest_path = f"{self.manifest_dir}/{version_id}.json"
+        if not os.path.exists(manifest_path):
+            replace_file(manifest_path, json.dumps(files, indent=2, sort_keys=True))
+        return version
+
+    def load_version(self, version_id: str) -> ProjectVersion:
+        with open(f"{self.manifest_dir}/{version_id}.json", "r") as f:
+            return ProjectVersion(version_id=version_id, files=json.load(f))
+
+    def diff(self, old: ProjectVersion, new: ProjectVersion) -> VersionDiff:
+        return VersionDiff(
+            added=sorted(path for path in new.files if path not in old.files),
+            removed=sorted(path for path in old.files if path not in new.files),
+            modified=sorted(path for path, blob_id in new.files.items() if path in old.files and old.files[path] != blob_id)
+        )
+
+    #-----------------
+    # working trees
+    #-----------------
+    def materialize(
+        self,
+        version: ProjectVersion,
+        dest_dir: str,
+        writable: Iterable[str] = ()
+    ) -> VersionDiff:
+        """
+        make `dest_dir` match `version`, writing only the files that differ; returns the applied changes.
+        The files in `writable` (relative paths) do not share their inode with the blobs.
+        """
+        writable = set(writable)
+        current = self.snapshot(dest_dir) if os.path.isdir(dest_dir) else ProjectVersion(version_id="", files={})
+        diff = self.diff(current, version)
+        for path in diff.removed:
+            remove_file(os.path.join(dest_dir, path))
+        for path in diff.added + diff.modified:
+            self.link_blob(version.files[path], os.path.join(dest_dir, path), writable=path in writable)
+        # unchanged files that are still linked to a blob
+        for path in sorted(writable & (set(version.files) - set(diff.added) - set(diff.modified))):
+            if os.stat(os.path.join(dest_dir, path)).st_nlink > 1:
+                self.link_blob(version.files[path], os.path.join(dest_dir, path), writable=True)
+        os.makedirs(dest_dir, exist_ok=True)
+        return diff
+
+    def clone(
+        self,
+        source_dir: str,
+        dest_dir: str,
+        writable: Iterable[str] = ()
+    ) -> ProjectVersion:
+        """replacement of `copy_dir`: duplicate the project in `source_dir` to `dest_dir`"""
+        assert os.path.isdir(source_dir), f"Source directory '{source_dir}' does not exist."
+        version = self.snapshot(source_dir)
+        self.materialize(version, dest_dir, writable=writable)
+        return version
+
+    def link_blob(
+        self,
+        blob_id: str,
+        path: str,
+        writable: bool = False
+    ) -> None:
+        """link the blob to `path`; a writable file is reflinked or copied instead of hardlinked"""
+        blob_path = self.get_blob_path(blob_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        remove_file(path)
+        if self.link_mode == "hardlink" and not writable:
+            try:
+                os.link(blob_path, path)
+                return
+            except OSError: # e.g., another filesystem or too many links
+                pass
+        if self.link_mode in ["hardlink", "reflink"]:
+            try:
+                with open(blob_path, "rb") as src, open(path, "wb") as dst:
+                    fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+                os.chmod(path, 0o755 if blob_id.endswith(EXECUTABLE_SUFFIX) else 0o644)
+                return
+            except OSError: # the filesystem does not support reflinks
+                remove_file(path)
+        shutil.copyfile(blob_path, path)
+        os.chmod(path, 0o755 if blob_id.endswith(EXECUTABLE_SUFFIX) else 0o644)
+
+    def get_files(
+        self,
+        version: ProjectVersion,
+        work_dir: str,
+        fnames: Optional[List[str]] = None
+    ) -> List[File]:
+        """File objects of a version materialized in `work_dir`; their content is read from the blobs"""
+        return [
+            File(
+                path=f"{work_dir}/{fname}",
+                content=self.read_blob(version.files[fname]).decode("utf-8"),
+                work_dir=work_dir,
+                fname=fname,
+                blob=version.files[fname]
+            )
+            for fname in (fnames if fnames is not None else version.files)
+        ]
@@ -7,4 +7,5 @@ class File(BaseModel):
     path: str # work_dir/fname
     content: str | bytes
     work_dir: Optional[str]
-    fname: Optional[str]
\ No newline at end of file
+    fname: Optional[str]
+    blob: Optional[str] = None # blob id in a ProjectStore, if the file is stored there
@@ -0,0 +1,170 @@
+import types
+import typing
+import functools
+from typing import Any, Type, TypeVar, Callable, Literal, Union
+
+import orjson
+
+from .wrappers import BaseModel
+
+
+Model = TypeVar("Model", bound=BaseModel)
+Format = Literal["json", "msgpack"]
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+#---------------
+# serialization
+#---------------
+def default(obj: Any) -> Any:
+    """orjson hook for the types it does not support natively; pydantic models are serialized from their field values"""
+    if isinstance(obj, BaseModel):
+        return obj.__dict__
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Type is not serializable: {type(obj)}")
+
+def to_primitive(obj: Any) -> Any:
+    """single-pass conversion of (nested) models to dicts/lists/primitives, i.e., `recursive_to_dict` without calling `.dict()`"""
+    if isinstance(obj, (str, int, float, bool)) or obj is None:
+        return obj
+    if isinstance(obj, BaseModel):
+        return {key: to_primitive(value) for key, value in obj.__dict__.items()}
+    if isinstance(obj, dict):
+        return {key: to_primitive(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return [to_primitive(item) for item in obj]
+    return obj # msgpack raises TypeError for the types it does not support
+
+def dumps(
+    obj: Any,
+    indent: bool = False,
+    format: Format = "json"
+) -> bytes:
+    if format == "msgpack":
+        return get_msgpack().packb(to_primitive(obj), use_bin_type=True)
+    option = ORJSON_OPTIONS | (orjson.OPT_INDENT_2 if indent else 0)
+    return orjson.dumps(obj, default=default, option=option)
+
+def loads(data: bytes | str, format: Format = "json") -> Any:
+    if format == "msgpack":
+        return get_msgpack().unpackb(data, raw=False, strict_map_key=False)
+    return orjson.loads(data)
+
+def save(path: str, obj: Any, indent: bool = True, format: Format = "json") -> None:
+    with open(path, "wb") as f:
+        f.write(dumps(obj, indent=indent, format=format))
+
+def load(path: str, format: Format = "json") -> Any:
+    with open(path, "rb") as f:
+        return loads(f.read(), format=format)
+
+def get_msgpack():
+    try:
+        import msgpack
+    except ImportError:
+        raise ImportError("msgpack is required for format='msgpack' (pip install msgpack)")
+    return msgpack
+
+
+#-----------------------------------------------
+# trusted loading (artifacts we wrote ourselves)
+#-----------------------------------------------
+def construct_model(cls: Type[Model], data: dict) -> Model:
+    """
+    Build `cls` from data without validation (like pydantic `construct`), recursing into nested models.
+    Only use it for artifacts written by ChaosHunter; otherwise use `cls.parse_obj`.
+    """
+    return get_constructor(cls)(data)
+
+def identity(value: Any) -> Any:
+    return value
+
+@functools.lru_cache(maxsize=None)
+def get_constructor(tp: Any) -> Callable[[Any], Any]:
+    """a function that converts loaded data into `tp`; built once per type"""
+    if not contains_conversion(tp):
+        return identity
+    if isinstance(tp, type) and issubclass(tp, BaseModel):
+        fields = [(name, field.alias, field, get_constructor(field.outer_type_)) for name, field in tp.__fields__.items()]
+        def construct(value):
+            if not isinstance(value, dict):
+                return value
+            values, fields_set = {}, set()
+            for name, alias, field, constructor in fields:
+                if alias in value:
+                    item = value[alias]
+                    values[name] = constructor(item) if item is not None else None
+                    fields_set.add(name)
+                elif not field.required:
+                    values[name] = field.get_default()
+            model = tp.__new__(tp)
+            object.__setattr__(model, "__dict__", values)
+            object.__setattr__(model, "__fields_set__", fields_set)
+            model._init_private_attributes()
+            return model
+        return construct
+    if tp in (tuple, set, frozenset):
+        return lambda value: tp(value) if isinstance(value, list) else value
+    origin = typing.get_origin(tp)
+    args = typing.get_args(tp)
+    if origin in (list, set, frozenset):
+        item_constructor = get_constructor(args[0])
+        if origin is list:
+            return lambda value: [item_constructor(item) for item in value] if isinstance(value, list) else value
+        return lambda value: origin(item_constructor(item) for item in value) if isinstance(value, list) else value
+    if origin is tuple:
+        constructors = [get_constructor(arg) for arg in args if arg is not Ellipsis]
+        return lambda value: tuple(constructors[min(i, len(constructors)-1)](item) for i, item in enumerate(value)) if isinstance(value, list) else value
+    if origin is dict:
+        value_constructor = get_constructor(args[1])
+        return lambda value: {key: value_constructor(item) for key, item in value.items()} if isinstance(value, dict) else value
+    if origin in (Union, types.UnionType):
+        # like pydantic, the first member that fits the value is used
+        members = [(arg, get_constructor(arg)) for arg in args]
+        def construct_union(value):
+            for arg, constructor in members:
+                if fits(arg, value):
+                    return constructor(value) if value is not None else None
+            return value
+        return construct_union
+    return identity
+
+def contains_conversion(tp: Any) -> bool:
+    """whether loaded data of `tp` needs to be converted (i.e., `tp` contains a model, tuple, or set)"""
+    if isinstance(tp, type):
+        return issubclass(tp, (BaseModel, tuple, set, frozenset))
+    return any(contains_conversion(arg) for arg in typing.get_args(tp) if arg is not Ellipsis)
+
+def fits(tp: Any, value: Any) -> bool:
+    """shallow check whether `value` has the shape of `tp`"""
+    if tp is Any:
+        return True
+    if tp is type(None):
+        return value is None
+    if isinstance(tp, type) and issubclass(tp, BaseModel):
+        return isinstance(value, dict) and all(field.alias in value for field in tp.__fields__.values() if field.required)
+    origin = typing.get_origin(tp)
+    if origin in (list, set, frozenset, tuple):
+        args = typing.get_args(tp)
+        return isinstance(value, list) and (len(value) == 0 or not args or fits(args[0], value[0]))
+    if origin is dict:
+        return isinstance(value, dict)
+    if origin is Literal:
+        return value in typing.get_args(tp)
+    if origin in (Union, types.UnionType):
+        return any(fits(arg, value) for arg in typing.get_args(tp))
+    if tp is float:
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if isinstance(tp, type):
+        return isinstance(value, tp)
+    return True
+
+def load_model(
+    cls: Type[Model],
+    path: str,
+    trusted: bool = True,
+    format: Format = "json"
+) -> Model:
+    data = load(path, format=format)
+    return construct_model(cls, data) if trusted else cls.parse_obj(data)
@@ -1,4 +1,7 @@
-from typing import List, Dict, Any
+import time
+import queue
+from concurrent.futures import Future
+from typing import List, Dict, Any, Callable, Optional
 
 import streamlit as st
 
@@ -157,4 +160,87 @@ class StreamlitContainer:
         return self.get_item_from_id(self.subcontainers, id)
 
     def get_subsubcontainer(self, id: str):
-        return self.get_item_from_id(self.subsubcontainers, id)
\ No newline at end of file
+        return self.get_item_from_id(self.subsubcontainers, id)
+
+class StreamlitUIQueue:
+    """
+    Thread-safe queue of UI updates.
+    Worker threads put updates, and the script thread applies them in order.
+    """
+    def __init__(self):
+        self.queue = queue.Queue()
+
+    def put(self, fn: Callable, *args, **kwargs) -> None:
+        self.queue.put((fn, args, kwargs))
+
+    def drain(self) -> None:
+        while True:
+            try:
+                fn, args, kwargs = self.queue.get_nowait()
+            except queue.Empty:
+                return
+            fn(*args, **kwargs)
+
+    def drain_until_done(
+        self,
+        futures: List[Future],
+        interval: float = 0.1 # sec
+    ) -> None:
+        while not all(future.done() for future in futures):
+            self.drain()
+            time.sleep(interval)
+        self.drain()
+
+    def wrap(self, target: Any) -> "QueuedUIProxy":
+        return QueuedUIProxy(target, self)
+
+    def draining(self, target: Any) -> "DrainingUIProxy":
+        return DrainingUIProxy(target, self)
+
+class QueuedUIProxy:
+    """
+    Proxy of a UI object (e.g., StreamlitContainer) for worker threads.
+    Method calls are put on the queue instead of being applied, so they must not return values.
+    """
+    def __init__(self, target: Any, ui_queue: StreamlitUIQueue):
+        self.target = target
+        self.ui_queue = ui_queue
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self.target, name)
+        if not callable(attr):
+            return attr
+        def put(*args, **kwargs):
+            self.ui_queue.put(attr, *args, **kwargs)
+        return put
+
+class DrainingUIProxy:
+    """
+    Proxy of a UI object (e.g., StreamlitContainer) for the script thread.
+    Pending updates of the worker threads are applied before each method call,
+    so they show up as they arrive instead of only when the script thread waits for the workers.
+    """
+    def __init__(self, target: Any, ui_queue: StreamlitUIQueue):
+        self.target = target
+        self.ui_queue = ui_queue
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self.target, name)
+        if not callable(attr):
+            return attr
+        def call(*args, **kwargs):
+            self.ui_queue.drain()
+            return attr(*args, **kwargs)
+        return call
+
+def run_ui(
+    ui_queue: Optional[StreamlitUIQueue],
+    fn: Callable,
+    *args,
+    **kwargs
+) -> None:
+    """apply a UI update now, or put it on ui_queue when called from a worker thread"""
+    if ui_queue is None:
+        fn(*args, **kwargs)
+    else:
+        ui_queue.put(fn, *args, **kwargs)
@@ -0,0 +1,414 @@
+import re
+import json
+import time
+import uuid
+import random
+import hashlib
+import threading
+from collections import defaultdict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import List, Dict, Tuple, Optional, Iterator
+
+from .wrappers import BaseModel
+
+
+STUB_MODEL_NAME = "chaos-hunter-stub"
+SCHEMA_HEADER = "Here is the output schema:\n```\n"
+ROLE_PREFIXES = {"system": "System", "user": "Human", "assistant": "AI", "tool": "Tool"}
+TOKEN_PATTERN = re.compile(r"\s*\w+|\s*[^\w\s]|\s+")
+WORDS = [
+    "pod", "service", "deployment", "replica", "latency", "request", "error", "traffic",
+    "steady", "state", "fault", "network", "cpu", "memory", "threshold", "check"
+]
+
+
+#-------
+# utils
+#-------
+def get_prompt(messages: List[dict]) -> str:
+    """the prompt string as LangChain passes it to callbacks (`get_buffer_string`), i.e., as recorded in LLMLog"""
+    lines = []
+    for message in messages:
+        content = message.get("content") or ""
+        if isinstance(content, list):
+            content = "".join(part.get("text", "") for part in content if isinstance(part, dict))
+        lines.append(f"{ROLE_PREFIXES.get(message.get('role'), message.get('role'))}: {content}")
+    return "\n".join(lines)
+
+def get_prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+def tokenize(text: str) -> List[str]:
+    """an approximate tokenization (words, punctuation, and whitespace), whose pieces concatenate back to `text`"""
+    return TOKEN_PATTERN.findall(text)
+
+def extract_schema(prompt: str) -> Optional[dict]:
+    """the JSON schema that `build_json_agent` puts into the prompt (the format instructions of JsonOutputParser)"""
+    start = prompt.rfind(SCHEMA_HEADER)
+    if start < 0:
+        return None
+    try:
+        schema, _ = json.JSONDecoder().raw_decode(prompt[start + len(SCHEMA_HEADER):])
+    except json.JSONDecodeError:
+        return None
+    return schema if isinstance(schema, dict) else None
+
+
+#-----------------
+# JSON generation
+#-----------------
+def generate_text(rng: random.Random, num_words: int = 6) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(num_words))
+
+def generate_instance(
+    schema: dict,
+    rng: random.Random,
+    definitions: Dict[str, dict],
+    depth: int = 0
+):
+    """a deterministic instance that is valid for `schema` (the subset that pydantic v1 emits)"""
+    if "$ref" in schema:
+        return generate_instance(definitions[schema["$ref"].split("/")[-1]], rng, definitions, depth)
+    for key in ("allOf", "anyOf", "oneOf"):
+        if key in schema:
+            return generate_instance(schema[key][0], rng, definitions, depth)
+    if "enum" in schema:
+        return rng.choice(schema["enum"])
+    if "const" in schema:
+        return schema["const"]
+    schema_type = schema.get("type", "object" if "properties" in schema else "string")
+    if isinstance(schema_type, list):
+        schema_type = schema_type[0]
+    if schema_type == "object":
+        if depth > 8:
+            return {}
+        properties = schema.get("properties", {})
+        return {name: generate_instance(prop, rng, definitions, depth + 1) for name, prop in properties.items()}
+    if schema_type == "array":
+        if depth > 8:
+            return []
+        num_items = max(schema.get("minItems", 1), 1)
+        items = schema.get("items", {"type": "string"})
+        return [generate_instance(items, rng, definitions, depth + 1) for _ in range(num_items)]
+    if schema_type == "integer":
+        return rng.randint(schema.get("minimum", 1), schema.get("maximum", 10))
+    if schema_type == "number":
+        return round(rng.uniform(schema.get("minimum", 0.), schema.get("maximum", 1.)), 3)
+    if schema_type == "boolean":
+        return rng.random() < 0.5
+    if schema_type == "null":
+        return None
+    return generate_text(rng)
+
+def generate_response(prompt: str, seed: int = 42) -> str:
+    """a deterministic response: a JSON instance of the requested schema, or plain text if the prompt has none"""
+    rng = random.Random(f"{seed}:{get_prompt_hash(prompt)}")
+    schema = extract_schema(prompt)
+    if schema is None:
+        return generate_text(rng, num_words=20)
+    instance = generate_instance(schema, rng, schema.get("definitions", {}))
+    return "```json\n" + json.dumps(instance, indent=2) + "\n```"
+
+
+#------------
+# recordings
+#------------
+class StubRecordings:
+    """recorded responses keyed by prompt hash; a prompt recorded several times replays its responses in turn"""
+    def __init__(self, responses: Optional[Dict[str, List[str]]] = None) -> None:
+        self.responses: Dict[str, List[str]] = defaultdict(list, responses or {})
+        self.counts: Dict[str, int] = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def add(self, prompt: str, response: str) -> None:
+        self.responses[get_prompt_hash(prompt)].append(response)
+
+    def add_message_history(self, message_history: List[List[str] | str]) -> None:
+        """add the (prompts, response) pairs of an LLMLog's (rehydrated) message history"""
+        for prompts, response in zip(message_history, message_history[1:]):
+            if isinstance(prompts, list) and len(prompts) > 0 and isinstance(response, str):
+                self.add(prompts[0], response)
+
+    def update(self, other: "StubRecordings") -> None:
+        for prompt_hash, responses in other.responses.items():
+            self.responses[prompt_hash].extend(responses)
+
+    def get(self, prompt_hash: str) -> Optional[str]:
+        with self.lock:
+            responses = self.responses.get(prompt_hash)
+            if not responses:
+                return None
+            count = self.counts[prompt_hash]
+            self.counts[prompt_hash] += 1
+        return responses[count % len(responses)]
+
+    def __len__(self) -> int:
+        return sum(len(responses) for responses in self.responses.values())
+
+    @classmethod
+    def from_cycle(cls, output_dir: str) -> "StubRecordings":
+        """the LLM calls of a (possibly unfinished) CE cycle in `output_dir`"""
+        from ..chaos_hunter import ChaosHunterOutput
+        recordings = cls()
+        for log in ChaosHunterOutput.load(output_dir).iter_logs():
+            recordings.add_message_history(log.get_message_history())
+        return recordings
+
+    @classmethod
+    def load(cls, path: str) -> "StubRecordings":
+        recordings = cls()
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    recordings.responses[entry["prompt_hash"]].append(entry["response"])
+        return recordings
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as f:
+            for prompt_hash, responses in self.responses.items():
+                for response in responses:
+                    f.write(json.dumps({"prompt_hash": prompt_hash, "response": response}, ensure_ascii=False) + "\n")
+
+
+#--------
+# server
+#--------
+class StubLLMConfig(BaseModel):
+    time_to_first_token: float = 0. # [s]
+    tokens_per_second: float = 0. # 0 means unlimited
+    rate_limit_rate: float = 0. # probability that a request gets a 429
+    error_rate: float = 0. # probability that a request gets a 500
+    retry_after: float = 1. # Retry-After of 429 responses [s]
+    seed: int = 42
+
+class StubLLMStats(BaseModel):
+    requests: int = 0
+    completions: int = 0
+    rate_limited: int = 0
+    errors: int = 0
+    replayed: int = 0
+    generated: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+class StubLLMServer:
+    """
+    A deterministic OpenAI-compatible chat completion server (`/v1/chat/completions`) for load and latency tests.
+    It replays recorded responses by prompt hash, or generates a schema-valid JSON for the prompts of `build_json_agent`.
+    Latency (time to first token and token rate) and 429/500 errors are injected as configured;
+    whether a request fails depends only on the seed, the prompt, and how many times the prompt was sent.
+    Use it with `load_llm(STUB_MODEL_NAME, port=server.port)`.
+    """
+    def __init__(
+        self,
+        config: StubLLMConfig = StubLLMConfig(),
+        recordings: Optional[StubRecordings] = None,
+        host: str = "127.0.0.1",
+        port: int = 8000
+    ) -> None:
+        self.config = config
+        self.recordings = recordings or StubRecordings()
+        self.stats = StubLLMStats()
+        self.attempts: Dict[str, int] = defaultdict(int) # prompt hash -> number of requests
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self.create_handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def port(self) -> int:
+        return self.httpd.server_address[1]
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.httpd.server_address[0]}:{self.port}/v1"
+
+    def start(self) -> "StubLLMServer":
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread is not None:
+            self.thread.join()
+
+    def __enter__(self) -> "StubLLMServer":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def count(self, **increments: int) -> None:
+        with self.lock:
+            for name, value in increments.items():
+                setattr(self.stats, name, getattr(self.stats, name) + value)
+
+    #-----------
+    # responses
+    #-----------
+    def get_fault(self, prompt_hash: str) -> Optional[int]:
+        """the status code of an injected failure (429 or 500), if any"""
+        with self.lock:
+            attempt = self.attempts[prompt_hash]
+            self.attempts[prompt_hash] += 1
+        rng = random.Random(f"{self.config.seed}:{prompt_hash}:{attempt}")
+        if rng.random() < self.config.rate_limit_rate:
+            return 429
+        if rng.random() < self.config.error_rate:
+            return 500
+        return None
+
+    def get_completion(self, prompt: str, prompt_hash: str) -> str:
+        if (response := self.recordings.get(prompt_hash)) is not None:
+            self.count(replayed=1)
+            return response
+        self.count(generated=1)
+        return generate_response(prompt, self.config.seed)
+
+    def iter_tokens(self, tokens: List[str]) -> Iterator[str]:
+        """yield the tokens on schedule (the first after time_to_first_token, then at tokens_per_second)"""
+        start = time.time()
+        for i, token in enumerate(tokens):
+            due = start + self.config.time_to_first_token
+            if self.config.tokens_per_second > 0:
+                due += i / self.config.tokens_per_second
+            if (delay := due - time.time()) > 0:
+                time.sleep(delay)
+            yield token
+
+    def complete(self, request: dict) -> Tuple[int, dict, Optional[Iterator[dict]]]:
+        """(status, body, chunks); chunks is None unless the request is streamed"""
+        self.count(requests=1)
+        prompt = get_prompt(request.get("messages", []))
+        prompt_hash = get_prompt_hash(prompt)
+        if (status := self.get_fault(prompt_hash)) is not None:
+            if status == 429:
+                self.count(rate_limited=1)
+                return status, {"error": {"message": "Rate limit reached (injected by the stub server)", "type": "rate_limit_error", "code": "rate_limit_exceeded"}}, None
+            self.count(errors=1)
+            return status, {"error": {"message": "Internal error (injected by the stub server)", "type": "server_error", "code": None}}, None
+        tokens = tokenize(self.get_completion(prompt, prompt_hash))
+        max_tokens = request.get("max_tokens") or request.get("max_completion_tokens")
+        finish_reason = "stop"
+        if max_tokens is not None and len(tokens) > max_tokens:
+            tokens, finish_reason = tokens[:max_tokens], "length"
+        usage = {"prompt_tokens": len(tokenize(prompt)), "completion_tokens": len(tokens)}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        self.count(completions=1, prompt_tokens=usage["prompt_tokens"], completion_tokens=usage["completion_tokens"])
+        base = {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+            "created": int(time.time()),
+            "model": request.get("model", STUB_MODEL_NAME),
+            "system_fingerprint": "stub"
+        }
+        if not request.get("stream", False):
+            content = "".join(self.iter_tokens(["".join(tokens)] if self.config.tokens_per_second <= 0 else tokens))
+            return 200, {
+                **base,
+                "object": "chat.completion",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": finish_reason, "logprobs": None}],
+                "usage": usage
+            }, None
+        include_usage = (request.get("stream_options") or {}).get("include_usage", False)
+        def iter_chunks() -> Iterator[dict]:
+            chunk = {**base, "object": "chat.completion.chunk"}
+            yield {**chunk, "choices": [{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}]}
+            for token in self.iter_tokens(tokens):
+                yield {**chunk, "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]}
+            yield {**chunk, "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}]}
+            if include_usage:
+                yield {**chunk, "choices": [], "usage": usage}
+        return 200, {}, iter_chunks()
+
+    #---------
+    # handler
+    #---------
+    def create_handler(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+            def send_json(self, status: int, body: dict, headers: Dict[str, str] = {}) -> None:
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self) -> None:
+                if self.path.rstrip("/") == "/v1/models":
+                    self.send_json(200, {"object": "list", "data": [{"id": STUB_MODEL_NAME, "object": "model", "owned_by": "chaos-hunter"}]})
+                elif self.path.rstrip("/") == "/stats":
+                    self.send_json(200, server.stats.dict())
+                else:
+                    self.send_json(404, {"error": {"message": f"Unknown path: {self.path}", "type": "invalid_request_error"}})
+
+            def do_POST(self) -> None:
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if self.path.rstrip("/") != "/v1/chat/completions":
+                    self.send_json(404, {"error": {"message": f"Unknown path: {self.path}", "type": "invalid_request_error"}})
+                    return
+                status, body, chunks = server.complete(request)
+                if chunks is None:
+                    headers = {"Retry-After": f"{server.config.retry_after:g}"} if status == 429 else {}
+                    self.send_json(status, body, headers)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+                try:
+                    for chunk in chunks:
+                        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                        self.wfile.flush()
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError): # the client stopped reading
+                    pass
+
+        return Handler
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", default=8000, type=int, help="Port number of the stub server (use it as the vLLM port)")
+    parser.add_argument("--host", default="127.0.0.1", type=str, help="Host address of the stub server")
+    parser.add_argument("--cycle_dirs", default=[], nargs="*", type=str, help="Output directories of CE cycles whose LLM calls are replayed")
+    parser.add_argument("--recordings", default=None, type=str, help="A JSONL file of recorded responses ({prompt_hash, response})")
+    parser.add_argument("--time_to_first_token", default=0., type=float, help="Time to first token [s]")
+    parser.add_argument("--tokens_per_second", default=0., type=float, help="Token rate (0 means unlimited)")
+    parser.add_argument("--rate_limit_rate", default=0., type=float, help="Probability of 429 responses")
+    parser.add_argument("--error_rate", default=0., type=float, help="Probability of 500 responses")
+    parser.add_argument("--retry_after", default=1., type=float, help="Retry-After of 429 responses [s]")
+    parser.add_argument("--seed", default=42, type=int, help="Seed of the generated responses and injected failures")
+    args = parser.parse_args()
+    recordings = StubRecordings.load(args.recordings) if args.recordings is not None else StubRecordings()
+    for cycle_dir in args.cycle_dirs:
+        recordings.update(StubRecordings.from_cycle(cycle_dir))
+    config = StubLLMConfig(
+        time_to_first_token=args.time_to_first_token,
+        tokens_per_second=args.tokens_per_second,
+        rate_limit_rate=args.rate_limit_rate,
+        error_rate=args.error_rate,
+        retry_after=args.retry_after,
+        seed=args.seed
+    )
+    server = StubLLMServer(config, recordings, host=args.host, port=args.port)
+    print(f"Serving {len(recordings)} recorded responses at {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
@@ -0,0 +1,288 @@
+import os
+import re
+import time
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Iterator
+
+from .wrappers import BaseModel
+from . import serialization
+
+
+TRACE_FNAME = "trace.json"
+SpanCategory = str # phase, llm, command, pod, wait, sleep, file, task, ...
+
+
+class Span(BaseModel):
+    span_id: int
+    parent_id: Optional[int] = None
+    name: str
+    category: SpanCategory
+    start: float # epoch seconds
+    end: Optional[float] = None
+    thread_id: int = 0
+    attributes: Dict[str, Any] = {}
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.time()) - self.start
+
+class SinkRow(BaseModel):
+    category: SpanCategory
+    name: str
+    count: int
+    total_time: float # sum of the durations
+    self_time: float # sum of the durations excluding child spans
+    share: float # self_time / wall time of the trace
+
+class TraceSummary(BaseModel):
+    wall_time: float
+    rows: List[SinkRow]
+
+    def to_str(self) -> str:
+        lines = [
+            f"Top time sinks (wall time: {self.wall_time:.1f}s)",
+            f"{'category':<10} {'name':<40} {'count':>6} {'self[s]':>9} {'total[s]':>9} {'share':>6}"
+        ]
+        for row in self.rows:
+            lines.append(f"{row.category:<10} {row.name[:40]:<40} {row.count:>6} {row.self_time:>9.2f} {row.total_time:>9.2f} {row.share:>6.1%}")
+        return "\n".join(lines)
+
+
+def get_command_name(cmd: str, num_words: int = 2) -> str:
+    """short, aggregatable name of a command (e.g., `kubectl apply -f x.yaml` -> `kubectl apply`)"""
+    words = [word for word in re.split(r"\s+", cmd.strip()) if word not in ("stdbuf", "-oL")]
+    return " ".join(words[:num_words])
+
+
+class Tracer:
+    """
+    Nested wall-clock spans of a CE cycle.
+    Spans nest per thread/context (a span started while another is open becomes its child), and
+    the finished trace can be exported as Chrome trace JSON (chrome://tracing, Perfetto) or to an OTLP collector.
+    Recording is off until `start_trace`, so instrumented functions cost a single check outside of traced cycles.
+    Each CE cycle records into its own tracer, which instrumented code gets with `get_tracer`.
+    """
+    def __init__(self) -> None:
+        self.enabled = False
+        self.spans: List[Span] = []
+        self.lock = threading.Lock()
+        self.next_id = 0
+        self.current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+    def start_trace(self) -> None:
+        with self.lock:
+            self.spans = []
+            self.next_id = 0
+        self.current.set(None)
+        self.enabled = True
+
+    def stop_trace(self) -> None:
+        now = time.time()
+        for span in self.spans:
+            if span.end is None:
+                span.end = now
+        self.enabled = False
+
+    #----------
+    # recording
+    #----------
+    def start_span(
+        self,
+        name: str,
+        category: SpanCategory,
+        parent: Optional[Span] = None,
+        **attributes
+    ) -> Optional[Span]:
+        if not self.enabled:
+            return None
+        parent = parent if parent is not None else self.current.get()
+        with self.lock:
+            span = Span(
+                span_id=self.next_id,
+                parent_id=parent.span_id if parent is not None else None,
+                name=name,
+                category=category,
+                start=time.time(),
+                thread_id=threading.get_ident(),
+                attributes=attributes
+            )
+            self.next_id += 1
+            self.spans.append(span)
+        self.current.set(span)
+        return span
+
+    def end_span(self, span: Optional[Span], **attributes) -> None:
+        if span is None:
+            return
+        span.end = time.time()
+        span.attributes.update(attributes)
+        # hook-based spans (e.g., callbacks) may end in another context than they started, so no context token is used
+        if self.current.get() is span:
+            self.current.set(self.get_span(span.parent_id))
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        category: SpanCategory,
+        **attributes
+    ) -> Iterator[Optional[Span]]:
+        if not self.enabled:
+            yield None
+            return
+        span = self.start_span(name, category, **attributes)
+        try:
+            yield span
+        except BaseException as e:
+            span.attributes["error"] = repr(e)[:200]
+            raise
+        finally:
+            self.end_span(span)
+
+    def add_span(
+        self,
+        name: str,
+        category: SpanCategory,
+        start: float,
+        end: float,
+        parent: Optional[Span] = None,
+        **attributes
+    ) -> Optional[Span]:
+        """record a span observed elsewhere (e.g., an experiment task from its pod's timestamps)"""
+        if not self.enabled:
+            return None
+        parent = parent if parent is not None else self.current.get()
+        with self.lock:
+            span = Span(
+                span_id=self.next_id,
+                parent_id=parent.span_id if parent is not None else None,
+                name=name,
+                category=category,
+                start=start,
+                end=end,
+                thread_id=threading.get_ident(),
+                attributes=attributes
+            )
+            self.next_id += 1
+            self.spans.append(span)
+        return span
+
+    def get_span(self, span_id: Optional[int]) -> Optional[Span]:
+        if span_id is None:
+            return None
+        # span ids are their indices in self.spans
+        return self.spans[span_id] if span_id < len(self.spans) else None
+
+    #-----------
+    # analysis
+    #-----------
+    def summarize(self, top_k: int = 15) -> TraceSummary:
+        """time sinks aggregated by (category, name) and ranked by self time"""
+        spans = [span for span in self.spans if span.end is not None]
+        if len(spans) == 0:
+            return TraceSummary(wall_time=0., rows=[])
+        wall_time = max(span.end for span in spans) - min(span.start for span in spans)
+        child_time: Dict[int, float] = {}
+        for span in spans:
+            if span.parent_id is not None:
+                child_time[span.parent_id] = child_time.get(span.parent_id, 0.) + span.duration
+        groups: Dict[tuple, List[float]] = {}
+        for span in spans:
+            stats = groups.setdefault((span.category, span.name), [0, 0., 0.])
+            stats[0] += 1
+            stats[1] += span.duration
+            # children in other threads can overlap their parent, so self time is clipped at 0
+            stats[2] += max(0., span.duration - child_time.get(span.span_id, 0.))
+        rows = [
+            SinkRow(category=category, name=name, count=count, total_time=total, self_time=self_time, share=self_time / wall_time if wall_time > 0 else 0.)
+            for (category, name), (count, total, self_time) in groups.items()
+        ]
+        rows.sort(key=lambda row: row.self_time, reverse=True)
+        return TraceSummary(wall_time=wall_time, rows=rows[:top_k])
+
+    #---------
+    # export
+    #---------
+    def to_chrome_trace(self) -> dict:
+        """Chrome trace event format (complete events in microseconds)"""
+        if len(self.spans) == 0:
+            return {"traceEvents": []}
+        origin = min(span.start for span in self.spans)
+        pid = os.getpid()
+        events = [
+            {
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": (span.start - origin) * 1e6,
+                "dur": span.duration * 1e6,
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": {"span_id": span.span_id, "parent_id": span.parent_id, **span.attributes}
+            }
+            for span in self.spans
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"origin_epoch": origin}}
+
+    def save_chrome_trace(self, path: str) -> None:
+        serialization.save(path, self.to_chrome_trace(), indent=False)
+
+    def export_otlp(self, endpoint: str, service_name: str = "chaos-hunter") -> None:
+        """send the spans to an OTLP/HTTP collector (requires opentelemetry-sdk and opentelemetry-exporter-otlp-proto-http)"""
+        from opentelemetry import trace as otel_trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=endpoint)))
+        tracer = provider.get_tracer(__name__)
+        otel_spans = {}
+        for span in sorted(self.spans, key=lambda span: span.start): # parents start before their children
+            parent = otel_spans.get(span.parent_id)
+            otel_span = tracer.start_span(
+                span.name,
+                context=otel_trace.set_span_in_context(parent) if parent is not None else None,
+                start_time=int(span.start * 1e9),
+                attributes={
+                    "category": span.category,
+                    **{key: value for key, value in span.attributes.items() if isinstance(value, (str, bool, int, float))}
+                }
+            )
+            otel_spans[span.span_id] = otel_span
+        for span in self.spans:
+            otel_spans[span.span_id].end(end_time=int((span.end if span.end is not None else time.time()) * 1e9))
+        provider.shutdown() # flushes the exporter
+
+#----------------
+# current tracer
+#----------------
+# the tracer of the running CE cycle (worker threads need to run in a copy of the cycle's context)
+CURRENT_TRACER: contextvars.ContextVar[Optional[Tracer]] = contextvars.ContextVar("tracer", default=None)
+DISABLED_TRACER = Tracer() # never started; used outside of cycles
+
+def get_tracer() -> Tracer:
+    tracer = CURRENT_TRACER.get()
+    return tracer if tracer is not None else DISABLED_TRACER
+
+@contextmanager
+def use_tracer(tracer: Tracer) -> Iterator[Tracer]:
+    """record the spans in this context into `tracer`"""
+    token = CURRENT_TRACER.set(tracer)
+    try:
+        yield tracer
+    finally:
+        CURRENT_TRACER.reset(token)
+
+def traced(category: SpanCategory, name: Optional[str] = None):
+    """decorator recording each call of a function as a span"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with get_tracer().span(name or func.__name__, category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
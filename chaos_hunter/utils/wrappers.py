@@ -1,5 +1,6 @@
 from pydantic.v1 import BaseModel as BaseModel
 from pydantic.v1 import Field as Field
+from pydantic.v1 import PrivateAttr as PrivateAttr
 
 from pydantic.v1 import BaseModel as LLMBaseModel
 from pydantic.v1 import Field as LLMField
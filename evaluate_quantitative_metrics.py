@@ -1,18 +1,15 @@
 import os
-import re
-import glob
 
 from chaos_hunter.utils.llms import load_llm
-from chaos_hunter.utils.functions import get_timestamp, load_jsonl, save_jsonl, save_json, load_json, remove_all_resources_in
+from chaos_hunter.utils.functions import get_timestamp, save_json, remove_all_resources_in
 from chaos_hunter.utils.k8s import remove_all_resources_by_labels
-from chaos_hunter.utils.schemas import File
-from chaos_hunter.chaos_hunter import ChaosHunter, ChaosHunterInput, ChaosHunterOutput
+from chaos_hunter.utils.journal import has_journal
+from chaos_hunter.utils.budget import BudgetManager, BudgetConfig, BudgetLimit
+from chaos_hunter.chaos_hunter import ChaosHunter, ChaosHunterOutput
+from chaos_hunter.data_generation.packed_dataset import PackedDataset
 from chaos_hunter.ce_tools.ce_tool import CEToolType, CETool
 
 
-def is_binary(file_content) -> str:
-    return b'\0' in file_content or any(byte > 127 for byte in file_content)
-
 def evaluate(
     dataset_dir: str,
     output_dir: str,
@@ -22,67 +19,17 @@ def evaluate(
     seed: int = 42,
     experiment_time_limit: int = 5,
     resume: bool = True,
-    uses_dataset_cache: bool = False
+    uses_dataset_cache: bool = False,
+    max_resume_attempts: int = 1,
+    sample_budget: BudgetLimit = BudgetLimit(),
+    fallback_model_name: str = None
 ) -> None:
     #----------------
     # load a dataset
     #----------------
-    converted_dataset_path = os.path.join(dataset_dir, "dataset_cache.jsonl")
-    if uses_dataset_cache and os.path.isfile(converted_dataset_path): # load the chache
-        dataset = load_jsonl(converted_dataset_path)
-    else:
-        # find samples
-        pattern = os.path.join(dataset_dir, "sample*")
-        sample_dirs = glob.glob(pattern)
-        sample_dirs = [d for d in sample_dirs if os.path.isdir(d)]
-        sample_dirs.sort()
-        # add samples to a dataset
-        dataset = []
-        project_files = []
-        for sample_dir in sample_dirs:
-            for root, _, files in os.walk(sample_dir):    
-                for entry in files:
-                    fpath = os.path.join(root, entry)
-                    if os.path.isfile(fpath):
-                        with open(fpath, "rb") as f:
-                            file_content = f.read()
-                        if is_binary(file_content):
-                            content = file_content
-                        else:
-                            content = file_content.decode('utf-8')
-                        # add a file
-                        work_dir = f"{dataset_dir}/{fpath.removeprefix(dataset_dir).split('/')[1]}"
-                        fname = fpath.removeprefix(f"{work_dir}/")
-                        if os.path.basename(fpath) == "skaffold.yaml":
-                            skaffold_yaml = File(
-                                path=fpath,
-                                content=content,
-                                work_dir=work_dir,
-                                fname=fname
-                            )
-                        else:
-                            project_files.append(File(
-                                    path=fpath,
-                                    content=content,
-                                    work_dir=work_dir,
-                                    fname=fname
-                            ))
-            match = re.search(r'sample(.+)', os.path.basename(sample_dir))
-            if match:
-                suffix = match.group(1)
-            else:
-                assert False
-
-            dataset.append((
-                suffix,
-                ChaosHunterInput(
-                    skaffold_yaml=skaffold_yaml,
-                    files=project_files,
-                    ce_instructions=f"The Chaos-Engineering experiment must be completed within {experiment_time_limit} minute(s)."
-                ).dict()
-            ))
-        # save the cache
-        save_jsonl(converted_dataset_path, dataset)
+    # the index is built once (or when samples are added/removed); samples are read lazily during the evaluation
+    dataset = PackedDataset.open(dataset_dir, rebuild=not uses_dataset_cache)
+    print(f"Loaded {len(dataset)} samples from {dataset_dir}")
 
     #-------------------------
     # load llm and ChaosHunter 
@@ -99,13 +46,24 @@ def evaluate(
         work_dir="sandbox",
         namespace="chaos-hunter"
     )
+    # a cheaper llm used when a sample is about to run out of its budget
+    fallback_llm = None
+    if fallback_model_name is not None:
+        fallback_llm = load_llm(
+            model_name=fallback_model_name,
+            temperature=temperature,
+            port=port,
+            seed=seed
+        )
 
     #------------
     # evaluation
     #------------
     project_name = "chaos-hunter"
     os.makedirs(output_dir, exist_ok=True)
-    for suffix, data in dataset:
+    ce_instructions = f"The Chaos-Engineering experiment must be completed within {experiment_time_limit} minute(s)."
+    for sample in dataset.index.samples:
+        suffix = sample.suffix
         save_path = f"{output_dir}/result{suffix}.json"
         # skip samples already evaluated
         if resume: 
@@ -114,28 +72,41 @@ def evaluate(
                 continue
         
         print(f"Evaluating sample{suffix} in {dataset_dir}")
-        # clean resources
-        remove_all_resources_in("chaos-hunter")
-        remove_all_resources_by_labels(label_selector=f"project={project_name}")
-        # run ChaosHunter
-        input = ChaosHunterInput(**data)
+        # run ChaosHunter; an interrupted cycle is resumed from its journal
+        input = dataset.load_sample(sample, ce_instructions)
         work_dir = f"{output_dir}/output{suffix}"
-        try:
-            output = chashunter.run_ce_cycle(
-                input=input,
-                work_dir=work_dir,
-                project_name=project_name,
-                is_new_deployment=True
-            )
-            save_json(save_path, output.dict())
-        except Exception as e:
-            print(f"CE cycle failed: {e}")
-            ce_output_path = f"{work_dir}/outputs/output.json"
-            if os.path.exists(ce_output_path):
-                ce_output = ChaosHunterOutput(**load_json(ce_output_path))
-            else:
-                ce_output = ChaosHunterOutput()
-            save_json(save_path, ce_output.dict())
+        resume_from = work_dir if resume and has_journal(f"{work_dir}/outputs") else None
+        # the budget applies to the sample, including its resumed attempts
+        budget = BudgetManager(BudgetConfig(total=sample_budget), fallback_llm=fallback_llm) if sample_budget != BudgetLimit() else None
+        for num_attempts in range(max_resume_attempts + 1):
+            if resume_from is None:
+                # clean resources
+                remove_all_resources_in("chaos-hunter")
+                remove_all_resources_by_labels(label_selector=f"project={project_name}")
+            try:
+                output = chashunter.run_ce_cycle(
+                    input=input,
+                    work_dir=work_dir,
+                    project_name=project_name,
+                    is_new_deployment=True,
+                    resume_from=resume_from,
+                    budget=budget
+                )
+                save_json(save_path, output.embed_messages())
+                break
+            except Exception as e:
+                print(f"CE cycle failed: {e}")
+                if has_journal(f"{work_dir}/outputs") and num_attempts < max_resume_attempts:
+                    print(f"Resuming sample{suffix} from the last completed phase ({num_attempts+1}/{max_resume_attempts})")
+                    resume_from = work_dir
+                    continue
+                # give up and save the partial output
+                ce_output_dir = f"{work_dir}/outputs"
+                if os.path.isdir(ce_output_dir):
+                    ce_output = ChaosHunterOutput.load(ce_output_dir)
+                else:
+                    ce_output = ChaosHunterOutput()
+                save_json(save_path, ce_output.embed_messages())
 
 
 if __name__ == "__main__":
@@ -148,8 +119,13 @@ if __name__ == "__main__":
     parser.add_argument("--seed", default=42, type=int, help="Seed number of the LLM")
     parser.add_argument("--port", default=8000, type=int, help="Port number of the vLLM server")
     parser.add_argument("--experiment_time_limit", default=1, type=int, help="The maximum duration of the Chaos-Engineering experiment")
-    parser.add_argument("--uses_dataset_cache", action="store_true", help="Whether to use the dataset cache")
+    parser.add_argument("--uses_dataset_cache", action="store_true", help="Whether to reuse the packed dataset index instead of rebuilding it")
     parser.add_argument("--restart", action="store_true", help="Evaluate all samaples (including already evaluated ones) from scratch.")
+    parser.add_argument("--max_resume_attempts", default=1, type=int, help="The maximum number of times a failed CE cycle is resumed from its last completed phase")
+    parser.add_argument("--max_tokens_per_sample", default=None, type=int, help="The token budget for each sample (no limit if not given)")
+    parser.add_argument("--max_cost_per_sample", default=None, type=float, help="The budget for each sample in dollars (no limit if not given)")
+    parser.add_argument("--max_time_per_sample", default=None, type=float, help="The wall-time budget for each sample in minutes (no limit if not given)")
+    parser.add_argument("--fallback_model_name", default=None, type=str, help="A cheaper LLM used when a sample is about to run out of its budget")
     args = parser.parse_args()
     evaluate(
         dataset_dir=args.dataset_dir,
@@ -160,5 +136,12 @@ if __name__ == "__main__":
         seed=args.seed,
         experiment_time_limit=args.experiment_time_limit,
         resume=(not args.restart),
-        uses_dataset_cache=args.uses_dataset_cache
+        uses_dataset_cache=args.uses_dataset_cache,
+        max_resume_attempts=args.max_resume_attempts,
+        sample_budget=BudgetLimit(
+            max_tokens=args.max_tokens_per_sample,
+            max_cost=args.max_cost_per_sample,
+            max_time=60 * args.max_time_per_sample if args.max_time_per_sample is not None else None
+        ),
+        fallback_model_name=args.fallback_model_name
     )
\ No newline at end of file
@@ -35,17 +35,18 @@ num_k8s_manifests=2 # (1, 2, 3, 4, 5, 6, 7, 8, 9, 10)
 #--------------------------------------------------------
 # review the ChaosHunter outputs by LLMs (LLM-as-a-judge)
 #--------------------------------------------------------
-for reviewer in "${reviewers[@]}"
+# all the reviewers review all the results concurrently in a single run
+review_dirs=()
+for model in "${models[@]}"
 do
-  for model in "${models[@]}"
+  model_name=$(basename "${model}")
+  model_suffix="_${model_name}"
+  for suffix in "_${data_types[@]}"
   do
-    model_name=$(basename "${model}")
-    model_suffix="_${model_name}"
-    for suffix in "_${data_types[@]}"
-    do
-      python evaluate_quality_by_reviewer.py --result_dir "${result_dir}${model_suffix}${suffix}" \
-                                             --model_name "${reviewer}" \
-                                             --uses_cache
-    done
+    review_dirs+=("${result_dir}${model_suffix}${suffix}")
   done
-done
\ No newline at end of file
+done
+python evaluate_quality_by_reviewer.py --result_dir "${review_dirs[@]}" \
+                                       --model_name "${reviewers[@]}" \
+                                       --max_workers 16 \
+                                       --uses_cache
\ No newline at end of file
@@ -0,0 +1,48 @@
+import pandas as pd
+
+from chaos_hunter.evaluation.results_exporter import collect_tables, concat_tables, save_tables
+from chaos_hunter.evaluation.results_query import summarize
+
+
+def export_evaluation_results(
+    result_dirs: list,
+    output_dir: str,
+    format: str = "csv",
+    model_name: str = None,
+    dataset_name: str = None,
+    by: list = ["model", "dataset"]
+) -> None:
+    #------------------------
+    # flatten and export runs
+    #------------------------
+    tables = concat_tables([collect_tables(result_dir, model_name, dataset_name) for result_dir in result_dirs])
+    for path in save_tables(tables, output_dir, format):
+        print(f"Saved {path}")
+
+    #-----------
+    # summaries
+    #-----------
+    with pd.option_context("display.max_columns", None, "display.width", 200, "display.precision", 3):
+        for name, summary in summarize(tables, by=by).items():
+            print(f"\n##### {name}")
+            print(summary)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--result_dirs", nargs="+", type=str, help="Directories containing evaluation results (outputs and reviews)")
+    parser.add_argument("--output_dir", type=str, help="The directory to save the tables (runs, phases, and reviews)")
+    parser.add_argument("--format", default="csv", type=str, choices=["csv", "parquet", "arrow"], help="Table format (parquet/arrow require pyarrow)")
+    parser.add_argument("--model_name", default=None, type=str, help="Model label of the results (parsed from the run dir names if omitted)")
+    parser.add_argument("--dataset_name", default=None, type=str, help="Dataset label of the results (parsed from the run dir names if omitted)")
+    parser.add_argument("--by", default=["model", "dataset"], nargs="+", type=str, help="Columns to group the summaries by (e.g., model num_manifests)")
+    args = parser.parse_args()
+    export_evaluation_results(
+        result_dirs=args.result_dirs,
+        output_dir=args.output_dir,
+        format=args.format,
+        model_name=args.model_name,
+        dataset_name=args.dataset_name,
+        by=args.by
+    )
@@ -13,7 +13,8 @@ def generate_dataset(
     seed: int = 42,
     num_samples: int = 5,
     num_k8s_manifests_list: List[int] = [1, 2, 3, 4, 5],
-    resume: bool = True
+    resume: bool = True,
+    num_workers: int = 4
 ) -> None:
     #-----------------------------
     # load llm and data generator 
@@ -24,24 +25,18 @@ def generate_dataset(
         port=port,
         seed=seed
     )
-    generator = DataGenerator(llm)
+    generator = DataGenerator(llm, num_workers=num_workers)
 
     #--------------------
     # generate a dataset
     #--------------------
-    # generate a seed dateset
+    # generate a seed dateset; each seed sample is weakened as soon as it is validated
     dataset = generator.generate_dataset(
         num_samples=num_samples,
         num_k8s_manifests_list=num_k8s_manifests_list,
         output_dir=output_dir,
-        resume=resume
-    )
-    weak_dataset = generator.weaken_dataset(
-        num_samples=num_samples,
-        num_k8s_manifests_list=num_k8s_manifests_list,
-        k8s_applications_list=dataset,
-        output_dir=f"{output_dir}_weak",
-        resume=resume
+        resume=resume,
+        weak_output_dir=f"{output_dir}_weak"
     )
 
 
@@ -56,6 +51,7 @@ if __name__ == "__main__":
     parser.add_argument("--num_samples", default=1, type=int, help="Number of samples")
     parser.add_argument("--num_k8s_manifests_list", default=[1, 2, 3, 4, 5], nargs='+', type=int, help="Number of manifests per sample")
     parser.add_argument("--restart", action="store_true", help="Even if samples already exist in the output_dir, overwrite the samples from scratch.")
+    parser.add_argument("--num_workers", default=4, type=int, help="Number of concurrent LLM calls for generating/weakening samples")
     args = parser.parse_args()
     generate_dataset(
         output_dir=args.output_dir,
@@ -65,5 +61,6 @@ if __name__ == "__main__":
         seed=args.seed,
         num_samples=args.num_samples,
         num_k8s_manifests_list=args.num_k8s_manifests_list,
-        resume=(not args.restart)
+        resume=(not args.restart),
+        num_workers=args.num_workers
     )
\ No newline at end of file
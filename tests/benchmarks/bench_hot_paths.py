@@ -0,0 +1,388 @@
+"""
+Micro-benchmarks of the non-LLM hot paths, with stored baselines and regression thresholds.
+
+usage:
+    python -m tests.benchmarks.bench_hot_paths --save          # run all and store the results as the baseline
+    python -m tests.benchmarks.bench_hot_paths                 # compare with the baseline (exit code 1 on regressions)
+    python -m tests.benchmarks.bench_hot_paths -k plan2workflow to_str --repeats 10
+
+A case regresses when its median time exceeds `threshold` x its baseline median.
+Baselines are machine-specific, so store one per machine (see --baseline).
+"""
+import os
+import re
+import sys
+import glob
+import time
+import platform
+import argparse
+import datetime
+import itertools
+import subprocess
+import statistics
+import tempfile
+from typing import Any, Callable, Dict, List, Optional
+
+import yaml
+from langchain_core.messages import AIMessage
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+
+from chaos_hunter.chaos_hunter import ChaosHunterOutput
+from chaos_hunter.preprocessing.preprocessor import PreProcessor, ChaosHunterInput, ProcessedData
+from chaos_hunter.preprocessing.llm_agents.k8s_app_assuption_agent import K8sAppAssumption
+from chaos_hunter.hypothesis.hypothesizer import Hypothesis
+from chaos_hunter.hypothesis.steady_states.steady_state_definer import SteadyState, SteadyStates
+from chaos_hunter.hypothesis.steady_states.llm_agents.utils import Inspection
+from chaos_hunter.hypothesis.faults.llm_agents.fault_refinement_agent import Fault, FaultScenario
+from chaos_hunter.experiment.experimenter import ChaosExperiment, ChaosExperimentResult, Status
+from chaos_hunter.experiment.algorithms.plan2workflow_converter import Plan2WorkflowConverter
+from chaos_hunter.analysis.analyzer import Analysis
+from chaos_hunter.improvement.llm_agents.reconfiguration_agent import ReconfigurationResult
+from chaos_hunter.postprocessing.llm_agents.summary_agent import ChaosCycle
+from chaos_hunter.data_generation.llm_agents.generate_seed_k8s_manifests import K8sApplication
+from chaos_hunter.utils.llms import LLMLog, TokenUsage, build_json_agent
+from chaos_hunter.utils.schemas import File
+from chaos_hunter.utils.wrappers import BaseModel
+from chaos_hunter.utils.serialization import save, load_model
+from chaos_hunter.utils.constants import PROJECT_ROOT, TASK_TEMPLATE_PATH
+from chaos_hunter.utils.functions import (
+    render_jinja_template,
+    parse_time,
+    add_timeunit,
+    recursive_to_dict,
+    save_json,
+    read_file
+)
+from .bench_plan2workflow_converter import generate_plan
+
+
+DEFAULT_THRESHOLD = 1.25
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", f"{platform.node() or 'local'}.json")
+SOCK_SHOP_DIR = os.path.join(PROJECT_ROOT, "examples/sock-shop")
+
+
+class BenchmarkCase(BaseModel):
+    name: str
+    setup: Callable[[str], Callable[[], Any]] # work_dir -> function to be measured
+    threshold: float
+
+class BenchmarkResult(BaseModel):
+    median: float # seconds per call
+    min: float
+    stdev: float
+    number: int # calls per repeat
+    repeats: int
+
+class BenchmarkReport(BaseModel):
+    created_at: str
+    commit: str
+    python: str
+    machine: str
+    results: Dict[str, BenchmarkResult]
+
+BENCHMARKS: Dict[str, BenchmarkCase] = {}
+
+def benchmark(name: str, threshold: float = DEFAULT_THRESHOLD):
+    def register(setup: Callable[[str], Callable[[], Any]]):
+        BENCHMARKS[name] = BenchmarkCase(name=name, setup=setup, threshold=threshold)
+        return setup
+    return register
+
+
+#----------
+# fixtures
+#----------
+def load_sock_shop() -> ChaosHunterInput:
+    skaffold_path = f"{SOCK_SHOP_DIR}/skaffold.yaml"
+    files = [
+        File(path=path, content=read_file(path), work_dir=SOCK_SHOP_DIR, fname=os.path.relpath(path, SOCK_SHOP_DIR))
+        for path in sorted(glob.glob(f"{SOCK_SHOP_DIR}/manifests/*.yaml"))
+    ]
+    return ChaosHunterInput(
+        skaffold_yaml=File(path=skaffold_path, content=read_file(skaffold_path), work_dir=SOCK_SHOP_DIR, fname="skaffold.yaml"),
+        files=files,
+        ce_instructions="The Chaos-Engineering experiment must be completed within 1 minute."
+    )
+
+def make_processed_data() -> ProcessedData:
+    input = load_sock_shop()
+    k8s_yamls = [file for file in input.files if file.fname.endswith(".yaml")]
+    return ProcessedData(
+        work_dir=SOCK_SHOP_DIR,
+        input=input,
+        k8s_yamls=k8s_yamls,
+        k8s_summaries=[f"- {file.fname} defines a resource of the sock shop with its ports, replicas, and probes." * 3 for file in k8s_yamls],
+        k8s_weakness_summary="\n".join(f"- Issue #{i}: a single replica without resource limits." for i in range(10)),
+        k8s_app=K8sAppAssumption(thought="The manifests define microservices of an online shop.", k8s_application="An e-commerce site (sock shop)."),
+        ce_instructions=input.ce_instructions
+    )
+
+def make_hypothesis(num_steady_states: int = 3) -> Hypothesis:
+    script = "import time\nfrom kubernetes import client, config\n" + "\n".join(f"# check {i}\nprint(client.CoreV1Api().list_namespaced_pod('sock-shop'))" for i in range(40))
+    steady_states = SteadyStates(elems=[
+        SteadyState(
+            id=i,
+            name=f"front-end-availability-{i}",
+            description="The front-end responds to 99% of the requests within 200ms.",
+            inspection=Inspection(tool_type="k8s", duration="30s", script=File(path=f"inspection{i}.py", content=script, fname=f"inspection{i}.py"), result="ok " * 200),
+            threshold={"threshold": ">= 99%", "reason": "The front-end should stay available under the fault."},
+            unittest=File(path=f"unittest{i}.py", content=script, fname=f"unittest{i}.py")
+        )
+        for i in range(num_steady_states)
+    ])
+    faults = [[Fault(name="PodChaos", name_id=i, params={"action": "pod-kill", "mode": "one", "selector": {"labelSelectors": {"name": "carts"}}}) for i in range(2)]]
+    return Hypothesis(steady_states=steady_states, fault=FaultScenario(event="Black Friday sale", faults=faults, description="Pods are killed under a traffic surge."))
+
+def make_experiment(work_dir: str, num_tasks: int = 10) -> ChaosExperiment:
+    plan = generate_plan(num_tasks)
+    workflow_name, workflow = Plan2WorkflowConverter().convert(plan, work_dir)
+    plan["time_schedule"] = {"total_time": "15m", "pre_validation_time": "5m", "fault_injection_time": "5m", "post_validation_time": "5m", "thought": "x " * 200}
+    for phase in ["pre_validation", "fault_injection", "post_validation"]:
+        plan[phase]["thought"] = "y " * 300
+    plan["summary"] = "z " * 300
+    return ChaosExperiment(plan=plan, workflow_name=workflow_name, workflow=workflow)
+
+def make_result(num_tests: int = 30, num_failed: int = 5) -> ChaosExperimentResult:
+    logs = "\n".join(f"[{i}] GET /catalogue 200 12ms" for i in range(300))
+    return ChaosExperimentResult(pod_statuses={
+        f"fault-unittest-test{i}-pod": Status(exitcode=1 if i < num_failed else 0, logs=logs)
+        for i in range(num_tests)
+    })
+
+def make_ce_cycle(work_dir: str, num_reconfigs: int = 2) -> ChaosCycle:
+    return ChaosCycle(
+        processed_data=make_processed_data(),
+        hypothesis=make_hypothesis(),
+        experiment=make_experiment(work_dir),
+        result_history=[make_result() for _ in range(num_reconfigs + 1)],
+        analysis_history=[Analysis(report="The carts service has a single replica. " * 50) for _ in range(num_reconfigs)],
+        reconfig_history=[
+            ReconfigurationResult(mod_k8s_yamls={"thought": "t", "modified_k8s_yamls": [{"mod_type": "replace", "fname": "manifests/01-carts-dep.yaml", "explanation": "Add replicas.", "code": "kind: Deployment\n" * 50}]})
+            for _ in range(num_reconfigs)
+        ],
+        conducts_reconfig=True,
+        completes_reconfig=True,
+        summary="summary " * 300
+    )
+
+def make_output(work_dir: str) -> ChaosHunterOutput:
+    ce_cycle = make_ce_cycle(work_dir)
+    prompt = ce_cycle.processed_data.to_str()
+    def make_logs(num_logs: int) -> List[LLMLog]:
+        return [
+            LLMLog(name=f"agent{i}", token_usage=TokenUsage(input_tokens=5000, output_tokens=800, total_tokens=5800), message_history=[[prompt, "response " * 200]])
+            for i in range(num_logs)
+        ]
+    return ChaosHunterOutput(
+        output_dir=f"{work_dir}/outputs",
+        work_dir=work_dir,
+        logs={
+            "preprocess": make_logs(30),
+            "hypothesis": make_logs(10),
+            "experiment_plan": make_logs(5),
+            "analysis": [make_logs(1) for _ in range(2)],
+            "improvement": [make_logs(1) for _ in range(2)],
+            "summary": make_logs(1)
+        },
+        run_time={"preprocess": 10.0, "hypothesis": 20.0, "analysis": [1.0, 2.0], "cycle": 100.0},
+        ce_cycle=ce_cycle,
+        completed_phases=["preprocess", "hypothesis", "experiment_plan"]
+    )
+
+def make_json_response(num_manifests: int = 1) -> str:
+    manifests = [
+        {"id": i, "file_name": f"manifest{i}.yaml", "content": read_file(path)}
+        for i, path in enumerate(sorted(glob.glob(f"{SOCK_SHOP_DIR}/manifests/*.yaml"))[:num_manifests])
+    ]
+    application = K8sApplication(title="Sock shop", description="An online shop that sells socks. " * 10, k8s_manifests=manifests)
+    return f"```json\n{application.json()}\n```"
+
+
+#------------
+# benchmarks
+#------------
+for size, num_tasks in [("small", 5), ("medium", 50), ("large", 200)]:
+    @benchmark(f"plan2workflow.convert[{size}]")
+    def setup_convert(work_dir: str, num_tasks: int = num_tasks):
+        converter, plan = Plan2WorkflowConverter(), generate_plan(num_tasks)
+        return lambda: converter.convert(plan, work_dir)
+
+@benchmark("render_jinja_template[task]")
+def setup_render_jinja_template(work_dir: str):
+    return lambda: render_jinja_template(TASK_TEMPLATE_PATH, task_name="pre-unittest-test0", deadline="5m30s", duration=300, unittest_path="unittest_test0.py")
+
+@benchmark("parse_time+add_timeunit")
+def setup_time_units(work_dir: str):
+    time_strs = [add_timeunit(value) for value in range(0, 100000, 37)]
+    return lambda: [add_timeunit(parse_time(time_str)) for time_str in time_strs]
+
+@benchmark("ProcessedData.to_k8s_overview_str[sock-shop]")
+def setup_k8s_overview_str(work_dir: str):
+    processed_data = make_processed_data()
+    return processed_data.to_k8s_overview_str
+
+@benchmark("ChaosCycle.to_str[sock-shop]")
+def setup_ce_cycle_to_str(work_dir: str):
+    return make_ce_cycle(work_dir).to_str
+
+@benchmark("ChaosExperimentResult.to_str")
+def setup_result_to_str(work_dir: str):
+    return make_result().to_str
+
+@benchmark("recursive_to_dict+save_json[output]")
+def setup_save_output(work_dir: str):
+    output = make_output(work_dir)
+    path = f"{work_dir}/output.json"
+    def save_output():
+        recursive_to_dict(output)
+        save_json(path, output)
+    return save_output
+
+@benchmark("build_json_agent.stream[fake llm]")
+def setup_json_agent_stream(work_dir: str):
+    # the fake LLM streams the response word by word, so this measures the prefill/parse overhead per chunk.
+    # partial-JSON parsing of each chunk grows superlinearly with the response (a 2-manifest response takes ~40x longer),
+    # so a single manifest keeps the suite fast
+    llm = GenericFakeChatModel(messages=itertools.cycle([AIMessage(content=make_json_response())]))
+    agent = build_json_agent(llm=llm, chat_messages=[("system", "{format_instructions}"), ("human", "generate")], pydantic_object=K8sApplication)
+    return lambda: list(agent.stream({}))
+
+@benchmark("PreProcessor.ingest[sock-shop]")
+def setup_preprocessor_ingest(work_dir: str):
+    preprocessor = PreProcessor(GenericFakeChatModel(messages=iter([])))
+    input = load_sock_shop()
+    def ingest():
+        # the file-handling part of PreProcessor.process (no deployment and no LLM calls)
+        raw_yaml_paths = preprocessor.get_raw_yaml_paths(yaml.safe_load(input.skaffold_yaml.content))
+        return preprocessor.process_raw_yaml_paths(input, raw_yaml_paths, f"{work_dir}/inputs")
+    return ingest
+
+
+#-------------------------
+# measurement & baselines
+#-------------------------
+def measure(fn: Callable[[], Any], repeats: int = 5, min_time: float = 0.05) -> BenchmarkResult:
+    """median time per call over `repeats` runs, each calling `fn` enough times to take at least `min_time` seconds"""
+    fn() # warm up caches (e.g., jinja templates)
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if (elapsed := time.perf_counter() - start) >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)))
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - start) / number)
+    return BenchmarkResult(
+        median=statistics.median(times),
+        min=min(times),
+        stdev=statistics.stdev(times) if len(times) > 1 else 0.,
+        number=number,
+        repeats=repeats
+    )
+
+def select_cases(patterns: Optional[List[str]] = None) -> List[BenchmarkCase]:
+    if not patterns:
+        return list(BENCHMARKS.values())
+    return [case for name, case in BENCHMARKS.items() if any(re.search(pattern, name) for pattern in patterns)]
+
+def run_benchmarks(
+    cases: List[BenchmarkCase],
+    repeats: int = 5,
+    min_time: float = 0.05
+) -> Dict[str, BenchmarkResult]:
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for case in cases:
+            results[case.name] = measure(case.setup(work_dir), repeats, min_time)
+    return results
+
+def get_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+def make_report(results: Dict[str, BenchmarkResult]) -> BenchmarkReport:
+    return BenchmarkReport(
+        created_at=datetime.datetime.now().isoformat(timespec="seconds"),
+        commit=get_commit(),
+        python=platform.python_version(),
+        machine=f"{platform.node()} ({platform.machine()}, {platform.system()})",
+        results=results
+    )
+
+def compare(
+    results: Dict[str, BenchmarkResult],
+    baseline: Optional[BenchmarkReport],
+    thresholds: Dict[str, float]
+) -> List[dict]:
+    """rows of (name, median, baseline median, ratio, status); a case regresses when ratio > its threshold"""
+    rows = []
+    for name, result in results.items():
+        base = baseline.results.get(name) if baseline is not None else None
+        ratio = result.median / base.median if base is not None and base.median > 0 else None
+        if ratio is None:
+            status = "new"
+        elif ratio > thresholds[name]:
+            status = "REGRESSION"
+        elif ratio < 1 / thresholds[name]:
+            status = "improved"
+        else:
+            status = "ok"
+        rows.append({"name": name, "median": result.median, "baseline": base.median if base is not None else None, "ratio": ratio, "status": status})
+    return rows
+
+def format_time(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "-"
+    for unit, scale in [("s", 1.), ("ms", 1e-3), ("us", 1e-6)]:
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+def print_rows(rows: List[dict]) -> None:
+    width = max(len(row["name"]) for row in rows)
+    print(f"{'benchmark':<{width}}  {'median':>10}  {'baseline':>10}  {'ratio':>6}  status")
+    for row in rows:
+        ratio = f"{row['ratio']:.2f}" if row["ratio"] is not None else "-"
+        print(f"{row['name']:<{width}}  {format_time(row['median']):>10}  {format_time(row['baseline']):>10}  {ratio:>6}  {row['status']}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-k", "--patterns", nargs="*", default=None, type=str, help="regexes of the benchmark names to run (all if omitted)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, type=str, help="baseline file to compare with (or to save with --save)")
+    parser.add_argument("--save", action="store_true", help="save the results as the baseline (results of other benchmarks in the file are kept)")
+    parser.add_argument("--threshold", default=None, type=float, help="override the regression thresholds (ratio to the baseline median)")
+    parser.add_argument("--repeats", default=5, type=int)
+    parser.add_argument("--min_time", default=0.05, type=float, help="minimum seconds per repeat")
+    parser.add_argument("--list", action="store_true", help="list the benchmarks and exit")
+    args = parser.parse_args()
+
+    cases = select_cases(args.patterns)
+    if args.list:
+        print("\n".join(case.name for case in cases))
+        return
+    assert len(cases) > 0, f"No benchmark matches {args.patterns}"
+    results = run_benchmarks(cases, args.repeats, args.min_time)
+    baseline = load_model(BenchmarkReport, args.baseline) if os.path.isfile(args.baseline) else None
+    thresholds = {case.name: args.threshold or case.threshold for case in cases}
+    rows = compare(results, baseline, thresholds)
+    print_rows(rows)
+    if args.save:
+        report = make_report({**(baseline.results if baseline is not None else {}), **results})
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        save(args.baseline, report)
+        print(f"Saved the baseline to {args.baseline}")
+    elif baseline is None:
+        print(f"No baseline at {args.baseline}; run with --save to create one.")
+    elif any(row["status"] == "REGRESSION" for row in rows):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
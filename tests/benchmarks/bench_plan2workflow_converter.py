@@ -0,0 +1,90 @@
+"""
+Per-plan conversion time of Plan2WorkflowConverter on large synthetic plans.
+
+usage: python -m tests.benchmarks.bench_plan2workflow_converter --num_tasks 200 --num_plans 20
+"""
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+from chaos_hunter.utils.functions import add_timeunit
+from chaos_hunter.experiment.llm_agents.experiment_plan_agent import DEADLINE_MARGIN
+from chaos_hunter.experiment.algorithms.plan2workflow_converter import Plan2WorkflowConverter
+
+
+FAULT_NAMES = ["PodChaos", "NetworkChaos", "StressChaos", "IOChaos"]
+
+def generate_unittests(
+    phase_name: str,
+    num_tasks: int,
+    phase_time: int,
+    rng: random.Random
+) -> list:
+    unit_tests = []
+    for i in range(num_tasks):
+        grace_period = rng.choice([0, 0, 10, 30, 60, 120]) % phase_time
+        duration = rng.randint(1, max(1, phase_time - grace_period))
+        unit_tests.append({
+            "name": f"test{i}",
+            "grace_period": add_timeunit(grace_period),
+            "duration": add_timeunit(duration),
+            "deadline": add_timeunit(duration + DEADLINE_MARGIN),
+            "workflow_name": f"{phase_name.split('_')[0]}-unittest-test{i}",
+            "file_path": f"unittest_test{i}.py" if i % 4 else f"unittest_test{i}.js"
+        })
+    return unit_tests
+
+def generate_faults(num_faults: int, phase_time: int, rng: random.Random) -> list:
+    faults = []
+    for i in range(num_faults):
+        grace_period = rng.choice([0, 30, 60]) % phase_time
+        duration = add_timeunit(rng.randint(1, max(1, phase_time - grace_period)))
+        faults.append({
+            "name": (name := rng.choice(FAULT_NAMES)),
+            "name_id": i,
+            "grace_period": add_timeunit(grace_period),
+            "duration": duration,
+            "deadline": duration,
+            "workflow_name": f"fault-{name.lower()}{i}",
+            "params": {
+                "action": "pod-kill",
+                "mode": "one",
+                "selector": {"namespaces": ["chaos-hunter"], "labelSelectors": {"app": f"app{i}"}}
+            }
+        })
+    return faults
+
+def generate_plan(num_tasks: int, seed: int = 0, phase_time: int = 300) -> dict:
+    rng = random.Random(seed)
+    return {
+        "pre_validation": {"unit_tests": generate_unittests("pre_validation", num_tasks, phase_time, rng)},
+        "fault_injection": {
+            "unit_tests": generate_unittests("fault_injection", num_tasks, phase_time, rng),
+            "fault_injection": generate_faults(max(1, num_tasks // 4), phase_time, rng)
+        },
+        "post_validation": {"unit_tests": generate_unittests("post_validation", num_tasks, phase_time, rng)}
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num_tasks", default=200, type=int, help="number of unit tests per phase")
+    parser.add_argument("--num_plans", default=20, type=int)
+    args = parser.parse_args()
+
+    converter = Plan2WorkflowConverter()
+    plans = [generate_plan(args.num_tasks, seed) for seed in range(args.num_plans)]
+    elapsed = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for plan in plans:
+            start = time.perf_counter()
+            converter.convert(plan, work_dir)
+            elapsed.append(time.perf_counter() - start)
+    print(f"tasks/phase: {args.num_tasks}, plans: {args.num_plans}")
+    print(f"first plan: {elapsed[0]*1e3:.2f} ms")
+    print(f"median per plan: {statistics.median(elapsed)*1e3:.2f} ms")
+    print(f"mean per plan: {statistics.mean(elapsed)*1e3:.2f} ms")
+
+if __name__ == "__main__":
+    main()
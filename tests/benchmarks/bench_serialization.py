@@ -0,0 +1,75 @@
+"""
+Load/save time of run artifacts (output.json of CE cycles): the previous path (json + validation / .dict())
+vs. utils/serialization.py (orjson + trusted construct, and msgpack if installed).
+
+usage: python -m tests.benchmarks.bench_serialization --glob "sandbox/**/outputs/output.json" --repeats 5
+"""
+import os
+import json
+import glob
+import time
+import argparse
+import tempfile
+import statistics
+from typing import Callable, List
+
+from chaos_hunter.chaos_hunter import ChaosHunterOutput
+from chaos_hunter.utils import serialization
+from chaos_hunter.utils.functions import recursive_to_dict
+
+
+def measure(fn: Callable[[], None], repeats: int) -> float:
+    elapsed = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        elapsed.append(time.perf_counter() - start)
+    return statistics.median(elapsed)
+
+def legacy_load(path: str) -> ChaosHunterOutput:
+    with open(path, "r") as f:
+        return ChaosHunterOutput(**json.load(f))
+
+def legacy_save(path: str, output: ChaosHunterOutput) -> None:
+    with open(path, "w") as f:
+        json.dump(recursive_to_dict(output.dict()), f, indent=4)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--glob", default="sandbox/**/outputs/output.json", type=str, help="output.json files to benchmark")
+    parser.add_argument("--repeats", default=5, type=int)
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(args.glob, recursive=True))
+    assert len(paths) > 0, f"No output.json found for '{args.glob}'. Run some CE cycles first or pass --glob."
+    try:
+        serialization.get_msgpack()
+        formats = ["json", "msgpack"]
+    except ImportError:
+        formats = ["json"]
+
+    results: dict[str, List[float]] = {}
+    def add(name: str, value: float) -> None:
+        results.setdefault(name, []).append(value)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for path in paths:
+            output = legacy_load(path)
+            add("load: json + validation", measure(lambda: legacy_load(path), args.repeats))
+            add("load: orjson + validation", measure(lambda: serialization.load_model(ChaosHunterOutput, path, trusted=False), args.repeats))
+            add("load: orjson + construct", measure(lambda: serialization.load_model(ChaosHunterOutput, path), args.repeats))
+            add("save: .dict() + json(indent=4)", measure(lambda: legacy_save(f"{tmp_dir}/legacy.json", output), args.repeats))
+            add("save: orjson(indent=2)", measure(lambda: serialization.save(f"{tmp_dir}/fast.json", output), args.repeats))
+            if "msgpack" in formats:
+                msgpack_path = f"{tmp_dir}/fast.msgpack"
+                add("save: msgpack", measure(lambda: serialization.save(msgpack_path, output, format="msgpack"), args.repeats))
+                add("load: msgpack + construct", measure(lambda: serialization.load_model(ChaosHunterOutput, msgpack_path, format="msgpack"), args.repeats))
+                add("size ratio: msgpack/json", os.path.getsize(msgpack_path) / os.path.getsize(path))
+    print(f"files: {len(paths)}, total size: {sum(os.path.getsize(path) for path in paths) / 1e6:.2f} MB, repeats: {args.repeats}")
+    for name, values in results.items():
+        if name.startswith("size"):
+            print(f"{name:<34} {statistics.mean(values):.2f}")
+        else:
+            print(f"{name:<34} median {statistics.median(values)*1e3:8.2f} ms  total {sum(values)*1e3:9.2f} ms")
+
+if __name__ == "__main__":
+    main()
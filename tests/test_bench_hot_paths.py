@@ -0,0 +1,37 @@
+import tempfile
+
+from tests.benchmarks.bench_hot_paths import (
+    BENCHMARKS,
+    BenchmarkResult,
+    compare,
+    make_report,
+    measure,
+    select_cases
+)
+
+
+def make_result(median: float) -> BenchmarkResult:
+    return BenchmarkResult(median=median, min=median, stdev=0., number=1, repeats=1)
+
+def test_every_case_runs():
+    with tempfile.TemporaryDirectory() as work_dir:
+        for case in BENCHMARKS.values():
+            case.setup(work_dir)()
+
+def test_select_cases():
+    names = [case.name for case in select_cases(["plan2workflow"])]
+    assert names == ["plan2workflow.convert[small]", "plan2workflow.convert[medium]", "plan2workflow.convert[large]"]
+    assert len(select_cases()) == len(BENCHMARKS)
+
+def test_measure_calibrates_number_of_calls():
+    result = measure(lambda: None, repeats=3, min_time=0.001)
+    assert result.number > 1 and result.repeats == 3
+    assert result.min <= result.median
+
+def test_compare_with_thresholds():
+    baseline = make_report({"a": make_result(1.0), "b": make_result(1.0), "c": make_result(1.0)})
+    results = {"a": make_result(1.2), "b": make_result(1.4), "c": make_result(0.5), "d": make_result(1.0)}
+    rows = compare(results, baseline, {"a": 1.25, "b": 1.25, "c": 1.25, "d": 1.25})
+    assert [row["status"] for row in rows] == ["ok", "REGRESSION", "improved", "new"]
+    assert rows[1]["ratio"] == 1.4
+    assert all(row["status"] == "new" for row in compare(results, None, {name: 1.25 for name in results}))
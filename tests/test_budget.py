@@ -0,0 +1,86 @@
+import threading
+import time
+
+import pytest
+
+from chaos_hunter.utils.llms import load_llm, build_json_agent, LoggingCallback, use_usage_tracker, get_usage_tracker
+from chaos_hunter.utils.budget import BudgetManager, BudgetConfig, BudgetLimit, BudgetUsage, BudgetExceeded
+from chaos_hunter.utils.stub_llm_server import StubLLMServer, STUB_MODEL_NAME
+from tests.test_stub_llm_server import Thresholds
+
+
+def test_cost_and_exceeded_budgets():
+    budget = BudgetManager(BudgetConfig(cycle=BudgetLimit(max_cost=1.)))
+    budget.start_cycle()
+    budget.add_usage("openai/gpt-4o-2024-08-06", 100_000, 10_000) # $0.25 + $0.10
+    assert budget.cycle.tokens == 110_000 and budget.cycle.cost == pytest.approx(0.35)
+    budget.check()
+    assert not budget.degrades()
+    budget.add_usage("openai/gpt-4o-2024-08-06", 200_000, 0) # $0.85 in total
+    assert budget.degrades()
+    budget.add_usage("local/unknown-model", 1_000_000, 0) # unknown models cost nothing
+    assert budget.cycle.cost == pytest.approx(0.85)
+    budget.add_usage("openai/gpt-4o-2024-08-06", 100_000, 0)
+    with pytest.raises(BudgetExceeded, match="CYCLE_BUDGET_EXCEEDED: cost"):
+        budget.check()
+    # the total budget spans cycles, while a resumed cycle starts from its recorded usage
+    budget.end_cycle()
+    budget.start_cycle(BudgetUsage(input_tokens=10))
+    assert budget.cycle.tokens == 10 and budget.total.tokens == 1_410_000
+    budget.check()
+
+def test_phase_budgets():
+    budget = BudgetManager(BudgetConfig(phases={"improvement": BudgetLimit(max_tokens=100, max_time=0.05)}))
+    budget.start_cycle()
+    budget.on_improvement_start()
+    budget.add_usage("openai/gpt-4o-2024-08-06", 50, 0)
+    budget.on_improvement_end({})
+    budget.on_analysis_start()
+    budget.add_usage("openai/gpt-4o-2024-08-06", 1_000, 0) # other phases are not limited
+    budget.on_analysis_end({})
+    budget.on_improvement_start() # the second loop
+    time.sleep(0.06)
+    with pytest.raises(BudgetExceeded, match="IMPROVEMENT_BUDGET_EXCEEDED: time"):
+        budget.check()
+    budget.add_usage("openai/gpt-4o-2024-08-06", 50, 0)
+    assert budget.phases["improvement"].tokens == 100 and budget.phases["analysis"].tokens == 1_000
+    budget.end_cycle()
+    assert budget.phase is None and budget.get_cycle_usage().time >= 0.06
+
+def test_llm_calls_stop_over_budget():
+    with StubLLMServer(port=0) as server:
+        llm = load_llm(STUB_MODEL_NAME, port=server.port)
+        agent = build_json_agent(llm, [("system", "Answer in JSON. {format_instructions}"), ("human", "{input}")], Thresholds)
+        budget = BudgetManager(BudgetConfig(cycle=BudgetLimit(max_tokens=10)))
+        budget.start_cycle()
+        with use_usage_tracker(budget):
+            for _ in agent.stream({"input": "hello"}, {"callbacks": [LoggingCallback("test", llm)]}):
+                pass
+            assert budget.cycle.input_tokens > 10 and budget.cycle.output_tokens > 0
+            with pytest.raises(BudgetExceeded):
+                for _ in agent.stream({"input": "hello"}, {"callbacks": [LoggingCallback("test", llm)]}):
+                    pass
+    assert get_usage_tracker() is None and server.stats.generated == 1
+
+def test_cycles_sharing_an_llm_track_their_own_usages():
+    with StubLLMServer(port=0) as server:
+        llm = load_llm(STUB_MODEL_NAME, port=server.port)
+        agent = build_json_agent(llm, [("system", "Answer in JSON. {format_instructions}"), ("human", "{input}")], Thresholds)
+        budgets = [BudgetManager(), BudgetManager()]
+        def run_cycle(budget: BudgetManager, num_calls: int) -> None:
+            budget.start_cycle()
+            with use_usage_tracker(budget):
+                for _ in range(num_calls):
+                    for _ in agent.stream({"input": "hello"}, {"callbacks": [LoggingCallback("test", llm)]}):
+                        pass
+        threads = [threading.Thread(target=run_cycle, args=(budget, i + 1)) for i, budget in enumerate(budgets)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # the end of the first cycle does not detach the second one
+        assert budgets[1].cycle.input_tokens == 2 * budgets[0].cycle.input_tokens > 0
+    # a tracker passed explicitly is used outside of cycles too
+    budget = BudgetManager()
+    assert LoggingCallback("test", llm, usage_tracker=budget).usage_tracker is budget
+    assert LoggingCallback("test", llm).usage_tracker is None
@@ -0,0 +1,113 @@
+import os
+import threading
+
+from chaos_hunter.data_generation.fingerprints import FingerprintIndex, normalize_manifest
+from chaos_hunter.data_generation.data_generator import DataGenerator, find_sample_dirs
+from chaos_hunter.data_generation.manifest_validator import ManifestValidator
+from chaos_hunter.data_generation.llm_agents.generate_seed_k8s_manifests import K8sApplication, K8sManifest
+from chaos_hunter.data_generation.llm_agents.weaken_seed_k8s_manifests import WeakK8sApplication, WeakK8sManifest
+
+
+POD_YAML = """\
+apiVersion: v1
+kind: Pod
+metadata:
+  name: {name}
+spec:
+  containers:
+  - name: app
+    image: {image}
+"""
+
+def make_app(title: str, description: str, image: str, name: str = "app") -> K8sApplication:
+    return K8sApplication(
+        title=title,
+        description=description,
+        k8s_manifests=[K8sManifest(id=0, file_name="pod.yaml", content=POD_YAML.format(name=name, image=image))]
+    )
+
+def test_normalize_manifest_ignores_format_and_metadata():
+    renamed = "# comment\nspec: {containers: [{image: nginx, name: app}]}\nkind: Pod\napiVersion: v1\nmetadata: {name: other}\n"
+    assert normalize_manifest(POD_YAML.format(name="app", image="nginx")) == normalize_manifest(renamed)
+    assert normalize_manifest(POD_YAML.format(name="app", image="redis")) != normalize_manifest(renamed)
+
+def test_fingerprint_index_finds_duplicates():
+    index = FingerprintIndex()
+    index.add(index.fingerprint(make_app("Nginx web server", "A simple nginx web server serving static pages to users", "nginx")))
+    # same manifests with another name
+    assert index.find_duplicate(index.fingerprint(make_app("Other", "Something completely different here", "nginx", name="web"))) is not None
+    # near-identical description
+    assert index.find_duplicate(index.fingerprint(make_app("Nginx web server", "A simple nginx web server serving static pages to the users", "nginx:1.25"))) is not None
+    # a different application
+    assert index.find_duplicate(index.fingerprint(make_app("Redis cache", "An in-memory key-value store for caching sessions", "redis"))) is None
+
+
+class FakeGenerationAgent:
+    """returns a duplicate every third call"""
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.num_calls = 0
+        self.prompted_titles = []
+
+    def generate_k8s_manifests(self, num_k8s_manifests, generation_history=[], generated_titles=None):
+        with self.lock:
+            self.num_calls += 1
+            i = self.num_calls
+            self.prompted_titles.append(generated_titles)
+        if i % 3 == 0:
+            return make_app("Service 1", "Service number 1 of the test dataset", "image1")
+        return make_app(f"Service {i}", f"Service number {i} of the test dataset", f"image{i}")
+
+class FakeVulnerabilityAgent:
+    def weaken_k8s_manifests(self, k8s_application):
+        return WeakK8sApplication(
+            title=k8s_application.title,
+            description=f"weak {k8s_application.description}",
+            k8s_manifests=[WeakK8sManifest(**m.dict()) for m in k8s_application.k8s_manifests]
+        )
+
+def make_generator() -> DataGenerator:
+    generator = DataGenerator.__new__(DataGenerator)
+    generator.data_generation_agent = FakeGenerationAgent()
+    generator.data_vul_agent = FakeVulnerabilityAgent()
+    generator.num_workers = 3
+    generator.similarity_threshold = 0.5
+    generator.max_prompt_titles = 50
+    generator.validator = ManifestValidator()
+    return generator
+
+def test_generate_dataset_concurrently_and_weaken(tmp_path):
+    output_dir, weak_output_dir = f"{tmp_path}/dataset", f"{tmp_path}/dataset_weak"
+    generator = make_generator()
+    dataset = generator.generate_dataset(
+        num_samples=4,
+        num_k8s_manifests_list=[1],
+        output_dir=output_dir,
+        weak_output_dir=weak_output_dir
+    )
+    titles = [app.title for app in dataset[0]]
+    assert len(titles) == 4 and len(set(titles)) == 4
+    # only titles are prompted
+    assert all(prompted is None or isinstance(prompted, list) for prompted in generator.data_generation_agent.prompted_titles)
+    sample_dirs = find_sample_dirs(output_dir, "sample_1manifests_id")
+    weak_sample_dirs = find_sample_dirs(weak_output_dir, "sample_1manifests_id")
+    assert [os.path.basename(d) for d in sample_dirs] == [os.path.basename(d) for d in weak_sample_dirs]
+
+    # resume: existing samples are loaded into the index, and no LLM call is needed
+    generator = make_generator()
+    dataset = generator.generate_dataset(
+        num_samples=4,
+        num_k8s_manifests_list=[1],
+        output_dir=output_dir,
+        weak_output_dir=weak_output_dir
+    )
+    assert [app.title for app in dataset[0]] == titles
+    assert generator.data_generation_agent.num_calls == 0
+
+def test_find_sample_dirs_ignores_other_entries(tmp_path):
+    for name in ["sample_1manifests_id10", "sample_1manifests_id2", "sample_1manifests_id2.bak", "sample_1manifests_id_tmp", "sample_1manifests_id3"]:
+        os.makedirs(f"{tmp_path}/{name}")
+    with open(f"{tmp_path}/sample_1manifests_id4", "w") as f:
+        f.write("not a dir")
+    sample_dirs = find_sample_dirs(str(tmp_path), "sample_1manifests_id")
+    assert [os.path.basename(d) for d in sample_dirs] == ["sample_1manifests_id2", "sample_1manifests_id3", "sample_1manifests_id10"]
@@ -0,0 +1,97 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from chaos_hunter.evaluation.results_exporter import collect_tables, save_tables, load_tables, find_runs
+from chaos_hunter.evaluation.results_query import bootstrap_ci, summarize_runs, summarize_phases, summarize_scores, score_distribution, summarize
+from chaos_hunter.utils.serialization import save
+
+
+def make_log(input_tokens: int, output_tokens: int) -> dict:
+    return {"name": "agent", "token_usage": {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}, "message_history": []}
+
+def make_output(completes: bool, num_manifests: int) -> dict:
+    output = {
+        "run_time": {"preprocess": 10., "hypothesis": 20., "experiment_plan": 5., "experiment_execution": [60., 60.], "analysis": [3.], "improvement": [4.]},
+        "logs": {"preprocess": [make_log(1000, 100)], "hypothesis": [make_log(2000, 200)], "analysis": [[make_log(500, 50)]], "improvement": [[make_log(500, 50), make_log(100, 10)]]},
+        "ce_cycle": {
+            "processed_data": {"k8s_yamls": [{}] * num_manifests},
+            "hypothesis": {},
+            "result_history": [{}, {}],
+            "reconfig_history": [{}],
+            "conducts_reconfig": True,
+            "completes_reconfig": completes,
+            "summary": "done" if completes else ""
+        }
+    }
+    if completes:
+        output["run_time"]["cycle"] = 200.
+    return output
+
+def make_results(root: str) -> None:
+    for i, (completes, num_manifests) in enumerate([(True, 1), (True, 2), (False, 2)]):
+        run_dir = f"{root}/gpt-4o-2024-08-06-nginx-{i}"
+        os.makedirs(f"{run_dir}/outputs")
+        save(f"{run_dir}/outputs/output.json", make_output(completes, num_manifests))
+        if completes:
+            os.makedirs(f"{run_dir}/reviews")
+            for j, score in enumerate([4, 5]):
+                save(f"{run_dir}/reviews/gpt-4o-2024-08-06_review{j}.json", {aspect: {"score": score} for aspect in ["overall", "hypothesis", "experiment", "analysis", "improvement"]})
+    # layout of evaluate_quantitative_metrics.py
+    os.makedirs(f"{root}/eval/output1/outputs")
+    save(f"{root}/eval/result1.json", make_output(True, 3))
+    save(f"{root}/eval/output1/outputs/output.json", make_output(False, 3))
+
+def test_collect_tables(tmp_path):
+    make_results(str(tmp_path))
+    assert [run_id for run_id, _ in find_runs(str(tmp_path))] == ["eval/output1", "gpt-4o-2024-08-06-nginx-0", "gpt-4o-2024-08-06-nginx-1", "gpt-4o-2024-08-06-nginx-2"]
+    tables = collect_tables(str(tmp_path))
+    runs = tables["runs"].set_index("run_id")
+    assert runs.loc["eval/output1", "completes_cycle"] # result1.json is preferred
+    assert runs.loc["gpt-4o-2024-08-06-nginx-0", "model"] == "gpt-4o-2024-08-06"
+    assert runs.loc["gpt-4o-2024-08-06-nginx-0", "dataset"] == "nginx"
+    assert runs.loc["gpt-4o-2024-08-06-nginx-0", "input_tokens"] == 4100
+    assert np.isclose(runs.loc["gpt-4o-2024-08-06-nginx-0", "cost"], 4100 * 2.5e-6 + 410 * 1e-5)
+    phases = tables["phases"]
+    assert phases[(phases.run_id == "gpt-4o-2024-08-06-nginx-0") & (phases.phase == "experiment_execution")].run_time.item() == 120.
+    assert len(tables["reviews"]) == 2 * 2 * 5
+
+def test_save_and_load_tables(tmp_path):
+    make_results(f"{tmp_path}/results")
+    tables = collect_tables(f"{tmp_path}/results")
+    save_tables(tables, f"{tmp_path}/tables", format="csv")
+    loaded = load_tables(f"{tmp_path}/tables")
+    pd.testing.assert_frame_equal(loaded["phases"], tables["phases"], check_dtype=False)
+
+def test_parquet_without_pyarrow(tmp_path, monkeypatch):
+    make_results(f"{tmp_path}/results")
+    tables = collect_tables(f"{tmp_path}/results")
+    monkeypatch.setitem(sys.modules, "pyarrow", None) # e.g., a wheel built against another numpy
+    with pytest.raises(ImportError, match="format='csv'"):
+        save_tables(tables, f"{tmp_path}/tables", format="parquet")
+    assert not os.path.exists(f"{tmp_path}/tables")
+    # csv is the default
+    assert all(path.endswith(".csv") for path in save_tables(tables, f"{tmp_path}/tables"))
+
+def test_summaries(tmp_path):
+    make_results(str(tmp_path))
+    tables = collect_tables(str(tmp_path), model="gpt-4o-2024-08-06", dataset="nginx")
+    runs = summarize_runs(tables["runs"])
+    assert runs.loc[("gpt-4o-2024-08-06", "nginx"), "success_rate"] == 0.75
+    assert runs.loc[("gpt-4o-2024-08-06", "nginx"), "success_rate_ci_low"] <= 0.75 <= runs.loc[("gpt-4o-2024-08-06", "nginx"), "success_rate_ci_high"]
+    phases = summarize_phases(tables["phases"])
+    assert phases.loc[("gpt-4o-2024-08-06", "experiment"), "mean_time"] == 125.
+    scores = summarize_scores(tables["reviews"], by=["model", "aspect"])
+    assert scores.loc[("gpt-4o-2024-08-06", "overall"), "mean_score"] == 4.5
+    assert score_distribution(tables["reviews"]).loc[("gpt-4o-2024-08-06", "overall"), 5.] == 0.5
+    by_manifests = summarize(tables, by=["model", "num_manifests"])
+    assert by_manifests["runs"].loc[("gpt-4o-2024-08-06", 2), "success_rate"] == 0.5
+    assert ("gpt-4o-2024-08-06", 1, "overall") in by_manifests["scores"].index
+
+def test_bootstrap_ci():
+    low, high = bootstrap_ci(np.array([1., 2., 3., 4., 5.] * 20))
+    assert low < 3. < high and high - low < 1.
+    assert np.isnan(bootstrap_ci(np.array([]))[0])
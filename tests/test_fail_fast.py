@@ -0,0 +1,164 @@
+import tempfile
+
+import pytest
+
+from chaos_hunter.backends.backend import set_backend
+from chaos_hunter.backends.fake_cluster import FakeClusterBackend, FakeClusterConfig, FakePodBehavior
+from chaos_hunter.experiment.experimenter import (
+    Experimenter,
+    ChaosExperiment,
+    FailFastPolicy,
+    WorkflowPodMonitor,
+    Status
+)
+from chaos_hunter.experiment.algorithms.plan2workflow_converter import Plan2WorkflowConverter
+from chaos_hunter.utils.schemas import File
+from chaos_hunter.utils.llms import use_usage_tracker
+from chaos_hunter.utils.budget import BudgetManager, BudgetConfig, BudgetLimit, BudgetExceeded
+from tests.benchmarks.bench_plan2workflow_converter import generate_plan
+
+
+WORKFLOW = """\
+spec:
+  templates:
+    - name: pre-unittest-a
+    - name: pre-unittest-a-2
+    - name: fault-podchaos
+"""
+
+class PodListBackend:
+    def __init__(self) -> None:
+        self.pods = []
+
+    def get(self, kind, kube_context, namespace=None, selector=None, **kwargs):
+        return {"items": self.pods}
+
+class StatusExperimenter:
+    def get_pod_status(self, pod_name, kube_context, namespace) -> Status:
+        return Status(exitcode=1 if pod_name.startswith("pre-unittest-a-2-") else 0, logs=f"logs of {pod_name}")
+
+def make_pod(name: str, phase: str, terminated: bool = False) -> dict:
+    state = {"terminated": {"exitCode": 0}} if terminated else {"running": {}}
+    return {"metadata": {"name": name}, "status": {"phase": phase, "containerStatuses": [{"state": state}]}}
+
+def test_abort_decision():
+    policy = FailFastPolicy(task_prefixes=["pre-unittest-"], max_failures=2)
+    statuses = {
+        "pre-unittest-a": Status(exitcode=1, logs=""),
+        "fault-unittest-b": Status(exitcode=1, logs=""), # not covered by the policy
+        "pre-unittest-c": Status(exitcode=0, logs="")
+    }
+    assert policy.get_abort_reason(statuses) is None
+    statuses["pre-unittest-d"] = Status(exitcode=2, logs="")
+    assert policy.get_abort_reason(statuses) == "fail-fast: pre-unittest-a, pre-unittest-d failed"
+
+def test_pod_monitor_state_transitions():
+    backend = PodListBackend()
+    previous = set_backend(backend)
+    try:
+        experiment = ChaosExperiment(plan={}, workflow_name="wf", workflow=File(path="workflow.yaml", content=WORKFLOW))
+        monitor = WorkflowPodMonitor(StatusExperimenter(), experiment, "fake", "chaos-hunter")
+        assert monitor.task_names == ["pre-unittest-a", "pre-unittest-a-2"]
+        backend.pods = [make_pod("pre-unittest-a-2-x1", "Pending")]
+        assert [(event.task_name, event.event_type) for event in monitor.poll()] == [("pre-unittest-a-2", "started")]
+        backend.pods = [make_pod("pre-unittest-a-2-x1", "Running"), make_pod("pre-unittest-a-x2", "Running")]
+        assert [(event.task_name, event.event_type) for event in monitor.poll()] == [("pre-unittest-a-2", "running"), ("pre-unittest-a", "started"), ("pre-unittest-a", "running")]
+        assert monitor.poll() == [] # no change
+        backend.pods = [make_pod("pre-unittest-a-2-x1", "Failed", terminated=True), make_pod("pre-unittest-a-x2", "Running")]
+        events = monitor.poll()
+        assert [(event.task_name, event.event_type, event.exitcode) for event in events] == [("pre-unittest-a-2", "terminated", 1)]
+        assert events[0].log_tail == "logs of pre-unittest-a-2-x1"
+        assert monitor.poll() == [] # terminated tasks are not reported again
+        assert monitor.missing_tasks == ["pre-unittest-a"]
+        assert "```pre-unittest-a-2```: failed" in monitor.to_status_str() and "```pre-unittest-a```: running" in monitor.to_status_str()
+    finally:
+        set_backend(previous)
+
+def test_experiment_aborts_on_pre_validation_failure():
+    plan = generate_plan(2, phase_time=60)
+    backend = FakeClusterBackend(FakeClusterConfig(speedup=500., pod_behaviors=[FakePodBehavior(pattern="pre-unittest-test0-*", exitcode=1)]))
+    previous = set_backend(backend)
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            workflow_name, workflow = Plan2WorkflowConverter().convert(plan, work_dir)
+            experimenter = Experimenter.__new__(Experimenter)
+            experimenter.namespace = "chaos-hunter"
+            result = experimenter.run(
+                ChaosExperiment(plan=plan, workflow_name=workflow_name, workflow=workflow),
+                kube_context="fake",
+                check_interval=0.05,
+                fail_fast=FailFastPolicy()
+            )
+        assert result.abort_reason == "fail-fast: pre-unittest-test0 failed"
+        assert not result.all_tests_passed
+        later_tasks = [unit_test["workflow_name"] for phase_name in ["fault_injection", "post_validation"] for unit_test in plan[phase_name]["unit_tests"]]
+        assert set(later_tasks) <= set(result.skipped_tasks) and "pre-unittest-test0" not in result.skipped_tasks
+        assert backend.get("workflow", "fake", "chaos-hunter")["items"] == []
+    finally:
+        set_backend(previous)
+
+class WorkflowNodeBackend(PodListBackend):
+    """a cluster where the workflow either never starts or never ends"""
+    def __init__(self, entry_node: dict = None) -> None:
+        super().__init__()
+        self.entry_node = entry_node
+        self.deleted = []
+
+    def get(self, kind, kube_context, namespace=None, selector=None, **kwargs):
+        if kind == "workflownode":
+            return {"items": [self.entry_node] if self.entry_node is not None else []}
+        return super().get(kind, kube_context, namespace, selector, **kwargs)
+
+    def apply(self, *args, **kwargs):
+        pass
+
+    def annotate(self, *args, **kwargs):
+        pass
+
+    def delete(self, kube_context, namespace, **kwargs):
+        self.deleted.append(kwargs)
+
+def run_stuck_workflow(backend: WorkflowNodeBackend, deadline: str) -> None:
+    workflow = File(path="workflow.yaml", content=f"spec:\n  templates:\n    - name: the-entry\n      deadline: {deadline}\n")
+    experimenter = Experimenter.__new__(Experimenter)
+    experimenter.namespace = "chaos-hunter"
+    experimenter.run(
+        ChaosExperiment(plan={}, workflow_name="wf", workflow=workflow),
+        kube_context="fake",
+        check_interval=0.05,
+        wait_margin=0.2
+    )
+
+def test_wait_fails_if_the_workflow_never_starts():
+    backend = WorkflowNodeBackend()
+    previous = set_backend(backend)
+    try:
+        with pytest.raises(TimeoutError, match="WORKFLOW_NOT_STARTED"):
+            run_stuck_workflow(backend, deadline="1h")
+        assert {"path": "workflow.yaml"} in backend.deleted # the workflow is aborted
+    finally:
+        set_backend(previous)
+
+def test_wait_fails_after_the_workflow_deadline():
+    entry_node = {"metadata": {"name": "the-entry-x1"}, "status": {"conditions": [{"type": "Accomplished", "status": "False"}]}}
+    backend = WorkflowNodeBackend(entry_node)
+    previous = set_backend(backend)
+    try:
+        with pytest.raises(TimeoutError, match="WORKFLOW_TIMEOUT"):
+            run_stuck_workflow(backend, deadline="1s")
+    finally:
+        set_backend(previous)
+
+def test_wait_stops_when_the_budget_is_exceeded():
+    entry_node = {"metadata": {"name": "the-entry-x1"}, "status": {"conditions": [{"type": "Accomplished", "status": "False"}]}}
+    backend = WorkflowNodeBackend(entry_node)
+    previous = set_backend(backend)
+    budget = BudgetManager(BudgetConfig(cycle=BudgetLimit(max_time=0.1)))
+    budget.start_cycle()
+    try:
+        with use_usage_tracker(budget):
+            with pytest.raises(BudgetExceeded, match="CYCLE_BUDGET_EXCEEDED: time"):
+                run_stuck_workflow(backend, deadline="1h")
+        assert {"path": "workflow.yaml"} in backend.deleted # the workflow is aborted
+    finally:
+        set_backend(previous)
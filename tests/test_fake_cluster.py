@@ -0,0 +1,152 @@
+import tempfile
+
+from chaos_hunter.backends.backend import get_backend, set_backend
+from chaos_hunter.backends.fake_cluster import FakeClusterBackend, FakeClusterConfig, FakePodBehavior
+from chaos_hunter.experiment.experimenter import Experimenter, ChaosExperiment
+from chaos_hunter.hypothesis.steady_states.llm_agents.utils import Inspection, run_pod
+from chaos_hunter.experiment.algorithms.plan2workflow_converter import Plan2WorkflowConverter
+from chaos_hunter.utils.functions import write_file
+from chaos_hunter.utils.schemas import File
+from chaos_hunter.utils.constants import PROJECT_ROOT
+from tests.benchmarks.bench_plan2workflow_converter import generate_plan
+
+
+WORKFLOW = """\
+apiVersion: chaos-mesh.org/v1alpha1
+kind: Workflow
+metadata:
+  name: wf
+spec:
+  entry: the-entry
+  templates:
+    - name: the-entry
+      templateType: Serial
+      deadline: 5m
+      children:
+        - pre-unittest-a
+        - fault-injection-phase
+    - name: pre-unittest-a
+      templateType: Task
+      deadline: 30s
+      task:
+        container:
+          name: a
+          image: test
+          args: ["python /chaos-hunter/a.py --duration 10"]
+    - name: fault-injection-phase
+      templateType: Parallel
+      deadline: 1m
+      children:
+        - fault-podchaos
+        - fault-unittest-b
+    - name: fault-podchaos
+      templateType: PodChaos
+      deadline: 20s
+      podChaos:
+        action: pod-kill
+    - name: fault-unittest-b
+      templateType: Task
+      deadline: 15s
+      task:
+        container:
+          name: b
+          image: test
+          args: ["python /chaos-hunter/b.py --duration 60"]
+"""
+
+class Clock:
+    def __init__(self) -> None:
+        self.time = 0.
+
+    def __call__(self) -> float:
+        return self.time
+
+def get_names(backend: FakeClusterBackend, kind: str) -> list:
+    return [item["metadata"]["name"] for item in backend.get(kind, "fake", "chaos-hunter")["items"]]
+
+def test_workflow_progression():
+    clock = Clock()
+    backend = FakeClusterBackend(FakeClusterConfig(pod_startup=1.), clock=clock)
+    with tempfile.TemporaryDirectory() as work_dir:
+        write_file(f"{work_dir}/workflow.yaml", WORKFLOW)
+        backend.apply(f"{work_dir}/workflow.yaml", "fake", "chaos-hunter", widget=False)
+        clock.time = 5.
+        pods = backend.get("pod", "fake", "chaos-hunter", selector="chaos-mesh.org/workflow=wf")["items"]
+        assert [pod["metadata"]["name"][:-6] for pod in pods] == ["pre-unittest-a"]
+        assert pods[0]["status"]["phase"] == "Running"
+        # pre-unittest-a terminates at 1 + 10 s, and then the fault-injection phase starts
+        clock.time = 12.
+        assert len(get_names(backend, "podchaos")) == 1
+        pod_a = backend.get("pod", "fake", "chaos-hunter", name=get_names(backend, "pod")[0])
+        assert pod_a["status"]["containerStatuses"][0]["state"]["terminated"]["exitCode"] == 0
+        # fault-unittest-b exceeds its deadline (15 s) and is killed, and the chaos ends at 20 s
+        clock.time = 11. + 16.
+        assert [name[:-6] for name in get_names(backend, "pod")] == ["pre-unittest-a"]
+        clock.time = 11. + 21.
+        assert get_names(backend, "podchaos") == []
+        nodes = {node["metadata"]["name"][:-6]: node for node in backend.get("workflownode", "fake", "chaos-hunter")["items"]}
+        conditions = {name: {c["type"]: c["status"] for c in node["status"]["conditions"]} for name, node in nodes.items()}
+        assert conditions["the-entry"]["Accomplished"] == "True"
+        assert conditions["fault-unittest-b"]["DeadlineExceed"] == "True"
+        assert conditions["pre-unittest-a"]["DeadlineExceed"] == "False"
+        # the workflow is deleted with its nodes and pods
+        backend.delete("fake", "chaos-hunter", path=f"{work_dir}/workflow.yaml", widget=False)
+        assert get_names(backend, "workflownode") == [] and get_names(backend, "pod") == []
+
+def test_pod_behaviors():
+    clock = Clock()
+    backend = FakeClusterBackend(FakeClusterConfig(pod_behaviors=[FakePodBehavior(pattern="bad-*", latency=5., exitcode=1, logs="error")]), clock=clock)
+    with tempfile.TemporaryDirectory() as work_dir:
+        write_file(f"{work_dir}/pod.yaml", "apiVersion: v1\nkind: Pod\nmetadata:\n  name: bad-pod\nspec:\n  containers:\n  - name: main\n    image: test\n")
+        backend.apply(f"{work_dir}/pod.yaml", "fake", "chaos-hunter", widget=False)
+    assert backend.get("pod", "fake", "chaos-hunter", name="bad-pod")["status"]["phase"] == "Pending"
+    assert backend.logs("bad-pod", "fake", "chaos-hunter").stdout == ""
+    clock.time = 6.
+    assert backend.get("pod", "fake", "chaos-hunter", name="bad-pod")["status"]["phase"] == "Failed"
+    assert backend.logs("bad-pod", "fake", "chaos-hunter").stdout == "error"
+    assert backend.get("pod", "fake", "chaos-hunter", name="missing") is None
+    assert backend.pvc_ready("pvc", "fake", "chaos-hunter")
+
+def test_deploy_and_cleanup():
+    clock = Clock()
+    backend = FakeClusterBackend(FakeClusterConfig(ready_latency=10.), clock=clock)
+    backend.deploy(f"{PROJECT_ROOT}/examples/sock-shop/skaffold.yaml", "fake", "chaos-hunter")
+    assert not backend.resources_ready("project=chaos-hunter")
+    clock.time = 10.
+    assert backend.resources_ready("project=chaos-hunter")
+    deployment = backend.get("deployment", "fake", "sock-shop", name="carts")
+    assert deployment["metadata"]["labels"]["project"] == "chaos-hunter"
+    with tempfile.TemporaryDirectory() as work_dir:
+        backend.get_dependency_graph("fake", "project=chaos-hunter", f"{work_dir}/dependency.dot", display_handler=None)
+        assert "carts selects Deployment carts" in open(f"{work_dir}/dependency.dot").read()
+    backend.delete("fake", kind="all", selector="project=chaos-hunter", all_namespaces=True, widget=False)
+    assert backend.get("all", "fake", selector="project=chaos-hunter")["items"] == []
+
+def test_experimenter_runs_on_fake_backend():
+    plan = generate_plan(2, phase_time=60)
+    backend = FakeClusterBackend(FakeClusterConfig(speedup=500., pod_behaviors=[FakePodBehavior(pattern="post-unittest-test1-*", exitcode=1)]))
+    previous = set_backend(backend)
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            workflow_name, workflow = Plan2WorkflowConverter().convert(plan, work_dir)
+            experimenter = Experimenter.__new__(Experimenter)
+            experimenter.namespace = "chaos-hunter"
+            result = experimenter.run(ChaosExperiment(plan=plan, workflow_name=workflow_name, workflow=workflow), kube_context="fake", check_interval=0.05)
+    finally:
+        set_backend(previous)
+    assert get_backend() is previous
+    assert len(result.pod_statuses) == 6
+    assert [task_name for task_name, status in result.pod_statuses.items() if status.exitcode != 0] == ["post-unittest-test1"]
+
+def test_run_pod_on_fake_backend():
+    backend = FakeClusterBackend(FakeClusterConfig(speedup=1000., pod_behaviors=[FakePodBehavior(pattern="check-*", logs="3 replicas are ready")]))
+    previous = set_backend(backend)
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            script = File(path=f"{work_dir}/check.py", content="print('ok')", fname="check.py")
+            inspection = Inspection(tool_type="k8s", duration="5s", script=script, result=None)
+            returncode, console_log = run_pod(inspection, work_dir, "fake", "chaos-hunter", use_cache=False)
+    finally:
+        set_backend(previous)
+    assert (returncode, console_log) == (0, "3 replicas are ready")
+    assert backend.get("pod", "fake", "chaos-hunter")["items"] == [] # deleted after the run
@@ -0,0 +1,23 @@
+from chaos_hunter.utils.k8s import is_subset
+
+
+def test_is_subset_ignores_defaulted_fields():
+    expected = {"replicas": 2, "template": {"spec": {"containers": [{"name": "app", "image": "nginx"}]}}}
+    actual = {"replicas": 2, "revisionHistoryLimit": 10, "template": {"spec": {"containers": [{"name": "app", "image": "nginx", "imagePullPolicy": "Always"}]}}}
+    assert is_subset(expected, actual)
+
+def test_is_subset_detects_modified_fields():
+    expected = {"replicas": 2, "ports": [80]}
+    assert not is_subset(expected, {"replicas": 1, "ports": [80]})
+    assert not is_subset(expected, {"replicas": 2, "ports": [80, 443]})
+    assert not is_subset(expected, {"ports": [80]})
+    assert is_subset({"port": 80}, {"port": "80"})
+
+def test_is_subset_normalizes_quantities():
+    assert is_subset({"cpu": 0.5}, {"cpu": "500m"})
+    assert is_subset({"memory": "1073741824"}, {"memory": "1Gi"})
+    assert is_subset({"memory": "1024Mi"}, {"memory": "1Gi"})
+    assert is_subset({"cpu": "1"}, {"cpu": "1000m"})
+    assert not is_subset({"cpu": "500m"}, {"cpu": "1"})
+    assert not is_subset({"memory": "1G"}, {"memory": "1Gi"})
+    assert not is_subset({"image": "nginx:1"}, {"image": "nginx:1.0"})
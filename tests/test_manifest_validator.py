@@ -0,0 +1,65 @@
+import yaml
+import kubernetes_validate
+
+from chaos_hunter.data_generation.manifest_validator import ManifestValidator, validate_manifest
+from chaos_hunter.utils.constants import K8S_VALIDATION_VERSION
+
+
+VALID_POD = """\
+apiVersion: v1
+kind: Pod
+metadata:
+  name: web
+spec:
+  containers:
+  - name: app
+    image: nginx
+"""
+
+INVALID_DEPLOYMENT = """\
+apiVersion: apps/v1
+kind: Deployment
+metadata:
+  name: api
+spec:
+  replicas: "two"
+  template:
+    spec:
+      containers:
+      - name: api
+        image: api
+"""
+
+def test_matches_kubernetes_validate():
+    for content in [VALID_POD, INVALID_DEPLOYMENT]:
+        try:
+            kubernetes_validate.validate(yaml.safe_load(content), K8S_VALIDATION_VERSION)
+            expected = True
+        except kubernetes_validate.ValidationError:
+            expected = False
+        assert validate_manifest(content).is_valid == expected
+
+def test_all_documents_are_validated():
+    # the invalid deployment is the second document, which yaml.safe_load would not read
+    result = validate_manifest(f"{VALID_POD}---\n{INVALID_DEPLOYMENT}---\n", fname="app.yaml")
+    assert result.num_docs == 2
+    assert not result.is_valid
+    paths = {error.path for error in result.errors}
+    assert "spec.replicas" in paths and "spec" in paths # wrong type and missing selector
+    assert all(error.kind == "Deployment" and error.name == "api" and error.doc_index == 1 for error in result.errors)
+    assert "app.yaml (Deployment/api) at `spec.replicas`" in result.to_str()
+
+def test_structured_errors():
+    assert validate_manifest("a: [b").errors[0].error_type == "yaml"
+    assert validate_manifest("- just\n- a list\n").errors[0].error_type == "format"
+    assert validate_manifest("apiVersion: example.com/v1\nkind: Widget\n").errors[0].error_type == "schema_not_found"
+
+def test_batch_with_process_pool():
+    validator = ManifestValidator(num_workers=2, pool_threshold=4)
+    manifests = [(f"m{i}.yaml", VALID_POD if i % 2 == 0 else INVALID_DEPLOYMENT) for i in range(8)]
+    try:
+        results = validator.validate_batch(manifests)
+    finally:
+        validator.close()
+    assert [result.fname for result in results] == [fname for fname, _ in manifests]
+    assert [result.is_valid for result in results] == [i % 2 == 0 for i in range(8)]
@@ -0,0 +1,92 @@
+import os
+import json
+
+from langchain_openai import ChatOpenAI
+
+from chaos_hunter.chaos_hunter import ChaosHunterOutput
+from chaos_hunter.utils.functions import save_json
+from chaos_hunter.utils.llms import LLMLog, TokenUsage, LoggingCallback, embed_messages
+from chaos_hunter.utils.message_store import MessageStore, split_segments, is_ref, use_message_store
+
+
+OVERVIEW = "".join(f"line {i}: the system consists of a frontend deployment and a redis service\n" for i in range(80))
+MANIFEST = "".join(f"  - name: container-{i}\n    image: nginx:1.{i}\n" for i in range(60))
+
+def make_prompt(i: int) -> str:
+    return f"# Step {i}\n{OVERVIEW}# Manifests\n{MANIFEST}# Instruction {i}\nPlease answer in JSON.\n"
+
+def test_split_segments_roundtrip():
+    text = make_prompt(0)
+    segments = split_segments(text)
+    assert "".join(segments) == text
+    assert len(segments) > 1
+
+def test_put_and_resolve():
+    store = MessageStore()
+    prompts = [make_prompt(i) for i in range(30)]
+    refs = [store.put(prompt) for prompt in prompts]
+    assert all(is_ref(ref) for ref in refs)
+    assert store.put(prompts[0]) == refs[0]
+    assert [store.resolve(ref) for ref in refs] == prompts
+    assert store.resolve_history([[refs[0]], refs[1], "raw message"]) == [[prompts[0]], prompts[1], "raw message"]
+    # the repeated overview and manifests are stored once
+    assert store.get_num_chars() * 10 < sum(len(prompt) for prompt in prompts)
+
+def test_flush_and_load(tmp_path):
+    store = MessageStore()
+    path = f"{tmp_path}/segments.jsonl.zst"
+    history1 = [[store.put(make_prompt(0))], store.put("response 0")]
+    history2 = [[store.put(make_prompt(1))], store.put("response 1")]
+    assert store.flush(path, [history1]) > 0
+    size = os.path.getsize(path)
+    # only the segments of the new prompt are appended
+    assert store.flush(path, [history1, history2]) > 0
+    assert store.flush(path, [history1, history2]) == 0
+    assert os.path.getsize(path) - size < size
+    loaded = MessageStore()
+    loaded.load(path)
+    assert loaded.resolve_history(history2) == [[make_prompt(1)], "response 1"]
+    assert len(json.dumps(history1)) * 8 < len(make_prompt(0))
+
+def make_log(store: MessageStore, name: str, messages: list) -> LLMLog:
+    return LLMLog(
+        name=name,
+        token_usage=TokenUsage(input_tokens=1, output_tokens=1, total_tokens=2),
+        message_history=[[store.put(messages[0])], store.put(messages[1])]
+    ).set_message_store(store)
+
+def test_store_is_scoped_to_the_cycle():
+    llm = ChatOpenAI(model_name="gpt-4o-2024-08-06", api_key="dummy")
+    store = MessageStore()
+    with use_message_store(store):
+        callback = LoggingCallback(name="in_cycle", llm=llm, streaming=False)
+        callback.on_llm_start({}, [make_prompt(0)])
+    assert callback.message_store is store and callback.log._message_store is store
+    assert store.resolve_history(callback.message_history) == [[make_prompt(0)]]
+    # outside of a cycle, the messages are not kept in the cycle's store
+    num_chars = store.get_num_chars()
+    outside = LoggingCallback(name="outside", llm=llm, streaming=False)
+    outside.on_llm_start({}, [make_prompt(1)])
+    assert outside.message_store is not store
+    assert outside.message_store.resolve_history(outside.message_history) == [[make_prompt(1)]]
+    assert store.get_num_chars() == num_chars
+
+def test_merge_and_embed_logs():
+    store1, store2 = MessageStore(), MessageStore()
+    log1 = make_log(store1, "a", [make_prompt(0), "response 0"])
+    log2 = make_log(store2, "b", [make_prompt(1), "response 1"])
+    merged = LLMLog.merge("merged", [log1, log2])
+    assert merged.token_usage.total_tokens == 4
+    assert merged.get_message_history() == [[make_prompt(0)], "response 0", [make_prompt(1)], "response 1"]
+    embedded = embed_messages([[log1], [log2]])
+    assert embedded[1][0].message_history == [[make_prompt(1)], "response 1"]
+    assert not any(is_ref(message) for message in embedded[0][0].message_history[0])
+
+def test_saved_output_is_readable_without_segments(tmp_path):
+    store = MessageStore()
+    ce_output = ChaosHunterOutput(logs={"hypothesis": [make_log(store, "a", [make_prompt(0), "response 0"])]})
+    save_json(f"{tmp_path}/output.json", ce_output.embed_messages())
+    loaded = ChaosHunterOutput.load(str(tmp_path))
+    assert loaded.logs["hypothesis"][0].get_message_history() == [[make_prompt(0)], "response 0"]
+    # the in-memory output keeps the references
+    assert is_ref(ce_output.logs["hypothesis"][0].message_history[1])
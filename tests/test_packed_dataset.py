@@ -0,0 +1,52 @@
+import os
+
+from chaos_hunter.data_generation.packed_dataset import PackedDataset, is_binary_array, INDEX_FNAME
+
+
+def legacy_is_binary(content: bytes) -> bool:
+    return b'\0' in content or any(byte > 127 for byte in content)
+
+def write(path: str, content: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+
+def make_dataset(dataset_dir: str, num_samples: int = 3) -> None:
+    for i in range(num_samples):
+        sample_dir = f"{dataset_dir}/sample{i}"
+        write(f"{sample_dir}/skaffold.yaml", b"apiVersion: skaffold/v3\n")
+        write(f"{sample_dir}/k8s/pod.yaml", f"kind: Pod\nname: pod{i}\n".encode())
+        write(f"{sample_dir}/k8s/image.png", b"\x89PNG\r\n\x1a\n\0\0")
+
+def test_is_binary_array_matches_legacy():
+    for content in [b"", b"plain text\n", b"\0", b"\x7f", b"\x80", "日本語".encode(), bytes(range(256))]:
+        assert is_binary_array(content) == legacy_is_binary(content)
+
+def test_build_and_iterate(tmp_path):
+    dataset_dir = str(tmp_path)
+    make_dataset(dataset_dir)
+    dataset = PackedDataset.open(dataset_dir)
+    assert len(dataset) == 3
+    samples = list(dataset.iter_samples("within 1 minute"))
+    suffix, input = samples[1]
+    assert suffix == "1"
+    assert input.skaffold_yaml.fname == "skaffold.yaml"
+    assert input.skaffold_yaml.work_dir == f"{dataset_dir}/sample1"
+    assert input.ce_instructions == "within 1 minute"
+    files = {file.fname: file.content for file in input.files}
+    assert files == {"k8s/image.png": b"\x89PNG\r\n\x1a\n\0\0", "k8s/pod.yaml": "kind: Pod\nname: pod1\n"}
+    # identical bodies are stored once
+    assert dataset.index.blob_size == len(b"apiVersion: skaffold/v3\n") + len(b"\x89PNG\r\n\x1a\n\0\0") + 3 * len(b"kind: Pod\nname: pod0\n")
+    dataset.close()
+
+def test_rebuild_when_samples_change(tmp_path):
+    dataset_dir = str(tmp_path)
+    make_dataset(dataset_dir, num_samples=2)
+    PackedDataset.open(dataset_dir).close()
+    mtime = os.path.getmtime(f"{dataset_dir}/{INDEX_FNAME}")
+    assert not PackedDataset.is_stale(dataset_dir)
+    make_dataset(dataset_dir, num_samples=3)
+    assert PackedDataset.is_stale(dataset_dir)
+    dataset = PackedDataset.open(dataset_dir)
+    assert len(dataset) == 3 and os.path.getmtime(f"{dataset_dir}/{INDEX_FNAME}") >= mtime
+    assert dataset.get_sample("2").files[1].content == "kind: Pod\nname: pod2\n"
@@ -0,0 +1,50 @@
+import time
+
+from chaos_hunter.utils.cache import PodResultCache
+from chaos_hunter.utils.schemas import File
+
+
+def test_pod_result_cache():
+    cache = PodResultCache(ttl=60.)
+    args = ("kind-chaos", "chaos-hunter", "k6", "5s", "export default function () {}")
+    cache.set_deployment("kind-chaos", [File(path="k8s/nginx.yaml", content="kind: Pod", fname="nginx.yaml")])
+    assert cache.get(*args) is None
+    cache.put(*args, returncode=0, console_log="ok")
+    assert cache.get(*args) == (0, "ok")
+    # the same deployment keeps the entry
+    cache.set_deployment("kind-chaos", [File(path="k8s/nginx.yaml", content="kind: Pod", fname="nginx.yaml")])
+    assert cache.get(*args) == (0, "ok")
+    # another script or duration misses
+    assert cache.get("kind-chaos", "chaos-hunter", "k6", "10s", args[-1]) is None
+    # a new deployment drops the entry
+    cache.set_deployment("kind-chaos", [File(path="k8s/nginx.yaml", content="kind: Deployment", fname="nginx.yaml")])
+    assert cache.get(*args) is None
+
+
+def test_pod_result_cache_ttl():
+    cache = PodResultCache(ttl=0.01)
+    args = ("kind-chaos", "chaos-hunter", "k8s", "5s", "print('hello')")
+    cache.set_deployment("kind-chaos", [File(path="k8s/nginx.yaml", content="kind: Pod", fname="nginx.yaml")])
+    cache.put(*args, returncode=0, console_log="ok")
+    time.sleep(0.02)
+    assert cache.get(*args) is None
+    cache.put(*args, returncode=0, console_log="ok")
+    cache.invalidate("kind-chaos")
+    assert cache.get(*args) is None
+    # a ttl of 0 disables the cache
+    cache.set_deployment("kind-chaos", [File(path="k8s/nginx.yaml", content="kind: Pod", fname="nginx.yaml")])
+    cache.set_ttl(0)
+    cache.put(*args, returncode=0, console_log="ok")
+    assert cache.get(*args) is None
+
+
+def test_only_successful_runs_against_known_deployments_are_cached():
+    cache = PodResultCache(ttl=60.)
+    args = ("kind-chaos", "chaos-hunter", "k8s", "5s", "print('hello')")
+    cache.put(*args, returncode=0, console_log="ok") # unknown deployment
+    assert cache.get(*args) is None
+    cache.set_deployment("kind-chaos", [File(path="k8s/nginx.yaml", content="kind: Pod", fname="nginx.yaml")])
+    cache.put(*args, returncode=1, console_log="failed") # transient failures are rerun
+    assert cache.get(*args) is None
+    cache.put(*args, returncode=0, console_log="ok")
+    assert cache.get(*args) == (0, "ok")
@@ -0,0 +1,82 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from chaos_hunter.utils.project_store import ProjectStore, replace_file
+
+
+def make_project(root: str) -> str:
+    project_dir = f"{root}/project"
+    replace_file(f"{project_dir}/k8s/deployment.yaml", "kind: Deployment\n")
+    replace_file(f"{project_dir}/k8s/service.yaml", "kind: Service\n")
+    replace_file(f"{project_dir}/src/main.py", "print('hello')\n")
+    os.chmod(f"{project_dir}/src/main.py", 0o755)
+    return project_dir
+
+def test_clone_links_blobs(tmp_path):
+    project_dir = make_project(str(tmp_path))
+    store = ProjectStore(f"{tmp_path}/store")
+    version = store.clone(project_dir, f"{tmp_path}/mod_0")
+    assert set(version.files) == {"k8s/deployment.yaml", "k8s/service.yaml", "src/main.py"}
+    blob_path = store.get_blob_path(version.files["k8s/service.yaml"])
+    assert os.path.samefile(f"{tmp_path}/mod_0/k8s/service.yaml", blob_path)
+    assert os.access(f"{tmp_path}/mod_0/src/main.py", os.X_OK)
+    # cloning the clone does not rehash its files
+    num_hashed = store.num_hashed
+    assert store.clone(f"{tmp_path}/mod_0", f"{tmp_path}/mod_1").version_id == version.version_id
+    assert store.num_hashed == num_hashed
+
+def test_replace_file_does_not_modify_blobs(tmp_path):
+    project_dir = make_project(str(tmp_path))
+    store = ProjectStore(f"{tmp_path}/store")
+    old = store.clone(project_dir, f"{tmp_path}/mod_0")
+    replace_file(f"{tmp_path}/mod_0/k8s/service.yaml", "kind: Service\nspec: {}\n")
+    os.remove(f"{tmp_path}/mod_0/k8s/deployment.yaml")
+    replace_file(f"{tmp_path}/mod_0/k8s/pdb.yaml", "kind: PodDisruptionBudget\n")
+    new = store.snapshot(f"{tmp_path}/mod_0")
+    assert store.read_blob(old.files["k8s/service.yaml"]) == b"kind: Service\n"
+    diff = store.diff(old, new)
+    assert (diff.added, diff.removed, diff.modified) == (["k8s/pdb.yaml"], ["k8s/deployment.yaml"], ["k8s/service.yaml"])
+
+def test_materialize_only_writes_changed_files(tmp_path):
+    project_dir = make_project(str(tmp_path))
+    store = ProjectStore(f"{tmp_path}/store")
+    old = store.clone(project_dir, f"{tmp_path}/mod_0")
+    replace_file(f"{tmp_path}/mod_0/k8s/service.yaml", "kind: Service\nspec: {}\n")
+    new = store.snapshot(f"{tmp_path}/mod_0")
+    # an existing tree of the old version is updated in place
+    store.materialize(old, f"{tmp_path}/mod_1")
+    inode = os.stat(f"{tmp_path}/mod_1/k8s/deployment.yaml").st_ino
+    diff = store.materialize(new, f"{tmp_path}/mod_1")
+    assert diff.modified == ["k8s/service.yaml"] and diff.added == [] and diff.removed == []
+    assert os.stat(f"{tmp_path}/mod_1/k8s/deployment.yaml").st_ino == inode
+    assert store.load_version(new.version_id).files == new.files
+    files = store.get_files(new, f"{tmp_path}/mod_1", ["k8s/service.yaml"])
+    assert files[0].content == "kind: Service\nspec: {}\n" and files[0].blob == new.files["k8s/service.yaml"]
+
+def test_copy_fallback_keeps_files_independent(tmp_path):
+    project_dir = make_project(str(tmp_path))
+    store = ProjectStore(f"{tmp_path}/store", link_mode="copy")
+    version = store.clone(project_dir, f"{tmp_path}/mod_0")
+    assert not os.path.samefile(f"{tmp_path}/mod_0/k8s/service.yaml", store.get_blob_path(version.files["k8s/service.yaml"]))
+
+def test_writable_files_do_not_share_blobs(tmp_path):
+    project_dir = make_project(str(tmp_path))
+    store = ProjectStore(f"{tmp_path}/store")
+    version = store.clone(project_dir, f"{tmp_path}/mod_0", writable=["k8s/service.yaml"])
+    assert not os.path.samefile(f"{tmp_path}/mod_0/k8s/service.yaml", store.get_blob_path(version.files["k8s/service.yaml"]))
+    assert os.path.samefile(f"{tmp_path}/mod_0/k8s/deployment.yaml", store.get_blob_path(version.files["k8s/deployment.yaml"]))
+    with open(f"{tmp_path}/mod_0/k8s/service.yaml", "a") as f:
+        f.write("spec: {}\n")
+    assert store.read_blob(version.files["k8s/service.yaml"]) == b"kind: Service\n"
+    # an unchanged file in an existing tree is unlinked from its blob as well
+    store.materialize(version, f"{tmp_path}/mod_0", writable=["k8s/deployment.yaml"])
+    assert not os.path.samefile(f"{tmp_path}/mod_0/k8s/deployment.yaml", store.get_blob_path(version.files["k8s/deployment.yaml"]))
+
+def test_replace_file_from_threads(tmp_path):
+    path = f"{tmp_path}/k8s/service.yaml"
+    contents = [f"kind: Service\nindex: {i}\n" * 100 for i in range(16)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda content: replace_file(path, content), contents))
+    with open(path, "r") as f:
+        assert f.read() in contents
+    assert os.listdir(f"{tmp_path}/k8s") == ["service.yaml"]
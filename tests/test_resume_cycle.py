@@ -0,0 +1,118 @@
+import os
+from unittest import mock
+
+import pytest
+
+import chaos_hunter.chaos_hunter as ch
+from chaos_hunter.chaos_hunter import ChaosHunter, ChaosHunterInput, ChaosHunterOutput
+from chaos_hunter.preprocessing.preprocessor import ProcessedData
+from chaos_hunter.preprocessing.llm_agents.k8s_app_assuption_agent import K8sAppAssumption
+from chaos_hunter.hypothesis.hypothesizer import Hypothesis
+from chaos_hunter.hypothesis.steady_states.steady_state_definer import SteadyStates
+from chaos_hunter.hypothesis.faults.llm_agents.fault_refinement_agent import FaultScenario
+from chaos_hunter.experiment.experimenter import ChaosExperiment, ChaosExperimentResult, Status
+from chaos_hunter.analysis.analyzer import Analysis
+from chaos_hunter.improvement.llm_agents.reconfiguration_agent import ReconfigurationResult
+from chaos_hunter.utils.schemas import File
+from chaos_hunter.utils.tracing import TRACE_FNAME, DISABLED_TRACER, get_tracer
+from chaos_hunter.backends.backend import get_backend, set_backend
+from chaos_hunter.backends.fake_cluster import FakeClusterBackend
+
+
+MOD_K8S_YAMLS = {"modified_k8s_yamls": [{"mod_type": "replace", "fname": "app/pod.yaml", "code": "apiVersion: apps/v1\nkind: Deployment\nmetadata:\n  name: pod"}]}
+
+
+class Stub:
+    """records its calls and optionally fails once (e.g., an LLM outage)"""
+    def __init__(self, calls, name, ret, fail_once=False):
+        self.calls, self.name, self.ret, self.fail_once = calls, name, ret, fail_once
+
+    def __call__(self, *args, **kwargs):
+        self.calls.append(self.name)
+        if self.fail_once:
+            self.fail_once = False
+            raise RuntimeError("LLM outage")
+        return self.ret() if callable(self.ret) else self.ret
+
+
+@pytest.fixture
+def fake_backend():
+    backend = get_backend()
+    set_backend(FakeClusterBackend())
+    yield
+    set_backend(backend)
+
+
+@pytest.fixture
+def patched_cluster_ops():
+    names = ["remove_all_resources_by_namespace", "remove_all_resources_by_labels", "remove_workflows_by_namespace", "Spinner", "StreamlitDisplayHandler"]
+    patches = [mock.patch.object(ch, name, mock.MagicMock()) for name in names]
+    patches.append(mock.patch.object(ch, "get_deployment_drift", mock.MagicMock(return_value=[])))
+    for patch in patches:
+        patch.start()
+    yield
+    for patch in patches:
+        patch.stop()
+
+
+def get_hunter(calls, proj, ce_input):
+    data = ProcessedData(
+        work_dir=proj,
+        input=ce_input,
+        k8s_yamls=[File(path=f"{proj}/app/pod.yaml", content="kind: Pod", work_dir=proj, fname="app/pod.yaml")],
+        k8s_summaries=["summary"],
+        k8s_weakness_summary="weakness",
+        k8s_app=K8sAppAssumption(thought="thought", k8s_application="app"),
+        ce_instructions=""
+    )
+    hypothesis = Hypothesis(steady_states=SteadyStates(), fault=FaultScenario(event="event", faults=[], description="description"))
+    experiment = ChaosExperiment(plan={}, workflow_name="wf", workflow=File(path="wf.yaml", content="", fname="wf.yaml"))
+    # the first experiment fails, and the one after the reconfiguration passes
+    exitcodes = iter([1, 0])
+    hunter = ChaosHunter.__new__(ChaosHunter)
+    hunter.llm = None
+    hunter.namespace = "chaos-hunter"
+    hunter.message_logger = mock.MagicMock()
+    hunter.preprocessor = mock.Mock(process=Stub(calls, "preprocess", ([], data)))
+    hunter.hypothesizer = mock.Mock(hypothesize=Stub(calls, "hypothesis", ([], hypothesis)))
+    hunter.experimenter = mock.Mock(
+        plan_experiment=Stub(calls, "plan", ([], experiment)),
+        run=Stub(calls, "run", lambda: ChaosExperimentResult(pod_statuses={"task": Status(exitcode=next(exitcodes), logs="")})),
+        replan_experiment=Stub(calls, "replan", ([], experiment))
+    )
+    hunter.analyzer = mock.Mock(analyze=Stub(calls, "analysis", ([], Analysis(report="report"))))
+    hunter.improver = mock.Mock(reconfigure=Stub(calls, "improve", ([], ReconfigurationResult(mod_k8s_yamls=MOD_K8S_YAMLS)), fail_once=True))
+    hunter.postprocessor = mock.Mock(process=Stub(calls, "summary", ([], "summary")))
+    return hunter
+
+
+def test_resume_skips_completed_phases(tmp_path, fake_backend, patched_cluster_ops):
+    proj = tmp_path / "proj"
+    (proj / "app").mkdir(parents=True)
+    (proj / "app" / "skaffold.yaml").write_text("skaffold")
+    (proj / "app" / "pod.yaml").write_text("kind: Pod")
+    ce_input = ChaosHunterInput(
+        skaffold_yaml=File(path=f"{proj}/app/skaffold.yaml", content="skaffold", work_dir=str(proj), fname="app/skaffold.yaml"),
+        files=[]
+    )
+    calls = []
+    hunter = get_hunter(calls, str(proj), ce_input)
+    work_dir = str(tmp_path / "cycle")
+    # the improvement phase is interrupted
+    with pytest.raises(RuntimeError):
+        hunter.run_ce_cycle(ce_input, "kind", work_dir=work_dir)
+    assert calls == ["preprocess", "hypothesis", "plan", "run", "analysis", "improve"]
+    # the trace of the failed cycle is saved, and its tracer is no longer current
+    assert os.path.isfile(f"{work_dir}/outputs/{TRACE_FNAME}")
+    assert get_tracer() is DISABLED_TRACER
+    assert any("Time sinks" in str(call) for call in hunter.message_logger.write.call_args_list)
+    interrupted = ChaosHunterOutput.load(f"{work_dir}/outputs")
+    assert interrupted.completed_phases == ["preprocess", "hypothesis", "experiment_plan", "experiment_0", "analysis_0"]
+
+    # the resumed cycle starts from the interrupted phase
+    calls.clear()
+    output = hunter.run_ce_cycle(ce_input, "kind", resume_from=work_dir)
+    assert calls == ["improve", "replan", "run", "summary"]
+    assert output.completed_phases[:5] == interrupted.completed_phases
+    assert output.ce_cycle.completes_reconfig
+    assert len(output.ce_cycle.result_history) == 2
@@ -0,0 +1,42 @@
+import os
+import time
+import tempfile
+
+from chaos_hunter.utils.llms import load_llm
+from chaos_hunter.utils.functions import save_json
+from chaos_hunter.utils.stub_llm_server import StubLLMServer
+from chaos_hunter.reviewing.review_runner import ReviewRunner, RateLimiter, get_review_path
+from chaos_hunter.reviewing.llm_agents.review_ce_cycle import Review
+from tests.benchmarks.bench_hot_paths import make_output
+
+
+def save_result(result_dir: str, completes_reconfig: bool = True) -> None:
+    os.makedirs(f"{result_dir}/outputs", exist_ok=True)
+    output = make_output(result_dir)
+    output.ce_cycle.completes_reconfig = completes_reconfig
+    save_json(f"{result_dir}/outputs/output.json", output)
+
+def test_concurrent_reviews_with_resume():
+    with tempfile.TemporaryDirectory() as work_dir, StubLLMServer(port=0) as server:
+        result_dirs = [f"{work_dir}/result0", f"{work_dir}/result1", f"{work_dir}/result2"]
+        save_result(result_dirs[0])
+        save_result(result_dirs[1])
+        save_result(result_dirs[2], completes_reconfig=False)
+        llms = {model_name: load_llm(model_name, port=server.port) for model_name in ["stub-a", "stub-b"]}
+        runner = ReviewRunner(llms, max_workers=4)
+        stats = runner.run(result_dirs, num_review_samples=2)
+        assert (stats.num_tasks, stats.num_done, stats.num_failed) == (12, 8, 0)
+        assert stats.skipped_cycles == [result_dirs[2]] and stats.throughput > 0
+        assert Review.parse_file(get_review_path(result_dirs[1], "stub-b", 1))
+        # only the missing reviews are run again
+        os.remove(get_review_path(result_dirs[0], "stub-a", 0))
+        stats = runner.run(result_dirs, num_review_samples=2)
+        assert (stats.num_done, stats.num_skipped) == (1, 7)
+        assert server.stats.completions == 9
+
+def test_rate_limiter():
+    rate_limiter = RateLimiter(requests_per_minute=600.) # 0.1 s interval
+    start = time.time()
+    for _ in range(4):
+        rate_limiter.acquire()
+    assert time.time() - start >= 0.3
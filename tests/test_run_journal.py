@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+from chaos_hunter.utils.journal import RunJournal, JournalCallback, load_journal, read_entries
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_journal_replay(tmp_path, compress):
+    state = {"work_dir": "sandbox", "run_time": {}, "ce_cycle": {"result_history": []}}
+    journal = RunJournal(str(tmp_path), get_state=lambda: state, compress=compress, checkpoint_interval=4)
+    callback = JournalCallback(journal)
+    callback.on_hypothesis_start()
+    journal.set("run_time.hypothesis", 1.5)
+    journal.set("ce_cycle.hypothesis", {"steady_states": ["a"]})
+    # the 4th entry triggers a checkpoint and truncates the journal
+    state["run_time"]["hypothesis"] = 1.5
+    state["ce_cycle"]["hypothesis"] = {"steady_states": ["a"]}
+    callback.on_hypothesis_end([])
+    assert read_entries(str(tmp_path)) == []
+    journal.append("ce_cycle.result_history", {"passed": False})
+    journal.append("ce_cycle.result_history", {"passed": True})
+    journal.close()
+    loaded = load_journal(str(tmp_path))
+    assert loaded["run_time"] == {"hypothesis": 1.5}
+    assert loaded["ce_cycle"]["result_history"] == [{"passed": False}, {"passed": True}]
+    # a reopened journal continues the sequence
+    journal = RunJournal(str(tmp_path), compress=compress)
+    journal.set("ce_cycle.summary", "done")
+    journal.close()
+    assert [entry["seq"] for entry in read_entries(str(tmp_path))] == [5, 6, 7]
+    assert load_journal(str(tmp_path))["ce_cycle"]["summary"] == "done"
+
+
+def test_journal_ignores_partial_line(tmp_path):
+    journal = RunJournal(str(tmp_path))
+    journal.set("run_time.preprocess", 3.0)
+    journal.close()
+    with open(os.path.join(tmp_path, "journal.jsonl"), "a") as f:
+        f.write('{"seq": 2, "op": "set", "path": "run_time.hypo')
+    journal = RunJournal(str(tmp_path))
+    journal.set("run_time.hypothesis", 4.0)
+    journal.close()
+    assert load_journal(str(tmp_path)) == {"run_time": {"preprocess": 3.0, "hypothesis": 4.0}}
+
+
+def test_compressed_journal_resumes_after_crash(tmp_path):
+    journal = RunJournal(str(tmp_path), compress=True)
+    journal.set("a", 1)
+    journal.set("b", 2)
+    journal.sync()
+    # a crash leaves the gzip stream without its trailer
+    path = os.path.join(tmp_path, "journal.jsonl.gz")
+    with open(path, "rb") as f:
+        synced = f.read()
+    journal.close()
+    with open(path, "wb") as f:
+        f.write(synced)
+    journal = RunJournal(str(tmp_path), compress=True)
+    journal.set("c", 3)
+    journal.close()
+    assert load_journal(str(tmp_path)) == {"a": 1, "b": 2, "c": 3}
+    assert [entry["seq"] for entry in read_entries(str(tmp_path))] == [1, 2, 3]
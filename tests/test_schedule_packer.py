@@ -0,0 +1,82 @@
+import yaml
+
+from chaos_hunter.experiment.algorithms.schedule_packer import SchedulePacker
+from chaos_hunter.experiment.algorithms.plan2workflow_converter import Plan2WorkflowConverter
+from chaos_hunter.experiment.algorithms.workflow_simulator import WorkflowSimulator
+from chaos_hunter.utils.functions import parse_time
+from tests.benchmarks.bench_plan2workflow_converter import generate_plan
+
+
+def make_task(name: str, grace_period: str, duration: str, deadline: str) -> dict:
+    return {
+        "workflow_name": name,
+        "grace_period": grace_period,
+        "duration": duration,
+        "deadline": deadline
+    }
+
+def get_tasks(plan: dict, phase_name: str) -> list:
+    phase = plan[phase_name]
+    return phase["unit_tests"] if phase_name != "fault_injection" else phase["unit_tests"] + phase["fault_injection"]
+
+def test_start_offsets_are_preserved():
+    tasks = [
+        make_task("pre-unittest-a", "0s", "30s", "5m30s"),
+        make_task("pre-unittest-b", "0s", "10s", "5m10s"),
+        make_task("pre-unittest-c", "6m", "30s", "5m30s"), # does not overlap with a and b
+        make_task("pre-unittest-d", "6m", "20s", "5m20s")
+    ]
+    schedule = SchedulePacker("pre_validation").pack(tasks)
+    assert schedule.template_type == "Parallel"
+    assert schedule.children == ["pre-unittest-a", "pre-unittest-b", "pre-validation-suspend-workflow"]
+    nodes = {node.name: node for node in schedule.nodes}
+    assert nodes["pre-validation-suspend"].deadline == 360
+    assert nodes["pre-validation-suspend-workflow"].children == ["pre-validation-suspend", "pre-validation-parallel-workflows"]
+    assert nodes["pre-validation-parallel-workflows"].children == ["pre-unittest-c", "pre-unittest-d"]
+    # makespan equals the latest task end (= critical path)
+    assert schedule.deadline == 360 + 330
+
+def test_budget_validation():
+    tasks = [
+        make_task("fault-podchaos", "30s", "1m", "1m"),
+        make_task("fault-unittest-a", "1m", "2m", "7m")
+    ]
+    schedule = SchedulePacker("fault_injection").pack(tasks, budget="2m")
+    assert [task.workflow_name for task in schedule.over_budget_tasks()] == ["fault-unittest-a"]
+    assert not schedule.fits_budget()
+    assert SchedulePacker("fault_injection").pack(tasks, budget="3m").fits_budget()
+
+def test_budget_violations_of_a_plan():
+    converter = Plan2WorkflowConverter()
+    plan = generate_plan(2, phase_time=60)
+    assert converter.get_budget_violations(plan) == {} # no time schedule, no budget
+    plan["time_schedule"] = {"pre_validation_time": "1s", "fault_injection_time": "10m", "post_validation_time": "10m"}
+    violations = converter.get_budget_violations(plan)
+    assert list(violations.keys()) == ["pre_validation"]
+    assert all(task.start + task.duration > 1 for task in violations["pre_validation"])
+
+def test_empty_phase():
+    schedule = SchedulePacker("post_validation").pack([])
+    assert schedule.deadline == 0
+    assert schedule.children == []
+
+def test_phase_deadlines_keep_a_margin():
+    plan = generate_plan(num_tasks=4, seed=0)
+    converter = Plan2WorkflowConverter()
+    _, workflow = converter.generate_workflow(plan, converter.generate_templates(plan))
+    templates = {template["name"]: template for template in yaml.safe_load(workflow)["spec"]["templates"]}
+    for phase_name in ["pre_validation", "fault_injection", "post_validation"]:
+        _, makespan, _, _ = converter.get_children(plan, phase_name)
+        phase = templates[f"{phase_name.replace('_', '-')}-phase"]
+        assert parse_time(phase["deadline"]) == makespan > SchedulePacker(phase_name).pack(get_tasks(plan, phase_name)).deadline
+    assert not WorkflowSimulator().simulate(workflow).has_overruns()
+
+def test_empty_phases_are_skipped():
+    plan = generate_plan(num_tasks=4, seed=0)
+    plan["post_validation"]["unit_tests"] = []
+    converter = Plan2WorkflowConverter()
+    _, workflow = converter.generate_workflow(plan, converter.generate_templates(plan))
+    templates = {template["name"]: template for template in yaml.safe_load(workflow)["spec"]["templates"]}
+    assert templates["the-entry"]["children"] == ["pre-validation-phase", "fault-injection-phase"]
+    assert "post-validation-phase" not in templates
+    assert all(template.get("deadline") not in ["0", 0] for template in templates.values())
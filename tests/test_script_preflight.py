@@ -0,0 +1,79 @@
+from chaos_hunter.hypothesis.steady_states.llm_agents.preflight import ScriptPreflight, get_runner_modules
+
+
+PYTHON_UNITTEST = """\
+import argparse
+import time
+from kubernetes import client
+from unittest_base import K8sAPIBase
+
+class TestPodCount(K8sAPIBase):
+    def test_pod_count(self, duration):
+        for _ in range(duration):
+            time.sleep(1)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--duration", type=int, default=5)
+    args = parser.parse_args()
+    TestPodCount().test_pod_count(args.duration)
+
+if __name__ == '__main__':
+    main()
+"""
+
+K6_SCRIPT = """\
+import http from 'k6/http';
+import { check, sleep } from 'k6';
+
+// the load test options
+export const options = {
+  vus: 2,
+  duration: '5s',
+  thresholds: {
+    'http_req_failed': ['rate<0.01'], /* no brackets ) here */
+  },
+};
+
+export default function () {
+  const res = http.get(`http://front-end.chaos-hunter.svc.cluster.local:80/${'{'}`);
+  check(res, { 'status is 200': (r) => r.status === 200 && /[}]/.test('}') });
+  sleep(1);
+}
+"""
+
+
+def test_runner_modules():
+    modules = get_runner_modules()
+    for module in ["kubernetes", "requests", "numpy", "pandas", "yaml"]:
+        assert module in modules
+
+
+def test_python_preflight():
+    preflight = ScriptPreflight()
+    assert preflight.check("unittest.py", PYTHON_UNITTEST, is_unittest=True).passed
+    result = preflight.check("unittest.py", PYTHON_UNITTEST.replace("K8sAPIBase)", ")").replace("import time", "import scipy"), is_unittest=True)
+    assert len(result.errors) == 2
+    assert "scipy" in result.errors[1]
+    result = preflight.check("inspection.py", PYTHON_UNITTEST.replace('"--duration"', '"--seconds"').replace("if __name__ == '__main__':\n    main()\n", ""))
+    assert len(result.errors) == 2
+    result = preflight.check("inspection.py", "def main(:\n    pass\n")
+    assert not result.passed and result.errors[0].startswith("SyntaxError at line 1")
+
+
+def test_k6_preflight():
+    preflight = ScriptPreflight()
+    assert preflight.check("inspection.js", K6_SCRIPT).passed
+    result = preflight.check("inspection.js", K6_SCRIPT.replace("  vus: 2,\n", "").replace("thresholds", "'tags'"))
+    assert result.errors == ["'vus' is missing in the options.", "'thresholds' is missing in the options."]
+    result = preflight.check("inspection.js", K6_SCRIPT.replace("sleep(1);\n}", "sleep(1);\n"))
+    assert not result.passed
+
+
+def test_k6_preflight_with_quoted_option_keys():
+    preflight = ScriptPreflight()
+    script = K6_SCRIPT.replace("  vus: 2,\n  duration: '5s',\n  thresholds: {", "  'vus': 2,\n  \"duration\": '5s',\n  \"thresholds\": {")
+    assert "'vus': 2" in script and '"thresholds": {' in script
+    assert preflight.check("inspection.js", script).passed
+    result = preflight.check("inspection.js", script.replace("'vus': 2,", "'v-u-s': 2,"))
+    assert result.errors == ["'vus' is missing in the options."]
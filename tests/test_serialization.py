@@ -0,0 +1,71 @@
+from typing import List, Dict, Optional, Literal
+
+import pytest
+
+from chaos_hunter.chaos_hunter import ChaosHunterOutput
+from chaos_hunter.utils.llms import LLMLog, TokenUsage
+from chaos_hunter.utils.wrappers import BaseModel
+from chaos_hunter.utils.serialization import dumps, loads, save, load_model, construct_model, to_primitive
+from chaos_hunter.utils.functions import recursive_to_dict
+
+
+class K8sTool(BaseModel):
+    duration: str
+    script: str
+
+class K6Tool(BaseModel):
+    vus: int
+    duration: str
+    script: str
+
+class Inspection(BaseModel):
+    tool_type: Literal["k8s", "k6"]
+    tool: K8sTool | K6Tool
+    thresholds: Dict[str, float] = {}
+    note: Optional[str] = None
+
+class Report(BaseModel):
+    inspections: List[Inspection]
+    history: List[List[Inspection]] = []
+    tags: tuple = ()
+
+def make_report() -> Report:
+    inspections = [
+        Inspection(tool_type="k8s", tool=K8sTool(duration="5s", script="print(1)"), thresholds={"ready": 1.}),
+        Inspection(tool_type="k6", tool=K6Tool(vus=2, duration="5s", script="export default function() {}"), note="é")
+    ]
+    return Report(inspections=inspections, history=[inspections], tags=("a", "b"))
+
+def test_dumps_matches_dict():
+    report = make_report()
+    assert loads(dumps(report)) == loads(dumps(report.dict()))
+    assert to_primitive(report) == loads(dumps(report))
+    assert recursive_to_dict(report)["inspections"] == report.dict()["inspections"]
+
+def test_construct_matches_validation():
+    data = loads(dumps(make_report()))
+    constructed = construct_model(Report, data)
+    assert constructed == Report.parse_obj(data)
+    assert isinstance(constructed.inspections[0].tool, K8sTool)
+    assert isinstance(constructed.history[0][1], Inspection)
+
+def test_load_chaos_hunter_output(tmp_path):
+    log = LLMLog(name="agent", token_usage=TokenUsage(input_tokens=1, output_tokens=2, total_tokens=3), message_history=[["prompt"], "response"])
+    output = ChaosHunterOutput(
+        work_dir="sandbox/cycle",
+        logs={"hypothesis": [log], "analysis": [[log, log]]},
+        run_time={"hypothesis": 1.5, "analysis": [2.0]},
+        completed_phases=["preprocess", "hypothesis"]
+    )
+    save(f"{tmp_path}/output.json", output)
+    trusted = load_model(ChaosHunterOutput, f"{tmp_path}/output.json")
+    assert trusted == load_model(ChaosHunterOutput, f"{tmp_path}/output.json", trusted=False) == output
+    assert isinstance(trusted.logs["analysis"][0][1], LLMLog)
+    assert trusted.ce_cycle.result_history == []
+
+def test_unknown_types_are_not_serialized():
+    class Opaque:
+        def __init__(self):
+            self.secret = "token"
+    with pytest.raises(TypeError):
+        dumps({"value": Opaque()})
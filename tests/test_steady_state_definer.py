@@ -0,0 +1,121 @@
+import threading
+
+import pytest
+
+from chaos_hunter.hypothesis.steady_states.steady_state_definer import SteadyStateDefiner
+from chaos_hunter.hypothesis.steady_states.llm_agents.utils import Inspection
+from chaos_hunter.utils.schemas import File
+from chaos_hunter.utils.llms import LLMLog, TokenUsage, LoggingCallback, LLMCallCancelled, load_llm, build_json_agent, cancellable
+from chaos_hunter.utils.streamlit import StreamlitUIQueue
+from chaos_hunter.utils.stub_llm_server import StubLLMServer, STUB_MODEL_NAME
+from tests.test_stub_llm_server import Thresholds
+
+
+def make_log(name: str) -> LLMLog:
+    return LLMLog(name=name, token_usage=TokenUsage(input_tokens=0, output_tokens=0, total_tokens=0), message_history=[])
+
+class FakeAgents:
+    """stands in for the LLM agents of SteadyStateDefiner and records the order of the calls"""
+    def __init__(self, num_required: int, fails_at: int = None) -> None:
+        self.num_required = num_required
+        self.fails_at = fails_at
+        self.calls = []
+        self.lock = threading.Lock()
+        self.check_started = threading.Event()
+        self.release_check = threading.Event()
+        self.release_check.set()
+
+    def record(self, call: str) -> None:
+        with self.lock:
+            self.calls.append(call)
+
+    def draft_steady_state(self, input_data, predefined_steady_states, prev_check_thought, display_container):
+        display_container.update_header(f"##### Steady state #{predefined_steady_states.count+1}", expanded=True)
+        self.record(f"draft{predefined_steady_states.count}")
+        return make_log(f"draft{predefined_steady_states.count}"), {"name": f"state{predefined_steady_states.count}", "thought": "", "manifest": "app.yaml"}
+
+    def inspect_current_state(self, steady_state_draft, predefined_steady_states, **kwargs):
+        self.record(f"inspect{predefined_steady_states.count}")
+        inspection = Inspection(tool_type="k8s", duration="5s", script=File(path="inspect.py", content=""), result="ok")
+        return make_log(f"inspect{predefined_steady_states.count}"), inspection
+
+    def define_threshold(self, predefined_steady_states, **kwargs):
+        self.record(f"threshold{predefined_steady_states.count}")
+        return make_log(f"threshold{predefined_steady_states.count}"), {"threshold": "1", "reason": ""}
+
+    def write_unittest(self, predefined_steady_states, **kwargs):
+        self.record(f"unittest{predefined_steady_states.count}")
+        if predefined_steady_states.count == self.fails_at:
+            self.check_started.wait(timeout=5)
+            raise AssertionError("MAX_RETRIES_EXCEEDED: the unit test failed")
+        return make_log(f"unittest{predefined_steady_states.count}"), File(path="unittest.py", content="")
+
+    def check_steady_state_completion(self, input_data, predefined_steady_states, ui_queue=None, container=None):
+        self.check_started.set()
+        self.release_check.wait(timeout=5)
+        self.record(f"check{predefined_steady_states.count}")
+        return make_log(f"check{predefined_steady_states.count}"), {"thought": "", "requires_addition": predefined_steady_states.count < self.num_required}
+
+def get_definer(agents: FakeAgents) -> SteadyStateDefiner:
+    definer = SteadyStateDefiner.__new__(SteadyStateDefiner)
+    definer.draft_agent = definer.inspection_agent = definer.threshold_agent = definer.unittest_agent = definer.completion_check_agent = agents
+    return definer
+
+def define(agents: FakeAgents, pipelined: bool, max_num_steady_states: int = 3) -> tuple:
+    return get_definer(agents).define_steady_states(None, "fake", "/tmp/chaos-hunter-test", max_num_steady_states=max_num_steady_states, pipelined=pipelined, use_library=False)
+
+def test_speculative_path_matches_sequential_one():
+    sequential_logs, sequential_steady_states = define(FakeAgents(num_required=2), pipelined=False)
+    agents = FakeAgents(num_required=2)
+    logs, steady_states = define(agents, pipelined=True)
+    # the logs and steady states are in the same order as the sequential definition
+    assert [log.name for log in logs] == [log.name for log in sequential_logs]
+    assert steady_states == sequential_steady_states and steady_states.count == 2
+    # the second steady state was drafted in the background (against the in-progress first one)
+    assert agents.calls.count("draft1") == 1 and agents.calls.index("check1") < agents.calls.index("draft1")
+
+def test_speculation_is_discarded_when_no_more_steady_states_are_needed():
+    agents = FakeAgents(num_required=1)
+    logs, steady_states = define(agents, pipelined=True)
+    assert steady_states.count == 1
+    assert [log.name for log in logs] == ["draft0", "inspect0", "threshold0", "unittest0", "check1"]
+    assert "draft1" not in agents.calls
+
+def test_speculation_is_cancelled_on_failure():
+    agents = FakeAgents(num_required=3, fails_at=0)
+    agents.release_check.clear() # the speculative completion check is still running when the unit test fails
+    with pytest.raises(AssertionError, match="MAX_RETRIES_EXCEEDED"):
+        define(agents, pipelined=True)
+    agents.release_check.set()
+    for thread in threading.enumerate():
+        if thread.name.startswith("ThreadPoolExecutor"):
+            thread.join(timeout=5)
+    assert agents.calls[-1] == "check1" and "draft1" not in agents.calls # no next draft after the failure
+
+def test_worker_updates_are_applied_when_the_script_thread_writes():
+    applied = []
+    class Container:
+        def write(self, text: str) -> None:
+            applied.append(text)
+    ui_queue = StreamlitUIQueue()
+    ui_queue.wrap(Container()).write("worker") # queued by a worker thread
+    assert applied == []
+    ui_queue.draining(Container()).write("script")
+    assert applied == ["worker", "script"]
+
+def test_discarded_llm_calls_are_stopped():
+    cancelled = threading.Event()
+    with StubLLMServer(port=0) as server:
+        llm = load_llm(STUB_MODEL_NAME, port=server.port)
+        agent = build_json_agent(llm, [("system", "Answer in JSON. {format_instructions}"), ("human", "{input}")], Thresholds)
+        with cancellable(cancelled):
+            callback = LoggingCallback("speculation", llm)
+        callback.on_llm_new_token("{")
+        cancelled.set()
+        # a running call stops at its next token, and a new call does not start
+        with pytest.raises(LLMCallCancelled):
+            callback.on_llm_new_token("}")
+        with pytest.raises(LLMCallCancelled):
+            for _ in agent.stream({"input": "hello"}, {"callbacks": [callback]}):
+                pass
+    assert server.stats.generated == 0
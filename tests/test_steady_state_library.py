@@ -0,0 +1,113 @@
+from chaos_hunter.hypothesis.steady_states.steady_state_library import SteadyStateLibrary, ManifestIndex
+from chaos_hunter.hypothesis.steady_states.llm_agents.preflight import ScriptPreflight
+from chaos_hunter.utils.schemas import File
+
+
+DEPLOYMENT_YAML = """\
+apiVersion: apps/v1
+kind: Deployment
+metadata:
+  name: front-end
+spec:
+  replicas: 2
+  selector:
+    matchLabels:
+      name: front-end
+  template:
+    metadata:
+      labels:
+        name: front-end
+    spec:
+      containers:
+      - name: front-end
+        image: weaveworksdemos/front-end:0.3.12
+"""
+
+SERVICE_YAML = """\
+apiVersion: v1
+kind: Service
+metadata:
+  name: front-end
+spec:
+  selector:
+    name: front-end
+  ports:
+  - port: 80
+    targetPort: 8079
+"""
+
+REDIS_YAML = """\
+apiVersion: apps/v1
+kind: StatefulSet
+metadata:
+  name: redis
+spec:
+  selector:
+    matchLabels:
+      app: redis
+  template:
+    metadata:
+      labels:
+        app: redis
+---
+apiVersion: v1
+kind: Service
+metadata:
+  name: redis
+spec:
+  selector:
+    app: redis
+  ports:
+  - name: redis
+    port: 6379
+"""
+
+def get_index() -> ManifestIndex:
+    return ManifestIndex([
+        File(path="sock-shop/front-end-dep.yaml", content=DEPLOYMENT_YAML, fname="sock-shop/front-end-dep.yaml"),
+        File(path="sock-shop/front-end-svc.yaml", content=SERVICE_YAML, fname="sock-shop/front-end-svc.yaml"),
+        File(path="redis/redis.yaml", content=REDIS_YAML, fname="redis/redis.yaml")
+    ])
+
+
+def test_match_templates():
+    library = SteadyStateLibrary()
+    index = get_index()
+    match = library.match({"name": "FrontEndReadyReplicas", "thought": "The number of ready pods of the front-end deployment.", "manifest": "front-end-dep.yaml", "category": "ready_pod_count"}, index)
+    assert match.template_name == "ready_pod_count"
+    assert match.params["label_selector"] == "name=front-end" and match.params["expected_replicas"] == 2
+    # the service is found from the deployment through its selector
+    match = library.match({"name": "FrontEndP95Latency", "thought": "The response time of the front-end.", "manifest": "front-end-dep.yaml", "category": "http_p95_latency"}, index)
+    assert match.template_name == "http_p95_latency"
+    assert match.params["url"] == "http://front-end.chaos-hunter.svc.cluster.local:80/"
+    match = library.match({"name": "FrontEndSuccessRate", "thought": "HTTP requests to the front-end succeed.", "manifest": "front-end-svc.yaml", "category": "http_success_rate"}, index)
+    assert match.template_name == "http_success_rate"
+    assert library.match({"name": "CartsDBDiskUsage", "thought": "Disk usage of the carts database.", "manifest": "carts-db.yaml", "category": "other"}, index) is None
+
+
+def test_unclassified_drafts_are_not_matched():
+    library = SteadyStateLibrary()
+    index = get_index()
+    # words like "pods" or "requests" do not route a draft to a template
+    draft = {"name": "RedisDataPersistence", "thought": "Data in redis persists when its pods restart and requests are retried.", "manifest": "redis.yaml"}
+    assert library.match(draft, index) is None
+    assert library.match({**draft, "category": "other"}, index) is None
+    # HTTP templates are not used for services that do not serve HTTP
+    assert library.match({**draft, "category": "http_success_rate"}, index) is None
+    assert library.match({**draft, "category": "ready_pod_count"}, index).params["resource_name"] == "redis"
+
+
+def test_rendered_templates_pass_preflight():
+    library = SteadyStateLibrary()
+    preflight = ScriptPreflight()
+    index = get_index()
+    for name, category, value in [("FrontEndReadyReplicas", "ready_pod_count", 2.), ("FrontEndP95Latency", "http_p95_latency", 12.3), ("FrontEndSuccessRate", "http_success_rate", 1.)]:
+        match = library.match({"name": name, "thought": "", "manifest": "front-end-dep.yaml", "category": category}, index)
+        template = library.get_template(match.template_name)
+        extension = ".py" if template.tool_type == "k8s" else ".js"
+        assert preflight.check(f"inspection{extension}", template.render_inspection(match.params)).passed
+        threshold, unittest_params = template.define_threshold(value, match.params)
+        result = preflight.check(f"unittest{extension}", template.render_unittest(unittest_params), is_unittest=True)
+        assert result.passed, result.errors
+    # not steady in the current state
+    assert library.get_template("ready_pod_count").define_threshold(0., match.params) is None
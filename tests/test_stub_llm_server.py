@@ -0,0 +1,81 @@
+import json
+import time
+import urllib.request
+import urllib.error
+from typing import List
+
+from chaos_hunter.utils.wrappers import LLMBaseModel, LLMField
+from chaos_hunter.utils.llms import load_llm, build_json_agent, LoggingCallback
+from chaos_hunter.utils.stub_llm_server import (
+    StubLLMServer,
+    StubLLMConfig,
+    StubRecordings,
+    STUB_MODEL_NAME,
+    generate_response,
+    tokenize
+)
+
+
+class Threshold(LLMBaseModel):
+    name: str = LLMField(description="name of the steady state")
+    value: float = LLMField(description="threshold value")
+
+class Thresholds(LLMBaseModel):
+    thoughts: str = LLMField(description="your thoughts")
+    thresholds: List[Threshold] = LLMField(description="thresholds of the steady states")
+    enabled: bool = LLMField(description="whether the thresholds are enabled")
+
+def run_agent(port: int, input: str = "hello") -> tuple:
+    llm = load_llm(STUB_MODEL_NAME, port=port)
+    agent = build_json_agent(llm, [("system", "Answer in JSON. {format_instructions}"), ("human", "{input}")], Thresholds)
+    callback = LoggingCallback("test", llm)
+    output = None
+    for output in agent.stream({"input": input}, {"callbacks": [callback]}):
+        pass
+    return output, callback
+
+def post(port: int, body: dict) -> tuple:
+    request = urllib.request.Request(f"http://127.0.0.1:{port}/v1/chat/completions", data=json.dumps(body).encode(), headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read()), response.headers
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read()), e.headers
+
+def test_json_agent_on_generated_responses():
+    with StubLLMServer(port=0) as server:
+        output, callback = run_agent(server.port)
+        output2, _ = run_agent(server.port)
+    assert Thresholds.parse_obj(output) and output == output2 # schema-valid and deterministic
+    assert len(output["thresholds"]) == 1 and isinstance(output["thresholds"][0]["value"], float)
+    assert callback.token_usage.input_tokens > 0 and callback.token_usage.output_tokens > 0
+    assert server.stats.generated == 2
+
+def test_replay_recorded_responses():
+    with StubLLMServer(port=0) as server:
+        _, callback = run_agent(server.port)
+    recorded = json.dumps({"thoughts": "recorded", "thresholds": [], "enabled": True})
+    message_history = callback.log.get_message_history()
+    recordings = StubRecordings()
+    recordings.add_message_history([message_history[0], f"```json\n{recorded}\n```"])
+    with StubLLMServer(recordings=recordings, port=0) as server:
+        output, _ = run_agent(server.port)
+        other_output, _ = run_agent(server.port, input="another prompt")
+    assert output["thoughts"] == "recorded" and other_output["thoughts"] != "recorded"
+    assert (server.stats.replayed, server.stats.generated) == (1, 1)
+
+def test_injected_failures_and_latency():
+    body = {"model": STUB_MODEL_NAME, "messages": [{"role": "user", "content": "hi"}], "max_tokens": 3}
+    with StubLLMServer(StubLLMConfig(rate_limit_rate=1., retry_after=2.), port=0) as server:
+        status, error, headers = post(server.port, body)
+    assert status == 429 and error["error"]["type"] == "rate_limit_error" and headers["Retry-After"] == "2"
+    with StubLLMServer(StubLLMConfig(time_to_first_token=0.2), port=0) as server:
+        start = time.time()
+        status, completion, _ = post(server.port, body)
+    assert status == 200 and time.time() - start >= 0.2
+    assert completion["choices"][0]["finish_reason"] == "length" and completion["usage"]["completion_tokens"] == 3
+
+def test_generate_and_tokenize():
+    response = generate_response("Human: hi")
+    assert response == generate_response("Human: hi") and response != generate_response("Human: hi", seed=0)
+    assert "".join(tokenize(response)) == response
@@ -0,0 +1,92 @@
+import json
+import time
+import tempfile
+import threading
+
+from chaos_hunter.utils.tracing import Tracer, DISABLED_TRACER, get_tracer, use_tracer, get_command_name
+from chaos_hunter.utils.callbacks import TracingCallback
+from chaos_hunter.utils.llms import LLMLog, TokenUsage
+from chaos_hunter.experiment.experimenter import TaskEvent
+
+
+def test_disabled_tracer_is_noop():
+    tracer = Tracer()
+    with tracer.span("cmd", "command") as span:
+        assert span is None
+    assert tracer.start_span("x", "phase") is None
+    assert tracer.spans == []
+
+def test_spans_nest():
+    tracer = Tracer()
+    tracer.start_trace()
+    with tracer.span("phase", "phase") as phase:
+        with tracer.span("kubectl apply", "command") as cmd:
+            pass
+        with tracer.span("wait", "sleep") as sleep:
+            time.sleep(0.01)
+    root = tracer.add_span("task", "task", start=phase.start, end=phase.end)
+    tracer.stop_trace()
+    assert phase.parent_id is None and root.parent_id is None
+    assert cmd.parent_id == phase.span_id and sleep.parent_id == phase.span_id
+    assert all(span.end is not None for span in tracer.spans)
+
+def test_summary_ranks_self_time():
+    tracer = Tracer()
+    tracer.start_trace()
+    parent = tracer.add_span("phase", "phase", start=0., end=10.)
+    tracer.add_span("llm", "llm", start=1., end=8., parent=parent)
+    tracer.add_span("llm", "llm", start=8., end=9., parent=parent)
+    summary = tracer.summarize()
+    assert summary.wall_time == 10.
+    assert [(row.name, row.count, row.self_time) for row in summary.rows] == [("llm", 2, 8.), ("phase", 1, 2.)]
+    assert "llm" in summary.to_str()
+
+def test_chrome_trace():
+    tracer = Tracer()
+    tracer.start_trace()
+    with tracer.span("kubectl apply", "command", returncode=0):
+        pass
+    tracer.stop_trace()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tracer.save_chrome_trace(f"{tmp_dir}/trace.json")
+        with open(f"{tmp_dir}/trace.json") as f:
+            events = json.load(f)["traceEvents"]
+    assert len(events) == 1
+    assert events[0]["ph"] == "X" and events[0]["cat"] == "command" and events[0]["ts"] == 0.
+    assert events[0]["args"]["returncode"] == 0
+
+def test_tracing_callback():
+    tracer = Tracer()
+    tracer.start_trace()
+    callback = TracingCallback(tracer)
+    log = LLMLog(name="agent", token_usage=TokenUsage(input_tokens=10, output_tokens=5, total_tokens=15), message_history=[])
+    callback.on_hypothesis_start()
+    callback.on_hypothesis_end([log, [log]])
+    callback.on_experiment_start()
+    callback.on_experiment_task_event(TaskEvent(task_name="fault", pod_name="p", event_type="started", timestamp=1.))
+    callback.on_experiment_task_event(TaskEvent(task_name="fault", pod_name="p", event_type="terminated", timestamp=3., exitcode=0))
+    callback.on_experiment_end()
+    hypothesis, experiment, task = tracer.spans
+    assert hypothesis.attributes == {"num_llm_calls": 2, "input_tokens": 20, "output_tokens": 10}
+    assert task.parent_id == experiment.span_id and task.duration == 2.
+
+def test_command_name():
+    assert get_command_name("stdbuf -oL kubectl apply -f x.yaml") == "kubectl apply"
+
+def test_tracers_are_scoped_to_their_context():
+    assert get_tracer() is DISABLED_TRACER
+    tracers = [Tracer(), Tracer()]
+    def run_cycle(tracer: Tracer, name: str) -> None:
+        tracer.start_trace()
+        with use_tracer(tracer):
+            with get_tracer().span(name, "phase"):
+                time.sleep(0.01)
+        tracer.stop_trace()
+    threads = [threading.Thread(target=run_cycle, args=(tracer, f"cycle{i}")) for i, tracer in enumerate(tracers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # starting a trace does not wipe the spans of another cycle
+    assert [[span.name for span in tracer.spans] for tracer in tracers] == [["cycle0"], ["cycle1"]]
+    assert get_tracer() is DISABLED_TRACER and DISABLED_TRACER.spans == []
@@ -0,0 +1,136 @@
+import tempfile
+
+import pytest
+
+from chaos_hunter.experiment.algorithms.workflow_simulator import WorkflowSimulator
+from chaos_hunter.experiment.algorithms.plan2workflow_converter import Plan2WorkflowConverter
+from chaos_hunter.experiment.llm_agents.experiment_plan_agent import ChaosExperimentPlan
+from chaos_hunter.experiment.experimenter import Experimenter
+from chaos_hunter.utils.llms import LLMLog, TokenUsage
+from chaos_hunter.utils.functions import parse_time
+from tests.benchmarks.bench_plan2workflow_converter import generate_plan
+
+
+WORKFLOW = """\
+apiVersion: chaos-mesh.org/v1alpha1
+kind: Workflow
+metadata:
+  name: chaos-experiment-test
+spec:
+  entry: the-entry
+  templates:
+    - name: the-entry
+      templateType: Serial
+      deadline: {total_time}
+      children:
+        - fault-injection-phase
+    - name: fault-injection-phase
+      templateType: Parallel
+      deadline: {phase_time}
+      children:
+        - fault-unittest-a
+        - fault-suspend-workflow
+    - name: fault-suspend-workflow
+      templateType: Serial
+      deadline: 2m
+      children:
+        - fault-suspend
+        - fault-podchaos
+    - name: fault-suspend
+      templateType: Suspend
+      deadline: 30s
+    - name: fault-podchaos
+      templateType: PodChaos
+      deadline: 90s
+      podChaos:
+        action: pod-kill
+    - name: fault-unittest-a
+      templateType: Task
+      deadline: 6m
+      task:
+        container:
+          name: fault-unittest-a-container
+          command: ["/bin/bash", "-c"]
+          args: ["python /chaos-hunter/unittest_a.py --duration 60"]
+"""
+
+def test_timeline_and_critical_path():
+    timeline = WorkflowSimulator().simulate(WORKFLOW.format(total_time="10m", phase_time="6m"))
+    entries = {entry.name: entry for entry in timeline.entries}
+    assert (entries["fault-unittest-a"].start, entries["fault-unittest-a"].end) == (0, 60)
+    assert (entries["fault-podchaos"].start, entries["fault-podchaos"].end) == (30, 120)
+    assert timeline.makespan == 120
+    assert timeline.critical_path == ["fault-suspend", "fault-podchaos"]
+    assert timeline.is_valid()
+    assert "fault-podchaos" in timeline.to_ascii_gantt()
+
+def test_overrun_and_budget():
+    timeline = WorkflowSimulator().simulate(
+        WORKFLOW.format(total_time="10m", phase_time="100s"),
+        budgets={"fault-injection-phase": "50s"}
+    )
+    overruns = [violation.task for violation in timeline.violations if violation.kind == "overrun"]
+    budgets = [violation.task for violation in timeline.violations if violation.kind == "budget"]
+    assert overruns == ["fault-podchaos"]
+    assert sorted(budgets) == ["fault-podchaos", "fault-unittest-a"]
+    assert timeline.has_overruns()
+    tasks = {task["name"]: task for task in timeline.to_json_gantt()["tasks"]}
+    assert tasks["fault-podchaos"]["cut_by"] == "fault-injection-phase"
+    assert tasks["fault-podchaos"]["end"] == 100
+
+class FakePlanAgent:
+    def __init__(self, plans: list) -> None:
+        self.plans = plans
+        self.feedbacks = []
+
+    def plan(self, data, hypothesis, feedback=None) -> tuple:
+        self.feedbacks.append(feedback)
+        log = LLMLog(name="experiment_plan", token_usage=TokenUsage(input_tokens=0, output_tokens=0, total_tokens=0), message_history=[])
+        return log, ChaosExperimentPlan(**{"time_schedule": {}, "summary": "", **self.plans.pop(0)})
+
+def get_experimenter(plans: list) -> Experimenter:
+    experimenter = Experimenter.__new__(Experimenter)
+    experimenter.experiment_plan_agent = FakePlanAgent(plans)
+    experimenter.plan2workflow_converter = Plan2WorkflowConverter()
+    experimenter.workflow_simulator = WorkflowSimulator()
+    return experimenter
+
+def get_short_plan() -> dict:
+    plan = generate_plan(2, phase_time=60)
+    plan["time_schedule"] = {"total_time": "30s", "pre_validation_time": "10s", "fault_injection_time": "10s", "post_validation_time": "10s"}
+    return plan
+
+def test_short_time_schedule_is_sent_back_to_the_plan_agent():
+    experimenter = get_experimenter([get_short_plan(), generate_plan(2, phase_time=60)])
+    with tempfile.TemporaryDirectory() as work_dir:
+        _, experiment = experimenter.plan_experiment(None, None, work_dir, max_retries=2)
+    feedbacks = experimenter.experiment_plan_agent.feedbacks
+    assert feedbacks[0] is None and "exceeds its time budget (10s)" in feedbacks[1]
+    assert experiment.plan["time_schedule"] == {} # the revised plan, not a stretched one
+
+def test_short_time_schedule_fails_without_retries():
+    experimenter = get_experimenter([get_short_plan()])
+    with tempfile.TemporaryDirectory() as work_dir:
+        with pytest.raises(AssertionError, match="exceeds its time budget"):
+            experimenter.plan_experiment(None, None, work_dir, max_retries=0)
+
+def test_short_time_schedule_is_extended_when_opted_in():
+    experimenter = get_experimenter([get_short_plan()])
+    with tempfile.TemporaryDirectory() as work_dir:
+        _, experiment = experimenter.plan_experiment(None, None, work_dir, max_retries=0, extend_time_schedule=True)
+    assert experimenter.experiment_plan_agent.feedbacks == [None] # a single plan (max_retries=0) without LLM replanning
+    time_schedule = experiment.plan["time_schedule"]
+    assert all(parse_time(time_schedule[f"{phase}_time"]) > 10 for phase in ["pre_validation", "fault_injection", "post_validation"])
+    assert WorkflowSimulator().simulate(experiment.workflow.content, {"fault-injection-phase": time_schedule["fault_injection_time"]}).is_valid()
+
+def test_invalid_plans_fail_after_retries():
+    plans = []
+    for _ in range(2):
+        plan = generate_plan(2, phase_time=60)
+        plan["pre_validation"]["unit_tests"][0]["deadline"] = "1s" # stops the test before its duration
+        plans.append(plan)
+    experimenter = get_experimenter(plans)
+    with tempfile.TemporaryDirectory() as work_dir:
+        with pytest.raises(AssertionError, match="WORKFLOW_DEADLINE_EXCEEDED"):
+            experimenter.plan_experiment(None, None, work_dir, max_retries=2)
+    assert len(experimenter.experiment_plan_agent.feedbacks) == 2 and experimenter.experiment_plan_agent.feedbacks[1] is not None